@@ -0,0 +1,150 @@
+"""Load test the aggregation service with many units uploading at once."""
+
+import asyncio
+import os
+import random
+import socket
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+import aiohttp
+import uvicorn
+
+
+def make_unit_db(path: str, unit: int, records: int = 500, aps: int = 200) -> None:
+    """Write a synthetic unit database with health records and AP fixes."""
+    rng = random.Random(unit)
+    with sqlite3.connect(path) as db:
+        db.execute(
+            """CREATE TABLE health_records (timestamp TEXT PRIMARY KEY,
+            cpu_temp REAL, cpu_percent REAL, memory_percent REAL, disk_percent REAL)"""
+        )
+        db.execute("CREATE TABLE ap_cache (bssid TEXT, lat REAL, lon REAL)")
+        db.executemany(
+            "INSERT INTO health_records VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    f"{unit}-{n}",
+                    rng.uniform(35, 75),
+                    rng.uniform(0, 100),
+                    rng.uniform(0, 100),
+                    rng.uniform(0, 100),
+                )
+                for n in range(records)
+            ],
+        )
+        lat, lon = 40 + rng.random(), -75 + rng.random()
+        db.executemany(
+            "INSERT INTO ap_cache VALUES (?, ?, ?)",
+            [
+                (
+                    f"{unit:04x}{n:08x}",
+                    lat + rng.gauss(0, 0.01),
+                    lon + rng.gauss(0, 0.01),
+                )
+                for n in range(aps)
+            ],
+        )
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+async def _run_clients(url: str, paths: list[str]) -> None:
+    acks: list[float] = []
+    rejected = 0
+
+    async def upload(session: aiohttp.ClientSession, path: str) -> None:
+        nonlocal rejected
+        while True:
+            form = aiohttp.FormData()
+            with open(path, "rb") as fh:
+                form.add_field("file", fh.read(), filename=os.path.basename(path))
+            start = time.perf_counter()
+            async with session.post(f"{url}/upload", data=form) as resp:
+                await resp.read()
+                if resp.status == 503:
+                    rejected += 1
+                    await asyncio.sleep(0.1)
+                    continue
+                resp.raise_for_status()
+            acks.append(time.perf_counter() - start)
+            return
+
+    async with aiohttp.ClientSession() as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(upload(session, p) for p in paths))
+        sent = time.perf_counter() - start
+        while True:
+            async with session.get(f"{url}/ingest") as resp:
+                data = await resp.json()
+            if (
+                data["queued"] == 0
+                and data["merged"] + data["failed"] == data["accepted"]
+            ):
+                break
+            await asyncio.sleep(0.05)
+        drained = time.perf_counter() - start
+
+        latency: dict[str, list[float]] = {"stats": [], "overlay": []}
+        for _ in range(20):
+            for name in latency:
+                t0 = time.perf_counter()
+                async with session.get(f"{url}/{name}") as resp:
+                    await resp.read()
+                latency[name].append(time.perf_counter() - t0)
+
+    print(f"{len(paths)} units uploaded in {sent:.2f}s, merged in {drained:.2f}s")
+    print(
+        f"ack latency p50 {_percentile(acks, 0.5) * 1000:.1f} ms, "
+        f"p95 {_percentile(acks, 0.95) * 1000:.1f} ms, {rejected} retries"
+    )
+    print(f"merge avg {data['merge_avg_ms']:.1f} ms, failed {data['failed']}")
+    for name, values in latency.items():
+        print(f"/{name} median {statistics.median(values) * 1000:.2f} ms")
+
+
+def bench(units: int = 200, rounds: int = 2) -> None:
+    """Upload ``units`` synthetic databases concurrently and time the service.
+
+    Every unit uploads its database ``rounds`` times, as repeated syncs do;
+    the stored point count should not grow after the first round.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["PW_AGG_DIR"] = os.path.join(tmp, "agg")
+        from piwardrive import aggregation_service as service
+
+        paths = []
+        for unit in range(units):
+            path = os.path.join(tmp, f"unit{unit}.db")
+            make_unit_db(path, unit)
+            paths.append(path)
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        server = uvicorn.Server(
+            uvicorn.Config(service.app, port=port, log_level="warning")
+        )
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.05)
+        try:
+            for _ in range(rounds):
+                asyncio.run(_run_clients(f"http://127.0.0.1:{port}", paths))
+                with sqlite3.connect(service.DB_PATH) as db:
+                    stored = db.execute("SELECT COUNT(*) FROM ap_points").fetchone()
+                print(f"ap_points rows: {stored[0]}")
+        finally:
+            server.should_exit = True
+            thread.join()
+
+
+if __name__ == "__main__":
+    bench()
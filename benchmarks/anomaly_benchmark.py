@@ -0,0 +1,89 @@
+"""Measure health anomaly scoring throughput and event loop stalls on retrain."""
+
+import asyncio
+import random
+import time
+
+from piwardrive.analytics.anomaly import HealthAnomalyDetector
+from piwardrive.core.persistence import HealthRecord
+from piwardrive.cpu_pool import shutdown_cpu_pool
+
+
+def make_records(count: int, seed: int = 0) -> list:
+    """Return a synthetic stream of health records with a few outliers."""
+    rng = random.Random(seed)
+    records = []
+    for n in range(count):
+        temp, cpu = rng.gauss(48, 3), rng.gauss(25, 8)
+        if rng.random() < 0.01:
+            temp, cpu = rng.uniform(80, 95), rng.uniform(90, 100)
+        records.append(HealthRecord(f"t{n}", temp, cpu, 30.0, 40.0))
+    return records
+
+
+async def _max_loop_lag(work) -> tuple[float, float]:
+    """Run ``work`` while ticking the loop; return (elapsed, worst lag) in s."""
+    lag = 0.0
+    done = False
+
+    async def ticker() -> None:
+        nonlocal lag
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lag = max(lag, time.perf_counter() - start - 0.001)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)  # let the ticker start waiting
+    start = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - start
+    done = True
+    await task
+    return elapsed, lag
+
+
+async def _bench(train: int, stream: int) -> None:
+    history = make_records(train)
+    detector = HealthAnomalyDetector()
+
+    async def inline() -> None:
+        detector.fit(history)
+
+    async def off_loop() -> None:
+        await detector.retrain(history)
+
+    await detector.retrain(history[:100])  # start the pool outside the timing
+    for name, work in (("fit on loop", inline), ("retrain in pool", off_loop)):
+        elapsed, lag = await _max_loop_lag(work)
+        print(
+            f"{name:18} {elapsed * 1000:8.1f} ms, "
+            f"worst loop stall {lag * 1000:8.1f} ms"
+        )
+
+    records = make_records(stream, seed=1)
+    start = time.perf_counter()
+    for rec in records:
+        detector.predict([rec])
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(0, len(records), detector.batch_size):
+        detector.predict(records[i : i + detector.batch_size])
+    batched = time.perf_counter() - start
+    print(f"per-record predict {stream / single:10,.0f} records/s")
+    print(
+        f"batch of {detector.batch_size:<3}       {stream / batched:10,.0f} records/s"
+    )
+
+
+def bench(train: int = 20000, stream: int = 2000) -> None:
+    """Print retrain stalls and per-record vs micro-batched scoring rates."""
+    try:
+        asyncio.run(_bench(train, stream))
+    finally:
+        shutdown_cpu_pool()
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,68 @@
+"""Compare whole-set DBSCAN with chunked and incremental geo-clustering."""
+
+import copy
+import time
+import tracemalloc
+
+import numpy as np
+from sklearn.cluster import DBSCAN
+
+from piwardrive.analytics.clustering import EARTH_RADIUS_M, GeoClusterer
+
+
+def make_points(count: int, seed: int = 0) -> np.ndarray:
+    """Return ``count`` city-like positions: dense hotspots over a sparse drive."""
+    rng = np.random.default_rng(seed)
+    lo, hi = np.array([40.0, -75.0]), np.array([40.3, -74.7])
+    hotspots = rng.uniform(lo, hi, (count // 500, 2))
+    dense = hotspots[rng.integers(len(hotspots), size=count // 2)]
+    dense = dense + rng.normal(0, 0.0004, dense.shape)
+    sparse = rng.uniform(lo, hi, (count - len(dense), 2))
+    return np.vstack((dense, sparse))
+
+
+def _measure(label: str, prepare) -> None:
+    """Time one call made by ``prepare()``, then trace the memory of another.
+
+    Tracing slows allocation-heavy code, so the two are measured separately.
+    """
+    func = prepare()
+    start = time.perf_counter()
+    labels = func()
+    elapsed = time.perf_counter() - start
+    func = prepare()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    clusters = len(set(labels.tolist()) - {-1})
+    print(
+        f"{label:24} {elapsed:7.2f} s  peak {peak / 2**20:8.1f} MiB  "
+        f"{clusters} clusters"
+    )
+
+
+def bench(count: int = 1_000_000, eps_m: float = 50.0, batch: int = 10_000) -> None:
+    """Print time and traced peak memory of each clustering strategy."""
+    pts = make_points(count)
+    dbscan = DBSCAN(
+        eps=eps_m / EARTH_RADIUS_M,
+        min_samples=5,
+        metric="haversine",
+        algorithm="ball_tree",
+    )
+    _measure("sklearn DBSCAN", lambda: lambda: dbscan.fit_predict(np.radians(pts)))
+    clusterer = GeoClusterer(eps_m, 5)
+    _measure("GeoClusterer.fit", lambda: lambda: clusterer.fit(pts[:, 0], pts[:, 1]))
+
+    extra = make_points(batch, seed=1)
+
+    def prepare_update():
+        fitted = copy.deepcopy(clusterer)
+        return lambda: fitted.update(extra[:, 0], extra[:, 1])
+
+    _measure(f"update with {batch:,} pts", prepare_update)
+
+
+if __name__ == "__main__":
+    bench()
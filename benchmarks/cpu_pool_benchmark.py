@@ -0,0 +1,71 @@
+"""Compare pickled and shared-memory argument passing to the CPU pool."""
+
+import asyncio
+import time
+
+import numpy as np
+
+from piwardrive.cpu_pool import (
+    run_cpu_bound,
+    run_cpu_bound_shared,
+    shutdown_cpu_pool,
+    warm_cpu_pool,
+)
+
+
+def haversine_columns(cols, lat0: float = 40.0, lon0: float = -75.0):
+    """Return the distance in metres of every row of ``cols`` to a point."""
+    lat = np.radians(np.asarray(cols["lat"], dtype=float))
+    lon = np.radians(np.asarray(cols["lon"], dtype=float))
+    dlat = lat - np.radians(lat0)
+    dlon = lon - np.radians(lon0)
+    a = (
+        np.sin(dlat / 2) ** 2
+        + np.cos(lat) * np.cos(np.radians(lat0)) * np.sin(dlon / 2) ** 2
+    )
+    return 6371000.0 * 2 * np.arcsin(np.sqrt(a))
+
+
+def make_columns(rows: int, seed: int = 0) -> dict:
+    """Return ``rows`` random coordinates around the reference point."""
+    rng = np.random.default_rng(seed)
+    return {
+        "lat": 40.0 + rng.normal(0, 0.05, rows),
+        "lon": -75.0 + rng.normal(0, 0.05, rows),
+    }
+
+
+async def _time(label: str, call, repeat: int) -> None:
+    await call()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await call()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:22} {elapsed * 1000:8.1f} ms/call")
+
+
+async def _bench(rows: int, repeat: int) -> None:
+    cols = make_columns(rows)
+    lists = {k: v.tolist() for k, v in cols.items()}
+    await _time("lists (pickled)", lambda: run_cpu_bound(haversine_columns, lists), 3)
+    await _time(
+        "arrays (pickled)", lambda: run_cpu_bound(haversine_columns, cols), repeat
+    )
+    await _time(
+        "arrays (shared)",
+        lambda: run_cpu_bound_shared(haversine_columns, cols),
+        repeat,
+    )
+
+
+def bench(rows: int = 1_000_000, repeat: int = 10) -> None:
+    """Print the per-call latency of each way of passing ``rows`` points."""
+    warm_cpu_pool()
+    try:
+        asyncio.run(_bench(rows, repeat))
+    finally:
+        shutdown_cpu_pool()
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,71 @@
+"""Measure db_monitor overhead and memory on a long stream of queries."""
+
+import random
+import time
+import tracemalloc
+
+from piwardrive.services import db_monitor
+
+TEMPLATES = [
+    "SELECT * FROM wifi_detections WHERE bssid = '{mac}' AND rssi > {rssi}",
+    "SELECT COUNT(*) FROM wifi_detections WHERE channel IN ({chans})",
+    "INSERT INTO health_records (timestamp, cpu_temp) VALUES ({ts}, {temp})",
+    "UPDATE access_points SET last_seen = {ts} WHERE bssid = '{mac}'",
+]
+
+
+def make_queries(count: int, seed: int = 0):
+    """Return ``count`` statements with inlined literals of varying shape."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        template = rng.choice(TEMPLATES)
+        queries.append(
+            template.format(
+                mac=":".join(f"{rng.randrange(256):02x}" for _ in range(6)),
+                rssi=-rng.randrange(30, 90),
+                chans=", ".join(
+                    str(rng.randrange(1, 14)) for _ in range(rng.randrange(1, 6))
+                ),
+                ts=rng.randrange(1_700_000_000, 1_800_000_000),
+                temp=round(rng.uniform(30, 80), 1),
+            )
+        )
+    return queries
+
+
+def _replay(queries, durations) -> float:
+    db_monitor.reset_query_metrics()
+    db_monitor.fingerprint.cache_clear()
+    start = time.perf_counter()
+    for sql, duration in zip(queries, durations):
+        db_monitor.record_query(sql, duration, explain=False)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    queries = make_queries(200_000)
+    rng = random.Random(1)
+    durations = [rng.lognormvariate(-7, 1.2) for _ in queries]
+
+    elapsed = _replay(queries, durations)
+    # tracing slows the replay, so memory is measured on a second run
+    tracemalloc.start()
+    _replay(queries, durations)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{len(queries):,} queries, {len(db_monitor.get_query_metrics())} fingerprints"
+    )
+    print(f"record_query {elapsed / len(queries) * 1e6:.1f} us/call")
+    print(f"peak traced memory {peak / 2**20:.2f} MiB")
+    for entry in db_monitor.top_queries(limit=4):
+        print(
+            f"  {entry['total']:7.3f} s  p50 {entry['p50'] * 1e3:6.3f} ms  "
+            f"p99 {entry['p99'] * 1e3:6.3f} ms  {entry['fingerprint'][:60]}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Time dashboard-style CPU temperature forecasts with and without state."""
+
+import math
+import random
+import time
+
+from piwardrive.analytics.forecasting import (
+    ForecastService,
+    fit_holt,
+    forecast_cpu_temp,
+    forecaster,
+)
+from piwardrive.core.persistence import HealthRecord
+
+
+def make_records(count: int, seed: int = 0) -> list:
+    """Return ``count`` records with a daily cycle and noise."""
+    rng = random.Random(seed)
+    return [
+        HealthRecord(
+            f"{n:08d}",
+            50 + 5 * math.sin(n / 720 * math.pi) + rng.gauss(0, 0.5),
+            20.0,
+            30.0,
+            40.0,
+        )
+        for n in range(count)
+    ]
+
+
+def bench(history: int = 20000, refreshes: int = 200) -> None:
+    """Print per-refresh cost of a full refit and of the incremental path."""
+    records = make_records(history + refreshes)
+    temps = [r.cpu_temp for r in records]
+
+    start = time.perf_counter()
+    for n in range(10):
+        fit_holt(temps[: history + n]).predict(12)
+    refit = (time.perf_counter() - start) / 10
+
+    forecaster.reset()
+    forecast_cpu_temp(records[:history], 12, series="cpu_temp")
+    start = time.perf_counter()
+    for n in range(refreshes):
+        forecast_cpu_temp(records[: history + n + 1], 12, series="cpu_temp")
+    incremental = (time.perf_counter() - start) / refreshes
+
+    service = ForecastService()
+    service.sync("t", [(r.timestamp, r.cpu_temp) for r in records[:history]])
+    start = time.perf_counter()
+    for n, r in enumerate(records[history:]):
+        service.observe("t", r.cpu_temp, r.timestamp)
+        service.forecast("t", 12)
+    observe = (time.perf_counter() - start) / refreshes
+
+    print(f"history {history} samples")
+    print(f"full refit per refresh        {refit * 1000:9.2f} ms")
+    print(f"forecast_cpu_temp (sync)      {incremental * 1000:9.2f} ms")
+    print(f"observe + forecast            {observe * 1000:9.3f} ms")
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,82 @@
+"""Time puts into a full 100k-entry IntelligentCache per strategy.
+
+The former implementation, which scanned its metadata for each victim and
+pickled every value to report its size, is inlined for comparison.
+"""
+
+import pickle
+import time
+from datetime import datetime
+
+import numpy as np
+
+from piwardrive.local_cache import CacheStrategy, IntelligentCache
+
+ENTRIES = 100_000
+
+
+class ScanningCache:
+    """LRU eviction by ``min()`` over access times, as before."""
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.cache = {}
+        self.access_times = {}
+
+    def put(self, key, value):
+        if key not in self.cache and len(self.cache) >= self.max_size:
+            oldest = min(self.access_times, key=self.access_times.__getitem__)
+            del self.cache[oldest], self.access_times[oldest]
+        self.cache[key] = value
+        self.access_times[key] = datetime.now()
+
+    def memory_usage(self):
+        return sum(len(k) + len(pickle.dumps(v)) for k, v in self.cache.items())
+
+
+def _rate(label: str, count: int, func) -> None:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:34} {elapsed / count * 1e6:10.2f} us/op")
+
+
+def main() -> None:
+    value = {"bssid": "aa:bb:cc:dd:ee:ff", "rssi": -60, "channel": 6}
+    old = ScanningCache(ENTRIES)
+    for i in range(ENTRIES):
+        old.put(f"ap:{i}", value)
+    _rate(
+        "scanning LRU put at capacity",
+        200,
+        lambda: [old.put(f"new:{i}", value) for i in range(200)],
+    )
+    _rate("scanning memory_usage()", 1, old.memory_usage)
+
+    rng = np.random.default_rng(0)
+    trace = [f"ap:{k}" for k in rng.zipf(1.1, 400_000) % (4 * ENTRIES)]
+    for strategy in CacheStrategy:
+        cache = IntelligentCache(ENTRIES, strategy)
+        for i in range(ENTRIES):
+            cache.put(f"fill:{i}", value)
+        _rate(
+            f"{strategy.value} put at capacity",
+            ENTRIES,
+            lambda: [cache.put(f"new:{i}", value) for i in range(ENTRIES)],
+        )
+        cache.clear()
+
+        def replay():
+            for key in trace:
+                if cache.get(key) is None:
+                    cache.put(key, value)
+
+        _rate(f"{strategy.value} get/put on zipf trace", len(trace), replay)
+        stats = cache.get_stats()
+        print(
+            f"{'':34} hit rate {stats['hit_rate']:.3f}  {stats['memory_usage'] / 2**20:.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
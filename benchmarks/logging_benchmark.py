@@ -0,0 +1,69 @@
+"""Benchmark structured logging throughput."""
+
+import argparse
+import logging
+import threading
+import time
+
+from piwardrive.logging.structured_logger import LogQueue, StructuredFormatter
+
+
+class _CountingHandler(logging.Handler):
+    """Format records and discard the output."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.format(record)
+
+
+def _run(logger: logging.Logger, count: int, threads: int) -> float:
+    def worker() -> None:
+        for i in range(count):
+            logger.info("scan %d complete", i, extra={"extra": {"aps": i}})
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return time.perf_counter() - start
+
+
+def main(count: int = 20000, threads: int = 4, policy: str = "drop") -> None:
+    """Log ``count`` records from each of ``threads`` threads."""
+    target = _CountingHandler()
+    target.setFormatter(StructuredFormatter())
+    total = count * threads
+
+    direct = logging.getLogger("bench.direct")
+    direct.propagate = False
+    direct.setLevel(logging.INFO)
+    direct.addHandler(target)
+    duration = _run(direct, count, threads)
+    print(f"synchronous: {total / duration:,.0f} records/s")
+
+    lq = LogQueue(maxsize=10000, policy=policy)
+    lq.start()
+    queued = logging.getLogger("bench.queued")
+    queued.propagate = False
+    queued.setLevel(logging.INFO)
+    queued.addHandler(lq.handler([target]))
+    duration = _run(queued, count, threads)
+    print(f"queued ({policy}) caller side: {total / duration:,.0f} records/s")
+    start = time.perf_counter()
+    lq.stop()
+    drained = duration + time.perf_counter() - start
+    stats = lq.stats()
+    print(
+        f"queued ({policy}) end to end: {stats['emitted'] / drained:,.0f} records/s "
+        f"(emitted={stats['emitted']} dropped={stats['dropped']})"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--policy", choices=LogQueue.POLICIES, default="drop")
+    args = parser.parse_args()
+    main(args.count, args.threads, args.policy)
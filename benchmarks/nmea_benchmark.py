@@ -0,0 +1,103 @@
+"""Benchmark NMEA log parsing on a synthetic multi-hour recording."""
+
+import math
+import os
+import tempfile
+import time
+from functools import reduce
+
+from piwardrive.hardware import nmea
+
+
+def _sentence(body: str) -> str:
+    checksum = reduce(lambda acc, ch: acc ^ ord(ch), body, 0)
+    return f"${body}*{checksum:02X}\r\n"
+
+
+def _coord(value: float, width: int) -> str:
+    degrees = int(abs(value))
+    minutes = (abs(value) - degrees) * 60
+    return f"{degrees:0{width}d}{minutes:07.4f}"
+
+
+def generate_log(path: str, hours: float = 3.0, rate: int = 10) -> int:
+    """Write ``hours`` of ``rate`` Hz GGA/RMC/GSA/GSV output to ``path``."""
+    epochs = int(hours * 3600 * rate)
+    with open(path, "w", encoding="ascii") as fh:
+        for i in range(epochs):
+            t = i / rate
+            hh, rem = divmod(int(t) % 86400, 3600)
+            mm, ss = divmod(rem, 60)
+            utc = f"{hh:02d}{mm:02d}{ss:02d}.{int(t * 100) % 100:02d}"
+            lat = 48.1173 + 0.01 * math.sin(t / 600)
+            lon = 11.5167 + 0.01 * math.cos(t / 600)
+            la, lo = _coord(lat, 2), _coord(lon, 3)
+            fh.write(
+                _sentence(f"GPGGA,{utc},{la},N,{lo},E,1,08,0.9,545.4,M,46.9,M,,")
+                + _sentence(f"GPRMC,{utc},A,{la},N,{lo},E,022.4,084.4,230394,,")
+                + _sentence("GPGSA,A,3,04,05,,09,12,,,24,,,,,2.5,1.3,2.1")
+            )
+            if i % rate == 0:
+                fh.write(
+                    _sentence("GPGSV,2,1,08,01,40,083,46,02,17,308,41,12,07,344,39")
+                )
+    return epochs
+
+
+def legacy_parse(path: str) -> int:
+    """Parse ``path`` line by line the way the GPS manager used to."""
+    from piwardrive.hardware.enhanced_hardware import EnhancedGPSManager
+
+    manager = EnhancedGPSManager()
+    count = 0
+    with open(path, "rb") as fh:
+        for raw in fh:
+            line = raw.decode("ascii", errors="ignore").strip()
+            if line.startswith("$GPGGA"):
+                if manager._parse_gga_sentence(line):
+                    count += 1
+            elif line.startswith("$GPRMC"):
+                manager._parse_rmc_sentence(line)
+    return count
+
+
+def bench(hours: float = 3.0) -> None:
+    """Compare the streaming parser with the legacy per-sentence parser."""
+    fd, path = tempfile.mkstemp(suffix=".nmea")
+    os.close(fd)
+    try:
+        epochs = generate_log(path, hours)
+        size = os.path.getsize(path) / 1e6
+        print(f"{hours:.1f}h log: {epochs} epochs, {size:.1f} MB")
+
+        start = time.perf_counter()
+        count = legacy_parse(path)
+        duration = time.perf_counter() - start
+        print(
+            f"legacy:     {count} fixes in {duration:.2f}s ({size / duration:.1f} MB/s)"
+        )
+
+        for validate in (True, False):
+            start = time.perf_counter()
+            count = sum(1 for _ in nmea.iter_fixes(path, validate=validate))
+            duration = time.perf_counter() - start
+            label = "stream:" if validate else "no-check:"
+            print(
+                f"{label:<11} {count} fixes in {duration:.2f}s "
+                f"({size / duration:.1f} MB/s)"
+            )
+
+        if nmea.np is not None:
+            start = time.perf_counter()
+            arrays = nmea.parse_log(path)
+            duration = time.perf_counter() - start
+            print(
+                f"parse_log:  {len(arrays['latitude'])} fixes in {duration:.2f}s "
+                f"({size / duration:.1f} MB/s)"
+            )
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    bench()
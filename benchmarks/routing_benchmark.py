@@ -0,0 +1,98 @@
+"""Compare dict-based A* with CSR routing on a 100k-node road grid."""
+
+import heapq
+import math
+import time
+
+import numpy as np
+
+from piwardrive.navigation.routing import RoutingGraph
+
+
+def make_network(size: int, seed: int = 0):
+    """Return ``(ids, edges, coords)`` of a ``size`` x ``size`` street grid.
+
+    Edge weights are the block length times a random slowdown, so the
+    straight-line distance stays a valid lower bound.
+    """
+    rng = np.random.default_rng(seed)
+    ids = list(range(size * size))
+    coords = np.array(
+        [(c * 50.0, r * 50.0, 0.0) for r in range(size) for c in ids[:size]]
+    )
+    edges = []
+    for r in range(size):
+        for c in range(size):
+            node = r * size + c
+            for other in (node + 1 if c + 1 < size else None, node + size):
+                if other is not None and other < size * size:
+                    slow = rng.uniform(1.0, 2.5, 2)
+                    edges.append((node, other, 50.0 * slow[0]))
+                    edges.append((other, node, 50.0 * slow[1]))
+    return ids, edges, coords
+
+
+def dict_a_star(graph, coords, start, end):
+    """The former ``Pathfinder._a_star`` over a dict of adjacency lists."""
+
+    def heuristic(a, b):
+        return math.dist(coords[a], coords[b])
+
+    open_set = [(0, start)]
+    came_from = {}
+    g_score = {start: 0}
+    while open_set:
+        current = heapq.heappop(open_set)[1]
+        if current == end:
+            return g_score[end]
+        for neighbor, weight in graph[current]:
+            tentative = g_score[current] + weight
+            if neighbor not in g_score or tentative < g_score[neighbor]:
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative
+                f = tentative + heuristic(neighbor, end)
+                heapq.heappush(open_set, (f, neighbor))
+    return None
+
+
+def main() -> None:
+    size = 320
+    ids, edges, coords = make_network(size)
+    adjacency = {node: [] for node in ids}
+    for a, b, weight in edges:
+        adjacency[a].append((b, weight))
+    coord_tuples = [tuple(c) for c in coords]
+    rng = np.random.default_rng(1)
+    queries = rng.integers(len(ids), size=(20, 2)).tolist()
+    print(f"{len(ids):,} nodes, {len(edges):,} edges, {len(queries)} queries")
+
+    start = time.perf_counter()
+    expected = [dict_a_star(adjacency, coord_tuples, s, t) for s, t in queries]
+    print(
+        f"{'dict A* (euclidean)':28} {(time.perf_counter() - start) / len(queries) * 1e3:8.1f} ms/query"
+    )
+
+    start = time.perf_counter()
+    graph = RoutingGraph.from_edges(ids, edges, coords)
+    print(f"{'compile CSR':28} {(time.perf_counter() - start) * 1e3:8.1f} ms")
+
+    for landmarks in (0, 8, 16):
+        start = time.perf_counter()
+        graph.build_landmarks(landmarks)
+        prep = time.perf_counter() - start
+        start = time.perf_counter()
+        costs = [graph.shortest_path(s, t)[0] for s, t in queries]
+        per_query = (time.perf_counter() - start) / len(queries)
+        assert np.allclose(costs, expected)
+        label = f"CSR A* ({landmarks} landmarks)" if landmarks else "CSR A* (euclidean)"
+        print(f"{label:28} {per_query * 1e3:8.1f} ms/query  prep {prep:5.2f} s")
+
+    sources = rng.integers(len(ids), size=50)
+    targets = rng.integers(len(ids), size=200)
+    start = time.perf_counter()
+    graph.many_to_many(sources, targets)
+    print(f"{'many-to-many 50 x 200':28} {(time.perf_counter() - start) * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
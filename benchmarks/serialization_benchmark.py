@@ -0,0 +1,67 @@
+"""Benchmark encode/decode throughput of the serialization codecs on AP lists."""
+
+import json
+import random
+import time
+
+from piwardrive import fastjson, serialization
+
+
+def make_aps(count: int = 5000) -> list[dict]:
+    """Return ``count`` access point records shaped like ``ap_cache`` rows."""
+    rng = random.Random(1)
+    return [
+        {
+            "bssid": ":".join(f"{rng.randrange(256):02x}" for _ in range(6)),
+            "ssid": f"net-{rng.randrange(10000)}",
+            "encryption": rng.choice(["WPA2", "WPA3", "OPEN", "WEP"]),
+            "channel": rng.choice([1, 6, 11, 36, 44, 149]),
+            "signal_dbm": rng.randint(-95, -30),
+            "lat": 40.0 + rng.random(),
+            "lon": -75.0 + rng.random(),
+            "last_time": 1_700_000_000 + rng.randrange(86400),
+        }
+        for _ in range(count)
+    ]
+
+
+def _time(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(count: int = 5000, repeat: int = 20) -> None:
+    """Print MB/s and records/s for each codec and the legacy str paths."""
+    payload = {"seq": 1, "aps": make_aps(count)}
+    cases = {
+        "stdlib json (str)": (
+            lambda: json.dumps(payload).encode(),
+            json.loads,
+        ),
+        "fastjson.dumps (str)": (
+            lambda: fastjson.dumps(payload).encode(),
+            fastjson.loads,
+        ),
+    }
+    for name in serialization.available_codecs():
+        codec = serialization.get_codec(name)
+        cases[f"codec {name}"] = (lambda c=codec: c.dumps(payload), codec.loads)
+
+    print(f"{count} APs per payload, best of {repeat}")
+    for label, (dumps, loads) in cases.items():
+        data = dumps()
+        enc = _time(dumps, repeat)
+        dec = _time(lambda: loads(data), repeat)
+        print(
+            f"{label:<22} {len(data) / 1e3:8.1f} kB  "
+            f"encode {len(data) / enc / 1e6:7.1f} MB/s {count / enc / 1e3:7.0f}k rec/s  "
+            f"decode {len(data) / dec / 1e6:7.1f} MB/s {count / dec / 1e3:7.0f}k rec/s"
+        )
+
+
+if __name__ == "__main__":
+    bench()
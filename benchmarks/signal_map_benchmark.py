@@ -0,0 +1,73 @@
+"""Compare the per-point IDW loop with tiled grid interpolation."""
+
+import math
+import time
+import tracemalloc
+
+import numpy as np
+
+from piwardrive.direction_finding.interpolation import SpatialInterpolator, grid_axes
+
+BOUNDS = (40.0, -74.0, 40.02, -73.98)
+
+
+def make_samples(count: int, seed: int = 0):
+    """Return ``count`` noisy samples of a log-distance field around an AP."""
+    rng = np.random.default_rng(seed)
+    lats = 40.0 + rng.random(count) * 0.02
+    lons = -74.0 + rng.random(count) * 0.02
+    dist = np.hypot((lats - 40.01) * 111e3, (lons + 73.99) * 85e3) + 1.0
+    values = -40.0 - 25.0 * np.log10(dist) + rng.normal(0, 2, count)
+    return lats, lons, values
+
+
+def scalar_idw(lats, lons, values, lat, lon, power=2.0):
+    """The former ``SignalMapper`` estimate: one haversine per sample."""
+    num = den = 0.0
+    for s_lat, s_lon, value in zip(lats, lons, values):
+        d_lat = math.radians(lat - s_lat)
+        d_lon = math.radians(lon - s_lon)
+        a = (
+            math.sin(d_lat / 2) ** 2
+            + math.cos(math.radians(s_lat))
+            * math.cos(math.radians(lat))
+            * math.sin(d_lon / 2) ** 2
+        )
+        dist = 6371000 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+        if dist < 1e-6:
+            return value
+        weight = 1.0 / dist**power
+        num += weight * value
+        den += weight
+    return num / den
+
+
+def main() -> None:
+    lats, lons, values = make_samples(2000)
+    lat_axis, lon_axis = grid_axes(BOUNDS, 5.0)
+    cells = len(lat_axis) * len(lon_axis)
+    print(f"{len(values)} samples, {cells:,} grid cells at 5 m")
+
+    sample = 2000
+    start = time.perf_counter()
+    for lat, lon in zip(lat_axis[:sample], np.resize(lon_axis, sample)):
+        scalar_idw(lats, lons, values, lat, lon)
+    per_cell = (time.perf_counter() - start) / sample
+    print(f"{'scalar IDW (projected)':28} {per_cell * cells:8.1f} s")
+
+    for method in ("idw", "kriging", "spline"):
+        interp = SpatialInterpolator(lats, lons, values, method=method)
+        start = time.perf_counter()
+        for _ in interp.grid(BOUNDS, 5.0, tile_size=256):
+            pass
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        for _ in interp.grid(BOUNDS, 5.0, tile_size=256):
+            pass
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{'tiled ' + method:28} {elapsed:8.1f} s  peak {peak / 2**20:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compare per-network and batch threat scoring on a synthetic scan."""
+
+import random
+import tempfile
+import time
+
+from piwardrive.ml.threat_detection import (
+    AnomalyDetector,
+    OfflineThreatDetector,
+    RiskScorer,
+    ScanFeatures,
+)
+
+
+def make_scan(count: int = 5000, seed: int = 1) -> list[dict]:
+    """Return ``count`` network dicts shaped like scanner output."""
+    rng = random.Random(seed)
+    ssids = [f"net-{n}" for n in range(count // 4)] + ["", "Free WiFi", "guest"]
+    return [
+        {
+            "bssid": ":".join(f"{rng.randrange(256):02x}" for _ in range(6)),
+            "ssid": rng.choice(ssids),
+            "signal_strength": rng.randint(-95, -25),
+            "encryption": rng.choice(["WPA2", "WPA3", "WPA2/WPA3", "Open", "WEP"]),
+            "channel": rng.choice([1, 6, 11, 36, 44, 149]),
+            "vendor": rng.choice(["Cisco", "Ubiquiti", "Unknown"]),
+            "wps_enabled": rng.random() < 0.1,
+        }
+        for _ in range(count)
+    ]
+
+
+def _time(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(count: int = 5000, repeat: int = 5) -> None:
+    """Print networks/s for the scalar and batch scoring paths."""
+    scan = make_scan(count)
+    scorer = RiskScorer()
+    anomaly = AnomalyDetector()
+    anomaly.train(make_scan(2000, seed=2))
+    with tempfile.TemporaryDirectory() as tmp:
+        detector = OfflineThreatDetector(tmp)
+        detector.anomaly_detector = anomaly
+        cases = {
+            "scalar risk": lambda: [scorer.calculate_network_risk(n) for n in scan],
+            "batch risk": lambda: scorer.score_batch(scan),
+            "batch risk + materialize": lambda: list(scorer.score_batch(scan)),
+            "encode features": lambda: ScanFeatures(scan),
+            "anomaly detection": lambda: anomaly.detect_anomalies(scan),
+            "scalar threat rules": lambda: [
+                detector._detect_specific_threats(n, scan) for n in scan[:500]
+            ],
+            "batch threat rules": lambda: detector._detect_threats_batch(
+                ScanFeatures(scan), None
+            ),
+            "analyze_scan_data": lambda: detector.analyze_scan_data(scan),
+            "analyze_scan_data (High+)": lambda: detector.analyze_scan_data(
+                scan, min_risk_level="High"
+            ),
+        }
+        for name, func in cases.items():
+            elapsed = _time(func, repeat)
+            n = 500 if name == "scalar threat rules" else count
+            print(
+                f"{name:28} {n / elapsed:12,.0f} networks/s  {elapsed * 1000:8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    bench()
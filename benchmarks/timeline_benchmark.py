@@ -0,0 +1,81 @@
+"""Compare sort-on-insert timeline storage with the bisect event index."""
+
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from piwardrive.visualization.timeline import EventIndex
+
+T0 = datetime(2024, 1, 1)
+
+
+@dataclass
+class Event:
+    timestamp: datetime
+    event_type: str
+
+
+def make_events(count: int, seed: int = 0):
+    """Return ``count`` events over one day, mostly in capture order."""
+    rng = random.Random(seed)
+    step = 86400 / count
+    return [
+        Event(T0 + timedelta(seconds=i * step + rng.uniform(-5, 5)), "beacon")
+        for i in range(count)
+    ]
+
+
+def _timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:36} {time.perf_counter() - start:8.3f} s")
+    return result
+
+
+def main() -> None:
+    small = make_events(20_000)
+
+    def sort_on_insert():
+        events = []
+        for event in small:
+            events.append(event)
+            events.sort(key=lambda e: e.timestamp)
+        return events
+
+    def bisect_insert():
+        index = EventIndex()
+        for event in small:
+            index.add(event)
+        return index
+
+    print(f"{len(small):,} events")
+    _timed("list.append + sort per event", sort_on_insert)
+    index = _timed("EventIndex.add per event", bisect_insert)
+
+    probe = T0 + timedelta(hours=12)
+    window = timedelta(seconds=30)
+    _timed(
+        "linear scan x 1000 lookups",
+        lambda: [
+            [e for e in index if abs((e.timestamp - probe).total_seconds()) <= 30]
+            for _ in range(1000)
+        ],
+    )
+    _timed(
+        "EventIndex.between x 1000 lookups",
+        lambda: [index.between(probe - window, probe + window) for _ in range(1000)],
+    )
+
+    large = make_events(2_000_000)
+    print(f"\n{len(large):,} events")
+    index = _timed("EventIndex.extend", lambda: EventIndex(large))
+    cursors = [T0 + timedelta(seconds=s) for s in range(-10, 86410)]
+    _timed(
+        "replay at 1 s steps (iter_windows)",
+        lambda: sum(len(batch) for _, batch in index.iter_windows(cursors)),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -45,3 +45,41 @@ if cgeom:
         "point_in_polygon c: %s",
         timeit.timeit(lambda: cgeom.point_in_polygon((0.5, 0.5), POLY), number=reps),
     )
+
+# batch kernels: one call per array instead of one per point
+import numpy as np  # noqa: E402
+
+rng = np.random.default_rng(0)
+LATS = rng.uniform(-0.5, 1.5, 100_000)
+LONS = rng.uniform(-0.5, 1.5, 100_000)
+FENCES = utils.PackedPolygons.from_polygons([POLY] * 20)
+batch_reps = 10
+
+logging.info(
+    "haversine per point: %s",
+    timeit.timeit(
+        lambda: [utils.haversine_distance(POINT1, p) for p in zip(LATS, LONS)],
+        number=batch_reps,
+    ),
+)
+logging.info(
+    "haversine_from batch: %s",
+    timeit.timeit(lambda: utils.haversine_from(POINT1, LATS, LONS), number=batch_reps),
+)
+logging.info(
+    "point_in_polygon per point: %s",
+    timeit.timeit(
+        lambda: [utils.point_in_polygon(p, POLY) for p in zip(LATS, LONS)],
+        number=batch_reps,
+    ),
+)
+logging.info(
+    "points_in_polygon batch: %s",
+    timeit.timeit(lambda: utils.points_in_polygon(LATS, LONS, POLY), number=batch_reps),
+)
+logging.info(
+    "points_in_geofences batch (20 fences): %s",
+    timeit.timeit(
+        lambda: utils.points_in_geofences(LATS, LONS, FENCES), number=batch_reps
+    ),
+)
@@ -4,6 +4,7 @@ import argparse
 import asyncio
 import json
 import logging
+import socket
 
 try:
     from persistence import load_recent_health
@@ -43,7 +44,9 @@ def main(argv: list[str] | None = None) -> None:
     logging.info(json.dumps(stats))
 
     if args.forecast:
-        pred = forecast_cpu_temp(records, args.forecast)
+        pred = forecast_cpu_temp(
+            records, args.forecast, series=f"cpu_temp:{socket.gethostname()}"
+        )
         logging.info(json.dumps({"forecast": pred}))
 
 
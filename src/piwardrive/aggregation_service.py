@@ -3,67 +3,169 @@
 This module provides a centralized aggregation service that collects and
 processes data from multiple distributed PiWardrive scanning units for
 comprehensive network analysis and reporting.
+
+Uploads are acknowledged as soon as they are stored and merged by a bounded
+pool of background workers. Health statistics are rolled up per unit and
+globally as each upload merges. Access points are stored once per unit and
+BSSID with their last seen position and an integer quadkey, and per-zoom
+tile counts are kept up to date, so ``/stats`` and ``/overlay`` read
+precomputed aggregates whose size depends on distinct APs, not on uploads.
 """
 
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import itertools
+import json
 import logging
+import math
 import os
+import re
 import shutil
 import tempfile
+import time
+import uuid
+import weakref
+from collections import Counter, OrderedDict
 from contextlib import asynccontextmanager
-from typing import AsyncIterator, Dict, Iterable, List, Tuple
+from typing import Any, AsyncIterator, Dict, Iterable, List, Mapping, Tuple
 
 import aiosqlite
-from fastapi import FastAPI, HTTPException, UploadFile
+from fastapi import FastAPI, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse, Response
+
+from remote_sync.delta import (
+    KEYED_TABLES,
+    SYNC_TABLES,
+    PayloadTooLarge,
+    decode_batch,
+)
 
-from . import analysis, heatmap
-from .persistence import HealthRecord
+from . import heatmap, quadkey
 from .security import validate_filename
+from .serialization import encoded_response
 
 DATA_DIR = os.path.expanduser(os.getenv("PW_AGG_DIR", "~/piwardrive-aggregation"))
 DB_PATH = os.path.join(DATA_DIR, "aggregation.db")
 UPLOAD_DIR = os.path.join(DATA_DIR, "uploads")
+SYNC_DIR = os.path.join(DATA_DIR, "sync")
 DEFAULT_PORT = 9100
+MAX_SYNC_CHUNK = 4 * 1024 * 1024
+# declared (compressed) size and decompressed size accepted for one delta sync
+MAX_SYNC_UPLOAD = int(os.getenv("PW_AGG_MAX_SYNC_UPLOAD", str(64 * 1024 * 1024)))
+MAX_SYNC_DECODED = int(os.getenv("PW_AGG_MAX_SYNC_DECODED", str(256 * 1024 * 1024)))
+INGEST_WORKERS = int(os.getenv("PW_AGG_WORKERS", "2"))
+INGEST_QUEUE_SIZE = int(os.getenv("PW_AGG_QUEUE_SIZE", "64"))
+# zoom levels with precomputed AP count tiles for /overlay
+TILE_ZOOMS = tuple(range(2, 19, 2))
+GLOBAL_UNIT = "*"
+# owner of rows migrated from tables that did not record the uploading unit
+LEGACY_UNIT = "unknown"
 
 os.makedirs(UPLOAD_DIR, exist_ok=True)
-
-app = FastAPI()
+os.makedirs(SYNC_DIR, exist_ok=True)
 
 _POOL: asyncio.Queue[aiosqlite.Connection] | None = None
 _POOL_SIZE = int(os.getenv("PW_AGG_POOL_SIZE", "5"))
+# SQLite has a single writer; merges queue here instead of failing as locked
+_WRITE_LOCK: asyncio.Lock | None = None
 
 
 async def _init_pool() -> None:
     """Initialize the global connection pool if needed."""
-    global _POOL
+    global _POOL, _WRITE_LOCK
     if _POOL is not None:
         return
     os.makedirs(UPLOAD_DIR, exist_ok=True)
     _POOL = asyncio.Queue(maxsize=_POOL_SIZE)
+    _WRITE_LOCK = asyncio.Lock()
     for _ in range(_POOL_SIZE):
         conn = await aiosqlite.connect(DB_PATH)
         await conn.execute("PRAGMA journal_mode=WAL")
+        await conn.execute("PRAGMA busy_timeout=5000")
+        cur = await conn.execute("PRAGMA table_info(health_records)")
+        columns = {row[1] for row in await cur.fetchall()}
+        legacy_health = bool(columns) and "unit_id" not in columns
+        if legacy_health:
+            # rows keyed by timestamp alone cannot be told apart by unit
+            await conn.execute(
+                "ALTER TABLE health_records RENAME TO health_records_legacy"
+            )
         await conn.execute(
             """
             CREATE TABLE IF NOT EXISTS health_records (
-                timestamp TEXT PRIMARY KEY,
+                unit_id TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
                 cpu_temp REAL,
                 cpu_percent REAL,
                 memory_percent REAL,
-                disk_percent REAL
+                disk_percent REAL,
+                PRIMARY KEY (unit_id, timestamp)
             )
             """
         )
+        cur = await conn.execute("PRAGMA table_info(ap_points)")
+        columns = {row[1] for row in await cur.fetchall()}
+        legacy_points = bool(columns) and "bssid" not in columns
+        if legacy_points:
+            # keep pre-dedup (lat, lon) rows around instead of dropping them
+            await conn.execute("ALTER TABLE ap_points RENAME TO ap_points_legacy")
         await conn.execute(
             """
             CREATE TABLE IF NOT EXISTS ap_points (
-                lat REAL,
-                lon REAL
+                unit_id TEXT NOT NULL,
+                bssid TEXT NOT NULL,
+                lat REAL NOT NULL,
+                lon REAL NOT NULL,
+                last_seen INTEGER NOT NULL,
+                quadkey INTEGER NOT NULL,
+                PRIMARY KEY (unit_id, bssid)
+            )
+            """
+        )
+        await conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_ap_points_quadkey "
+            "ON ap_points(unit_id, quadkey)"
+        )
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS point_tiles (
+                unit_id TEXT NOT NULL,
+                zoom INTEGER NOT NULL,
+                tile INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (unit_id, zoom, tile)
             )
             """
         )
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS health_rollups (
+                unit_id TEXT PRIMARY KEY,
+                count INTEGER NOT NULL,
+                temp_count INTEGER NOT NULL,
+                temp_sum REAL NOT NULL,
+                cpu_sum REAL NOT NULL,
+                mem_sum REAL NOT NULL,
+                disk_sum REAL NOT NULL
+            )
+            """
+        )
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sync_uploads (
+                id TEXT PRIMARY KEY,
+                unit_id TEXT,
+                completed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                rows TEXT
+            )
+            """
+        )
+        if legacy_health:
+            await _migrate_health(conn)
+        if legacy_points:
+            await _migrate_points(conn)
         await conn.commit()
         _POOL.put_nowait(conn)
 
@@ -81,46 +183,429 @@ async def _get_conn() -> AsyncIterator[aiosqlite.Connection]:
         await _POOL.put(conn)
 
 
-async def _merge_records(
+@asynccontextmanager
+async def _get_writer() -> AsyncIterator[aiosqlite.Connection]:
+    """Yield a pooled connection while holding the database write lock."""
+    await _init_pool()
+    assert _WRITE_LOCK is not None
+    async with _WRITE_LOCK, _get_conn() as conn:
+        yield conn
+
+
+def _check_unit(unit: str) -> str:
+    """Return ``unit`` or raise ``ValueError`` if it names the global rollup."""
+    if unit == GLOBAL_UNIT:
+        raise ValueError(f"Invalid unit: {unit}")
+    return unit
+
+
+async def _add_health(
+    conn: aiosqlite.Connection,
     records: Iterable[Tuple[str, float | None, float, float, float]],
-) -> None:
-    async with _get_conn() as conn:
+    unit: str,
+) -> int:
+    """Insert new health ``records`` of ``unit`` and fold them into the rollups.
+
+    Only rows whose timestamp is not stored for ``unit`` yet count towards
+    the rollups, so re-uploading the same database leaves the statistics
+    unchanged while units sampling at the same instant are all counted.
+    """
+    _check_unit(unit)
+    await conn.execute(
+        """CREATE TEMP TABLE IF NOT EXISTS incoming_health (
+            timestamp TEXT, cpu_temp REAL, cpu_percent REAL,
+            memory_percent REAL, disk_percent REAL)"""
+    )
+    await conn.execute("DELETE FROM incoming_health")
+    await conn.executemany(
+        "INSERT INTO incoming_health VALUES (?, ?, ?, ?, ?)", records
+    )
+    cur = await conn.execute(
+        """SELECT COUNT(*), COUNT(cpu_temp), TOTAL(cpu_temp), TOTAL(cpu_percent),
+            TOTAL(memory_percent), TOTAL(disk_percent)
+        FROM incoming_health i
+        WHERE rowid IN (SELECT MIN(rowid) FROM incoming_health GROUP BY timestamp)
+          AND NOT EXISTS (
+            SELECT 1 FROM health_records h
+            WHERE h.unit_id = ? AND h.timestamp = i.timestamp
+          )""",
+        (unit,),
+    )
+    delta = await cur.fetchone()
+    await conn.execute(
+        """INSERT OR IGNORE INTO health_records (unit_id, timestamp, cpu_temp,
+            cpu_percent, memory_percent, disk_percent)
+        SELECT ?, * FROM incoming_health""",
+        (unit,),
+    )
+    await conn.execute("DELETE FROM incoming_health")
+    if delta[0]:
         await conn.executemany(
-            """INSERT OR IGNORE INTO health_records
-            (timestamp, cpu_temp, cpu_percent, memory_percent, disk_percent)
-            VALUES (?, ?, ?, ?, ?)""",
-            records,
+            """INSERT INTO health_rollups VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(unit_id) DO UPDATE SET
+                count = count + excluded.count,
+                temp_count = temp_count + excluded.temp_count,
+                temp_sum = temp_sum + excluded.temp_sum,
+                cpu_sum = cpu_sum + excluded.cpu_sum,
+                mem_sum = mem_sum + excluded.mem_sum,
+                disk_sum = disk_sum + excluded.disk_sum""",
+            [(u, *delta) for u in (unit, GLOBAL_UNIT)],
         )
-        await conn.commit()
+    return int(delta[0])
 
 
-async def _merge_points(points: Iterable[Tuple[float, float]]) -> None:
-    async with _get_conn() as conn:
+async def _add_points(
+    conn: aiosqlite.Connection,
+    points: Iterable[Tuple[str, float, float, int | None]],
+    unit: str,
+) -> int:
+    """Upsert ``(bssid, lat, lon, last_seen)`` observations from ``unit``.
+
+    Each access point is stored once per unit (and once under
+    :data:`GLOBAL_UNIT`) with its most recently seen position. Tile counts
+    change only when an access point is new or moves to another tile, so
+    repeated uploads of the same cache leave them untouched.
+
+    Returns:
+        Number of access points of ``unit`` that were added or updated.
+    """
+    _check_unit(unit)
+    await conn.execute(
+        """CREATE TEMP TABLE IF NOT EXISTS incoming_points (
+            bssid TEXT PRIMARY KEY, lat REAL, lon REAL,
+            last_seen INTEGER, quadkey INTEGER)"""
+    )
+    await conn.execute("DELETE FROM incoming_points")
+    await conn.executemany(
+        """INSERT INTO incoming_points VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(bssid) DO UPDATE SET lat = excluded.lat, lon = excluded.lon,
+            last_seen = excluded.last_seen, quadkey = excluded.quadkey
+        WHERE excluded.last_seen >= incoming_points.last_seen""",
+        [
+            (bssid, lat, lon, seen or 0, quadkey.encode(lat, lon))
+            for bssid, lat, lon, seen in points
+        ],
+    )
+    changed = 0
+    for owner in (unit, GLOBAL_UNIT):
+        cur = await conn.execute(
+            """SELECT p.quadkey, i.quadkey FROM incoming_points i
+            LEFT JOIN ap_points p ON p.unit_id = ? AND p.bssid = i.bssid
+            WHERE p.bssid IS NULL OR (
+                i.last_seen >= p.last_seen
+                AND (i.last_seen > p.last_seen OR i.lat != p.lat OR i.lon != p.lon)
+            )""",
+            (owner,),
+        )
+        moves = await cur.fetchall()
+        if owner == unit:
+            changed = len(moves)
+        if not moves:
+            continue
+        await conn.execute(
+            """INSERT INTO ap_points
+            SELECT ?, bssid, lat, lon, last_seen, quadkey FROM incoming_points
+            WHERE true
+            ON CONFLICT(unit_id, bssid) DO UPDATE SET
+                lat = excluded.lat, lon = excluded.lon,
+                last_seen = excluded.last_seen, quadkey = excluded.quadkey
+            WHERE excluded.last_seen >= ap_points.last_seen""",
+            (owner,),
+        )
+        delta: Counter[Tuple[int, int]] = Counter()
+        for old, new in moves:
+            for zoom in TILE_ZOOMS:
+                new_tile = quadkey.parent(new, quadkey.MAX_ZOOM, zoom)
+                old_tile = (
+                    None if old is None else quadkey.parent(old, quadkey.MAX_ZOOM, zoom)
+                )
+                if old_tile != new_tile:
+                    delta[zoom, new_tile] += 1
+                    if old_tile is not None:
+                        delta[zoom, old_tile] -= 1
         await conn.executemany(
-            "INSERT INTO ap_points (lat, lon) VALUES (?, ?)",
-            points,
+            """INSERT INTO point_tiles VALUES (?, ?, ?, ?)
+            ON CONFLICT(unit_id, zoom, tile)
+            DO UPDATE SET count = count + excluded.count""",
+            [(owner, z, t, n) for (z, t), n in delta.items() if n],
         )
+    await conn.execute("DELETE FROM point_tiles WHERE count <= 0")
+    await conn.execute("DELETE FROM incoming_points")
+    return changed
+
+
+async def _migrate_health(conn: aiosqlite.Connection) -> None:
+    """Copy ``health_records_legacy`` into the keyed table and rebuild rollups."""
+    await conn.execute(
+        """INSERT OR IGNORE INTO health_records (unit_id, timestamp, cpu_temp,
+            cpu_percent, memory_percent, disk_percent)
+        SELECT ?, timestamp, cpu_temp, cpu_percent, memory_percent, disk_percent
+        FROM health_records_legacy""",
+        (LEGACY_UNIT,),
+    )
+    await conn.execute("DELETE FROM health_rollups")
+    await conn.execute(
+        """INSERT INTO health_rollups
+        SELECT unit_id, COUNT(*), COUNT(cpu_temp), TOTAL(cpu_temp),
+            TOTAL(cpu_percent), TOTAL(memory_percent), TOTAL(disk_percent)
+        FROM health_records GROUP BY unit_id
+        UNION ALL
+        SELECT ?, COUNT(*), COUNT(cpu_temp), TOTAL(cpu_temp),
+            TOTAL(cpu_percent), TOTAL(memory_percent), TOTAL(disk_percent)
+        FROM health_records HAVING COUNT(*) > 0""",
+        (GLOBAL_UNIT,),
+    )
+
+
+async def _migrate_points(conn: aiosqlite.Connection) -> None:
+    """Copy ``ap_points_legacy`` positions into ``ap_points`` and its tiles.
+
+    The legacy table stored bare positions, so each distinct position becomes
+    one access point of :data:`LEGACY_UNIT` named after its coordinates.
+    """
+    cur = await conn.execute(
+        "SELECT DISTINCT lat, lon FROM ap_points_legacy "
+        "WHERE lat IS NOT NULL AND lon IS NOT NULL"
+    )
+    points = [
+        (f"legacy:{lat},{lon}", float(lat), float(lon), 0)
+        for lat, lon in await cur.fetchall()
+    ]
+    await _add_points(conn, points, LEGACY_UNIT)
+
+
+async def _merge_records(
+    records: Iterable[Tuple[str, float | None, float, float, float]],
+    unit: str = "unknown",
+) -> int:
+    async with _get_writer() as conn:
+        added = await _add_health(conn, records, unit)
+        await conn.commit()
+    return added
+
+
+async def _merge_points(
+    points: Iterable[Tuple[str, float, float, int | None]], unit: str = "unknown"
+) -> int:
+    async with _get_writer() as conn:
+        added = await _add_points(conn, points, unit)
         await conn.commit()
+    return added
 
 
-async def _process_upload(path: str) -> None:
+async def _process_upload(path: str, unit: str = "unknown") -> Dict[str, int]:
     async with aiosqlite.connect(path) as db:
         cur = await db.execute(
-            "SELECT timestamp, cpu_temp, cpu_percent, memory_percent, ",
-            "disk_percent FROM health_records",
+            "SELECT timestamp, cpu_temp, cpu_percent, memory_percent, "
+            "disk_percent FROM health_records"
         )
-        recs = await cur.fetchall()
-        await _merge_records([tuple(r) for r in recs])
+        recs = [tuple(r) for r in await cur.fetchall()]
+        cur = await db.execute("PRAGMA table_info(ap_cache)")
+        columns = {row[1] for row in await cur.fetchall()}
+        seen = "last_time" if "last_time" in columns else "NULL"
         cur = await db.execute(
-            "SELECT lat, lon FROM ap_cache WHERE lat IS NOT NULL AND lon IS NOT NULL"
+            f"SELECT bssid, lat, lon, {seen} FROM ap_cache "  # nosec B608
+            "WHERE bssid IS NOT NULL AND lat IS NOT NULL AND lon IS NOT NULL"
         )
-        pts = await cur.fetchall()
-        await _merge_points([(float(r[0]), float(r[1])) for r in pts])
+        pts = [
+            (str(r[0]), float(r[1]), float(r[2]), r[3]) for r in await cur.fetchall()
+        ]
+    async with _get_writer() as conn:
+        merged = {
+            "health_records": await _add_health(conn, recs, unit),
+            "ap_points": await _add_points(conn, pts, unit),
+        }
+        await conn.commit()
+    return merged
+
+
+class IngestQueue:
+    """Bounded queue of uploads merged by a pool of worker tasks.
+
+    Jobs are either stored database uploads or decoded delta sync batches.
+    """
+
+    def __init__(
+        self,
+        workers: int = INGEST_WORKERS,
+        maxsize: int = INGEST_QUEUE_SIZE,
+        history: int = 1000,
+    ) -> None:
+        """Initialize the queue.
+
+        Args:
+            workers: Number of concurrent merge workers.
+            maxsize: Uploads waiting to be merged before new ones are refused.
+            history: Finished jobs whose status is kept for ``/ingest``.
+        """
+        self.workers = workers
+        self.maxsize = maxsize
+        self._queue: asyncio.Queue[Dict[str, Any]] | None = None
+        self._tasks: List[asyncio.Task[None]] = []
+        self._jobs: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._history = history
+        self.stats: Dict[str, float] = {
+            "accepted": 0,
+            "rejected": 0,
+            "merged": 0,
+            "failed": 0,
+            "merge_seconds": 0.0,
+        }
+
+    @property
+    def running(self) -> bool:
+        """Return ``True`` while workers are active."""
+        return any(not t.done() for t in self._tasks)
+
+    def start(self) -> None:
+        """Start the worker tasks on the running event loop."""
+        if self.running:
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"agg-ingest-{n}")
+            for n in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Cancel the workers; queued uploads stay on disk."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def join(self) -> None:
+        """Wait until every queued upload has been merged."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def submit(self, path: str, dest: str, unit: str) -> str:
+        """Queue the stored upload at ``path`` and return its job id.
+
+        Raises:
+            asyncio.QueueFull: If ``maxsize`` uploads are already waiting.
+        """
+        job = {"id": uuid.uuid4().hex, "path": path, "dest": dest, "unit": unit}
+        return self._enqueue(job)
+
+    def submit_sync(
+        self, upload_id: str, unit: str, blocks: List[Mapping[str, Any]]
+    ) -> str:
+        """Queue decoded delta sync ``blocks`` under the job id ``upload_id``.
+
+        Raises:
+            asyncio.QueueFull: If ``maxsize`` uploads are already waiting.
+        """
+        return self._enqueue({"id": upload_id, "unit": unit, "blocks": blocks})
+
+    def _enqueue(self, job: Dict[str, Any]) -> str:
+        self.start()
+        assert self._queue is not None
+        job.update(status="queued", queued=time.time())
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            raise
+        self.stats["accepted"] += 1
+        self._remember(job)
+        return job["id"]
+
+    def _remember(self, job: Dict[str, Any]) -> None:
+        self._jobs[job["id"]] = job
+        while len(self._jobs) > self._history:
+            oldest = next(iter(self._jobs.values()))
+            if oldest["status"] == "queued":
+                break
+            self._jobs.popitem(last=False)
+
+    def job(self, job_id: str) -> Dict[str, Any] | None:
+        """Return the public status of ``job_id``."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        return {k: v for k, v in job.items() if k not in {"path", "dest", "blocks"}}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return queue depth, worker count and merge counters."""
+        merged = self.stats["merged"]
+        return {
+            **self.stats,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "maxsize": self.maxsize,
+            "workers": sum(not t.done() for t in self._tasks),
+            "merge_avg_ms": (
+                self.stats["merge_seconds"] / merged * 1000.0 if merged else 0.0
+            ),
+        }
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        while True:
+            job = await self._queue.get()
+            job["status"] = "merging"
+            start = time.perf_counter()
+            try:
+                if "blocks" in job:
+                    job["rows"] = await _merge_sync_blocks(
+                        job["id"], job["unit"], job.pop("blocks")
+                    )
+                else:
+                    job["rows"] = await _process_upload(job["path"], job["unit"])
+                    await asyncio.to_thread(_finalize_upload, job["path"], job["dest"])
+            except Exception as exc:
+                logging.exception("Failed to merge upload %s: %s", job["id"], exc)
+                job["status"] = "failed"
+                job["error"] = str(exc)
+                self.stats["failed"] += 1
+            else:
+                job["status"] = "merged"
+                self.stats["merged"] += 1
+            finally:
+                elapsed = time.perf_counter() - start
+                self.stats["merge_seconds"] += elapsed
+                job["finished"] = time.time()
+                self._queue.task_done()
+
+
+def _finalize_upload(tmp_path: str, dest: str) -> None:
+    with open(tmp_path, "rb") as src, open(dest, "ab") as out:
+        shutil.copyfileobj(src, out)
+    os.remove(tmp_path)
+
+
+def _save_upload(src: Any, tmp_path: str) -> None:
+    with open(tmp_path, "wb") as fh:
+        shutil.copyfileobj(src, fh)
+
+
+ingest = IngestQueue()
+
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    await _init_pool()
+    ingest.start()
+    try:
+        yield
+    finally:
+        await ingest.stop()
 
 
-@app.post("/upload")
-async def upload(file: UploadFile) -> Dict[str, str]:  # noqa: V103 - FastAPI route
-    """Save ``file`` and merge its contents into the aggregation database."""
+app = FastAPI(lifespan=_lifespan)
+
+
+@app.post("/upload", status_code=202)
+async def upload(
+    file: UploadFile, unit: str | None = None
+) -> Dict[str, str]:  # noqa: V103 - FastAPI route
+    """Store ``file`` and queue it for merging into the aggregation database.
+
+    The request returns as soon as the file is on disk; poll
+    ``/ingest/<job>`` for the merge result. ``unit`` identifies the sending
+    unit and defaults to the file name without extension.
+    """
     # Called by FastAPI as a route handler.
     filename = file.filename or ""
     name = os.path.basename(filename)
@@ -132,53 +617,480 @@ async def upload(file: UploadFile) -> Dict[str, str]:  # noqa: V103 - FastAPI ro
         validate_filename(name)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
+    unit = unit or os.path.splitext(name)[0]
+    try:
+        _check_unit(unit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     dest = os.path.join(UPLOAD_DIR, name)
     fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR)
     os.close(fd)
     try:
-        with open(tmp_path, "wb") as fh:
-            shutil.copyfileobj(file.file, fh)
+        await asyncio.to_thread(_save_upload, file.file, tmp_path)
     except OSError as exc:  # pragma: no cover - write errors
         logging.exception("Failed to save upload %s: %s", tmp_path, exc)
         raise
-    await _process_upload(tmp_path)
     try:
-        with open(tmp_path, "rb") as src, open(dest, "ab") as out:
-            shutil.copyfileobj(src, out)
+        job = ingest.submit(tmp_path, dest, unit)
+    except asyncio.QueueFull:
         os.remove(tmp_path)
-    except OSError as exc:  # pragma: no cover - write errors
-        logging.exception("Failed to finalize upload %s: %s", dest, exc)
-        raise
-    return {"saved": dest}
+        raise HTTPException(
+            status_code=503,
+            detail="Ingest queue full",
+            headers={"Retry-After": "5"},
+        )
+    return {"saved": dest, "job": job}
+
+
+@app.get("/ingest")
+async def ingest_status() -> Dict[str, Any]:  # noqa: V103 - FastAPI route
+    """Return ingest queue depth and merge counters."""
+    return ingest.snapshot()
+
+
+@app.get("/ingest/{job_id}")
+async def ingest_job(job_id: str) -> Dict[str, Any]:  # noqa: V103 - FastAPI route
+    """Return the merge status of upload ``job_id``."""
+    job = ingest.job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job
+
+
+_UPLOAD_ID_RE = re.compile(r"[0-9a-f]{32}")
+_IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def _sync_part(upload_id: str) -> str:
+    if not _UPLOAD_ID_RE.fullmatch(upload_id):
+        raise HTTPException(status_code=400, detail="Invalid upload id")
+    return os.path.join(SYNC_DIR, f"{upload_id}.part")
+
+
+# one lock per upload id while a request for it is in flight
+_SYNC_LOCKS: "weakref.WeakValueDictionary[str, asyncio.Lock]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def _sync_lock(upload_id: str) -> asyncio.Lock:
+    lock = _SYNC_LOCKS.get(upload_id)
+    if lock is None:
+        lock = _SYNC_LOCKS[upload_id] = asyncio.Lock()
+    return lock
+
+
+def _part_size(part: str) -> int | None:
+    try:
+        return os.path.getsize(part)
+    except FileNotFoundError:
+        return None
+
+
+def _open_part(part: str, digest: str) -> int:
+    """Return the bytes of ``part`` received for the payload ``digest``.
+
+    A partial upload of a different payload is discarded first.
+    """
+    meta = os.path.splitext(part)[0] + ".sha256"
+    try:
+        with open(meta, "r", encoding="utf-8") as fh:
+            known = fh.read().strip()
+    except FileNotFoundError:
+        known = None
+    if known == digest:
+        return _part_size(part) or 0
+    if os.path.exists(part):
+        os.remove(part)
+    with open(meta, "w", encoding="utf-8") as fh:
+        fh.write(digest)
+    return 0
+
+
+def _append_part(part: str, chunk: bytes) -> int:
+    with open(part, "ab") as fh:
+        fh.write(chunk)
+        return fh.tell()
+
+
+def _take_part(part: str) -> bytes:
+    """Return the contents of ``part`` and remove it with its digest file."""
+    with open(part, "rb") as fh:
+        data = fh.read()
+    os.remove(part)
+    meta = os.path.splitext(part)[0] + ".sha256"
+    if os.path.exists(meta):
+        os.remove(meta)
+    return data
+
+
+async def _completed_upload(upload_id: str) -> Dict[str, int] | None:
+    async with _get_conn() as conn:
+        cur = await conn.execute(
+            "SELECT rows FROM sync_uploads WHERE id = ?", (upload_id,)
+        )
+        row = await cur.fetchone()
+    return json.loads(row[0]) if row else None
+
+
+async def _sync_progress(upload_id: str) -> Dict[str, Any] | None:
+    """Return the status of a merged or merging upload, else ``None``."""
+    rows = await _completed_upload(upload_id)
+    if rows is not None:
+        return {"received": 0, "complete": True, "rows": rows}
+    job = ingest.job(upload_id)
+    if job is not None and job["status"] in {"queued", "merging"}:
+        return {"received": 0, "complete": False, "merging": True}
+    return None
+
+
+def _check_sync_blocks(blocks: Iterable[Mapping[str, Any]]) -> None:
+    """Raise ``400`` unless every block names a sync table and valid columns."""
+    for block in blocks:
+        table = block["table"]
+        columns = list(block["columns"])
+        if table not in SYNC_TABLES or not all(_IDENT_RE.fullmatch(c) for c in columns):
+            raise HTTPException(status_code=400, detail=f"Invalid table {table}")
+        if table in KEYED_TABLES and KEYED_TABLES[table][0] not in columns:
+            key = KEYED_TABLES[table][0]
+            raise HTTPException(
+                status_code=400, detail=f"Missing key {key} for {table}"
+            )
+
+
+async def _merge_sync_blocks(
+    upload_id: str, unit: str, blocks: Iterable[Mapping[str, Any]]
+) -> Dict[str, int]:
+    """Merge sync ``blocks`` from ``unit`` checked by :func:`_check_sync_blocks`."""
+    merged: Dict[str, int] = {}
+    async with _get_writer() as conn:
+        for block in blocks:
+            table = block["table"]
+            columns = list(block["columns"])
+            dest = f"synced_{table}"
+            if table in KEYED_TABLES:
+                # rewritten in place on the unit, so rowids mean nothing here
+                key = KEYED_TABLES[table][0]
+                await conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {dest} ("
+                    f'unit_id TEXT NOT NULL, "{key}" NOT NULL, '
+                    f'PRIMARY KEY (unit_id, "{key}"))'
+                )
+                leading = ["unit_id"]
+                rows = list(zip(itertools.repeat(unit), *block["data"]))
+            else:
+                await conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {dest} ("
+                    "unit_id TEXT NOT NULL, src_rowid INTEGER NOT NULL, "
+                    "PRIMARY KEY (unit_id, src_rowid))"
+                )
+                leading = ["unit_id", "src_rowid"]
+                rows = list(
+                    zip(itertools.repeat(unit), block["rowids"], *block["data"])
+                )
+            cur = await conn.execute(f"PRAGMA table_info({dest})")
+            existing = {row[1] for row in await cur.fetchall()}
+            for col in columns:
+                if col not in existing:
+                    await conn.execute(f'ALTER TABLE {dest} ADD COLUMN "{col}"')
+            names = ", ".join(f'"{c}"' for c in [*leading, *columns])
+            marks = ", ".join("?" * (len(leading) + len(columns)))
+            await conn.executemany(
+                f"INSERT OR REPLACE INTO {dest} ({names}) VALUES ({marks})", rows
+            )
+            merged[table] = merged.get(table, 0) + len(rows)
+
+            data = dict(zip(columns, block["data"]))
+            if table == "health_records":
+                await _add_health(
+                    conn,
+                    zip(
+                        *(
+                            data.get(c, [None] * len(rows))
+                            for c in (
+                                "timestamp",
+                                "cpu_temp",
+                                "cpu_percent",
+                                "memory_percent",
+                                "disk_percent",
+                            )
+                        )
+                    ),
+                    unit,
+                )
+            elif table == "ap_cache" and {"bssid", "lat", "lon"} <= data.keys():
+                await _add_points(
+                    conn,
+                    [
+                        (str(bssid), float(lat), float(lon), seen)
+                        for bssid, lat, lon, seen in zip(
+                            data["bssid"],
+                            data["lat"],
+                            data["lon"],
+                            data.get("last_time", [None] * len(rows)),
+                        )
+                        if bssid is not None and lat is not None and lon is not None
+                    ],
+                    unit,
+                )
+        await conn.execute(
+            "INSERT INTO sync_uploads (id, unit_id, rows) VALUES (?, ?, ?)",
+            (upload_id, unit, json.dumps(merged)),
+        )
+        await conn.commit()
+    return merged
+
+
+@app.get("/sync/{upload_id}")
+async def sync_status(upload_id: str) -> Dict[str, Any]:  # noqa: V103 - FastAPI route
+    """Return how many bytes of ``upload_id`` have been received.
+
+    ``merging`` is set while the complete upload waits for an ingest worker
+    and ``error`` once its merge has failed.
+    """
+    part = _sync_part(upload_id)
+    progress = await _sync_progress(upload_id)
+    if progress is not None:
+        return progress
+    received = await asyncio.to_thread(_part_size, part)
+    if received is None:
+        job = ingest.job(upload_id)
+        if job is not None and job["status"] == "failed":
+            return {"received": 0, "complete": False, "error": job.get("error")}
+        raise HTTPException(status_code=404, detail="Unknown upload")
+    return {"received": received, "complete": False}
+
+
+@app.put("/sync/{upload_id}")
+async def sync_chunk(
+    upload_id: str, request: Request, offset: int = 0
+) -> Any:  # noqa: V103 - FastAPI route
+    """Append one chunk of a delta sync upload.
+
+    The chunk must start at the number of bytes already received, otherwise
+    ``409`` is returned with the current position. A partial upload whose
+    ``X-Sync-SHA256`` differs is discarded. Uploads declaring more than
+    ``MAX_SYNC_UPLOAD`` bytes, or decompressing to more than
+    ``MAX_SYNC_DECODED``, are rejected with ``413``. Once the declared total
+    has arrived, the payload is verified, decoded and queued for the ingest
+    workers; poll ``GET /sync/<upload_id>`` until it reports ``complete``.
+    ``503`` is returned while the ingest queue is full. Requests for the same
+    upload are handled one at a time.
+    """
+    part = _sync_part(upload_id)
+    try:
+        total = int(request.headers["X-Sync-Total"])
+        digest = request.headers["X-Sync-SHA256"]
+        encoding = request.headers["X-Sync-Encoding"]
+        chunk_digest = request.headers["X-Chunk-SHA256"]
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=400, detail="Missing sync headers")
+    if total <= 0:
+        raise HTTPException(status_code=400, detail="Invalid declared size")
+    if total > MAX_SYNC_UPLOAD:
+        raise HTTPException(status_code=413, detail="Upload too large")
+    chunk = await request.body()
+    if len(chunk) > MAX_SYNC_CHUNK:
+        raise HTTPException(status_code=413, detail="Chunk too large")
+    if hashlib.sha256(chunk).hexdigest() != chunk_digest:
+        raise HTTPException(status_code=422, detail="Chunk checksum mismatch")
+
+    async with _sync_lock(upload_id):
+        progress = await _sync_progress(upload_id)
+        if progress is not None:
+            return progress
+        received = await asyncio.to_thread(_open_part, part, digest)
+        if offset != received:
+            return JSONResponse(
+                status_code=409, content={"received": received, "complete": False}
+            )
+        if received + len(chunk) > total:
+            raise HTTPException(status_code=400, detail="Chunk exceeds declared size")
+        received = await asyncio.to_thread(_append_part, part, chunk)
+        if received < total:
+            return {"received": received, "complete": False}
+
+        data = await asyncio.to_thread(_take_part, part)
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise HTTPException(status_code=422, detail="Upload checksum mismatch")
+        try:
+            payload = await asyncio.to_thread(
+                decode_batch, data, encoding, MAX_SYNC_DECODED
+            )
+        except PayloadTooLarge as exc:
+            raise HTTPException(status_code=413, detail=str(exc))
+        except Exception as exc:
+            raise HTTPException(status_code=400, detail=f"Undecodable upload: {exc}")
+        try:
+            unit = _check_unit(str(payload.get("unit", "")))
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        blocks = list(payload.get("tables", []))
+        _check_sync_blocks(blocks)
+        try:
+            ingest.submit_sync(upload_id, unit, blocks)
+        except asyncio.QueueFull:
+            # keep the verified bytes so the unit retries without resending
+            await asyncio.to_thread(_open_part, part, digest)
+            await asyncio.to_thread(_append_part, part, data)
+            raise HTTPException(
+                status_code=503,
+                detail="Ingest queue full",
+                headers={"Retry-After": "5"},
+            )
+    return {"received": received, "complete": False, "merging": True}
 
 
 @app.get("/stats")
-async def stats() -> Dict[str, float]:  # noqa: V103 - FastAPI route
-    """Return averaged system metrics from all records."""
+async def stats(unit: str | None = None) -> Dict[str, float | None]:  # noqa: V103
+    """Return averaged system metrics for ``unit`` or for all units."""
     # Called by FastAPI as a route handler.
     async with _get_conn() as conn:
         cur = await conn.execute(
-            "SELECT timestamp, cpu_temp, cpu_percent, memory_percent, ",
-            "disk_percent FROM health_records",
+            "SELECT count, temp_count, temp_sum, cpu_sum, mem_sum, disk_sum "
+            "FROM health_rollups WHERE unit_id = ?",
+            (unit or GLOBAL_UNIT,),
         )
-        rows = await cur.fetchall()
-        records = [HealthRecord(*row) for row in rows]
-    return analysis.compute_health_stats(records)
+        row = await cur.fetchone()
+    if not row or not row[0]:
+        return {}
+    count, temp_count, temp_sum, cpu_sum, mem_sum, disk_sum = row
+    return {
+        "count": count,
+        "temp_avg": temp_sum / temp_count if temp_count else None,
+        "cpu_avg": cpu_sum / count,
+        "mem_avg": mem_sum / count,
+        "disk_avg": disk_sum / count,
+    }
+
+
+async def _overlay_zoom(
+    conn: aiosqlite.Connection,
+    owner: str,
+    bins: int,
+    bbox: Tuple[float, float, float, float] | None,
+) -> int:
+    """Pick the tile zoom whose resolution best matches ``bins``."""
+    if bbox is not None:
+        span = max(bbox[3] - bbox[1], 1e-9)
+        wanted = math.ceil(math.log2(360.0 * bins / span))
+        return next((z for z in TILE_ZOOMS if z >= wanted), TILE_ZOOMS[-1])
+    cur = await conn.execute(
+        "SELECT zoom, COUNT(*) FROM point_tiles WHERE unit_id = ? GROUP BY zoom",
+        (owner,),
+    )
+    counts = dict(await cur.fetchall())
+    fitting = [z for z in TILE_ZOOMS if counts.get(z, 0) <= bins * bins]
+    return fitting[-1] if fitting else TILE_ZOOMS[0]
+
+
+def _bbox(
+    min_lat: float | None,
+    min_lon: float | None,
+    max_lat: float | None,
+    max_lon: float | None,
+) -> Tuple[float, float, float, float] | None:
+    values = (min_lat, min_lon, max_lat, max_lon)
+    if all(v is None for v in values):
+        return None
+    if any(v is None for v in values) or min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="Invalid bounding box")
+    return values  # type: ignore[return-value]
+
+
+def _range_clause(column: str, ranges: List[Tuple[int, int]]) -> Tuple[str, List[int]]:
+    clause = " OR ".join(f"{column} BETWEEN ? AND ?" for _ in ranges)
+    return f"({clause})", [v for r in ranges for v in r]
 
 
 @app.get("/overlay")
-async def overlay(bins: int = 100) -> Dict[str, List[Tuple[float, float, int]]]:
+async def overlay(
+    bins: int = 100,
+    unit: str | None = None,
+    min_lat: float | None = None,
+    min_lon: float | None = None,
+    max_lat: float | None = None,
+    max_lon: float | None = None,
+) -> Dict[str, List[Tuple[float, float, int]]]:
     # noqa: V103 - FastAPI route
-    """Return heatmap points derived from all uploaded access points."""
+    """Return heatmap points for ``unit`` or all units from the count tiles.
+
+    Each access point is counted once at its last seen position. Pass all
+    four ``min_lat``/``min_lon``/``max_lat``/``max_lon`` values to restrict
+    the overlay to a viewport.
+    """
     # Called by FastAPI as a route handler.
+    bbox = _bbox(min_lat, min_lon, max_lat, max_lon)
+    owner = unit or GLOBAL_UNIT
     async with _get_conn() as conn:
-        cur = await conn.execute("SELECT lat, lon FROM ap_points")
-        coords = [(float(r[0]), float(r[1])) for r in await cur.fetchall()]
-    hist, lat_range, lon_range = heatmap.histogram(coords, bins=bins)
+        zoom = await _overlay_zoom(conn, owner, bins, bbox)
+        sql = "SELECT tile, count FROM point_tiles WHERE unit_id = ? AND zoom = ?"
+        params: List[Any] = [owner, zoom]
+        if bbox is not None:
+            clause, values = _range_clause("tile", quadkey.ranges(bbox, zoom))
+            sql += f" AND {clause}"
+            params += values
+        cur = await conn.execute(sql, params)
+        tiles = await cur.fetchall()
+    coords = [quadkey.center(tile, zoom) for tile, _ in tiles]
+    if bbox is not None:
+        inside = [
+            i
+            for i, (lat, lon) in enumerate(coords)
+            if bbox[0] <= lat <= bbox[2] and bbox[1] <= lon <= bbox[3]
+        ]
+        coords = [coords[i] for i in inside]
+        tiles = [tiles[i] for i in inside]
+    if not tiles:
+        return {"points": []}
+    if bbox is None:
+        edges = [quadkey.bounds(tile, zoom) for tile, _ in tiles]
+        bbox = (
+            min(e[0] for e in edges),
+            min(e[1] for e in edges),
+            max(e[2] for e in edges),
+            max(e[3] for e in edges),
+        )
+    hist, lat_range, lon_range = heatmap.histogram(
+        coords, bins=bins, bounds=bbox, weights=[count for _, count in tiles]
+    )
     points = heatmap.histogram_points(hist, lat_range, lon_range)
     return {"points": points}
 
 
+@app.get("/points")
+async def points(
+    request: Request,
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    unit: str | None = None,
+    limit: int = 1000,
+) -> Response:
+    # noqa: V103 - FastAPI route
+    """Return ``(bssid, lat, lon, last_seen)`` of access points in a viewport.
+
+    The response is JSON unless the ``Accept`` header asks for another
+    registered codec such as ``application/msgpack``.
+    """
+    # Called by FastAPI as a route handler.
+    bbox = _bbox(min_lat, min_lon, max_lat, max_lon)
+    assert bbox is not None
+    clause, values = _range_clause("quadkey", quadkey.ranges(bbox))
+    async with _get_conn() as conn:
+        cur = await conn.execute(
+            f"SELECT bssid, lat, lon, last_seen FROM ap_points "  # nosec B608
+            f"WHERE unit_id = ? AND {clause} AND lat BETWEEN ? AND ? "
+            "AND lon BETWEEN ? AND ? LIMIT ?",
+            [unit or GLOBAL_UNIT, *values, *bbox[::2], *bbox[1::2], limit],
+        )
+        rows = await cur.fetchall()
+    return encoded_response(
+        {"points": [tuple(r) for r in rows]}, request.headers.get("accept")
+    )
+
+
 async def main() -> None:
     """Start the aggregation service server.
 
@@ -194,7 +1106,20 @@ async def main() -> None:
     await server.serve()
 
 
-__all__ = ["app", "main", "upload", "stats", "overlay"]
+__all__ = [
+    "IngestQueue",
+    "app",
+    "ingest",
+    "ingest_job",
+    "ingest_status",
+    "main",
+    "overlay",
+    "points",
+    "stats",
+    "sync_chunk",
+    "sync_status",
+    "upload",
+]
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,42 +1,255 @@
-from __future__ import annotations
+"""Anomaly detection for health records.
+
+Models are fitted by :func:`fit_health_model`, a plain function that can run
+in the shared process pool, and wrapped in an immutable
+:class:`ModelArtifact`. :class:`HealthAnomalyDetector` replaces its artifact
+with a single reference assignment, so records are always scored by one
+complete model, and scores buffered records in micro-batches with one
+``predict`` call each.
+"""
 
-"""Anomaly detection for health records."""
+from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Iterable
+import os
+import pickle  # nosec B403 - artifacts are written by this process
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, List, Sequence
 
+import numpy as np
 from sklearn.ensemble import IsolationForest
 
+from ..cpu_pool import run_cpu_bound_shared
 from ..persistence import HealthRecord
 
+logger = logging.getLogger(__name__)
+
+ARTIFACT_PREFIX = "health_anomaly"
+# number of published artifacts kept on disk
+KEEP_ARTIFACTS = 3
+
+
+@dataclass(frozen=True)
+class ModelArtifact:
+    """A fitted model together with its version and provenance."""
+
+    version: int
+    model: Any
+    samples: int
+    trained_at: float
+    contamination: float
+
+
+def health_features(records: Iterable[HealthRecord]) -> np.ndarray:
+    """Return the ``(n, 2)`` feature matrix of records with a temperature."""
+    rows = [(r.cpu_temp, r.cpu_percent) for r in records if r.cpu_temp is not None]
+    return np.array(rows, dtype=float).reshape(len(rows), 2)
+
+
+def fit_health_model(
+    data: np.ndarray, contamination: float, version: int
+) -> ModelArtifact | None:
+    """Fit an :class:`IsolationForest` on ``data`` and wrap it in an artifact.
+
+    Pure and picklable so it can run in :mod:`piwardrive.cpu_pool`.
+    """
+    if len(data) == 0:
+        return None
+    model = IsolationForest(contamination=contamination, random_state=0)
+    model.fit(data)
+    return ModelArtifact(version, model, len(data), time.time(), contamination)
+
+
+def save_artifact(artifact: ModelArtifact, directory: str | Path) -> Path:
+    """Atomically write ``artifact`` to ``directory`` and prune old versions."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{ARTIFACT_PREFIX}.v{artifact.version:06d}.pkl"
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as fh:
+        pickle.dump(artifact, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+    for old in sorted(directory.glob(f"{ARTIFACT_PREFIX}.v*.pkl"))[:-KEEP_ARTIFACTS]:
+        old.unlink(missing_ok=True)
+    return path
+
+
+def load_latest_artifact(directory: str | Path) -> ModelArtifact | None:
+    """Return the newest readable artifact in ``directory`` if any."""
+    for path in sorted(Path(directory).glob(f"{ARTIFACT_PREFIX}.v*.pkl"))[::-1]:
+        try:
+            with open(path, "rb") as fh:
+                return pickle.load(fh)  # nosec B301 - local artifact
+        except Exception:
+            logger.warning("Skipping unreadable model artifact %s", path)
+    return None
+
 
 class HealthAnomalyDetector:
     """Detect anomalies in CPU temperature and usage."""
 
-    def __init__(self, contamination: float = 0.05) -> None:
-        self._model = IsolationForest(contamination=contamination, random_state=0)
-        self._fitted = False
+    def __init__(
+        self,
+        contamination: float = 0.05,
+        batch_size: int = 32,
+        max_delay: float = 0.5,
+    ) -> None:
+        """Initialize the detector.
+
+        Args:
+            contamination: Expected share of anomalies in training data.
+            batch_size: Buffered records that trigger an immediate flush.
+            max_delay: Seconds a record may wait for its batch when called
+                from a running event loop.
+        """
+        self.contamination = contamination
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._artifact: ModelArtifact | None = None
+        self._next_version = 1
+        self._pending: List[HealthRecord] = []
+        self._lock = threading.Lock()
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+    @property
+    def artifact(self) -> ModelArtifact | None:
+        """The model currently used for scoring."""
+        return self._artifact
+
+    @property
+    def version(self) -> int:
+        """Version of the live model, ``0`` before the first fit."""
+        artifact = self._artifact
+        return artifact.version if artifact is not None else 0
+
+    def swap(self, artifact: ModelArtifact | None) -> bool:
+        """Make ``artifact`` the live model unless a newer one is live.
+
+        Returns:
+            ``True`` if the artifact was installed.
+        """
+        if artifact is None:
+            return False
+        with self._lock:
+            if artifact.version <= self.version:
+                return False
+            self._next_version = max(self._next_version, artifact.version + 1)
+            self._artifact = artifact
+        logger.info(
+            "Health anomaly model v%d live (%d samples)",
+            artifact.version,
+            artifact.samples,
+        )
+        return True
+
+    def _claim_version(self) -> int:
+        with self._lock:
+            version = self._next_version
+            self._next_version += 1
+        return version
 
     def fit(self, records: Iterable[HealthRecord]) -> None:
-        """Train the detector on historical ``records``."""
-        data = [[r.cpu_temp, r.cpu_percent] for r in records if r.cpu_temp is not None]
-        if not data:
-            self._fitted = False
-            return
-        self._model.fit(data)
-        self._fitted = True
+        """Train the detector on historical ``records`` in this thread."""
+        artifact = fit_health_model(
+            health_features(records), self.contamination, self._claim_version()
+        )
+        if artifact is None:
+            self._artifact = None
+        else:
+            self.swap(artifact)
+
+    async def retrain(self, records: Iterable[HealthRecord]) -> ModelArtifact | None:
+        """Fit a new model in the CPU pool and hot-swap it when ready.
+
+        Returns:
+            The new artifact, or ``None`` if there was nothing to train on
+            or a newer model went live in the meantime.
+        """
+        data = health_features(records)
+        if len(data) == 0:
+            return None
+        version = self._claim_version()
+        try:
+            # large feature matrices reach the worker through shared memory
+            artifact = await run_cpu_bound_shared(
+                fit_health_model, data, self.contamination, version
+            )
+        except (OSError, RuntimeError) as exc:
+            # broken or unavailable process pool; a thread still keeps the
+            # event loop responsive
+            logger.warning("Process pool unavailable for training: %s", exc)
+            artifact = await asyncio.to_thread(
+                fit_health_model, data, self.contamination, version
+            )
+        return artifact if self.swap(artifact) else None
+
+    def predict(self, records: Sequence[HealthRecord]) -> np.ndarray:
+        """Return a boolean anomaly mask for ``records`` using one ``predict``.
+
+        Records without a temperature, or any record while no model is live,
+        are never anomalous.
+        """
+        mask = np.zeros(len(records), dtype=bool)
+        artifact = self._artifact
+        if artifact is None:
+            return mask
+        index = [i for i, r in enumerate(records) if r.cpu_temp is not None]
+        if index:
+            data = [[records[i].cpu_temp, records[i].cpu_percent] for i in index]
+            mask[index] = artifact.model.predict(data) == -1
+        return mask
 
     def __call__(self, record: HealthRecord) -> None:
-        """Invoke the detector with ``record`` and log warnings for anomalies."""
-        if not self._fitted or record.cpu_temp is None:
+        """Queue ``record`` for scoring and log warnings for anomalies.
+
+        Outside an event loop the record is scored immediately. Inside one,
+        records are scored in batches of ``batch_size`` or after
+        ``max_delay`` seconds, whichever comes first.
+        """
+        if self._artifact is None or record.cpu_temp is None:
             return
-        pred = self._model.predict([[record.cpu_temp, record.cpu_percent]])
-        if pred[0] == -1:
-            logging.warning(
+        with self._lock:
+            self._pending.append(record)
+            full = len(self._pending) >= self.batch_size
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None or full:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_delay, self.flush)
+
+    def flush(self) -> int:
+        """Score all queued records now and return how many were anomalous."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            handle, self._flush_handle = self._flush_handle, None
+        if handle is not None:
+            handle.cancel()
+        if not pending:
+            return 0
+        anomalies = self.predict(pending)
+        for record in (r for r, bad in zip(pending, anomalies) if bad):
+            logger.warning(
                 "Health anomaly detected: temp=%s cpu=%s",
                 record.cpu_temp,
                 record.cpu_percent,
             )
+        return int(anomalies.sum())
 
 
-__all__ = ["HealthAnomalyDetector"]
+__all__ = [
+    "HealthAnomalyDetector",
+    "ModelArtifact",
+    "fit_health_model",
+    "health_features",
+    "load_latest_artifact",
+    "save_artifact",
+]
@@ -1,11 +1,313 @@
-"""Clustering helpers using DBSCAN."""
+"""Geographic clustering of positions.
+
+:class:`GeoClusterer` runs DBSCAN with great-circle distances, searched as
+chord lengths between unit-sphere coordinates in KD-trees. Points are
+bucketed into grid chunks of ``chunk_deg`` degrees and every chunk is
+clustered together with the points within ``eps`` of its border, so peak
+memory follows the densest chunk instead of the whole data set. Clusters
+crossing chunk borders are merged through the core points the chunks share.
+After :meth:`GeoClusterer.fit`, :meth:`GeoClusterer.update` folds new points
+into the existing clusters by looking only at their neighbourhood. Chunks do
+not wrap around the antimeridian.
+"""
 
 from __future__ import annotations
 
-from typing import Iterable, List, Mapping, Tuple
+import math
+from typing import Dict, Iterable, List, Mapping, Tuple
 
 import numpy as np
-from sklearn.cluster import DBSCAN
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from sklearn.neighbors import KDTree, NearestNeighbors
+
+EARTH_RADIUS_M = 6371000.0
+
+Cell = Tuple[int, int]
+
+
+class _Clusters:
+    """Union-find over cluster ids; merged clusters keep the smallest id."""
+
+    def __init__(self, count: int = 0) -> None:
+        self._parent = np.arange(count, dtype=np.int64)
+
+    def add(self, count: int) -> np.ndarray:
+        start = len(self._parent)
+        fresh = np.arange(start, start + count, dtype=np.int64)
+        self._parent = np.concatenate((self._parent, fresh))
+        return fresh
+
+    def roots(self, ids: np.ndarray) -> np.ndarray:
+        parent = self._parent
+        roots = parent[ids]
+        while True:
+            nxt = parent[roots]
+            if np.array_equal(nxt, roots):
+                parent[ids] = roots
+                return roots
+            roots = nxt
+
+    def merge(self, a: np.ndarray, b: np.ndarray) -> None:
+        """Union every pair ``(a[i], b[i])`` at once."""
+        if len(a) == 0:
+            return
+        ra, rb = self.roots(a), self.roots(b)
+        n = len(self._parent)
+        pairs = coo_matrix((np.ones(len(ra)), (ra, rb)), shape=(n, n))
+        _, comp = connected_components(pairs, directed=False)
+        touched = np.unique(np.concatenate((ra, rb)))
+        lowest = np.full(n, n, dtype=np.int64)
+        np.minimum.at(lowest, comp[touched], touched)
+        self._parent[touched] = lowest[comp[touched]]
+
+
+class GeoClusterer:
+    """Chunked DBSCAN over latitude/longitude that can absorb new points."""
+
+    def __init__(
+        self, eps_m: float = 50.0, min_samples: int = 5, chunk_deg: float = 0.05
+    ) -> None:
+        """Initialize the clusterer.
+
+        Args:
+            eps_m: Neighbourhood radius in metres.
+            min_samples: Points, including itself, within ``eps_m`` of a
+                point for it to be a core point.
+            chunk_deg: Grid chunk size in degrees. Smaller chunks lower peak
+                memory on dense data; it is raised to at least ``eps_m``.
+        """
+        if eps_m <= 0:
+            raise ValueError("eps_m must be positive")
+        self.eps_m = eps_m
+        self.min_samples = min_samples
+        angle = eps_m / EARTH_RADIUS_M
+        # chord length on the unit sphere; monotonic in great-circle distance
+        self._radius = 2 * math.sin(angle / 2)
+        self._margin = math.degrees(angle)
+        self.chunk_deg = max(chunk_deg, self._margin)
+        self._reset()
+
+    def _reset(self) -> None:
+        self._lat = np.empty(0)
+        self._lon = np.empty(0)
+        self._counts = np.empty(0, dtype=np.int64)
+        self._core = np.empty(0, dtype=bool)
+        self._labels = np.empty(0, dtype=np.int64)
+        self._clusters = _Clusters()
+        self._cells: Dict[Cell, List[np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self._lat)
+
+    def _points(self, idx: np.ndarray) -> np.ndarray:
+        """Return unit-sphere Cartesian coordinates of ``idx``."""
+        lat, lon = np.radians(self._lat[idx]), np.radians(self._lon[idx])
+        cos_lat = np.cos(lat)
+        return np.column_stack(
+            (cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat))
+        )
+
+    def _group(self, idx: np.ndarray) -> Dict[Cell, np.ndarray]:
+        """Split point indices by grid chunk."""
+        cy = np.floor(self._lat[idx] / self.chunk_deg).astype(np.int64)
+        cx = np.floor(self._lon[idx] / self.chunk_deg).astype(np.int64)
+        order = np.lexsort((cx, cy))
+        idx, cy, cx = idx[order], cy[order], cx[order]
+        cuts = np.flatnonzero((np.diff(cy) != 0) | (np.diff(cx) != 0)) + 1
+        starts = np.concatenate(([0], cuts))
+        ends = np.concatenate((cuts, [len(idx)]))
+        return {
+            (int(cy[s]), int(cx[s])): idx[s:e] for s, e in zip(starts, ends) if e > s
+        }
+
+    def _index(self, idx: np.ndarray) -> Dict[Cell, np.ndarray]:
+        groups = self._group(idx)
+        for cell, members in groups.items():
+            self._cells.setdefault(cell, []).append(members)
+        return groups
+
+    def _neighbourhood(self, cell: Cell) -> np.ndarray:
+        """Return every point within ``eps`` of the bounding box of ``cell``."""
+        cy, cx = cell
+        size, margin = self.chunk_deg, self._margin
+        lat_lo, lat_hi = cy * size - margin, (cy + 1) * size + margin
+        edge = min(max(abs(lat_lo), abs(lat_hi)), 90.0)
+        lon_margin = min(margin / max(math.cos(math.radians(edge)), 1e-9), 180.0)
+        reach = math.ceil(lon_margin / size)
+        parts = [
+            part
+            for dy in (-1, 0, 1)
+            for dx in range(-reach, reach + 1)
+            for part in self._cells.get((cy + dy, cx + dx), ())
+        ]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        idx = np.concatenate(parts)
+        lat, lon = self._lat[idx], self._lon[idx]
+        keep = (
+            (lat >= lat_lo)
+            & (lat <= lat_hi)
+            & (lon >= cx * size - lon_margin)
+            & (lon <= (cx + 1) * size + lon_margin)
+        )
+        return idx[keep]
+
+    def _neighbours(self, idx: np.ndarray) -> Dict[int, np.ndarray]:
+        """Return the indices within ``eps`` of each point in ``idx``."""
+        found: Dict[int, np.ndarray] = {}
+        for cell, members in self._group(idx).items():
+            ext = self._neighbourhood(cell)
+            tree = KDTree(self._points(ext))
+            hits = tree.query_radius(self._points(members), self._radius)
+            found.update(zip(members.tolist(), (ext[h] for h in hits)))
+        return found
+
+    def fit(self, lat: Iterable[float], lon: Iterable[float]) -> np.ndarray:
+        """Cluster the given points from scratch and return their labels.
+
+        Labels are cluster ids starting at ``0``; noise is ``-1``.
+        """
+        self._reset()
+        self._lat = np.asarray(lat, dtype=float).ravel()
+        self._lon = np.asarray(lon, dtype=float).ravel()
+        if len(self._lat) != len(self._lon):
+            raise ValueError("lat and lon must have the same length")
+        n = len(self._lat)
+        self._counts = np.zeros(n, dtype=np.int64)
+        self._labels = np.full(n, -1, dtype=np.int64)
+        chunks = self._index(np.arange(n))
+
+        # core status of a chunk's own points is exact: its halo holds
+        # every point within eps of them
+        halos: Dict[Cell, np.ndarray] = {}
+        for cell, members in chunks.items():
+            ext = halos[cell] = self._neighbourhood(cell)
+            tree = KDTree(self._points(ext))
+            self._counts[members] = tree.query_radius(
+                self._points(members), self._radius, count_only=True
+            )
+        self._core = self._counts >= self.min_samples
+
+        node = np.full(n, -1, dtype=np.int64)
+        shared: List[np.ndarray] = []
+        shared_nodes: List[np.ndarray] = []
+        n_nodes = 0
+        for cell, members in chunks.items():
+            ext = halos.pop(cell)
+            cores = ext[self._core[ext]]
+            if len(cores) == 0:
+                continue
+            nn = NearestNeighbors(radius=self._radius, algorithm="kd_tree").fit(
+                self._points(cores)
+            )
+            count, local = connected_components(
+                nn.radius_neighbors_graph(mode="connectivity"), directed=False
+            )
+            local += n_nodes
+            n_nodes += count
+            own = np.isin(cores, members)
+            node[cores[own]] = local[own]
+            shared.append(cores[~own])
+            shared_nodes.append(local[~own])
+            border = members[~self._core[members]]
+            if len(border):
+                dist, nearest = nn.kneighbors(self._points(border), 1)
+                near = dist[:, 0] <= self._radius
+                node[border[near]] = local[nearest[near, 0]]
+
+        if n_nodes == 0:
+            return self.labels_
+        # halo cores link the component they form in a neighbouring chunk
+        # with the one they belong to in their own chunk
+        a = node[np.concatenate(shared)] if shared else np.empty(0, dtype=np.int64)
+        b = np.concatenate(shared_nodes) if shared else np.empty(0, dtype=np.int64)
+        links = coo_matrix((np.ones(len(a)), (a, b)), shape=(n_nodes, n_nodes))
+        _, merged = connected_components(links, directed=False)
+        labelled = node >= 0
+        ids, compact = np.unique(merged[node[labelled]], return_inverse=True)
+        self._labels[labelled] = compact
+        self._clusters = _Clusters(len(ids))
+        return self.labels_
+
+    def update(self, lat: Iterable[float], lon: Iterable[float]) -> np.ndarray:
+        """Add points to the fitted clusters and return their labels.
+
+        Only the neighbourhood of the new points is examined. Existing
+        clusters can grow or merge; a merged cluster keeps the smaller id.
+        """
+        lat = np.asarray(lat, dtype=float).ravel()
+        lon = np.asarray(lon, dtype=float).ravel()
+        if len(lat) != len(lon):
+            raise ValueError("lat and lon must have the same length")
+        start, m = len(self), len(lat)
+        if m == 0:
+            return np.empty(0, dtype=np.int64)
+        new = np.arange(start, start + m)
+        self._lat = np.concatenate((self._lat, lat))
+        self._lon = np.concatenate((self._lon, lon))
+        self._counts = np.concatenate((self._counts, np.zeros(m, dtype=np.int64)))
+        self._core = np.concatenate((self._core, np.zeros(m, dtype=bool)))
+        self._labels = np.concatenate((self._labels, np.full(m, -1, dtype=np.int64)))
+        self._index(new)
+
+        neighbours = self._neighbours(new)
+        self._counts[new] = [len(neighbours[i]) for i in new.tolist()]
+        old = [nb[nb < start] for nb in neighbours.values()]
+        np.add.at(self._counts, np.concatenate(old), 1)
+
+        promoted = np.flatnonzero((self._counts >= self.min_samples) & ~self._core)
+        self._core[promoted] = True
+        missing = np.array([p for p in promoted.tolist() if p not in neighbours])
+        if len(missing):
+            neighbours.update(self._neighbours(missing))
+        fresh = promoted[self._labels[promoted] < 0]
+        self._labels[fresh] = self._clusters.add(len(fresh))
+        if len(promoted):
+            owner, nb = self._flatten(promoted, neighbours)
+            core = self._core[nb]
+            self._clusters.merge(self._labels[owner[core]], self._labels[nb[core]])
+            free = self._labels[nb] < 0
+            self._labels[nb[free]] = self._labels[owner[free]]
+
+        orphans = new[self._labels[new] < 0]
+        if len(orphans):
+            owner, nb = self._flatten(orphans, neighbours)
+            core = self._core[nb]
+            first = np.unique(owner[core], return_index=True)[1]
+            self._labels[owner[core][first]] = self._labels[nb[core][first]]
+        return self._resolve(self._labels[new])
+
+    @staticmethod
+    def _flatten(
+        idx: np.ndarray, neighbours: Dict[int, np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return parallel ``(point, neighbour)`` arrays for points in ``idx``."""
+        lists = [neighbours[i] for i in idx.tolist()]
+        owner = np.repeat(idx, [len(nb) for nb in lists])
+        return owner, np.concatenate(lists)
+
+    def _resolve(self, labels: np.ndarray) -> np.ndarray:
+        out = labels.copy()
+        mask = out >= 0
+        out[mask] = self._clusters.roots(out[mask])
+        return out
+
+    @property
+    def labels_(self) -> np.ndarray:
+        """Cluster id of every point added so far, ``-1`` for noise."""
+        return self._resolve(self._labels)
+
+    def centroids(self) -> Dict[int, Tuple[float, float]]:
+        """Return the mean latitude/longitude of each cluster by id."""
+        labels = self.labels_
+        mask = labels >= 0
+        ids, inverse, sizes = np.unique(
+            labels[mask], return_inverse=True, return_counts=True
+        )
+        lat = np.bincount(inverse, weights=self._lat[mask]) / sizes
+        lon = np.bincount(inverse, weights=self._lon[mask]) / sizes
+        return {int(c): (float(a), float(b)) for c, a, b in zip(ids, lat, lon)}
 
 
 def cluster_positions(
@@ -15,9 +317,10 @@ def cluster_positions(
 ) -> List[Tuple[float, float]]:
     """Return cluster centroids for ``records``.
 
-    Each record should contain ``lat`` and ``lon`` keys. The coordinates
-    are clustered using DBSCAN and the mean latitude/longitude for each
-    cluster is returned.
+    Each record should contain ``lat`` and ``lon`` keys. ``eps`` is the
+    neighbourhood radius in degrees of great-circle arc (``0.0005`` is
+    about 55 m). The coordinates are clustered with :class:`GeoClusterer`
+    and the mean latitude/longitude for each cluster is returned.
     """
 
     coords = np.array(
@@ -27,14 +330,11 @@ def cluster_positions(
     if coords.size == 0:
         return []
 
-    labels = DBSCAN(eps=eps, min_samples=min_samples).fit_predict(coords)
-    centers: list[tuple[float, float]] = []
-    for label in set(labels):
-        if label == -1:
-            continue
-        pts = coords[labels == label]
-        centers.append((float(pts[:, 0].mean()), float(pts[:, 1].mean())))
-    return centers
+    clusterer = GeoClusterer(
+        eps_m=math.radians(eps) * EARTH_RADIUS_M, min_samples=min_samples
+    )
+    clusterer.fit(coords[:, 0], coords[:, 1])
+    return list(clusterer.centroids().values())
 
 
-__all__ = ["cluster_positions"]
+__all__ = ["EARTH_RADIUS_M", "GeoClusterer", "cluster_positions"]
@@ -1,14 +1,40 @@
-"""Forecast system health metrics using ARIMA or Prophet."""
+"""Forecast system health metrics.
+
+The default forecaster is a damped Holt (level and trend) exponential
+smoothing model whose state :class:`ForecastService` keeps per series. New
+samples update the state in constant time; the smoothing parameters are
+refitted on a bounded window of recent samples only when the fit is older
+than the refit interval or a CUSUM on the one-step errors signals drift.
+Prophet and ARIMA refits over the whole history remain available through
+``method=`` for offline analysis.
+"""
 
 from __future__ import annotations
 
-from typing import Iterable, List
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterable, List, Sequence, Tuple
 
 import numpy as np
 
 from ..persistence import HealthRecord
 
-__all__ = ["forecast_cpu_temp"]
+__all__ = [
+    "ForecastService",
+    "HoltState",
+    "fit_holt",
+    "forecast_cpu_temp",
+    "forecaster",
+]
+
+ALPHAS = np.linspace(0.05, 0.95, 19)
+BETAS = np.array([0.01, 0.05, 0.1, 0.2, 0.3, 0.5])
+DAMPING = 0.98
+# floor for the error variance so constant series still detect changes
+MIN_VARIANCE = 1e-6
 
 
 def _arima_forecast(values: list[float], steps: int) -> list[float]:
@@ -33,15 +59,236 @@ def _prophet_forecast(values: list[float], steps: int) -> list[float]:
     return [float(x) for x in forecast["yhat"].tail(steps)]
 
 
-def forecast_cpu_temp(records: Iterable[HealthRecord], steps: int) -> List[float]:
+@dataclass
+class HoltState:
+    """Smoothing parameters and current level/trend of one series."""
+
+    alpha: float
+    beta: float
+    phi: float
+    level: float
+    trend: float
+    sigma2: float
+    cusum_pos: float = 0.0
+    cusum_neg: float = 0.0
+    updates: int = 0
+    fitted_at: float = 0.0
+
+    def update(self, value: float, slack: float = 0.5) -> float:
+        """Fold ``value`` into the state and return the standardized error."""
+        pred = self.level + self.phi * self.trend
+        err = value - pred
+        self.level = pred + self.alpha * err
+        self.trend = self.phi * self.trend + self.alpha * self.beta * err
+        z = err / math.sqrt(max(self.sigma2, MIN_VARIANCE))
+        self.cusum_pos = max(0.0, self.cusum_pos + z - slack)
+        self.cusum_neg = max(0.0, self.cusum_neg - z - slack)
+        self.updates += 1
+        return z
+
+    def predict(self, steps: int) -> List[float]:
+        """Return forecasts for the next ``steps`` samples."""
+        damp = np.cumsum(self.phi ** np.arange(1, steps + 1))
+        return (self.level + damp * self.trend).tolist()
+
+
+def fit_holt(values: Sequence[float], phi: float = DAMPING) -> HoltState:
+    """Fit a damped Holt model to ``values`` by grid search on one-step SSE.
+
+    All parameter combinations are filtered in a single pass over the data.
+    """
+    y = np.asarray(values, dtype=float)
+    if len(y) == 0:
+        raise ValueError("no values to fit")
+    alpha, beta = (g.ravel() for g in np.meshgrid(ALPHAS, BETAS))
+    level = np.full(alpha.shape, y[0])
+    trend = np.full(alpha.shape, y[1] - y[0] if len(y) > 1 else 0.0)
+    sse = np.zeros(alpha.shape)
+    for x in y[1:]:
+        pred = level + phi * trend
+        err = x - pred
+        sse += err * err
+        level = pred + alpha * err
+        trend = phi * trend + alpha * beta * err
+    best = int(np.argmin(sse))
+    return HoltState(
+        alpha=float(alpha[best]),
+        beta=float(beta[best]),
+        phi=phi,
+        level=float(level[best]),
+        trend=float(trend[best]),
+        sigma2=float(sse[best]) / max(len(y) - 1, 1),
+        fitted_at=time.monotonic(),
+    )
+
+
+@dataclass
+class _Series:
+    state: HoltState
+    history: Deque[float]
+    last_key: Any = None
+    refits: int = 1
+    fit_size: int = 0
+
+
+class ForecastService:
+    """Keep fitted forecasting state per named series."""
+
+    def __init__(
+        self,
+        window: int = 2000,
+        refit_interval: float = 3600.0,
+        drift_threshold: float = 5.0,
+        cusum_slack: float = 0.5,
+        min_samples: int = 20,
+    ) -> None:
+        """Initialize the service.
+
+        Args:
+            window: Recent samples kept per series for refits.
+            refit_interval: Seconds after which a series is refitted.
+            drift_threshold: CUSUM level of standardized one-step errors
+                that triggers an early refit.
+            cusum_slack: Allowed drift per sample before the CUSUM grows.
+            min_samples: Series fitted on fewer samples are refitted on
+                every new sample until they reach this size.
+        """
+        self.window = window
+        self.refit_interval = refit_interval
+        self.drift_threshold = drift_threshold
+        self.cusum_slack = cusum_slack
+        self.min_samples = min_samples
+        self._series: Dict[str, _Series] = {}
+        self._lock = threading.Lock()
+
+    def _fit(self, name: str, values: Sequence[float], key: Any) -> _Series:
+        history = deque(values[-self.window :], maxlen=self.window)
+        old = self._series.get(name)
+        series = _Series(fit_holt(history), history, key, fit_size=len(history))
+        if old is not None:
+            series.refits = old.refits + 1
+        self._series[name] = series
+        return series
+
+    def _needs_refit(self, series: _Series) -> bool:
+        state = series.state
+        return (
+            series.fit_size < min(self.min_samples, len(series.history))
+            or max(state.cusum_pos, state.cusum_neg) > self.drift_threshold
+            or time.monotonic() - state.fitted_at > self.refit_interval
+        )
+
+    def _observe(self, series: _Series, value: float, key: Any) -> None:
+        series.state.update(value, self.cusum_slack)
+        series.history.append(value)
+        series.last_key = key
+
+    def observe(self, name: str, value: float, key: Any = None) -> None:
+        """Add one sample to series ``name`` in constant time.
+
+        A refit runs only if the series is due for one.
+        """
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                self._fit(name, [value], key)
+                return
+            self._observe(series, value, key)
+            if self._needs_refit(series):
+                self._fit(name, list(series.history), key)
+
+    def sync(self, name: str, samples: Sequence[Tuple[Any, float]]) -> None:
+        """Bring ``name`` up to date with ``(key, value)`` samples sorted by key.
+
+        Only samples newer than the last key seen are applied. A history
+        that ends before that key is treated as a different series and
+        fitted from scratch.
+        """
+        if not samples:
+            return
+        with self._lock:
+            series = self._series.get(name)
+            if (
+                series is None
+                or series.last_key is None
+                or samples[-1][0] < series.last_key
+            ):
+                self._fit(name, [v for _, v in samples], samples[-1][0])
+                return
+            new = [(k, v) for k, v in samples if k > series.last_key]
+            if len(new) >= self.window:
+                self._fit(name, [v for _, v in samples], samples[-1][0])
+                return
+            for key, value in new:
+                self._observe(series, value, key)
+            if new and self._needs_refit(series):
+                self._fit(name, list(series.history), series.last_key)
+
+    def forecast(self, name: str, steps: int) -> List[float]:
+        """Return ``steps`` forecasts for ``name`` from its current state."""
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                return [float("nan")] * steps
+            return series.state.predict(steps)
+
+    def refit(self, name: str) -> None:
+        """Refit ``name`` on its buffered window now."""
+        with self._lock:
+            series = self._series.get(name)
+            if series is not None:
+                self._fit(name, list(series.history), series.last_key)
+
+    def reset(self, name: str | None = None) -> None:
+        """Forget one series or all of them."""
+        with self._lock:
+            if name is None:
+                self._series.clear()
+            else:
+                self._series.pop(name, None)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return parameters and update counters per series."""
+        with self._lock:
+            return {
+                name: {
+                    "alpha": s.state.alpha,
+                    "beta": s.state.beta,
+                    "updates": s.state.updates,
+                    "refits": s.refits,
+                    "window": len(s.history),
+                    "drift": max(s.state.cusum_pos, s.state.cusum_neg),
+                }
+                for name, s in self._series.items()
+            }
+
+
+forecaster = ForecastService()
+
+
+def forecast_cpu_temp(
+    records: Iterable[HealthRecord],
+    steps: int,
+    method: str = "holt",
+    series: str | None = None,
+) -> List[float]:
     """Predict CPU temperature for upcoming intervals.
 
     Parameters
     ----------
     records:
-        Historical :class:`HealthRecord` samples.
+        Historical :class:`HealthRecord` samples in any order.
     steps:
         Number of future time steps to forecast.
+    method:
+        ``"holt"`` (default) forecasts with a damped Holt model.
+        ``"prophet"`` refits Prophet, falling back to ARIMA, on the whole
+        history.
+    series:
+        With ``"holt"``, name of a series in the shared :data:`forecaster`
+        to update with records it has not seen yet. Without a name a fresh
+        model is fitted on the most recent ``forecaster.window`` records
+        and no state is kept.
 
     Returns
     -------
@@ -49,10 +296,19 @@ def forecast_cpu_temp(records: Iterable[HealthRecord], steps: int) -> List[float
         Predicted CPU temperatures for each step.
     """
 
-    temps = [r.cpu_temp for r in records if r.cpu_temp is not None]
-    if not temps:
+    samples = sorted(
+        (r.timestamp, r.cpu_temp) for r in records if r.cpu_temp is not None
+    )
+    if not samples:
         return [float("nan")] * steps
 
+    if method == "holt":
+        if series is not None:
+            forecaster.sync(series, samples)
+            return forecaster.forecast(series, steps)
+        return fit_holt([t for _, t in samples[-forecaster.window :]]).predict(steps)
+
+    temps = [t for _, t in samples]
     try:
         return _prophet_forecast(temps, steps)
     except Exception:  # pragma: no cover - optional dependency
@@ -33,3 +33,8 @@ async def get_temporal_patterns(_auth: Any = AUTH_DEP) -> list[dict[str, Any]]:
 @router.get("/mobile-devices")
 async def get_mobile_devices(_auth: Any = AUTH_DEP) -> list[dict[str, Any]]:
     return await analysis_queries.mobile_device_detection()
+
+
+@router.get("/cache-stats")
+async def get_cache_stats(_auth: Any = AUTH_DEP) -> dict[str, Any]:
+    return analysis_queries.cache_stats()
@@ -7,6 +7,7 @@ from typing import Any
 from fastapi import APIRouter
 
 from piwardrive.api.auth import AUTH_DEP
+from piwardrive.logging.structured_logger import get_log_stats
 from piwardrive.services import monitoring
 
 router = APIRouter(prefix="/monitoring", tags=["monitoring"])
@@ -18,4 +19,18 @@ async def get_performance(_auth: Any = AUTH_DEP) -> dict[str, Any]:
     return await monitoring.collect_performance_metrics()
 
 
+@router.get("/sources")
+async def get_metric_sources(_auth: Any = AUTH_DEP) -> dict[str, Any]:
+    """Return latency and staleness for each widget metrics source."""
+    from piwardrive.api.system import get_source_metrics
+
+    return get_source_metrics()
+
+
+@router.get("/logging")
+async def get_logging_stats(_auth: Any = AUTH_DEP) -> dict[str, int]:
+    """Return emitted, dropped and queued counts of the shared log queue."""
+    return get_log_stats()
+
+
 __all__ = ["router"]
@@ -1,4 +1,4 @@
 from .endpoints_simple import router
-from .monitoring import collect_widget_metrics
+from .monitoring import collect_widget_metrics, get_source_metrics
 
-__all__ = ["router", "collect_widget_metrics"]
+__all__ = ["router", "collect_widget_metrics", "get_source_metrics"]
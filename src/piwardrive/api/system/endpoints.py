@@ -155,6 +155,16 @@ async def db_health_endpoint(_auth: Any = AUTH_DEP) -> dict[str, Any]:
     }
 
 
+@router.get("/db-query-stats")
+async def db_query_stats_endpoint(
+    limit: int = 20, sort: str = "total", _auth: Any = AUTH_DEP
+) -> list[dict[str, Any]]:
+    try:
+        return db_monitor.top_queries(limit, sort)
+    except ValueError as exc:
+        raise ServiceError(str(exc), status_code=400) from exc
+
+
 @router.get("/db-index-usage")
 async def db_index_usage_endpoint(
     _auth: Any = AUTH_DEP,
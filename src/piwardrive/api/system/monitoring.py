@@ -1,35 +1,82 @@
 from __future__ import annotations
 
-import asyncio
+import logging
 from datetime import datetime, timedelta
+from typing import Any, Dict
 
 import psutil
 
 from piwardrive import service, vehicle_sensors
 from piwardrive.database_service import db_service
-from piwardrive.utils import MetricsResult
+from piwardrive.services.metrics_collector import MetricsCollector, MetricSource
+
+logger = logging.getLogger(__name__)
+
+
+async def _scan_metrics() -> Any:
+    return await service.fetch_metrics_async()
+
+
+async def _suspicious_count() -> int:
+    since = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+    return await db_service.count_suspicious_activities(since)
+
+
+def _battery() -> tuple[Any, Any]:
+    batt = psutil.sensors_battery()
+    if batt is None:
+        return None, None
+    return batt.percent, batt.power_plugged
+
+
+def _vehicle() -> tuple[Any, Any, Any]:
+    # one worker thread hop for all three OBD queries
+    return (
+        vehicle_sensors.read_speed_obd(),
+        vehicle_sensors.read_rpm_obd(),
+        vehicle_sensors.read_engine_load_obd(),
+    )
+
+
+def _service_running(name: str) -> Any:
+    async def _status() -> bool:
+        return await service.service_status_async(name)
+
+    return _status
+
+
+collector = MetricsCollector(
+    [
+        MetricSource("scan", _scan_metrics, interval=2.0, timeout=5.0),
+        MetricSource("throughput", lambda: service.get_network_throughput(), 2.0),
+        MetricSource("cpu_temp", lambda: service.get_cpu_temp(), 5.0),
+        MetricSource("gps_fix", lambda: service.get_gps_fix_quality(), 1.0),
+        MetricSource("kismet", _service_running("kismet"), 10.0, 3.0, default=False),
+        MetricSource(
+            "bettercap", _service_running("bettercap"), 10.0, 3.0, default=False
+        ),
+        MetricSource("suspicious", _suspicious_count, 30.0, 3.0, default=0),
+        MetricSource("battery", _battery, 30.0, 2.0, default=(None, None)),
+        MetricSource("vehicle", _vehicle, 2.0, 3.0, default=(None, None, None)),
+    ]
+)
 
 
 async def collect_widget_metrics() -> service.WidgetMetrics:
-    """Return basic metrics used by dashboard widgets."""
-    metrics: MetricsResult = await service.fetch_metrics_async()
-    aps = metrics.aps
-    handshakes = metrics.handshake_count
-    rx, tx = service.get_network_throughput()
-    try:
-        since = (datetime.utcnow() - timedelta(hours=1)).isoformat()
-        suspicious_count = await db_service.count_suspicious_activities(since)
-    except Exception:  # pragma: no cover - database errors
-        service.logging.debug("suspicious activity count failed", exc_info=True)
-        suspicious_count = 0
-    batt_percent = batt_plugged = None
-    try:
-        batt = await asyncio.to_thread(psutil.sensors_battery)
-        if batt is not None:
-            batt_percent = batt.percent
-            batt_plugged = batt.power_plugged
-    except Exception:  # pragma: no cover - optional dependency
-        service.logging.debug("battery info unavailable", exc_info=True)
+    """Return basic metrics used by dashboard widgets.
+
+    Values come from :data:`collector`, which refreshes due sources in the
+    background, so this returns without waiting on slow sources. Names of
+    sources whose value is stale are listed under ``stale_sources``.
+    """
+    values = await collector.collect()
+    scan = values["scan"]
+    aps = scan.aps if scan is not None else []
+    handshakes = scan.handshake_count if scan is not None else 0
+    rx, tx = values["throughput"] or (0.0, 0.0)
+    suspicious_count = values["suspicious"] or 0
+    batt_percent, batt_plugged = values["battery"]
+    speed, rpm, load = values["vehicle"]
 
     detection_rate = handshakes / max(len(aps), 1)
     threat_level = (
@@ -39,13 +86,13 @@ async def collect_widget_metrics() -> service.WidgetMetrics:
     security_score = max(0.0, 100 - suspicious_count * 5)
 
     return {
-        "cpu_temp": service.get_cpu_temp(),
+        "cpu_temp": values["cpu_temp"],
         "bssid_count": len(aps),
         "handshake_count": handshakes,
         "avg_rssi": service.get_avg_rssi(aps),
-        "kismet_running": await service.service_status_async("kismet"),
-        "bettercap_running": await service.service_status_async("bettercap"),
-        "gps_fix": service.get_gps_fix_quality(),
+        "kismet_running": values["kismet"],
+        "bettercap_running": values["bettercap"],
+        "gps_fix": values["gps_fix"],
         "rx_kbps": rx,
         "tx_kbps": tx,
         "suspicious_activity_count": suspicious_count,
@@ -55,7 +102,13 @@ async def collect_widget_metrics() -> service.WidgetMetrics:
         "security_score": security_score,
         "battery_percent": batt_percent,
         "battery_plugged": batt_plugged,
-        "vehicle_speed": await asyncio.to_thread(vehicle_sensors.read_speed_obd),
-        "vehicle_rpm": await asyncio.to_thread(vehicle_sensors.read_rpm_obd),
-        "engine_load": await asyncio.to_thread(vehicle_sensors.read_engine_load_obd),
+        "vehicle_speed": speed,
+        "vehicle_rpm": rpm,
+        "engine_load": load,
+        "stale_sources": collector.stale(),
     }
+
+
+def get_source_metrics() -> Dict[str, Dict[str, Any]]:
+    """Return per-source latency and staleness of the widget metrics."""
+    return collector.metrics()
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import json
 from typing import AsyncGenerator
 
 from fastapi import Request
@@ -8,12 +7,15 @@ from fastapi.responses import StreamingResponse
 
 from piwardrive import service
 from piwardrive.database_service import db_service
+from piwardrive.serialization import get_codec
 
 
 async def broadcast_events(request: Request) -> StreamingResponse:
     """Stream access point updates using Server-Sent Events."""
 
-    async def _gen() -> AsyncGenerator[str, None]:
+    codec = get_codec("json")
+
+    async def _gen() -> AsyncGenerator[bytes, None]:
         seq = 0
         last_time = 0.0
         while True:
@@ -25,7 +27,7 @@ async def broadcast_events(request: Request) -> StreamingResponse:
             if records:
                 last_time = max(r["last_time"] for r in records)
             data = {"seq": seq, "aps": records}
-            yield f"data: {json.dumps(data)}\n\n"
+            yield b"data: " + codec.dumps(data) + b"\n\n"
             seq += 1
             await service.asyncio.sleep(service.STREAM_SLEEP)
 
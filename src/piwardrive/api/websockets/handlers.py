@@ -3,7 +3,6 @@ from __future__ import annotations
 """WebSocket handlers."""
 
 import inspect
-import json
 import time
 
 from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
@@ -11,13 +10,33 @@ from fastapi.responses import StreamingResponse
 
 from piwardrive import service
 from piwardrive.database_service import db_service
+from piwardrive.serialization import (
+    Codec,
+    get_codec,
+    negotiate_subprotocol,
+    send_encoded,
+)
+
+_JSON = get_codec("json")
+
+
+async def _accept(websocket: WebSocket) -> Codec:
+    """Accept ``websocket`` using the codec named by its subprotocol, if any."""
+    codec = negotiate_subprotocol(websocket.scope.get("subprotocols") or [])
+    await websocket.accept(subprotocol=codec.name if codec else None)
+    return codec or _JSON
+
+
+def _sse(data: object) -> bytes:
+    return b"data: " + _JSON.dumps(data) + b"\n\n"
+
 
 router = APIRouter()
 
 
 @router.websocket("/ws/aps")
 async def ws_aps(websocket: WebSocket) -> None:
-    await websocket.accept()
+    codec = await _accept(websocket)
     seq = 0
     last_time = 0.0
     error_count = 0
@@ -41,7 +60,8 @@ async def ws_aps(websocket: WebSocket) -> None:
             }
             try:
                 await service.asyncio.wait_for(
-                    websocket.send_json(data), timeout=service.WEBSOCKET_SEND_TIMEOUT
+                    send_encoded(websocket, data, codec),
+                    timeout=service.WEBSOCKET_SEND_TIMEOUT,
                 )
             except (service.asyncio.TimeoutError, Exception):
                 error_count += 1
@@ -80,7 +100,7 @@ async def sse_aps(request: Request) -> StreamingResponse:
                 "load_time": load_time,
                 "errors": error_count,
             }
-            yield f"data: {json.dumps(data)}\n\n"
+            yield _sse(data)
             seq += 1
             await service.asyncio.sleep(service.STREAM_SLEEP)
 
@@ -92,7 +112,7 @@ async def sse_aps(request: Request) -> StreamingResponse:
 
 @router.websocket("/ws/status")
 async def ws_status(websocket: WebSocket) -> None:
-    await websocket.accept()
+    codec = await _accept(websocket)
     seq = 0
     error_count = 0
     try:
@@ -106,7 +126,8 @@ async def ws_status(websocket: WebSocket) -> None:
             }
             try:
                 await service.asyncio.wait_for(
-                    websocket.send_json(data), timeout=service.WEBSOCKET_SEND_TIMEOUT
+                    send_encoded(websocket, data, codec),
+                    timeout=service.WEBSOCKET_SEND_TIMEOUT,
                 )
             except (service.asyncio.TimeoutError, Exception):
                 error_count += 1
@@ -133,7 +154,7 @@ async def sse_status(request: Request) -> StreamingResponse:
                 "metrics": await service._collect_widget_metrics(),
                 "errors": error_count,
             }
-            yield f"data: {json.dumps(data)}\n\n"
+            yield _sse(data)
             seq += 1
             await service.asyncio.sleep(service.STREAM_SLEEP)
 
@@ -48,6 +48,16 @@ async def get_widget_metrics(_auth: Any = AUTH_DEP) -> WidgetMetrics:
     return await _collect_widget_metrics()
 
 
+@router.get("/widget-data-costs")
+async def get_widget_data_costs(
+    _auth: Any = AUTH_DEP,
+) -> Dict[str, Dict[str, float]]:
+    """Return refresh cost figures for each shared widget dataset."""
+    from piwardrive.widget_data import data_hub
+
+    return data_hub.costs()
+
+
 @router.get("/plugins")
 async def get_plugins(_auth: Any = AUTH_DEP) -> list[str]:
     from piwardrive import widgets
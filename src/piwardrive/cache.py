@@ -1,32 +1,79 @@
 """Redis-based caching system for PiWardrive.
 
 This module provides a lightweight Redis cache implementation with TTL support
-for efficient data caching and retrieval.
+for efficient data caching and retrieval. Values are encoded with a codec from
+:mod:`piwardrive.serialization` (``json`` unless configured otherwise) and
+stored as bytes.
+
+:class:`TieredCache` puts a bounded in-process LRU (L1) in front of Redis
+(L2). Writes and invalidations are announced on a Redis pub/sub channel so
+other processes drop their stale L1 entries, concurrent loads of the same key
+share one call, and group invalidation uses tag sets or ``SCAN`` instead of
+``KEYS``. Without a reachable Redis the cache keeps working from L1 alone.
 """
 
 from __future__ import annotations
 
-import json
-from typing import Any
+import asyncio
+import contextlib
+import logging
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Set
 
 from .cache_config import load_cache_config
 from .core.utils import _get_redis_client
+from .serialization import Codec, get_codec
+
+logger = logging.getLogger(__name__)
+
+SCAN_COUNT = 500
+INVALIDATION_CHANNEL = "piwardrive:cache:invalidate"
+# how long to serve from L1 only after a Redis error
+REDIS_RETRY_SECONDS = 30.0
+
+
+async def _scan_delete(cli: Any, pattern: str) -> int:
+    """Delete keys matching ``pattern`` using ``SCAN`` in batches."""
+    deleted = 0
+    batch: List[Any] = []
+    async for key in cli.scan_iter(match=pattern, count=SCAN_COUNT):
+        batch.append(key)
+        if len(batch) >= SCAN_COUNT:
+            await cli.delete(*batch)
+            deleted += len(batch)
+            batch = []
+    if batch:
+        await cli.delete(*batch)
+        deleted += len(batch)
+    return deleted
 
 
 class RedisCache:
     """Lightweight async Redis cache with optional TTL."""
 
-    def __init__(self, prefix: str = "cache", default_ttl: int | None = None) -> None:
+    def __init__(
+        self,
+        prefix: str = "cache",
+        default_ttl: int | None = None,
+        codec: str | Codec | None = None,
+    ) -> None:
         """Initialize the Redis cache.
 
         Args:
             prefix: Key prefix for cache entries.
             default_ttl: Default TTL for ``set`` operations if not provided.
+            codec: Value codec name, defaults to ``redis.codec`` from the cache
+                configuration or ``json``.
         """
         self._prefix = prefix
+        redis_cfg = load_cache_config().get("redis", {})
         if default_ttl is None:
-            default_ttl = load_cache_config().get("redis", {}).get("default_ttl")
+            default_ttl = redis_cfg.get("default_ttl")
         self._default_ttl = default_ttl
+        self._codec = get_codec(codec or redis_cfg.get("codec", "json"))
 
     def _key(self, key: str) -> str:
         return f"{self._prefix}:{key}"
@@ -44,7 +91,7 @@ class RedisCache:
         if cli is None:
             return None
         data = await cli.get(self._key(key))
-        return json.loads(data) if data else None
+        return self._codec.loads(data) if data else None
 
     async def set(self, key: str, value: Any, ttl: int | None = None) -> None:
         """Set a value in cache.
@@ -59,8 +106,7 @@ class RedisCache:
             return
         if ttl is None:
             ttl = self._default_ttl
-        data = json.dumps(value)
-        await cli.set(self._key(key), data, ex=ttl)
+        await cli.set(self._key(key), self._codec.dumps(value), ex=ttl)
 
     async def invalidate(self, key: str) -> None:
         """Remove a key from cache.
@@ -78,18 +124,386 @@ class RedisCache:
         cli = _get_redis_client()
         if cli is None:
             return
-        keys = await cli.keys(pattern)
-        if keys:
-            await cli.delete(*keys)
+        await _scan_delete(cli, pattern)
 
     async def clear(self) -> None:
         """Clear all cache entries with this prefix."""
         cli = _get_redis_client()
         if cli is None:
             return
-        keys = await cli.keys(f"{self._prefix}:*")
-        if keys:
-            await cli.delete(*keys)
+        await _scan_delete(cli, f"{self._prefix}:*")
+
+
+_MISS = object()
+_DEFAULT_CLIENT = object()
+_JSON = get_codec("json")
+
+
+def _cap(ttl: float, remaining: float | None) -> float:
+    """Return ``ttl`` limited to the ``remaining`` lifetime of the L2 entry."""
+    return ttl if remaining is None else min(ttl, remaining)
+
+
+class _InvalidationBus:
+    """Relay L1 invalidations between processes over Redis pub/sub."""
+
+    def __init__(self) -> None:
+        self.caches: "weakref.WeakSet[TieredCache]" = weakref.WeakSet()
+        self._listeners: Dict[int, tuple[asyncio.Task[None], Any]] = {}
+
+    def ensure_listener(self, cli: Any) -> None:
+        """Subscribe with ``cli`` on the running loop unless already listening."""
+        loop = asyncio.get_running_loop()
+        current = self._listeners.get(id(cli))
+        if current is not None and not current[0].done() and current[1] is loop:
+            return
+        task = loop.create_task(self._listen(cli), name="cache-invalidation")
+        self._listeners[id(cli)] = (task, loop)
+
+    async def _listen(self, cli: Any) -> None:
+        pubsub = cli.pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    self.dispatch(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.debug("Cache invalidation listener stopped", exc_info=True)
+        finally:
+            with contextlib.suppress(Exception):
+                await pubsub.aclose()
+
+    def dispatch(self, data: bytes | str) -> None:
+        """Apply an invalidation message to every matching cache."""
+        try:
+            msg = _JSON.loads(data)
+        except Exception:
+            return
+        for cache in list(self.caches):
+            if cache.namespace == msg.get("ns") and cache._id != msg.get("origin"):
+                cache._drop_local(msg.get("keys"))
+
+    async def stop(self) -> None:
+        """Cancel all listener tasks."""
+        tasks = [task for task, _ in self._listeners.values()]
+        self._listeners.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+_bus = _InvalidationBus()
+
+
+class TieredCache:
+    """In-process LRU cache backed by Redis with cross-process invalidation."""
+
+    def __init__(
+        self,
+        namespace: str,
+        *,
+        maxsize: int = 1024,
+        ttl: int = 300,
+        l1_ttl: float | None = None,
+        codec: str | Codec | None = None,
+        client: Any = _DEFAULT_CLIENT,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            namespace: Key prefix in Redis and name used in metrics.
+            maxsize: Maximum number of entries kept in process.
+            ttl: Default time to live in seconds.
+            l1_ttl: Upper bound for the lifetime of L1 entries; bounds
+                staleness if an invalidation message is lost.
+            codec: Value codec for Redis, defaults to ``redis.codec`` from the
+                cache configuration or ``json``.
+            client: Redis client to use, ``None`` for an L1-only cache. The
+                shared client from the cache configuration is used by default.
+        """
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.l1_ttl = l1_ttl
+        redis_cfg = load_cache_config().get("redis", {})
+        self._codec = get_codec(codec or redis_cfg.get("codec", "json"))
+        self._client = client
+        self._id = uuid.uuid4().hex
+        self._l1: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._key_tags: Dict[str, Set[str]] = {}
+        self._tag_keys: Dict[str, Set[str]] = {}
+        self._inflight: Dict[str, asyncio.Future[Any]] = {}
+        self._down_until = 0.0
+        self._max_ttl = ttl
+        self.stats: Dict[str, int] = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "loads": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "errors": 0,
+        }
+        _bus.caches.add(self)
+
+    # ------------------------------------------------------------------
+    # L1
+    def _l1_get(self, key: str) -> Any:
+        entry = self._l1.get(key)
+        if entry is None:
+            return _MISS
+        if entry[0] < time.monotonic():
+            self._drop_local([key])
+            return _MISS
+        self._l1.move_to_end(key)
+        return entry[1]
+
+    def _l1_put(self, key: str, value: Any, ttl: float, tags: Iterable[str]) -> None:
+        if self.l1_ttl is not None:
+            ttl = min(ttl, self.l1_ttl)
+        self._l1[key] = (time.monotonic() + ttl, value)
+        self._l1.move_to_end(key)
+        for tag in tags:
+            self._key_tags.setdefault(key, set()).add(tag)
+            self._tag_keys.setdefault(tag, set()).add(key)
+        while len(self._l1) > self.maxsize:
+            oldest = next(iter(self._l1))
+            self._drop_local([oldest])
+            self.stats["evictions"] += 1
+
+    def _drop_local(self, keys: Iterable[str] | None) -> None:
+        if keys is None:
+            self._l1.clear()
+            self._key_tags.clear()
+            self._tag_keys.clear()
+            return
+        for key in keys:
+            self._l1.pop(key, None)
+            for tag in self._key_tags.pop(key, ()):
+                members = self._tag_keys.get(tag)
+                if members is not None:
+                    members.discard(key)
+                    if not members:
+                        del self._tag_keys[tag]
+
+    # ------------------------------------------------------------------
+    # L2
+    def _redis(self) -> Any:
+        cli = _get_redis_client() if self._client is _DEFAULT_CLIENT else self._client
+        if cli is None or time.monotonic() < self._down_until:
+            return None
+        return cli
+
+    def _redis_failed(self) -> None:
+        self.stats["errors"] += 1
+        self._down_until = time.monotonic() + REDIS_RETRY_SECONDS
+        logger.debug("Redis unavailable for cache %s", self.namespace, exc_info=True)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.namespace}:tag:{tag}"
+
+    async def _publish(self, cli: Any, keys: List[str] | None) -> None:
+        msg = {"ns": self.namespace, "origin": self._id, "keys": keys}
+        await cli.publish(INVALIDATION_CHANNEL, _JSON.dumps(msg))
+
+    async def _l2_get(self, key: str) -> tuple[Any, float | None]:
+        """Return the Redis value of ``key`` and its remaining lifetime.
+
+        The lifetime is ``None`` when the key does not expire.
+        """
+        cli = self._redis()
+        if cli is None:
+            return _MISS, None
+        try:
+            async with cli.pipeline(transaction=False) as pipe:
+                pipe.get(self._key(key))
+                pipe.pttl(self._key(key))
+                data, pttl = await pipe.execute()
+            _bus.ensure_listener(cli)
+        except Exception:
+            self._redis_failed()
+            return _MISS, None
+        if data is None:
+            return _MISS, None
+        try:
+            value = self._codec.loads(data)
+        except Exception:
+            logger.debug("Undecodable cache value for %s", key, exc_info=True)
+            return _MISS, None
+        return value, pttl / 1000.0 if pttl is not None and pttl >= 0 else None
+
+    # ------------------------------------------------------------------
+    # Public API
+    async def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value of ``key`` or ``default``."""
+        value = self._l1_get(key)
+        if value is not _MISS:
+            self.stats["l1_hits"] += 1
+            return value
+        value, remaining = await self._l2_get(key)
+        if value is not _MISS:
+            self.stats["l2_hits"] += 1
+            self._l1_put(key, value, _cap(self.ttl, remaining), ())
+            return value
+        self.stats["misses"] += 1
+        return default
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: int | None = None,
+        tags: Iterable[str] = (),
+    ) -> None:
+        """Store ``value`` in both tiers.
+
+        Args:
+            key: Cache key.
+            value: Value to cache; must be encodable by the codec.
+            ttl: Time to live in seconds, defaults to the cache TTL.
+            tags: Groups the key belongs to for :meth:`invalidate_tag`.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        tags = tuple(tags)
+        self._l1_put(key, value, ttl, tags)
+        cli = self._redis()
+        if cli is None:
+            return
+        self._max_ttl = max(self._max_ttl, ttl)
+        try:
+            data = self._codec.dumps(value)
+            async with cli.pipeline(transaction=False) as pipe:
+                pipe.set(self._key(key), data, ex=ttl)
+                for tag in tags:
+                    pipe.sadd(self._tag_key(tag), key)
+                    pipe.expire(self._tag_key(tag), self._max_ttl)
+                await pipe.execute()
+            await self._publish(cli, [key])
+            _bus.ensure_listener(cli)
+        except Exception:
+            self._redis_failed()
+
+    async def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int | None = None,
+        tags: Iterable[str] = (),
+    ) -> Any:
+        """Return the cached value of ``key``, loading it on a miss.
+
+        Concurrent callers missing the same key wait for a single
+        ``loader`` call instead of running their own.
+        """
+        value = self._l1_get(key)
+        if value is not _MISS:
+            self.stats["l1_hits"] += 1
+            return value
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(pending)
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value, remaining = await self._l2_get(key)
+            if value is not _MISS:
+                self.stats["l2_hits"] += 1
+                ttl_l1 = _cap(self.ttl if ttl is None else ttl, remaining)
+                self._l1_put(key, value, ttl_l1, tags)
+            else:
+                self.stats["misses"] += 1
+                self.stats["loads"] += 1
+                value = await loader()
+                await self.set(key, value, ttl, tags)
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # waiters re-raise; don't warn when there are none
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            self._inflight.pop(key, None)
+        return value
+
+    async def invalidate(self, key: str) -> None:
+        """Remove ``key`` from this and every other process."""
+        await self._invalidate_keys([key])
+
+    async def invalidate_tag(self, tag: str) -> int:
+        """Remove every key stored with ``tag`` and return how many were known."""
+        keys = set(self._tag_keys.get(tag, ()))
+        cli = self._redis()
+        if cli is not None:
+            try:
+                members = await cli.smembers(self._tag_key(tag))
+                keys.update(m.decode() if isinstance(m, bytes) else m for m in members)
+                await cli.delete(self._tag_key(tag))
+            except Exception:
+                self._redis_failed()
+        await self._invalidate_keys(sorted(keys))
+        return len(keys)
+
+    async def _invalidate_keys(self, keys: List[str]) -> None:
+        self.stats["invalidations"] += len(keys)
+        self._drop_local(keys)
+        cli = self._redis()
+        if cli is None or not keys:
+            return
+        try:
+            await cli.delete(*(self._key(k) for k in keys))
+            await self._publish(cli, keys)
+        except Exception:
+            self._redis_failed()
+
+    async def clear(self) -> None:
+        """Remove every entry of this namespace from all tiers and processes."""
+        self._drop_local(None)
+        cli = self._redis()
+        if cli is None:
+            return
+        try:
+            await _scan_delete(cli, f"{self.namespace}:*")
+            await self._publish(cli, None)
+        except Exception:
+            self._redis_failed()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return hit counters, hit rates and L1 size."""
+        stats = dict(self.stats)
+        lookups = stats["l1_hits"] + stats["l2_hits"] + stats["misses"]
+        stats["size"] = len(self._l1)
+        stats["hit_rate"] = (
+            (stats["l1_hits"] + stats["l2_hits"]) / lookups if lookups else 0.0
+        )
+        stats["l1_hit_rate"] = stats["l1_hits"] / lookups if lookups else 0.0
+        stats["redis"] = self._redis() is not None
+        return stats
+
+
+def cache_metrics() -> Dict[str, Dict[str, Any]]:
+    """Return :meth:`TieredCache.metrics` per namespace, summed over instances."""
+    result: Dict[str, Dict[str, Any]] = {}
+    for cache in list(_bus.caches):
+        stats = cache.metrics()
+        merged = result.setdefault(cache.namespace, {})
+        for name, value in stats.items():
+            if isinstance(value, bool):
+                merged[name] = merged.get(name, False) or value
+            elif name not in ("hit_rate", "l1_hit_rate"):
+                merged[name] = merged.get(name, 0) + value
+    for merged in result.values():
+        lookups = merged["l1_hits"] + merged["l2_hits"] + merged["misses"]
+        hits = merged["l1_hits"] + merged["l2_hits"]
+        merged["hit_rate"] = hits / lookups if lookups else 0.0
+        merged["l1_hit_rate"] = merged["l1_hits"] / lookups if lookups else 0.0
+    return result
 
 
-__all__ = ["RedisCache"]
+__all__ = ["INVALIDATION_CHANNEL", "RedisCache", "TieredCache", "cache_metrics"]
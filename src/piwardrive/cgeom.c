@@ -1,12 +1,9 @@
 #define PY_SSIZE_T_CLEAN
 #include <Python.h>
 #include <math.h>
+#include <string.h>
 
-static PyObject* py_haversine_distance(PyObject* self, PyObject* args) {
-    double lat1, lon1, lat2, lon2;
-    if (!PyArg_ParseTuple(args, "(dd)(dd)", &lat1, &lon1, &lat2, &lon2)) {
-        return NULL;
-    }
+static double haversine(double lat1, double lon1, double lat2, double lon2) {
     double r = 6371000.0;
     double phi1 = lat1 * M_PI / 180.0;
     double phi2 = lat2 * M_PI / 180.0;
@@ -15,8 +12,33 @@ static PyObject* py_haversine_distance(PyObject* self, PyObject* args) {
     double a = sin(d_phi / 2) * sin(d_phi / 2) +
                cos(phi1) * cos(phi2) * sin(d_lambda / 2) * sin(d_lambda / 2);
     double c = 2 * atan2(sqrt(a), sqrt(1 - a));
-    double dist = r * c;
-    return PyFloat_FromDouble(dist);
+    return r * c;
+}
+
+/* Ray casting on parallel vertex arrays; same rule as point_in_polygon. */
+static int inside_polygon(double lat, double lon, const double* plat,
+                          const double* plon, Py_ssize_t n) {
+    int inside = 0;
+    if (n < 3)
+        return 0;
+    for (Py_ssize_t i = 0; i < n; ++i) {
+        Py_ssize_t j = (i + 1) % n;
+        if ((plon[i] > lon) != (plon[j] > lon)) {
+            double intersect = (plat[j] - plat[i]) * (lon - plon[i]) /
+                               (plon[j] - plon[i] + 1e-12) + plat[i];
+            if (lat < intersect)
+                inside = !inside;
+        }
+    }
+    return inside;
+}
+
+static PyObject* py_haversine_distance(PyObject* self, PyObject* args) {
+    double lat1, lon1, lat2, lon2;
+    if (!PyArg_ParseTuple(args, "(dd)(dd)", &lat1, &lon1, &lat2, &lon2)) {
+        return NULL;
+    }
+    return PyFloat_FromDouble(haversine(lat1, lon1, lat2, lon2));
 }
 
 static PyObject* py_polygon_area(PyObject* self, PyObject* args) {
@@ -110,10 +132,237 @@ static PyObject* py_point_in_polygon(PyObject* self, PyObject* args) {
     Py_RETURN_FALSE;
 }
 
+/* ------------------------------------------------------------------ */
+/* Batch kernels: 1-D C-contiguous buffers in, caller-allocated out.    */
+
+enum { KIND_DOUBLE, KIND_BOOL, KIND_INT64 };
+
+static int kind_matches(const char* fmt, Py_ssize_t itemsize, int kind) {
+    if (fmt == NULL)
+        fmt = "B";
+    if (fmt[0] == '@' || fmt[0] == '=')
+        fmt++;
+    if (fmt[0] == '\0' || fmt[1] != '\0')
+        return 0;
+    switch (kind) {
+    case KIND_DOUBLE:
+        return fmt[0] == 'd' && itemsize == sizeof(double);
+    case KIND_BOOL:
+        return strchr("?Bb", fmt[0]) != NULL && itemsize == 1;
+    default:
+        return strchr("qlQL", fmt[0]) != NULL && itemsize == 8;
+    }
+}
+
+static const char* kind_names[] = {"float64", "bool", "int64"};
+
+/* Acquire ``obj`` as a 1-D buffer of ``kind``; returns the item count. */
+static Py_ssize_t get_array(PyObject* obj, Py_buffer* view, int kind,
+                            int writable, const char* name) {
+    int flags = PyBUF_C_CONTIGUOUS | PyBUF_FORMAT;
+    if (writable)
+        flags |= PyBUF_WRITABLE;
+    if (PyObject_GetBuffer(obj, view, flags) < 0)
+        return -1;
+    if (!kind_matches(view->format, view->itemsize, kind)) {
+        PyErr_Format(PyExc_TypeError, "%s must be a contiguous %s array", name,
+                     kind_names[kind]);
+        PyBuffer_Release(view);
+        return -1;
+    }
+    return view->len / view->itemsize;
+}
+
+static void release_all(Py_buffer* views, int count) {
+    for (int i = 0; i < count; ++i)
+        PyBuffer_Release(&views[i]);
+}
+
+static PyObject* length_error(Py_buffer* views, int count, const char* msg) {
+    release_all(views, count);
+    PyErr_SetString(PyExc_ValueError, msg);
+    return NULL;
+}
+
+static PyObject* py_haversine_pairwise(PyObject* self, PyObject* args) {
+    PyObject *o[5];
+    Py_buffer v[5];
+    static const char* names[] = {"lat1", "lon1", "lat2", "lon2", "out"};
+    Py_ssize_t n[5];
+    if (!PyArg_ParseTuple(args, "OOOOO", &o[0], &o[1], &o[2], &o[3], &o[4]))
+        return NULL;
+    for (int i = 0; i < 5; ++i) {
+        n[i] = get_array(o[i], &v[i], KIND_DOUBLE, i == 4, names[i]);
+        if (n[i] < 0) {
+            release_all(v, i);
+            return NULL;
+        }
+    }
+    for (int i = 1; i < 5; ++i)
+        if (n[i] != n[0])
+            return length_error(v, 5, "arrays must have the same length");
+    const double *lat1 = v[0].buf, *lon1 = v[1].buf;
+    const double *lat2 = v[2].buf, *lon2 = v[3].buf;
+    double* out = v[4].buf;
+    Py_BEGIN_ALLOW_THREADS
+    for (Py_ssize_t i = 0; i < n[0]; ++i)
+        out[i] = haversine(lat1[i], lon1[i], lat2[i], lon2[i]);
+    Py_END_ALLOW_THREADS
+    release_all(v, 5);
+    Py_INCREF(o[4]);
+    return o[4];
+}
+
+static PyObject* py_haversine_one_to_many(PyObject* self, PyObject* args) {
+    double lat0, lon0;
+    PyObject *o[3];
+    Py_buffer v[3];
+    static const char* names[] = {"lats", "lons", "out"};
+    Py_ssize_t n[3];
+    if (!PyArg_ParseTuple(args, "(dd)OOO", &lat0, &lon0, &o[0], &o[1], &o[2]))
+        return NULL;
+    for (int i = 0; i < 3; ++i) {
+        n[i] = get_array(o[i], &v[i], KIND_DOUBLE, i == 2, names[i]);
+        if (n[i] < 0) {
+            release_all(v, i);
+            return NULL;
+        }
+    }
+    if (n[1] != n[0] || n[2] != n[0])
+        return length_error(v, 3, "arrays must have the same length");
+    const double *lat = v[0].buf, *lon = v[1].buf;
+    double* out = v[2].buf;
+    Py_BEGIN_ALLOW_THREADS
+    for (Py_ssize_t i = 0; i < n[0]; ++i)
+        out[i] = haversine(lat0, lon0, lat[i], lon[i]);
+    Py_END_ALLOW_THREADS
+    release_all(v, 3);
+    Py_INCREF(o[2]);
+    return o[2];
+}
+
+static PyObject* py_points_in_polygon(PyObject* self, PyObject* args) {
+    PyObject *o[5];
+    Py_buffer v[5];
+    static const char* names[] = {"lats", "lons", "poly_lats", "poly_lons",
+                                  "out"};
+    static const int kinds[] = {KIND_DOUBLE, KIND_DOUBLE, KIND_DOUBLE,
+                                KIND_DOUBLE, KIND_BOOL};
+    Py_ssize_t n[5];
+    if (!PyArg_ParseTuple(args, "OOOOO", &o[0], &o[1], &o[2], &o[3], &o[4]))
+        return NULL;
+    for (int i = 0; i < 5; ++i) {
+        n[i] = get_array(o[i], &v[i], kinds[i], i == 4, names[i]);
+        if (n[i] < 0) {
+            release_all(v, i);
+            return NULL;
+        }
+    }
+    if (n[1] != n[0] || n[4] != n[0] || n[3] != n[2])
+        return length_error(v, 5, "array lengths do not match");
+    const double *lat = v[0].buf, *lon = v[1].buf;
+    const double *plat = v[2].buf, *plon = v[3].buf;
+    unsigned char* out = v[4].buf;
+    Py_ssize_t m = n[2];
+    Py_BEGIN_ALLOW_THREADS
+    double lat_lo = INFINITY, lat_hi = -INFINITY;
+    double lon_lo = INFINITY, lon_hi = -INFINITY;
+    for (Py_ssize_t k = 0; k < m; ++k) {
+        lat_lo = fmin(lat_lo, plat[k]);
+        lat_hi = fmax(lat_hi, plat[k]);
+        lon_lo = fmin(lon_lo, plon[k]);
+        lon_hi = fmax(lon_hi, plon[k]);
+    }
+    for (Py_ssize_t i = 0; i < n[0]; ++i) {
+        out[i] = lat[i] >= lat_lo && lat[i] <= lat_hi && lon[i] >= lon_lo &&
+                 lon[i] <= lon_hi &&
+                 inside_polygon(lat[i], lon[i], plat, plon, m);
+    }
+    Py_END_ALLOW_THREADS
+    release_all(v, 5);
+    Py_INCREF(o[4]);
+    return o[4];
+}
+
+static PyObject* py_points_in_geofences(PyObject* self, PyObject* args) {
+    PyObject *o[6];
+    Py_buffer v[6];
+    static const char* names[] = {"lats", "lons", "poly_lats", "poly_lons",
+                                  "offsets", "out"};
+    static const int kinds[] = {KIND_DOUBLE, KIND_DOUBLE, KIND_DOUBLE,
+                                KIND_DOUBLE, KIND_INT64, KIND_BOOL};
+    Py_ssize_t n[6];
+    if (!PyArg_ParseTuple(args, "OOOOOO", &o[0], &o[1], &o[2], &o[3], &o[4],
+                          &o[5]))
+        return NULL;
+    for (int i = 0; i < 6; ++i) {
+        n[i] = get_array(o[i], &v[i], kinds[i], i == 5, names[i]);
+        if (n[i] < 0) {
+            release_all(v, i);
+            return NULL;
+        }
+    }
+    Py_ssize_t points = n[0], fences = n[4] - 1;
+    if (n[1] != points || n[3] != n[2] || fences < 0 ||
+        n[5] != points * fences)
+        return length_error(v, 6, "array lengths do not match");
+    const double *lat = v[0].buf, *lon = v[1].buf;
+    const double *plat = v[2].buf, *plon = v[3].buf;
+    const long long* offsets = v[4].buf;
+    unsigned char* out = v[5].buf;
+    for (Py_ssize_t f = 0; f < fences; ++f) {
+        if (offsets[f] < 0 || offsets[f] > offsets[f + 1] ||
+            offsets[f + 1] > n[2])
+            return length_error(v, 6, "offsets must be ascending vertex indices");
+    }
+    double* boxes = PyMem_RawMalloc(sizeof(double) * 4 * (fences ? fences : 1));
+    if (boxes == NULL) {
+        release_all(v, 6);
+        return PyErr_NoMemory();
+    }
+    Py_BEGIN_ALLOW_THREADS
+    for (Py_ssize_t f = 0; f < fences; ++f) {
+        double* box = boxes + 4 * f;
+        box[0] = box[2] = INFINITY;
+        box[1] = box[3] = -INFINITY;
+        for (long long k = offsets[f]; k < offsets[f + 1]; ++k) {
+            box[0] = fmin(box[0], plat[k]);
+            box[1] = fmax(box[1], plat[k]);
+            box[2] = fmin(box[2], plon[k]);
+            box[3] = fmax(box[3], plon[k]);
+        }
+    }
+    for (Py_ssize_t i = 0; i < points; ++i) {
+        unsigned char* row = out + i * fences;
+        for (Py_ssize_t f = 0; f < fences; ++f) {
+            const double* box = boxes + 4 * f;
+            row[f] = lat[i] >= box[0] && lat[i] <= box[1] &&
+                     lon[i] >= box[2] && lon[i] <= box[3] &&
+                     inside_polygon(lat[i], lon[i], plat + offsets[f],
+                                    plon + offsets[f],
+                                    offsets[f + 1] - offsets[f]);
+        }
+    }
+    Py_END_ALLOW_THREADS
+    PyMem_RawFree(boxes);
+    release_all(v, 6);
+    Py_INCREF(o[5]);
+    return o[5];
+}
+
 static PyMethodDef methods[] = {
     {"haversine_distance", py_haversine_distance, METH_VARARGS, "Great-circle distance in meters"},
     {"polygon_area", py_polygon_area, METH_VARARGS, "Polygon area in square meters"},
     {"point_in_polygon", py_point_in_polygon, METH_VARARGS, "Test if point inside polygon"},
+    {"haversine_pairwise", py_haversine_pairwise, METH_VARARGS,
+     "haversine_pairwise(lat1, lon1, lat2, lon2, out): element-wise distances in meters"},
+    {"haversine_one_to_many", py_haversine_one_to_many, METH_VARARGS,
+     "haversine_one_to_many(point, lats, lons, out): distances from one point in meters"},
+    {"points_in_polygon", py_points_in_polygon, METH_VARARGS,
+     "points_in_polygon(lats, lons, poly_lats, poly_lons, out): containment mask"},
+    {"points_in_geofences", py_points_in_geofences, METH_VARARGS,
+     "points_in_geofences(lats, lons, poly_lats, poly_lons, offsets, out): "
+     "(points x fences) containment mask with bounding-box prefilter"},
     {NULL, NULL, 0, NULL}
 };
 
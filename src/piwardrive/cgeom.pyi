@@ -2,9 +2,32 @@ from __future__ import annotations
 
 from typing import Sequence
 
+from typing_extensions import Buffer
+
 def haversine_distance(p1: tuple[float, float], p2: tuple[float, float]) -> float: ...
 def polygon_area(points: Sequence[tuple[float, float]]) -> float: ...
 def point_in_polygon(
     point: tuple[float, float],
     polygon: Sequence[tuple[float, float]],
 ) -> bool: ...
+
+# Batch kernels. Inputs are 1-D C-contiguous float64 buffers (``offsets`` is
+# int64); results are written into ``out`` (float64 or bool), which is
+# returned. The GIL is released while computing.
+def haversine_pairwise(
+    lat1: Buffer, lon1: Buffer, lat2: Buffer, lon2: Buffer, out: Buffer
+) -> Buffer: ...
+def haversine_one_to_many(
+    point: tuple[float, float], lats: Buffer, lons: Buffer, out: Buffer
+) -> Buffer: ...
+def points_in_polygon(
+    lats: Buffer, lons: Buffer, poly_lats: Buffer, poly_lons: Buffer, out: Buffer
+) -> Buffer: ...
+def points_in_geofences(
+    lats: Buffer,
+    lons: Buffer,
+    poly_lats: Buffer,
+    poly_lons: Buffer,
+    offsets: Buffer,
+    out: Buffer,
+) -> Buffer: ...
@@ -4,6 +4,6 @@ This module provides optimized JSON serialization and deserialization functions
 for the PiWardrive platform.
 """
 
-from ..fastjson import dumps, loads
+from ..fastjson import dumpb, dumps, loads
 
-__all__ = ["loads", "dumps"]
+__all__ = ["loads", "dumps", "dumpb"]
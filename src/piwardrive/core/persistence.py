@@ -719,13 +719,18 @@ async def iter_ap_cache(
     *,
     limit: int | None = None,
     offset: int = 0,
+    inclusive: bool = False,
 ) -> AsyncIterator[dict[str, Any]]:
-    """Yield rows from ``ap_cache`` optionally newer than ``after`` with pagination."""
+    """Yield rows from ``ap_cache`` optionally newer than ``after`` with pagination.
+
+    With ``inclusive`` rows whose ``last_time`` equals ``after`` are returned
+    as well.
+    """
     async with _get_conn() as conn:
         params: list[object] = []
         query = "SELECT bssid, ssid, encryption, lat, lon, last_time FROM ap_cache"
         if after is not None:
-            query += " WHERE last_time > ?"
+            query += " WHERE last_time >= ?" if inclusive else " WHERE last_time > ?"
             params.append(after)
         query += " ORDER BY last_time"
         if limit is not None:
@@ -741,9 +746,15 @@ async def load_ap_cache(
     *,
     limit: int | None = None,
     offset: int = 0,
+    inclusive: bool = False,
 ) -> list[dict[str, Any]]:
     """Return rows from ``ap_cache`` optionally newer than ``after`` with pagination."""
-    return [row async for row in iter_ap_cache(after, limit=limit, offset=offset)]
+    return [
+        row
+        async for row in iter_ap_cache(
+            after, limit=limit, offset=offset, inclusive=inclusive
+        )
+    ]
 
 
 async def save_wifi_detections(records: list[dict[str, Any]]) -> None:
@@ -8,7 +8,6 @@ import glob
 import logging
 import mmap
 import os
-import pickle
 import subprocess
 import threading
 import time
@@ -40,6 +39,7 @@ except ImportError:  # pragma: no cover - fallback when sigint_suite is missing
 from concurrent.futures import Future
 from enum import IntEnum
 
+import numpy as np
 import psutil
 import requests
 from cachetools import TTLCache
@@ -57,6 +57,7 @@ import aiohttp
 
 from piwardrive import persistence
 from piwardrive.cache_config import load_cache_config
+from piwardrive.serialization import get_codec
 
 
 class App:
@@ -214,8 +215,15 @@ def _expire_safe_request_cache() -> None:
 
 def async_ttl_cache(
     ttl_getter: float | Callable[[], float],
+    codec: str = "pickle",
 ) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
-    """Return decorator caching async function results for ``ttl`` seconds."""
+    """Return decorator caching async function results for ``ttl`` seconds.
+
+    Results shared through Redis are encoded with the
+    :mod:`piwardrive.serialization` codec named ``codec``. ``pickle`` keeps
+    arbitrary return types; ``json`` or ``msgpack`` are faster for plain data.
+    """
+    value_codec = get_codec(codec)
 
     def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
         cache: dict[tuple[Any, ...], tuple[float, T]] = {}
@@ -242,7 +250,7 @@ def async_ttl_cache(
                 try:
                     data = await redis_cli.get(redis_key)
                     if data:
-                        ts, res = pickle.loads(data)
+                        ts, res = value_codec.loads(data)
                         if now is not None and now - ts <= ttl:
                             return res
                 except Exception:
@@ -254,7 +262,7 @@ def async_ttl_cache(
                 try:
                     await redis_cli.set(
                         redis_key,
-                        pickle.dumps((0.0 if now is None else now, result)),
+                        value_codec.dumps((0.0 if now is None else now, result)),
                         ex=int(ttl),
                     )
                 except Exception:
@@ -1187,6 +1195,159 @@ haversine_distance = _haversine_distance_c or _haversine_distance_py
 polygon_area = _polygon_area_c or _polygon_area_py
 point_in_polygon = _point_in_polygon_c or _point_in_polygon_py
 
+try:  # pragma: no cover - batch kernels of the geometry C extension
+    from cgeom import haversine_one_to_many as _haversine_one_to_many_c
+    from cgeom import haversine_pairwise as _haversine_pairwise_c
+    from cgeom import points_in_geofences as _points_in_geofences_c
+    from cgeom import points_in_polygon as _points_in_polygon_c
+except Exception:  # pragma: no cover - extension not built or outdated
+    _haversine_pairwise_c = None
+    _haversine_one_to_many_c = None
+    _points_in_polygon_c = None
+    _points_in_geofences_c = None
+
+
+def _as_float64(values: Any) -> np.ndarray:
+    return np.ascontiguousarray(values, dtype=np.float64).ravel()
+
+
+def _haversine_np(
+    lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray
+) -> np.ndarray:
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    a = (
+        np.sin((phi2 - phi1) / 2) ** 2
+        + np.cos(phi1) * np.cos(phi2) * np.sin(np.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * 6371000.0 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def haversine_pairwise(lat1: Any, lon1: Any, lat2: Any, lon2: Any) -> np.ndarray:
+    """Return element-wise distances in meters between two arrays of points."""
+    arrays = [_as_float64(a) for a in (lat1, lon1, lat2, lon2)]
+    if len({len(a) for a in arrays}) != 1:
+        raise ValueError("arrays must have the same length")
+    if _haversine_pairwise_c is not None:
+        return _haversine_pairwise_c(*arrays, np.empty_like(arrays[0]))
+    return _haversine_np(*arrays)
+
+
+def haversine_from(point: tuple[float, float], lats: Any, lons: Any) -> np.ndarray:
+    """Return distances in meters from ``point`` to each ``(lats[i], lons[i])``."""
+    lat, lon = _as_float64(lats), _as_float64(lons)
+    if len(lat) != len(lon):
+        raise ValueError("arrays must have the same length")
+    if _haversine_one_to_many_c is not None:
+        return _haversine_one_to_many_c(
+            (float(point[0]), float(point[1])), lat, lon, np.empty_like(lat)
+        )
+    return _haversine_np(float(point[0]), float(point[1]), lat, lon)
+
+
+@dataclass(frozen=True)
+class PackedPolygons:
+    """Polygons stored as concatenated vertex arrays for batch containment.
+
+    Vertices of polygon ``i`` are ``lats[offsets[i]:offsets[i + 1]]`` and the
+    matching slice of ``lons``.
+    """
+
+    lats: np.ndarray
+    lons: np.ndarray
+    offsets: np.ndarray
+
+    @classmethod
+    def from_polygons(
+        cls, polygons: Iterable[Sequence[tuple[float, float]]]
+    ) -> "PackedPolygons":
+        """Pack ``(lat, lon)`` vertex sequences."""
+        polygons = [np.asarray(p, dtype=np.float64).reshape(-1, 2) for p in polygons]
+        sizes = [len(p) for p in polygons]
+        offsets = np.zeros(len(polygons) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        verts = np.concatenate(polygons) if polygons else np.empty((0, 2))
+        return cls(
+            np.ascontiguousarray(verts[:, 0]),
+            np.ascontiguousarray(verts[:, 1]),
+            offsets,
+        )
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+
+def _in_polygon_np(
+    lat: np.ndarray, lon: np.ndarray, plat: np.ndarray, plon: np.ndarray
+) -> np.ndarray:
+    """Vectorised :func:`_point_in_polygon_py` over points, looping over edges."""
+    inside = np.zeros(len(lat), dtype=bool)
+    n = len(plat)
+    if n < 3:
+        return inside
+    keep = (
+        (lat >= plat.min())
+        & (lat <= plat.max())
+        & (lon >= plon.min())
+        & (lon <= plon.max())
+    )
+    idx = np.flatnonzero(keep)
+    lat, lon = lat[idx], lon[idx]
+    hit = np.zeros(len(idx), dtype=bool)
+    for i in range(n):
+        j = (i + 1) % n
+        crosses = (plon[i] > lon) != (plon[j] > lon)
+        intersect = (plat[j] - plat[i]) * (lon - plon[i]) / (
+            plon[j] - plon[i] + 1e-12
+        ) + plat[i]
+        hit ^= crosses & (lat < intersect)
+    inside[idx] = hit
+    return inside
+
+
+def points_in_polygon(
+    lats: Any, lons: Any, polygon: Sequence[tuple[float, float]]
+) -> np.ndarray:
+    """Return a mask of the points that lie inside ``polygon``.
+
+    Uses the same ray casting rule as :func:`point_in_polygon`.
+    """
+    lat, lon = _as_float64(lats), _as_float64(lons)
+    if len(lat) != len(lon):
+        raise ValueError("arrays must have the same length")
+    packed = PackedPolygons.from_polygons([polygon])
+    if _points_in_polygon_c is not None:
+        return _points_in_polygon_c(
+            lat, lon, packed.lats, packed.lons, np.empty(len(lat), dtype=bool)
+        )
+    return _in_polygon_np(lat, lon, packed.lats, packed.lons)
+
+
+def points_in_geofences(
+    lats: Any,
+    lons: Any,
+    fences: PackedPolygons | Sequence[Sequence[tuple[float, float]]],
+) -> np.ndarray:
+    """Return a ``(points, fences)`` mask of which fence contains which point.
+
+    Each fence's bounding box is checked before the polygon test. Pack
+    fences that are reused with :meth:`PackedPolygons.from_polygons`.
+    """
+    lat, lon = _as_float64(lats), _as_float64(lons)
+    if len(lat) != len(lon):
+        raise ValueError("arrays must have the same length")
+    if not isinstance(fences, PackedPolygons):
+        fences = PackedPolygons.from_polygons(fences)
+    out = np.zeros((len(lat), len(fences)), dtype=bool)
+    if _points_in_geofences_c is not None:
+        return _points_in_geofences_c(
+            lat, lon, fences.lats, fences.lons, fences.offsets, out.reshape(-1)
+        ).reshape(out.shape)
+    for f in range(len(fences)):
+        part = slice(fences.offsets[f], fences.offsets[f + 1])
+        out[:, f] = _in_polygon_np(lat, lon, fences.lats[part], fences.lons[part])
+    return out
+
+
 try:  # pragma: no cover - optional C extension for speed
     from ckml import parse_coords as _parse_coords
 except Exception:  # pragma: no cover - fallback to Python
@@ -1284,8 +1445,13 @@ __all__ = [
     "tail_log_file",
     "get_recent_bssids",
     "haversine_distance",
+    "haversine_from",
+    "haversine_pairwise",
     "polygon_area",
     "point_in_polygon",
+    "points_in_polygon",
+    "points_in_geofences",
+    "PackedPolygons",
     "load_kml",
     "SAFE_REQUEST_CACHE_MAX_SIZE",
     "HTTP_SESSION",
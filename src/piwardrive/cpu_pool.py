@@ -3,33 +3,209 @@
 This module provides a process pool executor for CPU-bound tasks such as
 signal processing, data analysis, and cryptographic operations that can
 benefit from multi-core processing.
+
+:func:`run_cpu_bound_shared` is the array-oriented variant: NumPy arrays,
+including dicts of column arrays, are placed in
+:mod:`multiprocessing.shared_memory` blocks and workers receive only small
+descriptors, so large inputs are not pickled. Array results come back the
+same way. Workers import the modules listed in ``PW_CPU_POOL_PRELOAD`` when
+they start.
 """
 
 from __future__ import annotations
 
 import asyncio
+import importlib
 import os
-from concurrent.futures import ProcessPoolExecutor
-from typing import Any, Callable
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
 
 _CPU_POOL: ProcessPoolExecutor | None = None
 
+# arrays smaller than this are pickled; a shared block costs a few syscalls
+SHM_MIN_BYTES = 1 << 16
+
+
+def _preload_modules() -> Tuple[str, ...]:
+    names = os.getenv("PW_CPU_POOL_PRELOAD", "numpy")
+    return tuple(n.strip() for n in names.split(",") if n.strip())
+
+
+def _init_worker(modules: Tuple[str, ...]) -> None:
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception:  # pragma: no cover - optional modules
+            pass
+
 
 def get_cpu_pool() -> ProcessPoolExecutor:
     """Return a global :class:`ProcessPoolExecutor`."""
     global _CPU_POOL
     if _CPU_POOL is None:
         size = int(os.getenv("PW_CPU_POOL_SIZE", os.cpu_count() or 1))
-        _CPU_POOL = ProcessPoolExecutor(max_workers=size)
+        # workers must share the parent's tracker for shared memory blocks
+        resource_tracker.ensure_running()
+        _CPU_POOL = ProcessPoolExecutor(
+            max_workers=size,
+            initializer=_init_worker,
+            initargs=(_preload_modules(),),
+        )
     return _CPU_POOL
 
 
+def _ping() -> int:
+    return os.getpid()
+
+
+def warm_cpu_pool() -> None:
+    """Start every worker now instead of on the first submitted task."""
+    pool = get_cpu_pool()
+    wait([pool.submit(_ping) for _ in range(pool._max_workers)])
+
+
 async def run_cpu_bound(func: Callable[..., Any], *args: Any) -> Any:
     """Run ``func`` in the shared process pool and return the result."""
     loop = asyncio.get_running_loop()
     return await loop.run_in_executor(get_cpu_pool(), func, *args)
 
 
+@dataclass(frozen=True)
+class SharedArray:
+    """Descriptor of an array stored in a shared memory block."""
+
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+def _share(arr: np.ndarray, blocks: List[shared_memory.SharedMemory]) -> SharedArray:
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    blocks.append(shm)
+    view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+    view[...] = arr
+    return SharedArray(shm.name, arr.shape, arr.dtype.str)
+
+
+def _pack(obj: Any, blocks: List[shared_memory.SharedMemory]) -> Any:
+    """Replace large arrays in ``obj`` by :class:`SharedArray` descriptors."""
+    if (
+        isinstance(obj, np.ndarray)
+        and obj.nbytes >= SHM_MIN_BYTES
+        and not obj.dtype.hasobject
+    ):
+        return _share(obj, blocks)
+    if isinstance(obj, dict):
+        return {k: _pack(v, blocks) for k, v in obj.items()}
+    if isinstance(obj, tuple):
+        return tuple(_pack(v, blocks) for v in obj)
+    return obj
+
+
+def _attach(obj: Any, blocks: List[shared_memory.SharedMemory]) -> Any:
+    """Replace descriptors in ``obj`` by array views of their blocks."""
+    if isinstance(obj, SharedArray):
+        shm = shared_memory.SharedMemory(name=obj.name)
+        blocks.append(shm)
+        return np.ndarray(obj.shape, dtype=np.dtype(obj.dtype), buffer=shm.buf)
+    if isinstance(obj, dict):
+        return {k: _attach(v, blocks) for k, v in obj.items()}
+    if isinstance(obj, tuple):
+        return tuple(_attach(v, blocks) for v in obj)
+    return obj
+
+
+def _copy_out(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        return obj.copy()
+    if isinstance(obj, dict):
+        return {k: _copy_out(v) for k, v in obj.items()}
+    if isinstance(obj, tuple):
+        return tuple(_copy_out(v) for v in obj)
+    return obj
+
+
+def _release(blocks: List[shared_memory.SharedMemory], unlink: bool) -> None:
+    for shm in blocks:
+        try:
+            shm.close()
+        except BufferError:  # pragma: no cover - a view is still referenced
+            pass
+        if unlink:
+            try:
+                shm.unlink()
+            except FileNotFoundError:  # pragma: no cover - already removed
+                pass
+
+
+def _run_shared(func: Callable[..., Any], args: Tuple, kwargs: Dict) -> Any:
+    """Worker side of :func:`run_cpu_bound_shared`."""
+    inputs: List[shared_memory.SharedMemory] = []
+    outputs: List[shared_memory.SharedMemory] = []
+    try:
+        result = func(*_attach(args, inputs), **_attach(kwargs, inputs))
+        packed = _pack(result, outputs)
+    except BaseException:
+        _release(outputs, unlink=True)
+        raise
+    finally:
+        # results may be views of the inputs; they were copied by _pack
+        result = None
+        _release(inputs, unlink=False)
+    for shm in outputs:
+        # the caller unlinks result blocks; hand them over to its tracking
+        resource_tracker.unregister(shm._name, "shared_memory")
+    _release(outputs, unlink=False)
+    return packed
+
+
+def _discard_result(future: Future) -> None:
+    """Unlink the result blocks of a call whose caller was cancelled."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    blocks: List[shared_memory.SharedMemory] = []
+    try:
+        _attach(future.result(), blocks)
+    except FileNotFoundError:  # pragma: no cover - already removed
+        pass
+    _release(blocks, unlink=True)
+
+
+async def run_cpu_bound_shared(func: Callable[..., Any], *args: Any, **kwargs: Any):
+    """Run ``func`` in the pool, passing large arrays through shared memory.
+
+    Arguments and keyword arguments that are NumPy arrays, or dicts and
+    tuples of arrays such as column sets, reach ``func`` as read-write views
+    of shared blocks; other values are pickled as usual. Array results are
+    returned the same way and copied once into private memory. Blocks are
+    unlinked when the call finishes, so ``func`` must not keep references
+    to its inputs. If the caller is cancelled while ``func`` runs, the
+    result blocks are unlinked once it finishes.
+    """
+    blocks: List[shared_memory.SharedMemory] = []
+    try:
+        packed_args = _pack(args, blocks)
+        packed_kwargs = _pack(kwargs, blocks)
+        future = get_cpu_pool().submit(_run_shared, func, packed_args, packed_kwargs)
+        try:
+            packed = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if not future.cancel():
+                future.add_done_callback(_discard_result)
+            raise
+    finally:
+        _release(blocks, unlink=True)
+    results: List[shared_memory.SharedMemory] = []
+    try:
+        return _copy_out(_attach(packed, results))
+    finally:
+        _release(results, unlink=True)
+
+
 def shutdown_cpu_pool() -> None:
     """Clean up the global process pool."""
     global _CPU_POOL
@@ -38,4 +214,11 @@ def shutdown_cpu_pool() -> None:
         _CPU_POOL = None
 
 
-__all__ = ["get_cpu_pool", "run_cpu_bound", "shutdown_cpu_pool"]
+__all__ = [
+    "SharedArray",
+    "get_cpu_pool",
+    "run_cpu_bound",
+    "run_cpu_bound_shared",
+    "shutdown_cpu_pool",
+    "warm_cpu_pool",
+]
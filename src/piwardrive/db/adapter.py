@@ -6,6 +6,9 @@ from typing import Any, AsyncIterator, Iterable
 class DatabaseAdapter:
     """Abstract database adapter interface."""
 
+    # prefix that turns a statement into a request for its plan
+    explain_prefix = "EXPLAIN"
+
     async def connect(self) -> None:
         raise NotImplementedError
 
@@ -3,7 +3,7 @@ from __future__ import annotations
 import asyncio
 import time
 from contextlib import asynccontextmanager
-from typing import AsyncIterator, Callable, Dict
+from typing import Any, AsyncIterator, Callable, Dict, Sequence, Set
 
 from ..resource_manager import ResourceManager
 from ..services import db_monitor
@@ -27,6 +27,7 @@ class DatabaseManager:
         self._shard_func = shard_func or (lambda key: "default")
         self._lock = asyncio.Lock()
         self._rm = resource_manager
+        self._plan_tasks: Set[asyncio.Task] = set()
         if self._rm is not None:
             self._rm.register(self, lambda: asyncio.run(self.close()))
 
@@ -53,26 +54,50 @@ class DatabaseManager:
         shard = self._shard_func(key)
         return self.adapters[shard]
 
+    def _record(
+        self,
+        adapter: DatabaseAdapter,
+        query: str,
+        args: Sequence[Any] | None,
+        start: float,
+    ) -> None:
+        """Record the query duration and explain it in the background if slow."""
+        duration = time.perf_counter() - start
+        if db_monitor.record_query(query, duration, explain=args is not None):
+            task = asyncio.get_running_loop().create_task(
+                db_monitor.capture_plan(
+                    query,
+                    args,
+                    adapter.fetchall,
+                    getattr(adapter, "explain_prefix", "EXPLAIN"),
+                )
+            )
+            self._plan_tasks.add(task)
+            task.add_done_callback(self._plan_tasks.discard)
+
     async def execute(self, query: str, *args, key: str | None = None) -> None:
+        adapter = self._get_adapter(key)
         start = time.perf_counter()
         try:
-            await self._get_adapter(key).execute(query, *args)
+            await adapter.execute(query, *args)
         finally:
-            db_monitor.record_query(query, time.perf_counter() - start)
+            self._record(adapter, query, args, start)
 
     async def executemany(self, query: str, args_iter, key: str | None = None) -> None:
+        adapter = self._get_adapter(key)
         start = time.perf_counter()
         try:
-            await self._get_adapter(key).executemany(query, args_iter)
+            await adapter.executemany(query, args_iter)
         finally:
-            db_monitor.record_query(query, time.perf_counter() - start)
+            self._record(adapter, query, None, start)
 
     async def fetchall(self, query: str, *args, key: str | None = None) -> list[Dict]:
+        adapter = self._get_adapter(key)
         start = time.perf_counter()
         try:
-            return await self._get_adapter(key).fetchall(query, *args)
+            return await adapter.fetchall(query, *args)
         finally:
-            db_monitor.record_query(query, time.perf_counter() - start)
+            self._record(adapter, query, args, start)
 
     def get_metrics(self) -> dict[str, Dict[str, int]]:
         return {name: adapter.get_metrics() for name, adapter in self.adapters.items()}
@@ -11,6 +11,8 @@ from .adapter import DatabaseAdapter
 class SQLiteAdapter(DatabaseAdapter):
     """SQLite backend using aiosqlite with connection pooling."""
 
+    explain_prefix = "EXPLAIN QUERY PLAN"
+
     def __init__(
         self,
         path: str,
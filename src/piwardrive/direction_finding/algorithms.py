@@ -8,7 +8,7 @@ import asyncio
 import logging
 import math
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 import numpy as np
 from scipy.optimize import minimize
@@ -25,6 +25,7 @@ from .config import (
     TriangulationConfig,
 )
 from .core import AngleEstimate, DFMeasurement, DFQuality, DFResult, PositionEstimate
+from .interpolation import GridTile, SpatialInterpolator, Variogram
 
 logger = logging.getLogger(__name__)
 
@@ -517,10 +518,14 @@ class RSSTriangulation:
 class SignalMapper:
     """Signal strength mapping and interpolation."""
 
+    # refit a BSSID's variogram once it has this factor more samples
+    VARIOGRAM_REFIT_GROWTH = 1.25
+
     def __init__(self, config: SignalMappingConfig):
         self.config = config
         self.signal_map = {}
         self.interpolation_cache = {}
+        self._variograms: Dict[str, Tuple[int, Variogram]] = {}
 
     def add_measurement(
         self, bssid: str, position: Tuple[float, float], signal_strength: float
@@ -541,83 +546,85 @@ class SignalMapper:
         if bssid in self.interpolation_cache:
             del self.interpolation_cache[bssid]
 
+    def _method(self) -> str:
+        return {
+            InterpolationMethod.KRIGING: "kriging",
+            InterpolationMethod.SPLINE: "spline",
+        }.get(self.config.interpolation_method, "idw")
+
+    def get_interpolator(self, bssid: str) -> Optional[SpatialInterpolator]:
+        """Return the interpolator for ``bssid``, building it if needed.
+
+        Kriging reuses the BSSID's last variogram fit until its sample count
+        has grown by :attr:`VARIOGRAM_REFIT_GROWTH`.
+        """
+        measurements = self.signal_map.get(bssid)
+        if not measurements or len(measurements) < 3:
+            return None
+        interpolator = self.interpolation_cache.get(bssid)
+        if interpolator is not None:
+            return interpolator
+
+        lats, lons = zip(*(m["position"] for m in measurements))
+        values = [m["signal_strength"] for m in measurements]
+        method = self._method()
+        variogram = None
+        fitted = self._variograms.get(bssid)
+        if fitted and len(values) < fitted[0] * self.VARIOGRAM_REFIT_GROWTH:
+            variogram = fitted[1]
+        interpolator = SpatialInterpolator(
+            lats,
+            lons,
+            values,
+            method=method,
+            power=self.config.idw_power,
+            max_neighbors=self.config.max_neighbors,
+            variogram=variogram,
+            variogram_model=self.config.variogram_model,
+        )
+        if method == "kriging" and variogram is None:
+            self._variograms[bssid] = (len(values), interpolator.variogram)
+        self.interpolation_cache[bssid] = interpolator
+        return interpolator
+
     def interpolate_signal(
         self, bssid: str, position: Tuple[float, float]
     ) -> Optional[float]:
         """Interpolate signal strength at a given position."""
-        if bssid not in self.signal_map or len(self.signal_map[bssid]) < 3:
+        interpolator = self.get_interpolator(bssid)
+        if interpolator is None:
             return None
+        return float(interpolator.predict([position[0]], [position[1]])[0])
 
-        measurements = self.signal_map[bssid]
-
-        if self.config.interpolation_method == InterpolationMethod.IDW:
-            return self._inverse_distance_weighting(measurements, position)
-        elif self.config.interpolation_method == InterpolationMethod.KRIGING:
-            return self._kriging_interpolation(measurements, position)
-        elif self.config.interpolation_method == InterpolationMethod.SPLINE:
-            return self._spline_interpolation(measurements, position)
-        else:
-            return self._inverse_distance_weighting(measurements, position)
-
-    def _inverse_distance_weighting(
-        self, measurements: List[Dict], position: Tuple[float, float]
-    ) -> float:
-        """Inverse distance weighting interpolation."""
-        weights = []
-        values = []
-
-        for measurement in measurements:
-            distance = self._calculate_distance(position, measurement["position"])
-            if distance < 1e-6:  # Very close point
-                return measurement["signal_strength"]
-
-            weight = 1.0 / (distance**2)
-            weights.append(weight)
-            values.append(measurement["signal_strength"])
-
-        weights = np.array(weights)
-        values = np.array(values)
-
-        return np.sum(weights * values) / np.sum(weights)
-
-    def _kriging_interpolation(
-        self, measurements: List[Dict], position: Tuple[float, float]
-    ) -> float:
-        """Simplified kriging interpolation."""
-        # This is a simplified implementation
-        # Full kriging would require semivariogram modeling
-        return self._inverse_distance_weighting(measurements, position)
-
-    def _spline_interpolation(
-        self, measurements: List[Dict], position: Tuple[float, float]
-    ) -> float:
-        """Spline interpolation."""
-        # This is a simplified implementation
-        # Full spline interpolation would require scipy.interpolate
-        return self._inverse_distance_weighting(measurements, position)
-
-    def _calculate_distance(
-        self, pos1: Tuple[float, float], pos2: Tuple[float, float]
-    ) -> float:
-        """Calculate distance between two positions."""
-        lat1, lon1 = pos1
-        lat2, lon2 = pos2
-
-        # Haversine formula
-        R = 6371000  # Earth radius in meters
-
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_lon = math.radians(lon2 - lon1)
+    def interpolate_many(
+        self, bssid: str, lats: Sequence[float], lons: Sequence[float]
+    ) -> Optional[np.ndarray]:
+        """Interpolate signal strength at many positions in one call."""
+        interpolator = self.get_interpolator(bssid)
+        if interpolator is None:
+            return None
+        return interpolator.predict(lats, lons)
 
-        a = (
-            math.sin(delta_lat / 2) ** 2
-            + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon / 2) ** 2
+    def signal_grid(
+        self,
+        bssid: str,
+        bounds: Tuple[float, float, float, float],
+        resolution: Optional[float] = None,
+        tile_size: Optional[int] = None,
+    ) -> Iterator[GridTile]:
+        """Yield the signal map of ``bssid`` over ``bounds`` tile by tile.
+
+        ``bounds`` is ``(min_lat, min_lon, max_lat, max_lon)``; resolution
+        and tile size default to the mapping configuration.
+        """
+        interpolator = self.get_interpolator(bssid)
+        if interpolator is None:
+            return
+        yield from interpolator.grid(
+            bounds,
+            resolution or self.config.map_resolution,
+            tile_size or self.config.tile_size,
         )
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-        return R * c
 
 
 class MUSICProcessor:
@@ -99,6 +99,10 @@ class SignalMappingConfig:
 
     map_resolution: float = 10.0  # meters per pixel
     interpolation_method: InterpolationMethod = InterpolationMethod.KRIGING
+    max_neighbors: int = 16  # samples used per estimate on large maps
+    idw_power: float = 2.0
+    variogram_model: str = "spherical"  # spherical, exponential or gaussian
+    tile_size: int = 256  # grid cells per tile side
     coverage_threshold: float = -70.0  # dBm
     update_interval: float = 5.0  # seconds
     enable_real_time: bool = True
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Spatial interpolation engine for signal strength maps.
+
+Samples are projected to local metres around their centroid. Targets are
+processed in fixed-size blocks: small sample sets use a blocked dense
+distance matrix, larger ones a KD-tree limited to the nearest
+``max_neighbors`` samples. Ordinary kriging fits a variogram model once per
+sample set, and :meth:`SpatialInterpolator.grid` yields output in tiles so
+large survey areas are produced in constant memory.
+"""
+
+import logging
+import math
+from dataclasses import dataclass
+from typing import Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.interpolate import RBFInterpolator
+from scipy.linalg import lu_factor, lu_solve
+from scipy.optimize import curve_fit
+from scipy.spatial import cKDTree
+from scipy.spatial.distance import cdist
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371000.0
+
+# (min_lat, min_lon, max_lat, max_lon)
+Bounds = Tuple[float, float, float, float]
+
+
+def _spherical(h: np.ndarray, nugget: float, sill: float, rng: float) -> np.ndarray:
+    r = np.minimum(h / rng, 1.0)
+    return nugget + sill * (1.5 * r - 0.5 * r**3)
+
+
+def _exponential(h: np.ndarray, nugget: float, sill: float, rng: float) -> np.ndarray:
+    return nugget + sill * (1.0 - np.exp(-3.0 * h / rng))
+
+
+def _gaussian(h: np.ndarray, nugget: float, sill: float, rng: float) -> np.ndarray:
+    return nugget + sill * (1.0 - np.exp(-3.0 * (h / rng) ** 2))
+
+
+VARIOGRAM_MODELS = {
+    "spherical": _spherical,
+    "exponential": _exponential,
+    "gaussian": _gaussian,
+}
+
+
+@dataclass(frozen=True)
+class Variogram:
+    """Fitted semivariogram ``gamma(h)`` with distances in metres."""
+
+    model: str
+    nugget: float
+    sill: float
+    range: float
+
+    def __call__(self, h: np.ndarray) -> np.ndarray:
+        """Return the semivariance at lags ``h``; ``gamma(0)`` is ``0``."""
+        gamma = VARIOGRAM_MODELS[self.model](h, self.nugget, self.sill, self.range)
+        return np.where(h > 0, gamma, 0.0)
+
+    def covariance(self, h: np.ndarray) -> np.ndarray:
+        """Return the covariance ``C(h) = C(0) - gamma(h)``."""
+        return self.nugget + self.sill - self(h)
+
+
+def fit_variogram(
+    xy: np.ndarray,
+    values: np.ndarray,
+    model: str = "spherical",
+    n_lags: int = 12,
+    max_pairs: int = 200_000,
+    seed: int = 0,
+) -> Variogram:
+    """Fit a variogram ``model`` to the empirical semivariance of samples.
+
+    At most ``max_pairs`` random sample pairs are used, binned into
+    ``n_lags`` distance classes up to half the largest separation.
+    """
+    n = len(values)
+    variance = float(np.var(values)) or 1.0
+    if n * (n - 1) // 2 <= max_pairs:
+        i, j = np.triu_indices(n, k=1)
+    else:
+        rng = np.random.default_rng(seed)
+        i, j = rng.integers(n, size=(2, max_pairs))
+        keep = i != j
+        i, j = i[keep], j[keep]
+    lags = np.hypot(*(xy[i] - xy[j]).T)
+    semivariance = 0.5 * (values[i] - values[j]) ** 2
+    max_lag = float(lags.max()) / 2 if len(lags) else 0.0
+    if max_lag <= 0:
+        return Variogram(model, 0.0, variance, 1.0)
+
+    edges = np.linspace(0.0, max_lag, n_lags + 1)
+    which = np.digitize(lags, edges) - 1
+    inside = (which >= 0) & (which < n_lags)
+    counts = np.bincount(which[inside], minlength=n_lags)
+    sums = np.bincount(which[inside], weights=semivariance[inside], minlength=n_lags)
+    filled = counts > 0
+    centers = ((edges[:-1] + edges[1:]) / 2)[filled]
+    gamma = sums[filled] / counts[filled]
+    fallback = Variogram(model, 0.0, variance, max_lag)
+    if len(centers) < 3:
+        return fallback
+    try:
+        (nugget, sill, rng), _ = curve_fit(
+            VARIOGRAM_MODELS[model],
+            centers,
+            gamma,
+            p0=(0.0, variance, max_lag / 2),
+            bounds=([0.0, 1e-9, 1e-6], [np.inf, np.inf, 4 * max_lag]),
+            sigma=1.0 / np.sqrt(counts[filled]),
+            maxfev=2000,
+        )
+    except (RuntimeError, ValueError) as exc:
+        logger.debug("Variogram fit failed, using defaults: %s", exc)
+        return fallback
+    return Variogram(model, float(nugget), float(sill), float(rng))
+
+
+@dataclass
+class GridTile:
+    """One tile of an interpolated grid.
+
+    ``values[r, c]`` is the estimate at ``(lats[r], lons[c])``; the tile
+    starts at ``(row, col)`` of the full grid.
+    """
+
+    row: int
+    col: int
+    lats: np.ndarray
+    lons: np.ndarray
+    values: np.ndarray
+
+
+class SpatialInterpolator:
+    """Interpolate scattered samples with IDW, ordinary kriging or splines."""
+
+    METHODS = ("idw", "kriging", "spline")
+
+    def __init__(
+        self,
+        lats: Sequence[float],
+        lons: Sequence[float],
+        values: Sequence[float],
+        method: str = "idw",
+        power: float = 2.0,
+        max_neighbors: int = 16,
+        block_size: int = 4096,
+        variogram: Optional[Variogram] = None,
+        variogram_model: str = "spherical",
+    ):
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown interpolation method: {method}")
+        self.lats = np.asarray(lats, dtype=float)
+        self.lons = np.asarray(lons, dtype=float)
+        self.values = np.asarray(values, dtype=float)
+        if not len(self.values) == len(self.lats) == len(self.lons):
+            raise ValueError("lats, lons and values must have the same length")
+        if len(self.values) == 0:
+            raise ValueError("at least one sample is required")
+        self.method = method
+        self.power = power
+        self.max_neighbors = max(1, max_neighbors)
+        self.block_size = block_size
+        self.variogram_model = variogram_model
+        self._variogram = variogram
+        self.origin = (float(self.lats.mean()), float(self.lons.mean()))
+        self.xy = self.project(self.lats, self.lons)
+        self._tree: Optional[cKDTree] = None
+        self._kriging_lu = None
+        self._spline: Optional[RBFInterpolator] = None
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def project(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """Return ``(n, 2)`` local east/north metres around the sample centroid."""
+        lat0, lon0 = self.origin
+        scale = math.radians(1.0) * EARTH_RADIUS_M
+        x = (
+            (np.asarray(lons, dtype=float) - lon0)
+            * scale
+            * math.cos(math.radians(lat0))
+        )
+        y = (np.asarray(lats, dtype=float) - lat0) * scale
+        return np.column_stack((x, y))
+
+    @property
+    def tree(self) -> cKDTree:
+        """KD-tree over the projected samples, built on first use."""
+        if self._tree is None:
+            self._tree = cKDTree(self.xy)
+        return self._tree
+
+    @property
+    def variogram(self) -> Variogram:
+        """Variogram used for kriging, fitted on first use."""
+        if self._variogram is None:
+            self._variogram = fit_variogram(
+                self.xy, self.values, model=self.variogram_model
+            )
+        return self._variogram
+
+    @property
+    def _local(self) -> bool:
+        return len(self.values) > self.max_neighbors
+
+    def predict(self, lats: Sequence[float], lons: Sequence[float]) -> np.ndarray:
+        """Return estimates at the given positions, computed block by block."""
+        targets = self.project(np.ravel(lats), np.ravel(lons))
+        out = np.empty(len(targets))
+        handler = {
+            "idw": self._idw,
+            "kriging": self._kriging,
+            "spline": self._spline_predict,
+        }[self.method]
+        for start in range(0, len(targets), self.block_size):
+            block = targets[start : start + self.block_size]
+            out[start : start + len(block)] = handler(block)
+        return out
+
+    def _neighbours(self, xy: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(distances, indices)`` of the samples used for ``xy``."""
+        if self._local:
+            return self.tree.query(xy, k=self.max_neighbors)
+        dist = cdist(xy, self.xy)
+        idx = np.broadcast_to(np.arange(len(self.values)), dist.shape)
+        return dist, idx
+
+    def _idw(self, xy: np.ndarray) -> np.ndarray:
+        dist, idx = self._neighbours(xy)
+        values = self.values[idx]
+        exact = dist < 1e-6
+        with np.errstate(divide="ignore"):
+            weights = 1.0 / dist**self.power
+        weights[exact] = 0.0
+        est = (weights * values).sum(axis=1) / weights.sum(axis=1)
+        hit = exact.any(axis=1)
+        if hit.any():
+            est[hit] = values[hit, exact[hit].argmax(axis=1)]
+        return est
+
+    def _kriging(self, xy: np.ndarray) -> np.ndarray:
+        vario = self.variogram
+        # a tiny diagonal term keeps systems with co-located samples solvable
+        jitter = 1e-9 * (vario.nugget + vario.sill)
+        if not self._local:
+            n = len(self.values)
+            if self._kriging_lu is None:
+                system = np.ones((n + 1, n + 1))
+                system[:n, :n] = vario.covariance(cdist(self.xy, self.xy))
+                system[:n, :n] += jitter * np.eye(n)
+                system[n, n] = 0.0
+                self._kriging_lu = lu_factor(system)
+            rhs = np.ones((n + 1, len(xy)))
+            rhs[:n] = vario.covariance(cdist(self.xy, xy))
+            weights = lu_solve(self._kriging_lu, rhs)
+            return self.values @ weights[:n]
+
+        dist, idx = self.tree.query(xy, k=self.max_neighbors)
+        k = self.max_neighbors
+        points = self.xy[idx]
+        pair = np.linalg.norm(points[:, :, None, :] - points[:, None, :, :], axis=-1)
+        system = np.ones((len(xy), k + 1, k + 1))
+        system[:, :k, :k] = vario.covariance(pair) + jitter * np.eye(k)
+        system[:, k, k] = 0.0
+        rhs = np.ones((len(xy), k + 1, 1))
+        rhs[:, :k, 0] = vario.covariance(dist)
+        try:
+            weights = np.linalg.solve(system, rhs)[:, :k, 0]
+        except np.linalg.LinAlgError:
+            weights = (np.linalg.pinv(system) @ rhs)[:, :k, 0]
+        return (weights * self.values[idx]).sum(axis=1)
+
+    def _spline_predict(self, xy: np.ndarray) -> np.ndarray:
+        if self._spline is None:
+            self._spline = RBFInterpolator(
+                self.xy,
+                self.values,
+                kernel="thin_plate_spline",
+                neighbors=self.max_neighbors if self._local else None,
+                smoothing=1e-6,
+            )
+        return self._spline(xy)
+
+    def grid(
+        self, bounds: Bounds, resolution: float, tile_size: int = 256
+    ) -> Iterator[GridTile]:
+        """Yield the grid over ``bounds`` at ``resolution`` metres in tiles.
+
+        Only one ``tile_size`` x ``tile_size`` tile is held at a time.
+        """
+        lat_axis, lon_axis = grid_axes(bounds, resolution)
+        for row in range(0, len(lat_axis), tile_size):
+            lats = lat_axis[row : row + tile_size]
+            for col in range(0, len(lon_axis), tile_size):
+                lons = lon_axis[col : col + tile_size]
+                lat_grid, lon_grid = np.meshgrid(lats, lons, indexing="ij")
+                values = self.predict(lat_grid, lon_grid).reshape(lat_grid.shape)
+                yield GridTile(row, col, lats, lons, values)
+
+    def render(
+        self, bounds: Bounds, resolution: float, tile_size: int = 256
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return ``(lats, lons, values)`` of the whole grid over ``bounds``."""
+        lat_axis, lon_axis = grid_axes(bounds, resolution)
+        values = np.empty((len(lat_axis), len(lon_axis)))
+        for tile in self.grid(bounds, resolution, tile_size):
+            rows, cols = tile.values.shape
+            values[tile.row : tile.row + rows, tile.col : tile.col + cols] = tile.values
+        return lat_axis, lon_axis, values
+
+
+def grid_axes(bounds: Bounds, resolution: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Return latitude and longitude axes spaced ``resolution`` metres apart."""
+    if resolution <= 0:
+        raise ValueError("resolution must be positive")
+    min_lat, min_lon, max_lat, max_lon = bounds
+    lat_step = math.degrees(resolution / EARTH_RADIUS_M)
+    mid = math.radians((min_lat + max_lat) / 2)
+    lon_step = lat_step / max(math.cos(mid), 1e-9)
+    rows = int(math.floor((max_lat - min_lat) / lat_step)) + 1
+    cols = int(math.floor((max_lon - min_lon) / lon_step)) + 1
+    return min_lat + np.arange(rows) * lat_step, min_lon + np.arange(cols) * lon_step
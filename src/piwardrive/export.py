@@ -1,14 +1,16 @@
 """Helpers for exporting data in various formats."""
 
 import csv
-import json
 import os
 import tempfile
 import time
 import xml.etree.ElementTree as ET
 import zipfile
+from functools import partial
 from typing import Any, Callable, Iterable, Mapping, Sequence
 
+from .serialization import available_codecs, get_codec
+
 try:  # Optional dependency for shapefile export
     import shapefile
 
@@ -22,7 +24,19 @@ try:  # Optional dependency for shapefile export
 except Exception:  # pragma: no cover - optional
     shapefile = None
 
-EXPORT_FORMATS: tuple[str, ...] = ("csv", "json", "gpx", "kml", "geojson", "shp")
+# binary codecs from :mod:`piwardrive.serialization` (e.g. ``msgpack``)
+_CODEC_FORMATS = tuple(
+    name for name in available_codecs(negotiable_only=True) if get_codec(name).binary
+)
+
+EXPORT_FORMATS: tuple[str, ...] = (
+    "csv",
+    "json",
+    "gpx",
+    "kml",
+    "geojson",
+    "shp",
+) + _CODEC_FORMATS
 
 __all__ = [
     "EXPORT_FORMATS",
@@ -89,13 +103,25 @@ def export_json(
     rows: Sequence[Mapping[str, Any]], path: str, _fields: Sequence[str] | None
 ) -> None:
     """Write ``rows`` to ``path`` in JSON format."""
-    with open(path, "w", encoding="utf-8") as fh:
-        fh.write("[")
+    dumps = get_codec("json").dumps
+    with open(path, "wb") as fh:
+        fh.write(b"[")
         for i, rec in enumerate(rows):
             if i:
-                fh.write(",")
-            json.dump(rec, fh)
-        fh.write("]")
+                fh.write(b",")
+            fh.write(dumps(rec))
+        fh.write(b"]")
+
+
+def export_codec(
+    rows: Sequence[Mapping[str, Any]],
+    path: str,
+    _fields: Sequence[str] | None,
+    codec: str,
+) -> None:
+    """Write ``rows`` to ``path`` as one array encoded with ``codec``."""
+    with open(path, "wb") as fh:
+        fh.write(get_codec(codec).dumps(list(rows)))
 
 
 def export_gpx(
@@ -157,8 +183,9 @@ def export_geojson(
                 "properties": props,
             }
         )
-    with open(path, "w", encoding="utf-8") as fh:
-        json.dump({"type": "FeatureCollection", "features": features}, fh)
+    collection = {"type": "FeatureCollection", "features": features}
+    with open(path, "wb") as fh:
+        fh.write(get_codec("json").dumps(collection))
 
 
 def export_shp(
@@ -214,6 +241,7 @@ EXPORTERS: dict[
     "kml": export_kml,
     "geojson": export_geojson,
     "shp": export_shp,
+    **{name: partial(export_codec, codec=name) for name in _CODEC_FORMATS},
 }
 
 
@@ -6,12 +6,16 @@ available library. The import order is:
 1. ``orjson`` – preferred if installed.
 2. ``ujson`` – used when ``orjson`` is unavailable.
 3. builtin ``json`` – final fallback.
+
+:func:`dumps` always returns ``str``. Use :func:`dumpb` when the result is
+written to a socket, file or cache anyway; with ``orjson`` it returns the
+encoder's bytes without a decode/encode round trip.
 """
 
 from __future__ import annotations
 
 import json
-from typing import Any
+from typing import Any, Callable
 
 try:  # pragma: no cover - optional dependency
     import orjson as _json
@@ -21,6 +25,13 @@ except Exception:  # pragma: no cover - orjson missing
     except Exception:  # pragma: no cover - fallback
         _json = json
 
+if getattr(_json, "__name__", "") == "orjson":  # pragma: no cover - backend
+    _ORJSON_OPTS = _json.OPT_SERIALIZE_NUMPY
+    # non-str dict keys are ~25% slower in orjson, so only retry with them
+    _ORJSON_RETRY = _ORJSON_OPTS | _json.OPT_NON_STR_KEYS
+else:  # pragma: no cover - backend
+    _ORJSON_OPTS = _ORJSON_RETRY = None
+
 
 def loads(data: bytes | str) -> Any:
     """Deserialize JSON ``data`` using the chosen backend."""
@@ -35,4 +46,21 @@ def dumps(obj: Any, **kwargs: Any) -> str:
     return _result
 
 
-__all__ = ["loads", "dumps"]
+def dumpb(obj: Any, default: Callable[[Any], Any] | None = None) -> bytes:
+    """Serialize ``obj`` to compact UTF-8 JSON bytes.
+
+    Args:
+        obj: Object to encode.
+        default: Called for objects the backend cannot encode natively and
+            must return an encodable replacement.
+    """
+    if _ORJSON_OPTS is not None:
+        try:
+            return _json.dumps(obj, default=default, option=_ORJSON_OPTS)
+        except TypeError:
+            return _json.dumps(obj, default=default, option=_ORJSON_RETRY)
+    text = json.dumps(obj, default=default, separators=(",", ":"), ensure_ascii=False)
+    return text.encode()
+
+
+__all__ = ["loads", "dumps", "dumpb"]
@@ -12,12 +12,14 @@ import subprocess
 import threading
 import time
 from dataclasses import asdict, dataclass
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 import serial
 
+from .nmea import NMEAFix, NMEAStreamParser
+
 # Hardware-specific imports (conditional)
 try:
     import smbus
@@ -429,26 +431,63 @@ class EnhancedGPSManager:
 
     def _read_gps_data(self):
         """Read GPS data from serial connection"""
+        parser = NMEAStreamParser()
         while self.running:
             try:
-                line = (
-                    self.serial_connection.readline()
-                    .decode("ascii", errors="ignore")
-                    .strip()
-                )
-
-                if line.startswith("$GPGGA") or line.startswith("$GNGGA"):
-                    _gpsdata = self._parse_gga_sentence(line)
-                    if _gpsdata:
-                        self.current_position = _gpsdata
-
-                elif line.startswith("$GPRMC") or line.startswith("$GNRMC"):
-                    self._parse_rmc_sentence(line)
+                conn = self.serial_connection
+                data = conn.read(max(1, getattr(conn, "in_waiting", 0) or 0))
+                if not data:
+                    continue
+                for fix in parser.feed(data):
+                    gps_data = self._fix_to_gps_data(fix)
+                    if gps_data:
+                        self.current_position = gps_data
 
             except Exception as e:
                 logger.debug(f"Error reading GPS data: {e}")
                 time.sleep(0.1)
 
+    def _fix_to_gps_data(self, fix: NMEAFix) -> Optional[GPSData]:
+        """Convert a merged NMEA fix to :class:`GPSData`"""
+        if fix.latitude != fix.latitude or fix.longitude != fix.longitude:
+            return None
+
+        ts = fix.timestamp
+        if ts == ts:
+            timestamp = datetime.fromtimestamp(ts, timezone.utc)
+        elif fix.time == fix.time:
+            # NMEA times are UTC; without an RMC date assume today in UTC
+            seconds = int(fix.time)
+            timestamp = datetime.now(timezone.utc).replace(
+                hour=seconds // 3600,
+                minute=seconds // 60 % 60,
+                second=seconds % 60,
+                microsecond=0,
+            )
+        else:
+            timestamp = datetime.now(timezone.utc)
+
+        def _or_zero(value: float) -> float:
+            return value if value == value else 0.0
+
+        hdop = _or_zero(fix.hdop)
+        return GPSData(
+            timestamp=timestamp,
+            latitude=fix.latitude,
+            longitude=fix.longitude,
+            altitude=_or_zero(fix.altitude),
+            speed=_or_zero(fix.speed),
+            bearing=_or_zero(fix.bearing),
+            accuracy=hdop * 5,  # Rough estimate
+            satellites=fix.satellites,
+            hdop=hdop,
+            vdop=_or_zero(fix.vdop),
+            pdop=_or_zero(fix.pdop),
+            fix_type=self._get_fix_type(fix.quality),
+            dgps_correction=fix.quality in [2, 3, 4, 5],
+            rtk_correction=fix.quality in [4, 5],
+        )
+
     def _parse_gga_sentence(self, sentence: str) -> Optional[GPSData]:
         """Parse GGA NMEA sentence"""
         try:
@@ -538,13 +577,11 @@ class EnhancedGPSManager:
         if not coord_str:
             return 0.0
 
-        # NMEA format: DDMM.MMMM or DDDMM.MMMM
-        if len(coord_str) > 7:  # Longitude
-            degrees = int(coord_str[:3])
-            minutes = float(coord_str[3:])
-        else:  # Latitude
-            degrees = int(coord_str[:2])
-            minutes = float(coord_str[2:])
+        # NMEA format: DDMM.MMMM or DDDMM.MMMM; minutes always take two
+        # digits before the decimal point
+        value = float(coord_str)
+        degrees = int(value // 100)
+        minutes = value - degrees * 100
 
         decimal_degrees = degrees + minutes / 60.0
 
@@ -0,0 +1,406 @@
+"""Streaming NMEA 0183 parser for GPS receivers.
+
+:class:`NMEAStreamParser` is fed raw bytes as they arrive from the serial
+port. It frames sentences incrementally, drops sentences whose checksum does
+not match and merges the GGA, RMC and GSA sentences of one epoch into a
+single :class:`NMEAFix`. A fix is emitted as soon as its epoch has all three
+sentences and is not modified afterwards. Epochs missing one of them are
+emitted when the next epoch starts or on :meth:`~NMEAStreamParser.flush`.
+A GSA received before the timed sentences of an epoch is kept for it.
+
+:func:`parse_log` runs the same parser over a recorded log and returns one
+NumPy array per field for track replay.
+"""
+
+from __future__ import annotations
+
+import calendar
+import itertools
+import operator
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+try:  # pragma: no cover - optional dependency
+    import numpy as np
+except Exception:  # pragma: no cover - numpy missing
+    np = None
+
+MAX_SENTENCE = 128  # NMEA allows 82 bytes; leave room for vendor extensions
+_NAN = float("nan")
+_KNOTS_TO_KMH = 1.852
+
+
+@lru_cache(maxsize=8)
+def _midnight(date: tuple[int, int, int]) -> int:
+    return calendar.timegm((*date, 0, 0, 0))
+
+
+@dataclass(slots=True)
+class NMEAFix:
+    """GPS fix merged from the sentences of a single epoch."""
+
+    time: float = _NAN  # UTC seconds since midnight
+    date: Optional[tuple[int, int, int]] = None  # (year, month, day)
+    latitude: float = _NAN
+    longitude: float = _NAN
+    altitude: float = _NAN
+    speed: float = _NAN  # km/h
+    bearing: float = _NAN
+    quality: int = 0  # GGA fix quality
+    mode: int = 0  # GSA fix mode: 1 none, 2 2D, 3 3D
+    satellites: int = 0
+    hdop: float = _NAN
+    vdop: float = _NAN
+    pdop: float = _NAN
+    valid: bool = False  # RMC status ``A``
+
+    @property
+    def timestamp(self) -> float:
+        """Return UNIX time of the fix, or NaN when the date is unknown."""
+        if self.date is None:
+            return _NAN
+        return _midnight(self.date) + self.time
+
+
+_FOLD_MASKS = tuple((1 << bits) - 1 for bits in (512, 256, 128, 64, 32, 16))
+
+
+def _xor(body: bytes, _m: tuple[int, ...] = _FOLD_MASKS) -> int:
+    # XOR all bytes by folding the body as one integer; a handful of big-int
+    # operations instead of a Python loop over every byte
+    value = int.from_bytes(body, "little")
+    if len(body) > 128:
+        checksum = 0
+        while value:
+            checksum ^= value & 0xFF
+            value >>= 8
+        return checksum
+    value = (value ^ (value >> 512)) & _m[0]
+    value = (value ^ (value >> 256)) & _m[1]
+    value = (value ^ (value >> 128)) & _m[2]
+    value = (value ^ (value >> 64)) & _m[3]
+    value = (value ^ (value >> 32)) & _m[4]
+    value = (value ^ (value >> 16)) & _m[5]
+    return (value ^ (value >> 8)) & 0xFF
+
+
+def checksum_ok(sentence: bytes) -> bool:
+    """Return ``True`` if ``sentence`` (``$...*hh``) has a valid checksum."""
+    start = sentence.find(b"$")
+    star = sentence.rfind(b"*")
+    if start < 0 or star < start:
+        return False
+    try:
+        expected = int(sentence[star + 1 : star + 3], 16)
+    except ValueError:
+        return False
+    return _xor(sentence[start + 1 : star]) == expected
+
+
+BATCH_VALIDATE_MIN = 64  # lines per feed before checksums are vectorised
+
+if np is not None:
+    _HEX = np.full(256, -1, dtype=np.int16)
+    for _i, _c in enumerate(b"0123456789ABCDEF"):
+        _HEX[_c] = _i
+    for _i, _c in enumerate(b"abcdef"):
+        _HEX[_c] = 10 + _i
+
+
+def _batch_checksums(lines: List[bytes]) -> List[bool]:
+    """Return which of ``lines`` are ``$...*hh`` sentences with valid checksums.
+
+    All lines are validated at once with NumPy. A ``False`` entry only means
+    the line is not a clean sentence; lines with leading noise are rejected
+    here and must be checked individually.
+    """
+    width = min(max(map(len, lines)), MAX_SENTENCE)
+    u8 = np.array(lines, dtype=f"S{width}").view(np.uint8).reshape(len(lines), width)
+    star = (u8 == 0x2A).argmax(axis=1)
+    cols = np.arange(width)
+    body = (cols >= 1) & (cols < star[:, None])
+    xor = np.bitwise_xor.reduce(np.where(body, u8, 0), axis=1)
+    rows = np.arange(len(lines))
+    hi = _HEX[u8[rows, np.minimum(star + 1, width - 1)]]
+    lo = _HEX[u8[rows, np.minimum(star + 2, width - 1)]]
+    ok = (u8[:, 0] == 0x24) & (star > 0) & (star + 2 < width)
+    ok &= (hi >= 0) & (lo >= 0) & (hi * 16 + lo == xor)
+    return ok.tolist()
+
+
+# ----------------------------------------------------------------------
+# Field parsers
+def _time(field: bytes) -> float:
+    # hhmmss[.sss]
+    if len(field) < 6:
+        return _NAN
+    return int(field[0:2]) * 3600 + int(field[2:4]) * 60 + float(field[4:])
+
+
+def _coord(value: bytes, hemisphere: bytes) -> float:
+    # ddmm.mmmm / dddmm.mmmm -> decimal degrees without string slicing
+    if not value:
+        return _NAN
+    raw = float(value)
+    degrees = raw // 100
+    result = degrees + (raw - degrees * 100) / 60.0
+    return -result if hemisphere == b"S" or hemisphere == b"W" else result
+
+
+@lru_cache(maxsize=8)
+def _date(field: bytes) -> Optional[tuple[int, int, int]]:
+    if len(field) != 6:
+        return None
+    year = int(field[4:6])
+    year += 2000 if year < 80 else 1900
+    return year, int(field[2:4]), int(field[0:2])
+
+
+def _gga(fix: NMEAFix, f: List[bytes], nan: float = _NAN) -> None:
+    if len(f) < 10:
+        raise ValueError("short GGA")
+    fix.latitude = _coord(f[2], f[3])
+    fix.longitude = _coord(f[4], f[5])
+    fix.quality = int(f[6]) if f[6] else 0
+    fix.satellites = int(f[7]) if f[7] else 0
+    if not fix.mode:  # GSA carries the authoritative HDOP
+        fix.hdop = float(f[8]) if f[8] else nan
+    fix.altitude = float(f[9]) if f[9] else nan
+
+
+def _rmc(fix: NMEAFix, f: List[bytes], nan: float = _NAN) -> None:
+    if len(f) < 10:
+        raise ValueError("short RMC")
+    fix.valid = f[2] == b"A"
+    if fix.latitude != fix.latitude:  # GGA not seen for this epoch
+        fix.latitude = _coord(f[3], f[4])
+        fix.longitude = _coord(f[5], f[6])
+    fix.speed = float(f[7]) * _KNOTS_TO_KMH if f[7] else nan
+    fix.bearing = float(f[8]) if f[8] else nan
+    fix.date = _date(f[9])
+
+
+def _gsa(fix: NMEAFix, f: List[bytes], nan: float = _NAN) -> None:
+    if len(f) < 18:
+        raise ValueError("short GSA")
+    fix.mode = int(f[2]) if f[2] else 0
+    fix.pdop = float(f[15]) if f[15] else nan
+    fix.hdop = float(f[16]) if f[16] else nan
+    fix.vdop = float(f[17]) if f[17] else nan
+
+
+_GGA, _RMC, _GSA = 1, 2, 4
+_COMPLETE = _GGA | _RMC | _GSA
+
+# sentence type -> (parser, index of the UTC time field or 0 if none, flag)
+_PARSERS: Dict[bytes, tuple[Callable[[NMEAFix, List[bytes]], None], int, int]] = {
+    b"GGA": (_gga, 1, _GGA),
+    b"RMC": (_rmc, 1, _RMC),
+    b"GSA": (_gsa, 0, _GSA),
+}
+
+
+class NMEAStreamParser:
+    """Incrementally parse NMEA bytes into merged per-epoch fixes."""
+
+    def __init__(self, validate: bool = True) -> None:
+        """Initialize the parser.
+
+        Args:
+            validate: Reject sentences without a valid ``*hh`` checksum.
+        """
+        self.validate = validate
+        self._tail = b""
+        self._fix: Optional[NMEAFix] = None
+        self._epoch = b""  # raw UTC time field of ``_fix``, empty if untimed
+        self._seen = 0  # GGA/RMC/GSA flags of ``_fix``
+        self.stats: Dict[str, int] = {
+            "sentences": 0,
+            "bad_checksum": 0,
+            "malformed": 0,
+            "ignored": 0,
+            "fixes": 0,
+        }
+
+    def feed(self, data: bytes) -> List[NMEAFix]:
+        """Consume ``data`` and return the fixes completed by it."""
+        if self._tail:
+            data = self._tail + data
+        lines = data.split(b"\n")
+        tail = lines.pop()
+        if len(tail) > MAX_SENTENCE:
+            # no line ending in sight; resynchronise on the last ``$``
+            dollar = tail.rfind(b"$")
+            tail = tail[dollar:] if dollar > 0 else b""
+            self.stats["malformed"] += 1
+        self._tail = tail
+        return self._consume(lines)
+
+    def flush(self) -> List[NMEAFix]:
+        """Return the fix of the current epoch, if not emitted yet, and reset it."""
+        fixes = self._consume([self._tail]) if self._tail else []
+        self._tail = b""
+        if self._fix is not None and self._epoch:
+            fixes.append(self._fix)
+            self.stats["fixes"] += 1
+        self._fix = None
+        self._epoch = b""
+        self._seen = 0
+        return fixes
+
+    def _consume(self, lines: List[bytes]) -> List[NMEAFix]:
+        fixes: List[NMEAFix] = []
+        stats = self.stats
+        validate = self.validate
+        parsers = _PARSERS
+        fix, epoch, seen = self._fix, self._epoch, self._seen
+        if validate and np is not None and len(lines) >= BATCH_VALIDATE_MIN:
+            checked: Iterable[bool] = _batch_checksums(lines)
+        else:
+            checked = itertools.repeat(False)
+        for line, good in zip(lines, checked):
+            start = line.find(b"$")
+            if start < 0:
+                continue
+            stats["sentences"] += 1
+            entry = parsers.get(line[start + 3 : start + 6])
+            if entry is None:
+                stats["ignored"] += 1
+                continue
+            star = line.rfind(b"*")
+            if star > start:
+                body = line[start + 1 : star]
+                if validate and not good:
+                    try:
+                        good = _xor(body) == int(line[star + 1 : star + 3], 16)
+                    except ValueError:
+                        good = False
+                    if not good:
+                        stats["bad_checksum"] += 1
+                        continue
+            elif validate:
+                stats["bad_checksum"] += 1
+                continue
+            else:
+                body = line[start + 1 :].rstrip()
+            fields = body.split(b",")
+            parser, time_index, flag = entry
+            try:
+                if time_index:
+                    raw = fields[time_index]
+                    if raw != epoch:
+                        if fix is not None and epoch:
+                            # the previous epoch is incomplete; emit it as is
+                            fixes.append(fix)
+                            stats["fixes"] += 1
+                            fix = None
+                        if fix is None:
+                            fix = NMEAFix()
+                            seen = 0
+                        fix.time = _time(raw)
+                        epoch = raw
+                if fix is None:
+                    fix = NMEAFix()
+                    seen = 0
+                parser(fix, fields)
+                seen |= flag
+                if seen == _COMPLETE:
+                    fixes.append(fix)
+                    stats["fixes"] += 1
+                    fix, epoch, seen = None, b"", 0
+            except (ValueError, IndexError):
+                stats["malformed"] += 1
+        self._fix, self._epoch, self._seen = fix, epoch, seen
+        return fixes
+
+
+FIELDS = (
+    "timestamp",
+    "time",
+    "latitude",
+    "longitude",
+    "altitude",
+    "speed",
+    "bearing",
+    "hdop",
+    "vdop",
+    "pdop",
+    "quality",
+    "mode",
+    "satellites",
+)
+_INT_FIELDS = frozenset({"quality", "mode", "satellites"})
+_row = operator.attrgetter(*FIELDS)
+
+
+Source = Union[str, "os.PathLike[str]", IO[bytes], bytes, Iterable[bytes]]
+
+
+def _chunks(source: Source, chunk_size: int) -> Iterator[bytes]:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield bytes(source)
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as fh:
+            yield from iter(lambda: fh.read(chunk_size), b"")
+    elif hasattr(source, "read"):
+        yield from iter(lambda: source.read(chunk_size), b"")
+    else:
+        yield from source
+
+
+def iter_fixes(
+    source: Source, *, chunk_size: int = 1 << 20, validate: bool = True
+) -> Iterator[NMEAFix]:
+    """Yield merged fixes from a recorded NMEA log.
+
+    Args:
+        source: Path, binary file object, bytes or iterable of byte chunks.
+        chunk_size: Bytes read per step from paths and files.
+        validate: Reject sentences with a bad checksum.
+    """
+    parser = NMEAStreamParser(validate=validate)
+    for chunk in _chunks(source, chunk_size):
+        yield from parser.feed(chunk)
+    yield from parser.flush()
+
+
+def parse_log(
+    source: Source, *, chunk_size: int = 1 << 20, validate: bool = True
+) -> Dict[str, "np.ndarray"]:
+    """Parse a recorded NMEA log into one NumPy array per field.
+
+    Args:
+        source: Path, binary file object, bytes or iterable of byte chunks.
+        chunk_size: Bytes read per step from paths and files.
+        validate: Reject sentences with a bad checksum.
+
+    Returns:
+        Mapping of every name in :data:`FIELDS` to an array with one element
+        per fix. Missing values are NaN, except for the integer ``quality``,
+        ``mode`` and ``satellites`` columns where they are ``0``.
+    """
+    if np is None:
+        raise RuntimeError("numpy is required for parse_log")
+    parser = NMEAStreamParser(validate=validate)
+    rows: List[tuple] = []
+    for chunk in _chunks(source, chunk_size):
+        rows.extend(map(_row, parser.feed(chunk)))
+    rows.extend(map(_row, parser.flush()))
+    columns = list(zip(*rows)) if rows else [()] * len(FIELDS)
+    return {
+        name: np.array(column, dtype=np.int32 if name in _INT_FIELDS else np.float64)
+        for name, column in zip(FIELDS, columns)
+    }
+
+
+__all__ = [
+    "FIELDS",
+    "MAX_SENTENCE",
+    "NMEAFix",
+    "NMEAStreamParser",
+    "checksum_ok",
+    "iter_fixes",
+    "parse_log",
+]
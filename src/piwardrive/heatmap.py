@@ -39,6 +39,7 @@ def _fill_histogram(
     max_lat: float,
     min_lon: float,
     max_lon: float,
+    weights: Sequence[int] | None = None,
 ) -> list[list[int]]:
     hist = [[0 for _ in range(bins_lon)] for _ in range(bins_lat)]
     if max_lat == min_lat or max_lon == min_lon:
@@ -46,14 +47,14 @@ def _fill_histogram(
 
     lat_span = max_lat - min_lat
     lon_span = max_lon - min_lon
-    for lat, lon in pts:
+    for n, (lat, lon) in enumerate(pts):
         if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
             continue
         i = int((lat - min_lat) / lat_span * bins_lat)
         j = int((lon - min_lon) / lon_span * bins_lon)
         i = min(i, bins_lat - 1)
         j = min(j, bins_lon - 1)
-        hist[i][j] += 1
+        hist[i][j] += 1 if weights is None else weights[n]
     return hist
 
 
@@ -65,11 +66,14 @@ def histogram(
     *,
     bins: int | Tuple[int, int] = 100,
     bounds: Sequence[float] | None = None,
+    weights: Sequence[int] | None = None,
 ) -> Tuple[List[List[int]], Tuple[float, float], Tuple[float, float]]:
     """Return a 2D histogram for latitude/longitude pairs.
 
     ``bins`` sets the grid resolution. If ``bounds`` is omitted the
-    minimum/maximum coordinates are derived from ``coords``.
+    minimum/maximum coordinates are derived from ``coords``. ``weights``
+    gives the count contributed by each coordinate, e.g. when re-binning
+    pre-aggregated cells; each coordinate counts once by default.
     """
     pts = [(float(lat), float(lon)) for lat, lon in coords]
     bins_lat, bins_lon = _get_bins(bins)
@@ -82,7 +86,9 @@ def histogram(
     else:
         min_lat, min_lon, max_lat, max_lon = map(float, bounds)
 
-    hist = _fill_histogram(pts, bins_lat, bins_lon, min_lat, max_lat, min_lon, max_lon)
+    hist = _fill_histogram(
+        pts, bins_lat, bins_lon, min_lat, max_lat, min_lon, max_lon, weights
+    )
     return hist, (min_lat, max_lat), (min_lon, max_lon)
 
 
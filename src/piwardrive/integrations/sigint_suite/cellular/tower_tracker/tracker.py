@@ -1,18 +1,85 @@
 """Module tracker."""
 
+import asyncio
+import contextlib
+import logging
 import time
 from types import TracebackType
-from typing import Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, List, Mapping, Optional
 
 import aiosqlite
 
+logger = logging.getLogger(__name__)
+
+_INSERT_SQL = {
+    "towers": """
+        INSERT INTO towers (tower_id, lat, lon, last_seen)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(tower_id) DO UPDATE SET
+            lat=excluded.lat,
+            lon=excluded.lon,
+            last_seen=excluded.last_seen
+        """,
+    "tower_observations": """
+        INSERT INTO tower_observations (tower_id, rssi, lat, lon, timestamp)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+    "wifi_observations": """
+        INSERT INTO wifi_observations (bssid, ssid, lat, lon, timestamp)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+    "bluetooth_observations": """
+        INSERT INTO bluetooth_observations (address, name, lat, lon, timestamp)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+}
+
+# (table, key column, selected columns) used by the history helpers
+_HISTORY = {
+    "tower": ("tower_observations", "tower_id", "tower_id, rssi, lat, lon"),
+    "wifi": ("wifi_observations", "bssid", "bssid, ssid, lat, lon"),
+    "bluetooth": ("bluetooth_observations", "address", "address, name, lat, lon"),
+}
+
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-4000",
+)
+
+
+def _or(value: Optional[int], default: int) -> int:
+    return default if value is None else value
+
 
 class TowerTracker:
-    """Maintain a database of observed cell towers."""
+    """Maintain a database of observed cell towers.
 
-    def __init__(self, db_path: str = "towers.db") -> None:
+    Writes are collected in an in-memory buffer and committed in a single
+    transaction once ``buffer_size`` rows are pending or ``flush_interval``
+    seconds have passed since the last commit; a background task flushes
+    rows that are still pending after ``flush_interval``. Rows of a failed
+    commit stay buffered. Read helpers flush first so callers always
+    observe their own writes. Use ``buffer_size=1`` to commit every call.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "towers.db",
+        *,
+        buffer_size: int = 500,
+        flush_interval: float = 5.0,
+    ) -> None:
         self.db_path = db_path
         self.conn: aiosqlite.Connection | None = None
+        self.buffer_size = max(1, buffer_size)
+        self.flush_interval = flush_interval
+        self._buffer: Dict[str, List[tuple[Any, ...]]] = {t: [] for t in _INSERT_SQL}
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task[None] | None = None
 
     async def __aenter__(self) -> "TowerTracker":
         """Allow usage as an async context manager."""
@@ -32,6 +99,8 @@ class TowerTracker:
         if self.conn is None:
             self.conn = await aiosqlite.connect(self.db_path)
             self.conn.row_factory = aiosqlite.Row
+            for pragma in _PRAGMAS:
+                await self.conn.execute(pragma)
             await self._init_db()
         return self.conn
 
@@ -83,30 +152,103 @@ class TowerTracker:
             )
             """
         )
+        # Composite indexes serve the history lookups and their ordering
+        await self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tower_obs_id_ts "
+            "ON tower_observations(tower_id, timestamp)"
+        )
+        await self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_wifi_obs_id_ts "
+            "ON wifi_observations(bssid, timestamp)"
+        )
+        await self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_bt_obs_id_ts "
+            "ON bluetooth_observations(address, timestamp)"
+        )
         await self.conn.commit()
 
+    # ------------------------------------------------------------------
+    # Write buffer
+    # ------------------------------------------------------------------
+
+    async def _buffer_rows(self, table: str, rows: Iterable[tuple[Any, ...]]) -> None:
+        buf = self._buffer[table]
+        before = len(buf)
+        buf.extend(rows)
+        self._pending += len(buf) - before
+        if (
+            self._pending >= self.buffer_size
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            await self.flush()
+        elif self._pending and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        while self._pending:
+            delay = self._last_flush + self.flush_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            try:
+                await self.flush()
+            except Exception as exc:
+                logger.warning("Tower tracker flush failed: %s", exc)
+                await asyncio.sleep(self.flush_interval)
+
+    async def flush(self) -> int:
+        """Commit all buffered writes in one transaction and return the count.
+
+        If the commit fails the rows are buffered again and the error is
+        raised.
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            buffers = self._buffer
+            self._buffer = {t: [] for t in _INSERT_SQL}
+            count, self._pending = self._pending, 0
+            try:
+                conn = await self._get_conn()
+                for table, rows in buffers.items():
+                    if rows:
+                        await conn.executemany(_INSERT_SQL[table], rows)
+                await conn.commit()
+            except Exception:
+                if self.conn is not None:
+                    with contextlib.suppress(Exception):
+                        await self.conn.rollback()
+                # keep rows buffered since the failed batch was taken
+                for table, rows in self._buffer.items():
+                    buffers[table].extend(rows)
+                self._buffer = buffers
+                self._pending += count
+                raise
+            self._last_flush = time.monotonic()
+            return count
+
     async def update_tower(
         self, tower_id: str, lat: float, lon: float, last_seen: Optional[int] = None
     ) -> None:
         """Insert or update ``tower_id`` with location and timestamp."""
         if last_seen is None:
             last_seen = int(time.time())
-        conn = await self._get_conn()
-        await conn.execute(
-            """
-            INSERT INTO towers (tower_id, lat, lon, last_seen)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(tower_id) DO UPDATE SET
-                lat=excluded.lat,
-                lon=excluded.lon,
-                last_seen=excluded.last_seen
-            """,
-            (tower_id, lat, lon, last_seen),
+        await self._buffer_rows("towers", [(tower_id, lat, lon, last_seen)])
+
+    async def update_tower_many(self, towers: Iterable[Mapping[str, Any]]) -> None:
+        """Insert or update several towers given as ``update_tower`` kwargs."""
+        now = int(time.time())
+        await self._buffer_rows(
+            "towers",
+            (
+                (t["tower_id"], t["lat"], t["lon"], _or(t.get("last_seen"), now))
+                for t in towers
+            ),
         )
-        await conn.commit()
 
     async def get_tower(self, tower_id: str) -> Optional[Dict[str, float]]:
         """Return tower details or ``None`` if not found."""
+        await self.flush()
         conn = await self._get_conn()
         cur = await conn.execute(
             "SELECT tower_id, lat, lon, last_seen FROM towers WHERE tower_id=?",
@@ -124,15 +266,52 @@ class TowerTracker:
 
     async def all_towers(self) -> List[Dict[str, float]]:
         """Return all tracked towers."""
+        await self.flush()
         conn = await self._get_conn()
         cur = await conn.execute("SELECT tower_id, lat, lon, last_seen FROM towers")
         rows = await cur.fetchall()
         return [dict(row) for row in rows]
 
     async def close(self) -> None:
-        """Close the database connection."""
+        """Flush pending writes and close the database connection."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flush_task
+            self._flush_task = None
+        if self.conn is not None or self._pending:
+            await self.flush()
         if self.conn is not None:
             await self.conn.close()
+            self.conn = None
+
+    async def _history(self, kind: str, key: str) -> List[Dict[str, float]]:
+        return [row async for row in self._iter_history(kind, key)]
+
+    async def _iter_history(
+        self, kind: str, key: str, page_size: int = 500
+    ) -> AsyncIterator[Dict[str, Any]]:
+        table, column, columns = _HISTORY[kind]
+        await self.flush()
+        conn = await self._get_conn()
+        query = (
+            f"SELECT id, {columns}, timestamp FROM {table} "  # nosec B608
+            f"WHERE {column}=? AND (timestamp, id) < (?, ?) "
+            "ORDER BY timestamp DESC, id DESC LIMIT ?"
+        )
+        # keyset pagination: resume strictly after the last (timestamp, id)
+        last_ts: float = float("inf")
+        last_id: float = float("inf")
+        while True:
+            cur = await conn.execute(query, (key, last_ts, last_id, page_size))
+            rows = list(await cur.fetchall())
+            for row in rows:
+                rec = dict(row)
+                last_id = rec.pop("id")
+                last_ts = rec["timestamp"]
+                yield rec
+            if len(rows) < page_size:
+                break
 
     # ------------------------------------------------------------------
     # Cellular tower helpers
@@ -149,29 +328,36 @@ class TowerTracker:
         """Persist a cell tower observation."""
         if timestamp is None:
             timestamp = int(time.time())
-        conn = await self._get_conn()
-        await conn.execute(
-            """
-            INSERT INTO tower_observations (tower_id, rssi, lat, lon, timestamp)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (tower_id, rssi, lat, lon, timestamp),
+        await self._buffer_rows(
+            "tower_observations", [(tower_id, rssi, lat, lon, timestamp)]
+        )
+
+    async def log_tower_many(self, records: Iterable[Mapping[str, Any]]) -> None:
+        """Persist several cell tower observations given as ``log_tower`` kwargs."""
+        now = int(time.time())
+        await self._buffer_rows(
+            "tower_observations",
+            (
+                (
+                    r["tower_id"],
+                    r["rssi"],
+                    r.get("lat"),
+                    r.get("lon"),
+                    _or(r.get("timestamp"), now),
+                )
+                for r in records
+            ),
         )
-        await conn.commit()
 
     async def tower_history(self, tower_id: str) -> List[Dict[str, float]]:
         """Return all records for ``tower_id`` sorted by newest first."""
-        conn = await self._get_conn()
-        cur = await conn.execute(
-            """
-            SELECT tower_id, rssi, lat, lon, timestamp
-            FROM tower_observations
-            WHERE tower_id=? ORDER BY timestamp DESC
-            """,
-            (tower_id,),
-        )
-        rows = await cur.fetchall()
-        return [dict(row) for row in rows]
+        return await self._history("tower", tower_id)
+
+    def iter_tower_history(
+        self, tower_id: str, page_size: int = 500
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield records for ``tower_id`` newest first, ``page_size`` per query."""
+        return self._iter_history("tower", tower_id, page_size)
 
     # ------------------------------------------------------------------
     # Wi-Fi helpers
@@ -188,29 +374,36 @@ class TowerTracker:
         """Persist a Wi-Fi observation."""
         if timestamp is None:
             timestamp = int(time.time())
-        conn = await self._get_conn()
-        await conn.execute(
-            """
-            INSERT INTO wifi_observations (bssid, ssid, lat, lon, timestamp)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (bssid, ssid, lat, lon, timestamp),
+        await self._buffer_rows(
+            "wifi_observations", [(bssid, ssid, lat, lon, timestamp)]
+        )
+
+    async def log_wifi_many(self, records: Iterable[Mapping[str, Any]]) -> None:
+        """Persist several Wi-Fi observations given as ``log_wifi`` kwargs."""
+        now = int(time.time())
+        await self._buffer_rows(
+            "wifi_observations",
+            (
+                (
+                    r["bssid"],
+                    r.get("ssid"),
+                    r.get("lat"),
+                    r.get("lon"),
+                    _or(r.get("timestamp"), now),
+                )
+                for r in records
+            ),
         )
-        await conn.commit()
 
     async def wifi_history(self, bssid: str) -> List[Dict[str, float]]:
         """Return all Wi-Fi records for ``bssid`` sorted by newest first."""
-        conn = await self._get_conn()
-        cur = await conn.execute(
-            """
-            SELECT bssid, ssid, lat, lon, timestamp
-            FROM wifi_observations
-            WHERE bssid=? ORDER BY timestamp DESC
-            """,
-            (bssid,),
-        )
-        rows = await cur.fetchall()
-        return [dict(row) for row in rows]
+        return await self._history("wifi", bssid)
+
+    def iter_wifi_history(
+        self, bssid: str, page_size: int = 500
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield Wi-Fi records for ``bssid`` newest first, ``page_size`` per query."""
+        return self._iter_history("wifi", bssid, page_size)
 
     # ------------------------------------------------------------------
     # Bluetooth helpers
@@ -227,26 +420,33 @@ class TowerTracker:
         """Persist a Bluetooth observation."""
         if timestamp is None:
             timestamp = int(time.time())
-        conn = await self._get_conn()
-        await conn.execute(
-            """
-            INSERT INTO bluetooth_observations (address, name, lat, lon, timestamp)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (address, name, lat, lon, timestamp),
+        await self._buffer_rows(
+            "bluetooth_observations", [(address, name, lat, lon, timestamp)]
+        )
+
+    async def log_bluetooth_many(self, records: Iterable[Mapping[str, Any]]) -> None:
+        """Persist several Bluetooth observations given as ``log_bluetooth`` kwargs."""
+        now = int(time.time())
+        await self._buffer_rows(
+            "bluetooth_observations",
+            (
+                (
+                    r["address"],
+                    r.get("name"),
+                    r.get("lat"),
+                    r.get("lon"),
+                    _or(r.get("timestamp"), now),
+                )
+                for r in records
+            ),
         )
-        await conn.commit()
 
     async def bluetooth_history(self, address: str) -> List[Dict[str, float]]:
         """Return all Bluetooth records for ``address`` sorted by newest first."""
-        conn = await self._get_conn()
-        cur = await conn.execute(
-            """
-            SELECT address, name, lat, lon, timestamp
-            FROM bluetooth_observations
-            WHERE address=? ORDER BY timestamp DESC
-            """,
-            (address,),
-        )
-        rows = await cur.fetchall()
-        return [dict(row) for row in rows]
+        return await self._history("bluetooth", address)
+
+    def iter_bluetooth_history(
+        self, address: str, page_size: int = 500
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield Bluetooth records for ``address`` newest first in pages."""
+        return self._iter_history("bluetooth", address, page_size)
@@ -0,0 +1,500 @@
+"""Bounded in-process cache with constant-time eviction.
+
+:class:`IntelligentCache` keeps values in a dict and delegates ordering to a
+small policy object: an :class:`~collections.OrderedDict` for LRU and FIFO,
+frequency buckets for LFU and a segmented LRU for ``ADAPTIVE``. Every
+operation is O(1). With admission enabled, which is the default for
+``ADAPTIVE``, new keys first enter a small LRU window (W-TinyLFU). A key
+leaving the window only displaces the main region's eviction victim when a
+TinyLFU sketch has seen it requested more often recently, so one-off scans
+churn the window instead of flushing the working set.
+
+Entry sizes come from per-type sizers (see :func:`register_sizer`) or from
+the caller through ``put(..., size=)``, and are summed incrementally.
+"""
+
+from __future__ import annotations
+
+import itertools
+import sys
+import threading
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Callable, Dict, Hashable, List, Optional, Protocol
+
+import numpy as np
+
+
+class CacheStrategy(Enum):
+    """Cache strategy options"""
+
+    LRU = "lru"
+    LFU = "lfu"
+    FIFO = "fifo"
+    ADAPTIVE = "adaptive"
+
+
+# ---------------------------------------------------------------------------
+# Size estimation
+
+_SIZERS: Dict[type, Callable[[Any], int]] = {
+    bytes: len,
+    bytearray: len,
+    memoryview: lambda v: v.nbytes,
+    str: len,
+    int: lambda v: 28,
+    float: lambda v: 24,
+    bool: lambda v: 28,
+    type(None): lambda v: 16,
+}
+
+# container items sampled to extrapolate their total size
+SIZE_SAMPLE = 8
+
+
+def register_sizer(tp: type, func: Callable[[Any], int]) -> None:
+    """Use ``func`` to estimate the size of values of exactly type ``tp``."""
+    _SIZERS[tp] = func
+
+
+def sizeof(value: Any, _depth: int = 0) -> int:
+    """Return a cheap estimate of the bytes held by ``value``.
+
+    Containers are estimated from their first :data:`SIZE_SAMPLE` items, so
+    the cost does not grow with their length.
+    """
+    sizer = _SIZERS.get(type(value))
+    if sizer is not None:
+        return sizer(value)
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    shallow = sys.getsizeof(value, 64)
+    if _depth >= 2 or not isinstance(value, (list, tuple, set, frozenset, dict)):
+        return shallow
+    if not value:
+        return shallow
+    if isinstance(value, dict):
+        sample = itertools.islice(value.items(), SIZE_SAMPLE)
+        sizes = [sizeof(k, _depth + 1) + sizeof(v, _depth + 1) for k, v in sample]
+    else:
+        sample = itertools.islice(value, SIZE_SAMPLE)
+        sizes = [sizeof(v, _depth + 1) for v in sample]
+    return shallow + sum(sizes) * len(value) // len(sizes)
+
+
+# ---------------------------------------------------------------------------
+# Admission
+
+
+class FrequencySketch:
+    """Count-min sketch of recent request counts for TinyLFU admission.
+
+    Four rows of saturating 4-bit counters, each row about four times
+    ``capacity`` wide; all counters are halved after ``10 * capacity``
+    increments so old popularity fades.
+    """
+
+    DEPTH = 4
+    MAX_COUNT = 15
+    _SEEDS = (
+        0x9E3779B97F4A7C15,
+        0xC2B2AE3D27D4EB4F,
+        0x165667B19E3779F9,
+        0x27D4EB2F165667C5,
+    )
+
+    def __init__(self, capacity: int) -> None:
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.width = 1 << max(6, (4 * capacity - 1).bit_length())
+        self._shift = 64 - (self.width.bit_length() - 1)
+        self._table = bytearray(self.DEPTH * self.width)
+        self._view = np.frombuffer(self._table, dtype=np.uint8)
+        self.sample_size = 10 * capacity
+        self._additions = 0
+
+    def _slots(self, key: Hashable) -> List[int]:
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        return [
+            row * self.width + (((h * seed) & 0xFFFFFFFFFFFFFFFF) >> self._shift)
+            for row, seed in enumerate(self._SEEDS)
+        ]
+
+    def increment(self, key: Hashable) -> None:
+        """Count one request for ``key``."""
+        table = self._table
+        for slot in self._slots(key):
+            if table[slot] < self.MAX_COUNT:
+                table[slot] += 1
+        self._additions += 1
+        if self._additions >= self.sample_size:
+            np.right_shift(self._view, 1, out=self._view)
+            self._additions //= 2
+
+    def estimate(self, key: Hashable) -> int:
+        """Return the estimated recent request count of ``key``."""
+        table = self._table
+        return min(table[slot] for slot in self._slots(key))
+
+    def clear(self) -> None:
+        """Forget all counts."""
+        self._view[:] = 0
+        self._additions = 0
+
+
+# ---------------------------------------------------------------------------
+# Eviction policies; all methods are O(1) except LFU removal of the last key
+# of the lowest frequency, which scans the distinct frequencies.
+
+
+class _Policy(Protocol):
+    capacity: int
+
+    def insert(self, key: str) -> None: ...
+
+    def touch(self, key: str) -> None: ...
+
+    def remove(self, key: str) -> None: ...
+
+    def victim(self) -> str: ...
+
+    def clear(self) -> None: ...
+
+
+class _LRUPolicy:
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._order: "OrderedDict[str, None]" = OrderedDict()
+
+    def insert(self, key: str) -> None:
+        self._order[key] = None
+
+    def touch(self, key: str) -> None:
+        self._order.move_to_end(key)
+
+    def remove(self, key: str) -> None:
+        del self._order[key]
+
+    def victim(self) -> str:
+        return next(iter(self._order))
+
+    def clear(self) -> None:
+        self._order.clear()
+
+
+class _FIFOPolicy(_LRUPolicy):
+    def touch(self, key: str) -> None:
+        pass
+
+
+class _LFUPolicy:
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._freq: Dict[str, int] = {}
+        self._buckets: Dict[int, "OrderedDict[str, None]"] = {}
+        self._min = 0
+
+    def _unlink(self, key: str, freq: int) -> None:
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+            if freq == self._min:
+                self._min = min(self._buckets, default=0)
+
+    def insert(self, key: str) -> None:
+        self._freq[key] = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min = 1
+
+    def touch(self, key: str) -> None:
+        freq = self._freq[key]
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+            if freq == self._min:
+                self._min = freq + 1
+        self._freq[key] = freq + 1
+        self._buckets.setdefault(freq + 1, OrderedDict())[key] = None
+
+    def remove(self, key: str) -> None:
+        self._unlink(key, self._freq.pop(key))
+
+    def victim(self) -> str:
+        return next(iter(self._buckets[self._min]))
+
+    def clear(self) -> None:
+        self._freq.clear()
+        self._buckets.clear()
+        self._min = 0
+
+
+class _SegmentedLRUPolicy:
+    """Probation and protected LRU segments; a second hit protects a key."""
+
+    PROTECTED_SHARE = 0.8
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._probation: "OrderedDict[str, None]" = OrderedDict()
+        self._protected: "OrderedDict[str, None]" = OrderedDict()
+
+    def insert(self, key: str) -> None:
+        self._probation[key] = None
+
+    def touch(self, key: str) -> None:
+        if key in self._protected:
+            self._protected.move_to_end(key)
+            return
+        del self._probation[key]
+        self._protected[key] = None
+        if len(self._protected) > max(1, int(self.capacity * self.PROTECTED_SHARE)):
+            demoted, _ = self._protected.popitem(last=False)
+            self._probation[demoted] = None
+
+    def remove(self, key: str) -> None:
+        if key in self._probation:
+            del self._probation[key]
+        else:
+            del self._protected[key]
+
+    def victim(self) -> str:
+        return next(iter(self._probation or self._protected))
+
+    def clear(self) -> None:
+        self._probation.clear()
+        self._protected.clear()
+
+
+_POLICIES: Dict[CacheStrategy, Callable[[int], _Policy]] = {
+    CacheStrategy.LRU: _LRUPolicy,
+    CacheStrategy.FIFO: _FIFOPolicy,
+    CacheStrategy.LFU: _LFUPolicy,
+    CacheStrategy.ADAPTIVE: _SegmentedLRUPolicy,
+}
+
+
+def _namespace(key: Any) -> str:
+    if isinstance(key, str) and ":" in key:
+        return key.split(":", 1)[0]
+    return "default"
+
+
+class IntelligentCache:
+    """Intelligent caching system"""
+
+    # share of ``max_size`` held by the admission window
+    WINDOW_SHARE = 0.01
+
+    def __init__(
+        self,
+        max_size: int = 1000,
+        strategy: CacheStrategy = CacheStrategy.LRU,
+        max_bytes: Optional[int] = None,
+        admission: Optional[bool] = None,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_size: Maximum number of entries.
+            strategy: Eviction order.
+            max_bytes: Optional bound on the summed entry sizes.
+            admission: Admit new keys through a W-TinyLFU window; defaults
+                to on for ``ADAPTIVE`` only.
+        """
+        self.strategy = strategy
+        self.max_bytes = max_bytes
+        self.admission = (
+            strategy == CacheStrategy.ADAPTIVE if admission is None else admission
+        )
+        self.cache: Dict[str, Any] = {}
+        self._sizes: Dict[str, int] = {}
+        self._policy: _Policy = _POLICIES[strategy](max_size)
+        # admission window in front of the policy's main region
+        self._window: "OrderedDict[str, None]" = OrderedDict()
+        self._max_size = max_size
+        self.sketch = FrequencySketch(max_size)
+        self.lock = threading.Lock()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejections = 0
+        self.memory_usage = 0
+        self._namespaces: Dict[str, List[int]] = {}
+
+    @property
+    def max_size(self) -> int:
+        """Maximum number of entries; lowering it evicts immediately."""
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, value: int) -> None:
+        with self.lock:
+            if value > self.sketch.capacity:
+                self.sketch = FrequencySketch(value)
+            self._max_size = value
+            self._policy.capacity = value
+            self._drain_window()
+            self._make_room(0, 0)
+
+    def get(self, key: str, namespace: Optional[str] = None) -> Optional[Any]:
+        """Get item from cache
+
+        Hits and misses are also counted per ``namespace``, by default the
+        part of ``key`` before the first ``:``.
+        """
+        with self.lock:
+            counters = self._namespaces.setdefault(namespace or _namespace(key), [0, 0])
+            if self.admission:
+                self.sketch.increment(key)
+            if key in self.cache:
+                self.hits += 1
+                counters[0] += 1
+                self._touch(key)
+                return self.cache[key]
+            self.misses += 1
+            counters[1] += 1
+            return None
+
+    def put(self, key: str, value: Any, size: Optional[int] = None) -> None:
+        """Put item in cache
+
+        ``size`` overrides the estimated size of ``value`` in bytes.
+        """
+        nbytes = sizeof(value) if size is None else size
+        with self.lock:
+            if key in self.cache:
+                self.memory_usage += nbytes - self._sizes[key]
+                self.cache[key] = value
+                self._sizes[key] = nbytes
+                self._touch(key)
+                self._make_room(0, 0)
+                return
+
+            if self.max_size <= 0 or (
+                self.max_bytes is not None and nbytes > self.max_bytes
+            ):
+                self.rejections += 1
+                return
+            if not self.admission:
+                self._make_room(1, nbytes)
+            self.cache[key] = value
+            self._sizes[key] = nbytes
+            self.memory_usage += nbytes
+            if self.admission:
+                self._window[key] = None
+                self._drain_window()
+                self._make_room(0, 0)
+            else:
+                self._policy.insert(key)
+
+    def invalidate(self, key: str) -> None:
+        """Invalidate cache entry"""
+        with self.lock:
+            if key in self.cache:
+                self._remove_key(key)
+
+    def clear(self) -> None:
+        """Clear cache"""
+        with self.lock:
+            self.cache.clear()
+            self._sizes.clear()
+            self._policy.clear()
+            self._window.clear()
+            self.sketch.clear()
+            self.memory_usage = 0
+
+            # Reset statistics
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.rejections = 0
+            self._namespaces.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        total_requests = self.hits + self.misses
+        hit_rate = (self.hits / total_requests) if total_requests > 0 else 0
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "rejections": self.rejections,
+            "hit_rate": hit_rate,
+            "cache_size": len(self.cache),
+            "max_size": self.max_size,
+            "memory_usage": self.memory_usage,
+            "max_bytes": self.max_bytes,
+            "namespaces": {
+                name: {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": hits / (hits + misses) if hits + misses else 0,
+                }
+                for name, (hits, misses) in self._namespaces.items()
+            },
+        }
+
+    def _touch(self, key: str) -> None:
+        if key in self._window:
+            self._window.move_to_end(key)
+        else:
+            self._policy.touch(key)
+
+    def _victim(self) -> str:
+        if len(self.cache) > len(self._window):
+            return self._policy.victim()
+        return next(iter(self._window))
+
+    def _drain_window(self) -> None:
+        """Move keys beyond the window share into the main region.
+
+        While the cache is full a key only displaces the main region's victim
+        if the sketch has seen it more often; otherwise the key is dropped.
+        """
+        while len(self._window) > max(1, int(self.max_size * self.WINDOW_SHARE)):
+            key = next(iter(self._window))
+            if len(self.cache) > len(self._window) and self._is_full(0, 0):
+                victim = self._policy.victim()
+                if self.sketch.estimate(key) <= self.sketch.estimate(victim):
+                    self._remove_key(key)
+                    self.rejections += 1
+                    continue
+                self._remove_key(victim)
+                self.evictions += 1
+            del self._window[key]
+            self._policy.insert(key)
+
+    def _is_full(self, count: int, nbytes: int) -> bool:
+        return len(self.cache) + count > self.max_size or (
+            self.max_bytes is not None and self.memory_usage + nbytes > self.max_bytes
+        )
+
+    def _make_room(self, count: int, nbytes: int) -> None:
+        """Evict until ``count`` more entries of ``nbytes`` fit"""
+        while self.cache and self._is_full(count, nbytes):
+            self._remove_key(self._victim())
+            self.evictions += 1
+
+    def _remove_key(self, key: str) -> None:
+        """Remove key from all data structures"""
+        del self.cache[key]
+        self.memory_usage -= self._sizes.pop(key)
+        if key in self._window:
+            del self._window[key]
+        else:
+            self._policy.remove(key)
+
+
+__all__ = [
+    "CacheStrategy",
+    "FrequencySketch",
+    "IntelligentCache",
+    "register_sizer",
+    "sizeof",
+]
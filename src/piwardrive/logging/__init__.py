@@ -1,8 +1,11 @@
 from .config import LoggingConfig
 from .structured_logger import (
     LogContext,
+    LogQueue,
     PiWardriveLogger,
     StructuredFormatter,
+    get_log_queue,
+    get_log_stats,
     get_logger,
     set_log_context,
 )
@@ -17,8 +20,11 @@ __all__ = [
     "LogContext",
     "StructuredFormatter",
     "PiWardriveLogger",
+    "LogQueue",
     "LoggingConfig",
     "init_logging",
     "set_log_context",
     "get_logger",
+    "get_log_queue",
+    "get_log_stats",
 ]
@@ -8,20 +8,25 @@ Features:
 - Request-scoped context tracking
 - Distributed tracing support
 - Configurable handlers (console, file, queue)
+- Shared bounded queue with drop/sample overload policies
 - Fallback serialization for complex objects
 - Exception formatting with traceback details
 """
 
+import atexit
 import json
 import logging
 import os
+import queue
 import socket
 import threading
+import time
 from contextvars import ContextVar
-from dataclasses import asdict, dataclass
-from datetime import datetime, timezone
+from dataclasses import asdict, dataclass, fields
+from functools import lru_cache
 from importlib.metadata import PackageNotFoundError, version
-from typing import Any, Dict, Optional
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, Sequence, Tuple
 
 from ..fastjson import dumps
 
@@ -33,6 +38,12 @@ def _get_version() -> str:
         return "0"
 
 
+@lru_cache(maxsize=1)
+def _static_metadata() -> Tuple[str, str]:
+    """Return the hostname and package version, resolved once per process."""
+    return socket.gethostname(), _get_version()
+
+
 @dataclass
 class LogContext:
     """Standard log context structure."""
@@ -50,6 +61,39 @@ class LogContext:
 # Context variable for request-scoped logging
 log_context: ContextVar[LogContext] = ContextVar("log_context", default=LogContext())
 
+_CONTEXT_FIELDS = tuple(f.name for f in fields(LogContext))
+
+
+def _context_snapshot() -> Tuple[Optional[str], ...]:
+    """Return the current log context as a tuple ordered like ``LogContext``."""
+    ctx = log_context.get()
+    return tuple(getattr(ctx, name) for name in _CONTEXT_FIELDS)
+
+
+class _TimestampCache:
+    """Format ISO-8601 UTC timestamps reusing the string for the current second.
+
+    The cached second and its prefix live in one tuple that is replaced in a
+    single assignment, so handlers sharing a formatter across threads never
+    see a prefix paired with the wrong second.
+    """
+
+    __slots__ = ("_entry",)
+
+    def __init__(self) -> None:
+        self._entry: Tuple[Optional[int], str] = (None, "")
+
+    def format(self, created: float) -> str:
+        second, micro = divmod(round(created * 1_000_000), 1_000_000)
+        cached, prefix = self._entry
+        if second != cached:
+            prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._entry = (second, prefix)
+        # match ``datetime.isoformat`` which omits a zero fraction
+        if micro:
+            return f"{prefix}.{micro:06d}+00:00"
+        return f"{prefix}+00:00"
+
 
 class StructuredFormatter(logging.Formatter):
     """JSON formatter for structured logging."""
@@ -57,8 +101,8 @@ class StructuredFormatter(logging.Formatter):
     def __init__(self, include_extra: bool = True):
         super().__init__()
         self.include_extra = include_extra
-        self.hostname = socket.gethostname()
-        self.version = _get_version()
+        self.hostname, self.version = _static_metadata()
+        self._timestamps = _TimestampCache()
 
     def _serialize(self, record_dict: Dict[str, Any]) -> str:
         """Serialize the record dictionary to JSON."""
@@ -73,20 +117,27 @@ class StructuredFormatter(logging.Formatter):
 
     def format(self, record: logging.LogRecord) -> str:  # type: ignore[override]
         """Format log record as structured JSON."""
-        ctx = log_context.get()
-        context_data = asdict(ctx)
+        # records handed over by ``BoundedQueueHandler`` carry the context of
+        # the thread that logged them; otherwise snapshot the current one
+        snapshot = getattr(record, "pw_context", None)
+        if snapshot is None:
+            snapshot = _context_snapshot()
         log_data: Dict[str, Any] = {
-            "timestamp": datetime.fromtimestamp(
-                record.created, tz=timezone.utc
-            ).isoformat(),
+            "timestamp": self._timestamps.format(record.created),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
-            "context": {k: v for k, v in context_data.items() if v is not None},
+            "context": {
+                k: v for k, v in zip(_CONTEXT_FIELDS, snapshot) if v is not None
+            },
             "metadata": {
                 "hostname": self.hostname,
-                "pid": os.getpid(),
-                "thread_id": threading.get_ident(),
+                "pid": record.process if record.process is not None else os.getpid(),
+                "thread_id": (
+                    record.thread
+                    if record.thread is not None
+                    else threading.get_ident()
+                ),
                 "version": self.version,
             },
         }
@@ -111,6 +162,162 @@ class StructuredFormatter(logging.Formatter):
         return self._serialize(log_data)
 
 
+class BoundedQueueHandler(QueueHandler):
+    """Queue handler that applies the overload policy of a :class:`LogQueue`.
+
+    Only the message interpolation and a context snapshot happen on the
+    logging thread; JSON formatting and I/O run on the listener thread.
+    """
+
+    def __init__(
+        self, log_queue: "LogQueue", targets: Sequence[logging.Handler]
+    ) -> None:
+        super().__init__(log_queue.queue)
+        self.log_queue = log_queue
+        self.targets = tuple(targets)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        record.pw_context = _context_snapshot()
+        record.pw_targets = self.targets
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self.log_queue.put(record)
+
+
+class _DispatchingListener(QueueListener):
+    """Queue listener delivering each record to the handlers it names."""
+
+    def __init__(self, log_queue: "LogQueue") -> None:
+        super().__init__(log_queue.queue, respect_handler_level=True)
+        self.log_queue = log_queue
+
+    def handle(self, record: logging.LogRecord) -> None:
+        record = self.prepare(record)
+        for handler in getattr(record, "pw_targets", ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        self.log_queue._emitted()
+
+    def enqueue_sentinel(self) -> None:
+        # the queue is bounded so wait for room instead of raising ``Full``
+        self.queue.put(self._sentinel)
+
+
+class LogQueue:
+    """Process-wide bounded queue drained by a single formatting thread.
+
+    When the queue is full records are dropped. With the ``sample`` policy
+    records below ``WARNING`` are additionally thinned to one in
+    ``sample_every`` once the queue is ``high_water`` full, so bursts of
+    debug output do not crowd out warnings. The ``block`` policy waits for
+    room instead and never drops.
+    """
+
+    POLICIES = ("drop", "sample", "block")
+
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        policy: str = "drop",
+        sample_every: int = 10,
+        high_water: float = 0.8,
+    ) -> None:
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown log queue policy: {policy}")
+        self.queue: "queue.Queue[Any]" = queue.Queue(maxsize)
+        self.maxsize = maxsize
+        self.policy = policy
+        self.sample_every = max(1, sample_every)
+        self._high_water = max(1, int(maxsize * high_water))
+        self._sample_seq = 0
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {"emitted": 0, "dropped": 0, "sampled": 0}
+        self._listener: Optional[_DispatchingListener] = None
+
+    def handler(self, targets: Sequence[logging.Handler]) -> BoundedQueueHandler:
+        """Return a handler forwarding records to ``targets`` via this queue."""
+        return BoundedQueueHandler(self, targets)
+
+    def put(self, record: logging.LogRecord) -> None:
+        """Enqueue ``record`` according to the overload policy."""
+        if self.policy == "block":
+            self.queue.put(record)
+            return
+        if (
+            self.policy == "sample"
+            and record.levelno < logging.WARNING
+            and self.queue.qsize() >= self._high_water
+        ):
+            with self._lock:
+                self._sample_seq += 1
+                if self._sample_seq % self.sample_every:
+                    self._stats["sampled"] += 1
+                    self._stats["dropped"] += 1
+                    return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += 1
+
+    def _emitted(self) -> None:
+        # only the listener thread updates this counter
+        self._stats["emitted"] += 1
+
+    def start(self) -> None:
+        """Start the listener thread if it is not running."""
+        if self._listener is None:
+            self._listener = _DispatchingListener(self)
+            self._listener.start()
+
+    def stop(self) -> None:
+        """Flush queued records and stop the listener thread."""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def stats(self) -> Dict[str, int]:
+        """Return emitted/dropped counters and the current queue depth."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queued"] = self.queue.qsize()
+        stats["maxsize"] = self.maxsize
+        return stats
+
+
+_LOG_QUEUE: Optional[LogQueue] = None
+_LOG_QUEUE_LOCK = threading.Lock()
+
+
+def get_log_queue() -> LogQueue:
+    """Return the shared :class:`LogQueue`, starting it on first use.
+
+    The queue is sized by ``PW_LOG_QUEUE_SIZE`` and its overload behaviour is
+    chosen with ``PW_LOG_QUEUE_POLICY`` and ``PW_LOG_SAMPLE_EVERY``.
+    """
+    global _LOG_QUEUE
+    with _LOG_QUEUE_LOCK:
+        if _LOG_QUEUE is None:
+            _LOG_QUEUE = LogQueue(
+                int(os.getenv("PW_LOG_QUEUE_SIZE", "10000")),
+                os.getenv("PW_LOG_QUEUE_POLICY", "drop"),
+                int(os.getenv("PW_LOG_SAMPLE_EVERY", "10")),
+            )
+            _LOG_QUEUE.start()
+            atexit.register(_LOG_QUEUE.stop)
+        return _LOG_QUEUE
+
+
+def get_log_stats() -> Dict[str, int]:
+    """Return counters for the shared log queue."""
+    if _LOG_QUEUE is None:
+        return {"emitted": 0, "dropped": 0, "sampled": 0, "queued": 0, "maxsize": 0}
+    return _LOG_QUEUE.stats()
+
+
 class PiWardriveLogger:
     """Centralized logger for PiWardrive application."""
 
@@ -128,16 +335,9 @@ class PiWardriveLogger:
         level = self.config.get("level", logging.INFO)
         logger.setLevel(level)
 
-        handler: logging.Handler
-        if self.config.get("queue", False):
-            from logging.handlers import QueueHandler, QueueListener
-            from queue import SimpleQueue
-
-            queue: SimpleQueue[logging.LogRecord] = SimpleQueue()
-            handler = QueueHandler(queue)
-            listener = QueueListener(queue, *self._create_handlers())
-            listener.start()
-            logger.addHandler(handler)
+        queued = self.config.get("queue", os.getenv("PW_LOG_QUEUE", "1") != "0")
+        if queued:
+            logger.addHandler(get_log_queue().handler(self._create_handlers()))
         else:
             for h in self._create_handlers():
                 logger.addHandler(h)
@@ -250,7 +450,11 @@ def get_logger(name: str, **config: Any) -> PiWardriveLogger:
 __all__ = [
     "LogContext",
     "StructuredFormatter",
+    "LogQueue",
+    "BoundedQueueHandler",
     "PiWardriveLogger",
     "set_log_context",
     "get_logger",
+    "get_log_queue",
+    "get_log_stats",
 ]
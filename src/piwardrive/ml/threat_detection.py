@@ -12,10 +12,11 @@ import logging
 import pickle
 import re
 from collections import Counter, defaultdict
-from dataclasses import asdict, dataclass
+from collections.abc import Sequence
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Union
 
 import numpy as np
 from sklearn.ensemble import IsolationForest
@@ -24,6 +25,23 @@ from sklearn.preprocessing import StandardScaler
 logger = logging.getLogger(__name__)
 
 
+def _record_dict(record: Any) -> Dict[str, Any]:
+    """Return ``asdict(record)`` for flat records without deep-copying.
+
+    Only list and dict fields are copied, which is all the records in this
+    module contain.
+    """
+    out = {}
+    for name in record.__dataclass_fields__:
+        value = getattr(record, name)
+        if isinstance(value, list):
+            value = list(value)
+        elif isinstance(value, dict):
+            value = dict(value)
+        out[name] = value
+    return out
+
+
 @dataclass
 class DeviceFingerprint:
     """Device fingerprinting data structure"""
@@ -44,7 +62,7 @@ class DeviceFingerprint:
 
     def to_dict(self) -> Dict[str, Any]:
         return {
-            **asdict(self),
+            **_record_dict(self),
             "last_seen": self.last_seen.isoformat() if self.last_seen else None,
         }
 
@@ -65,7 +83,7 @@ class ThreatIndicator:
     network_context: Dict[str, Any]
 
     def to_dict(self) -> Dict[str, Any]:
-        return {**asdict(self), "timestamp": self.timestamp.isoformat()}
+        return {**_record_dict(self), "timestamp": self.timestamp.isoformat()}
 
 
 @dataclass
@@ -81,7 +99,7 @@ class RiskAssessment:
     timestamp: datetime
 
     def to_dict(self) -> Dict[str, Any]:
-        return {**asdict(self), "timestamp": self.timestamp.isoformat()}
+        return {**_record_dict(self), "timestamp": self.timestamp.isoformat()}
 
 
 class OUIDatabase:
@@ -226,9 +244,166 @@ class OUIDatabase:
         return max(scores, key=scores.get) if scores else "unknown"
 
 
+# Encryption classes in the order of RiskScorer._assess_encryption_risk.
+ENC_OPEN, ENC_WEP, ENC_WPA, ENC_WPA2, ENC_WPA3, ENC_OTHER = range(6)
+_ENCRYPTION_RISK = np.array([9.0, 8.0, 6.0, 2.0, 1.0, 5.0])
+RISK_LEVELS = ("Low", "Medium", "High", "Critical")
+SUSPICIOUS_SSID_PATTERNS = ("test", "hack", "pwn", "evil", "fake", "free")
+ROGUE_SSID_PATTERNS = ("test", "hack", "pwn", "free", "guest")
+
+
+def _encryption_class(encryption: str) -> int:
+    upper = encryption.upper()
+    if upper in ("OPEN", ""):
+        return ENC_OPEN
+    if "WEP" in upper:
+        return ENC_WEP
+    if "WPA" in upper and "WPA2" not in upper and "WPA3" not in upper:
+        return ENC_WPA
+    if "WPA2" in upper:
+        return ENC_WPA2
+    if "WPA3" in upper:
+        return ENC_WPA3
+    return ENC_OTHER
+
+
+def _encryption_profile(encryption: str) -> tuple:
+    upper = encryption.upper()
+    return (
+        _encryption_class(encryption),
+        "WPA2" in upper,
+        "WPA3" in upper,
+        encryption == "Open",
+        encryption.startswith("WEP"),
+        encryption.startswith("WPA"),
+        encryption.startswith("WPA2"),
+        encryption.startswith("WPA3"),
+    )
+
+
+def _is_randomized_prefix(prefix: str) -> bool:
+    try:
+        return bool(int(prefix, 16) & 0x02)
+    except ValueError:
+        return False
+
+
+def _map_unique(
+    values: List[Any], func: Callable[[Any], Any], dtype: Any
+) -> np.ndarray:
+    """Apply ``func`` once per distinct value and broadcast the results."""
+    index = {v: i for i, v in enumerate(dict.fromkeys(values))}
+    codes = np.fromiter(map(index.__getitem__, values), np.intp, len(values))
+    table = np.array([func(v) for v in index], dtype=dtype)
+    return table[codes] if len(values) else np.zeros(0, dtype=dtype)
+
+
+def _contains_any(lowered: np.ndarray, patterns: Sequence) -> np.ndarray:
+    found = np.zeros(lowered.shape, dtype=bool)
+    for pattern in patterns:
+        found |= np.char.find(lowered, pattern) >= 0
+    return found
+
+
+class ScanFeatures:
+    """Column-oriented encoding of a scan used for batch scoring.
+
+    Every attribute the risk scorer, anomaly detector and threat rules look
+    at is decoded from the network dicts once into NumPy arrays. Categorical
+    strings such as the encryption and vendor are evaluated once per
+    distinct value and broadcast back to the networks.
+    """
+
+    def __init__(self, networks: List[Dict[str, Any]]):
+        self.networks = networks
+        n = len(networks)
+
+        def column(key: str, default: Any) -> List[Any]:
+            return [net.get(key, default) for net in networks]
+
+        def numeric(key: str, default: float) -> np.ndarray:
+            return np.array(column(key, default), dtype=float).reshape(n)
+
+        self.ssid = np.array(column("ssid", ""), dtype=str).reshape(n)
+        self.bssid = np.array(column("bssid", ""), dtype=str).reshape(n)
+        self.signal = numeric("signal_strength", -100)
+        self.channel = numeric("channel", 0)
+        self.frequency = numeric("frequency", 0)
+        self.beacon_interval = numeric("beacon_interval", 100)
+        self.vendor_elements = np.fromiter(
+            map(len, column("vendor_elements", [])), dtype=float, count=n
+        )
+        self.wps = np.fromiter(
+            map(bool, column("wps_enabled", False)), dtype=bool, count=n
+        )
+
+        profile = _map_unique(column("encryption", ""), _encryption_profile, float)
+        profile = profile.reshape(n, 8)
+        self.encryption_class = profile[:, 0].astype(np.int8)
+        self.has_wpa2 = profile[:, 1].astype(bool)
+        self.has_wpa3 = profile[:, 2].astype(bool)
+        # case-sensitive encodings used by the anomaly model
+        self.encryption_onehot = profile[:, 3:]
+
+        self.rogue_vendor = _map_unique(
+            column("vendor", "Unknown"), lambda v: "Unknown" in v or v == "", bool
+        )
+
+        lowered = np.char.lower(self.ssid)
+        self.hidden = (self.ssid == "") | np.char.startswith(self.ssid, "_")
+        self.suspicious_ssid = _contains_any(lowered, SUSPICIOUS_SSID_PATTERNS)
+        self.rogue_ssid = _contains_any(lowered, ROGUE_SSID_PATTERNS)
+        self.special_chars = _contains_any(self.ssid, ("!", "@", "#", "$"))
+        self.randomized_mac = (np.char.str_len(self.bssid) >= 17) & _map_unique(
+            list(self.bssid.astype("U2")), _is_randomized_prefix, bool
+        )
+
+    def __len__(self) -> int:
+        return len(self.networks)
+
+    def anomaly_matrix(self) -> np.ndarray:
+        """Return the feature matrix of :meth:`AnomalyDetector.extract_features`."""
+        n = len(self)
+        if n == 0:
+            return np.zeros((0, len(AnomalyDetector.FEATURE_COLUMNS)))
+        return np.column_stack(
+            [
+                self.signal,
+                self.channel,
+                self.frequency,
+                np.char.str_len(self.ssid),
+                self.encryption_onehot,
+                np.char.count(self.bssid, ":") + 1,
+                np.char.startswith(self.ssid, "_"),
+                self.special_chars,
+                self.beacon_interval,
+                self.vendor_elements,
+                self.wps,
+            ]
+        ).astype(float)
+
+
 class AnomalyDetector:
     """Machine learning-based anomaly detection"""
 
+    FEATURE_COLUMNS = (
+        "signal_strength",
+        "channel",
+        "frequency",
+        "ssid_length",
+        "is_open",
+        "is_wep",
+        "is_wpa",
+        "is_wpa2",
+        "is_wpa3",
+        "bssid_segments",
+        "hidden_ssid",
+        "suspicious_chars",
+        "beacon_interval",
+        "vendor_elements_count",
+        "wps_enabled",
+    )
+
     def __init__(self, contamination: float = 0.1):
         self.contamination = contamination
         self.model = IsolationForest(contamination=contamination, random_state=42)
@@ -236,53 +411,14 @@ class AnomalyDetector:
         self.is_trained = False
         self.feature_columns = []
 
-    def extract_features(self, scan_data: List[Dict[str, Any]]) -> np.ndarray:
+    def extract_features(
+        self, scan_data: Union[List[Dict[str, Any]], ScanFeatures]
+    ) -> np.ndarray:
         """Extract features for anomaly detection"""
-        features = []
-
-        for item in scan_data:
-            feature_vector = [
-                item.get("signal_strength", -100),
-                item.get("channel", 0),
-                item.get("frequency", 0),
-                len(item.get("ssid", "")),
-                1 if item.get("encryption", "") == "Open" else 0,
-                1 if item.get("encryption", "").startswith("WEP") else 0,
-                1 if item.get("encryption", "").startswith("WPA") else 0,
-                1 if item.get("encryption", "").startswith("WPA2") else 0,
-                1 if item.get("encryption", "").startswith("WPA3") else 0,
-                len(item.get("bssid", "").split(":")),
-                1 if item.get("ssid", "").startswith("_") else 0,
-                (
-                    1
-                    if any(c in item.get("ssid", "") for c in ["!", "@", "#", "$"])
-                    else 0
-                ),
-                item.get("beacon_interval", 100),
-                len(item.get("vendor_elements", [])),
-                1 if item.get("wps_enabled", False) else 0,
-            ]
-            features.append(feature_vector)
-
-        self.feature_columns = [
-            "signal_strength",
-            "channel",
-            "frequency",
-            "ssid_length",
-            "is_open",
-            "is_wep",
-            "is_wpa",
-            "is_wpa2",
-            "is_wpa3",
-            "bssid_segments",
-            "hidden_ssid",
-            "suspicious_chars",
-            "beacon_interval",
-            "vendor_elements_count",
-            "wps_enabled",
-        ]
-
-        return np.array(features)
+        if not isinstance(scan_data, ScanFeatures):
+            scan_data = ScanFeatures(scan_data)
+        self.feature_columns = list(self.FEATURE_COLUMNS)
+        return scan_data.anomaly_matrix()
 
     def train(self, training_data: List[Dict[str, Any]]) -> bool:
         """Train the anomaly detection model"""
@@ -307,33 +443,41 @@ class AnomalyDetector:
             logger.error(f"Error training anomaly detection model: {e}")
             return False
 
-    def detect_anomalies(self, scan_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Detect anomalies in scan data"""
+    def detect_anomalies(
+        self,
+        scan_data: List[Dict[str, Any]],
+        features: Optional[ScanFeatures] = None,
+    ) -> List[Dict[str, Any]]:
+        """Detect anomalies in scan data
+
+        ``features`` may carry an existing encoding of ``scan_data`` so a
+        batch analysis decodes the scan only once.
+        """
         if not self.is_trained:
             logger.warning("Anomaly detection model not trained")
             return []
 
         try:
-            features = self.extract_features(scan_data)
-            features_scaled = self.scaler.transform(features)
+            matrix = self.extract_features(features or scan_data)
+            if len(matrix) == 0:
+                return []
+            features_scaled = self.scaler.transform(matrix)
 
-            # Predict anomalies (-1 for anomaly, 1 for normal)
-            predictions = self.model.predict(features_scaled)
+            # decision_function is negative exactly where predict returns -1,
+            # so one pass over the forest gives both
             anomaly_scores = self.model.decision_function(features_scaled)
-
-            anomalies = []
-            for i, (pred, score) in enumerate(zip(predictions, anomaly_scores)):
-                if pred == -1:  # Anomaly detected
-                    anomaly = {
-                        "index": i,
-                        "data": scan_data[i],
-                        "anomaly_score": float(score),
-                        "severity": self._calculate_severity(score),
-                        "reason": self._explain_anomaly(features[i], scan_data[i]),
-                    }
-                    anomalies.append(anomaly)
-
-            return anomalies
+            flagged = np.flatnonzero(anomaly_scores < 0)
+
+            return [
+                {
+                    "index": int(i),
+                    "data": scan_data[i],
+                    "anomaly_score": float(anomaly_scores[i]),
+                    "severity": self._calculate_severity(anomaly_scores[i]),
+                    "reason": self._explain_anomaly(matrix[i], scan_data[i]),
+                }
+                for i in flagged
+            ]
 
         except Exception as e:
             logger.error(f"Error detecting anomalies: {e}")
@@ -674,6 +818,48 @@ class RiskScorer:
                 timestamp=datetime.now(),
             )
 
+    def score_batch(
+        self,
+        networks: Union[List[Dict[str, Any]], ScanFeatures],
+        timestamp: Optional[datetime] = None,
+    ) -> "BatchRiskAssessment":
+        """Score a whole scan at once.
+
+        Produces the same scores, levels and, on access, the same
+        :class:`RiskAssessment` objects as :meth:`calculate_network_risk`.
+        All assessments share one ``timestamp``.
+        """
+        if isinstance(networks, ScanFeatures):
+            features = networks
+        else:
+            features = ScanFeatures(networks)
+        encryption = _ENCRYPTION_RISK[features.encryption_class]
+        signal = np.where(
+            features.signal > -30, 6.0, np.where(features.signal > -40, 3.0, 1.0)
+        )
+        characteristics = np.minimum(
+            2.0 * features.hidden
+            + 4.0 * features.suspicious_ssid
+            + 1.0 * features.randomized_mac
+            + 1.0 * features.wps,
+            10.0,
+        )
+        weights = self.risk_weights
+        score = (
+            encryption * weights["encryption_risk"]
+            + signal * weights["signal_anomaly"]
+            + characteristics * weights["network_characteristics"]
+        )
+        return BatchRiskAssessment(
+            self,
+            features,
+            encryption,
+            signal,
+            characteristics,
+            score,
+            timestamp or datetime.now(),
+        )
+
     def _assess_encryption_risk(self, network_data: Dict[str, Any]) -> float:
         """Assess encryption-related risk"""
         encryption = network_data.get("encryption", "").upper()
@@ -798,6 +984,85 @@ class RiskScorer:
         return compliance
 
 
+class BatchRiskAssessment(Sequence):
+    """Risk scores of a scan with :class:`RiskAssessment` objects built on access."""
+
+    def __init__(
+        self,
+        scorer: RiskScorer,
+        features: ScanFeatures,
+        encryption_score: np.ndarray,
+        signal_score: np.ndarray,
+        characteristics_score: np.ndarray,
+        risk_score: np.ndarray,
+        timestamp: datetime,
+    ):
+        self.scorer = scorer
+        self.features = features
+        self.encryption_score = encryption_score
+        self.signal_score = signal_score
+        self.characteristics_score = characteristics_score
+        self.risk_score = risk_score
+        self.level_index = (
+            (risk_score >= 3.0).astype(np.int8)
+            + (risk_score >= 5.0)
+            + (risk_score >= 7.0)
+        )
+        self.timestamp = timestamp
+
+    def __len__(self) -> int:
+        return len(self.risk_score)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self._materialize(range(len(self))[index])
+
+    @property
+    def risk_levels(self) -> List[str]:
+        """Risk level name of every network."""
+        return [RISK_LEVELS[i] for i in self.level_index]
+
+    @property
+    def compliance_issues(self) -> np.ndarray:
+        """Mask of networks failing any check of ``_check_compliance``."""
+        f = self.features
+        modern = f.has_wpa2 | f.has_wpa3
+        return ~(modern & (f.has_wpa3 | (f.has_wpa2 & ~f.wps)))
+
+    def flagged(self, min_level: str = "Medium") -> np.ndarray:
+        """Return indices of networks at ``min_level`` risk or above."""
+        return np.flatnonzero(self.level_index >= RISK_LEVELS.index(min_level))
+
+    def level_counts(self) -> Dict[str, int]:
+        """Return the number of networks per risk level."""
+        counts = np.bincount(self.level_index, minlength=len(RISK_LEVELS))
+        return dict(zip(RISK_LEVELS, counts.tolist()))
+
+    def _materialize(self, i: int) -> RiskAssessment:
+        network = self.features.networks[i]
+        risk_factors = []
+        if self.encryption_score[i] > 5:
+            risk_factors.append(
+                f"Weak encryption: {network.get('encryption', 'Unknown')}"
+            )
+        if self.signal_score[i] > 5:
+            risk_factors.append("Unusual signal characteristics")
+        if self.characteristics_score[i] > 5:
+            risk_factors.append("Suspicious network characteristics")
+        return RiskAssessment(
+            network_id=network.get("bssid", "unknown"),
+            risk_score=float(self.risk_score[i]),
+            risk_level=RISK_LEVELS[self.level_index[i]],
+            risk_factors=risk_factors,
+            recommendations=self.scorer._generate_recommendations(
+                risk_factors, network
+            ),
+            compliance_status=self.scorer._check_compliance(network),
+            timestamp=self.timestamp,
+        )
+
+
 class OfflineThreatDetector:
     """Main threat detection engine coordinator"""
 
@@ -828,12 +1093,22 @@ class OfflineThreatDetector:
             return False
 
     def analyze_scan_data(
-        self, scan_data: List[Dict[str, Any]], environment_id: str = "default"
+        self,
+        scan_data: List[Dict[str, Any]],
+        environment_id: str = "default",
+        min_risk_level: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Comprehensive analysis of scan data"""
+        """Comprehensive analysis of scan data
+
+        The scan is encoded once and scored in batch. With ``min_risk_level``
+        only assessments at that level or above are materialized; the
+        summary still counts every network.
+        """
         try:
+            now = datetime.now()
+            features = ScanFeatures(scan_data)
             results = {
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now.isoformat(),
                 "environment_id": environment_id,
                 "networks_analyzed": len(scan_data),
                 "anomalies": [],
@@ -846,23 +1121,22 @@ class OfflineThreatDetector:
 
             # Detect anomalies
             if self.anomaly_detector.is_trained:
-                anomalies = self.anomaly_detector.detect_anomalies(scan_data)
+                anomalies = self.anomaly_detector.detect_anomalies(scan_data, features)
                 results["anomalies"] = anomalies
 
-            # Analyze each network
             for network in scan_data:
-                # Create device fingerprint
-                fingerprint = self._create_device_fingerprint(network)
+                fingerprint = self._create_device_fingerprint(network, now)
                 if fingerprint:
                     results["device_fingerprints"].append(fingerprint.to_dict())
 
-                # Calculate risk assessment
-                risk_assessment = self.risk_scorer.calculate_network_risk(network)
-                results["risk_assessments"].append(risk_assessment.to_dict())
+            assessments = self.risk_scorer.score_batch(features, now)
+            if min_risk_level is None:
+                selected = range(len(assessments))
+            else:
+                selected = assessments.flagged(min_risk_level)
+            results["risk_assessments"] = [assessments[i].to_dict() for i in selected]
 
-                # Check for specific threats
-                threats = self._detect_specific_threats(network, scan_data)
-                results["threats"].extend(threats)
+            results["threats"] = self._detect_threats_batch(features, now)
 
             # Behavioral analysis
             behavioral_analysis = self.behavioral_profiler.analyze_deviation(
@@ -871,7 +1145,7 @@ class OfflineThreatDetector:
             results["behavioral_analysis"] = behavioral_analysis
 
             # Generate summary
-            results["summary"] = self._generate_analysis_summary(results)
+            results["summary"] = self._generate_analysis_summary(results, assessments)
 
             return results
 
@@ -879,8 +1153,49 @@ class OfflineThreatDetector:
             logger.error(f"Error analyzing scan data: {e}")
             return {"error": str(e)}
 
+    def _detect_threats_batch(
+        self, features: ScanFeatures, now: datetime
+    ) -> List[ThreatIndicator]:
+        """Run the threat rules over a scan, building indicators only for hits.
+
+        Matches calling :meth:`_detect_specific_threats` for every network.
+        """
+        networks = features.networks
+        ssids = features.ssid.tolist()
+        bssid = features.bssid.tolist()
+        signal = features.signal.tolist()
+        by_ssid: Dict[str, List[int]] = defaultdict(list)
+        for i, ssid in enumerate(ssids):
+            if ssid:
+                by_ssid[ssid].append(i)
+        duplicated = np.zeros(len(networks), dtype=bool)
+        for group in by_ssid.values():
+            if len(group) > 1:
+                duplicated[group] = True
+        rogue = features.rogue_vendor | features.rogue_ssid
+        weak = features.encryption_class <= ENC_WEP
+
+        threats = []
+        for i in np.flatnonzero(duplicated | rogue | weak).tolist():
+            network = networks[i]
+            try:
+                if duplicated[i]:
+                    for j in by_ssid[ssids[i]]:
+                        if bssid[j] != bssid[i] and abs(signal[i] - signal[j]) < 10:
+                            threats.append(
+                                self._evil_twin_indicator(network, networks[j], now)
+                            )
+                            break
+                if rogue[i]:
+                    threats.append(self._detect_rogue_ap(network, now))
+                if weak[i]:
+                    threats.append(self._detect_weak_security(network, now))
+            except Exception as e:
+                logger.error(f"Error detecting specific threats: {e}")
+        return threats
+
     def _create_device_fingerprint(
-        self, network_data: Dict[str, Any]
+        self, network_data: Dict[str, Any], now: Optional[datetime] = None
     ) -> Optional[DeviceFingerprint]:
         """Create device fingerprint from network data"""
         try:
@@ -903,7 +1218,7 @@ class OfflineThreatDetector:
                 vendor_elements=network_data.get("vendor_elements", []),
                 fingerprint_hash="",
                 confidence_score=0.8,
-                last_seen=datetime.now(),
+                last_seen=now or datetime.now(),
             )
 
             # Identify device type
@@ -975,30 +1290,44 @@ class OfflineThreatDetector:
                 and bssid != other_bssid
                 and abs(signal_strength - other_signal) < 10
             ):  # Similar signal strength
-
-                return ThreatIndicator(
-                    threat_id=f"evil_twin_{bssid[:8]}",
-                    threat_type="evil_twin",
-                    severity="High",
-                    confidence=0.7,
-                    description=f"Potential evil twin detected for SSID '{ssid}'",
-                    indicators=[
-                        f"Duplicate SSID: {ssid}",
-                        f"Different BSSID: {bssid} vs {other_bssid}",
-                        f"Similar signal strength: {signal_strength} vs {other_signal}",
-                    ],
-                    mitigation="Verify legitimate AP and disable the rogue device",
-                    timestamp=datetime.now(),
-                    affected_devices=[bssid, other_bssid],
-                    network_context={
-                        "ssid": ssid,
-                        "signal_di": abs(signal_strength - other_signal),
-                    },
-                )
+                return self._evil_twin_indicator(network, other_network)
 
         return None
 
-    def _detect_rogue_ap(self, network: Dict[str, Any]) -> Optional[ThreatIndicator]:
+    def _evil_twin_indicator(
+        self,
+        network: Dict[str, Any],
+        other_network: Dict[str, Any],
+        now: Optional[datetime] = None,
+    ) -> ThreatIndicator:
+        ssid = network.get("ssid", "")
+        bssid = network.get("bssid", "")
+        signal_strength = network.get("signal_strength", -100)
+        other_bssid = other_network.get("bssid", "")
+        other_signal = other_network.get("signal_strength", -100)
+        return ThreatIndicator(
+            threat_id=f"evil_twin_{bssid[:8]}",
+            threat_type="evil_twin",
+            severity="High",
+            confidence=0.7,
+            description=f"Potential evil twin detected for SSID '{ssid}'",
+            indicators=[
+                f"Duplicate SSID: {ssid}",
+                f"Different BSSID: {bssid} vs {other_bssid}",
+                f"Similar signal strength: {signal_strength} vs {other_signal}",
+            ],
+            mitigation="Verify legitimate AP and disable the rogue device",
+            timestamp=now or datetime.now(),
+            affected_devices=[bssid, other_bssid],
+            network_context={
+                "ssid": ssid,
+                "signal_di": abs(signal_strength - other_signal),
+            },
+        )
+
+    def _detect_rogue_ap(
+        self, network: Dict[str, Any], now: Optional[datetime] = None
+    ) -> Optional[ThreatIndicator]:
         """Detect unauthorized access points"""
         vendor = network.get("vendor", "Unknown")
         ssid = network.get("ssid", "")
@@ -1023,7 +1352,7 @@ class OfflineThreatDetector:
                 description="Potential rogue access point detected",
                 indicators=suspicious_indicators,
                 mitigation="Investigate and remove unauthorized access point",
-                timestamp=datetime.now(),
+                timestamp=now or datetime.now(),
                 affected_devices=[bssid],
                 network_context={"ssid": ssid, "vendor": vendor},
             )
@@ -1031,7 +1360,7 @@ class OfflineThreatDetector:
         return None
 
     def _detect_weak_security(
-        self, network: Dict[str, Any]
+        self, network: Dict[str, Any], now: Optional[datetime] = None
     ) -> Optional[ThreatIndicator]:
         """Detect weak security configurations"""
         encryption = network.get("encryption", "").upper()
@@ -1047,7 +1376,7 @@ class OfflineThreatDetector:
                 description="Open network detected (no encryption)",
                 indicators=["No encryption enabled"],
                 mitigation="Enable WPA2 or WPA3 encryption",
-                timestamp=datetime.now(),
+                timestamp=now or datetime.now(),
                 affected_devices=[bssid],
                 network_context={"ssid": ssid, "encryption": encryption},
             )
@@ -1060,14 +1389,18 @@ class OfflineThreatDetector:
                 description="WEP encryption detected (weak security)",
                 indicators=["WEP encryption is easily broken"],
                 mitigation="Upgrade to WPA2 or WPA3 encryption",
-                timestamp=datetime.now(),
+                timestamp=now or datetime.now(),
                 affected_devices=[bssid],
                 network_context={"ssid": ssid, "encryption": encryption},
             )
 
         return None
 
-    def _generate_analysis_summary(self, results: Dict[str, Any]) -> Dict[str, Any]:
+    def _generate_analysis_summary(
+        self,
+        results: Dict[str, Any],
+        assessments: Optional[BatchRiskAssessment] = None,
+    ) -> Dict[str, Any]:
         """Generate analysis summary"""
         summary = {
             "total_networks": results["networks_analyzed"],
@@ -1079,18 +1412,24 @@ class OfflineThreatDetector:
             "recommendations": [],
         }
 
-        # Count risk levels
-        for assessment in results["risk_assessments"]:
-            if assessment["risk_level"] == "High":
-                summary["high_risk_networks"] += 1
-            elif assessment["risk_level"] == "Critical":
-                summary["critical_risk_networks"] += 1
-
-        # Count compliance issues
-        for assessment in results["risk_assessments"]:
-            compliance = assessment.get("compliance_status", {})
-            if not all(compliance.values()):
-                summary["compliance_issues"] += 1
+        if assessments is not None:
+            counts = assessments.level_counts()
+            summary["high_risk_networks"] = counts["High"]
+            summary["critical_risk_networks"] = counts["Critical"]
+            summary["compliance_issues"] = int(assessments.compliance_issues.sum())
+        else:
+            # Count risk levels
+            for assessment in results["risk_assessments"]:
+                if assessment["risk_level"] == "High":
+                    summary["high_risk_networks"] += 1
+                elif assessment["risk_level"] == "Critical":
+                    summary["critical_risk_networks"] += 1
+
+            # Count compliance issues
+            for assessment in results["risk_assessments"]:
+                compliance = assessment.get("compliance_status", {})
+                if not all(compliance.values()):
+                    summary["compliance_issues"] += 1
 
         # Generate top recommendations
         if summary["critical_risk_networks"] > 0:
@@ -47,6 +47,32 @@ class MQTTClient:
             self.connect()
         self.client.publish(self.topic, json.dumps(payload))
 
+    def publish_raw(
+        self, topic: str, data: bytes, qos: int = 0, retain: bool = False
+    ) -> bool:
+        """Publish pre-encoded ``data`` to ``topic``.
+
+        Args:
+            topic: Destination topic
+            data: Encoded message body
+            qos: MQTT quality of service level
+            retain: Whether the broker should retain the message
+
+        Returns:
+            ``True`` if the message was handed to the client for delivery
+        """
+        if not self.connected:
+            try:
+                self.connect()
+            except OSError:
+                return False
+        info = self.client.publish(topic, data, qos=qos, retain=retain)
+        return info.rc == mqtt.MQTT_ERR_SUCCESS
+
+    def is_connected(self) -> bool:
+        """Return ``True`` when the broker connection is up."""
+        return self.connected and self.client.is_connected()
+
     def disconnect(self) -> None:
         """Disconnect from the MQTT broker."""
         if self.connected:
@@ -0,0 +1,370 @@
+"""Batched, compressed MQTT publishing of stream detections.
+
+:class:`DetectionPublisher` listens to a
+:class:`~piwardrive.services.stream_processor.StreamProcessor`, coalesces
+records per source into batches bounded by size and age, encodes each batch
+once and publishes it to ``<topic_prefix>/<source>``. Batches that cannot be
+delivered are written to a bounded on-disk spool and replayed, oldest first,
+once the broker is reachable again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+import zlib
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Protocol
+
+from piwardrive import fastjson
+
+try:  # pragma: no cover - optional dependency
+    import msgpack
+except Exception:  # pragma: no cover - msgpack missing
+    msgpack = None
+
+try:  # pragma: no cover - optional dependency
+    import zstandard
+except Exception:  # pragma: no cover - zstandard missing
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+
+class RawPublisher(Protocol):
+    """Minimal client interface used by :class:`DetectionPublisher`."""
+
+    def publish_raw(
+        self, topic: str, data: bytes, qos: int = 0, retain: bool = False
+    ) -> bool:
+        """Publish ``data`` and return ``True`` when accepted."""
+
+
+def _encoder(fmt: str) -> Callable[[Any], bytes]:
+    if fmt == "json":
+        return lambda obj: fastjson.dumps(obj).encode()
+    if fmt == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("msgpack is required for the msgpack format")
+        return lambda obj: msgpack.packb(obj, use_bin_type=True, default=str)
+    raise ValueError(f"Unknown encoding: {fmt}")
+
+
+def _compressor(kind: str | None, level: int) -> Callable[[bytes], bytes]:
+    if kind is None:
+        return lambda data: data
+    if kind == "zlib":
+        return lambda data: zlib.compress(data, level)
+    if kind == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required for zstd compression")
+        ctx = zstandard.ZstdCompressor(level=level)
+        return ctx.compress
+    raise ValueError(f"Unknown compression: {kind}")
+
+
+class _Spool:
+    """Size-bounded FIFO of undelivered messages stored as files."""
+
+    def __init__(self, directory: str | os.PathLike[str], max_bytes: int) -> None:
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._files: deque[tuple[Path, int]] = deque(
+            (p, p.stat().st_size) for p in sorted(self.dir.glob("*.msg"))
+        )
+        self._bytes = sum(size for _, size in self._files)
+        self._seq = int(self._files[-1][0].stem.split("-")[0]) + 1 if self._files else 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+    def push(self, topic: str, qos: int, data: bytes) -> None:
+        path = self.dir / f"{self._seq:012d}-{qos}.msg"
+        self._seq += 1
+        blob = topic.encode() + b"\n" + data
+        path.write_bytes(blob)
+        self._files.append((path, len(blob)))
+        self._bytes += len(blob)
+        while self._bytes > self.max_bytes and len(self._files) > 1:
+            old, size = self._files.popleft()
+            old.unlink(missing_ok=True)
+            self._bytes -= size
+            self.dropped += 1
+
+    def peek(self) -> tuple[str, int, bytes] | None:
+        if not self._files:
+            return None
+        path = self._files[0][0]
+        topic, _, data = path.read_bytes().partition(b"\n")
+        qos = int(path.stem.split("-")[1])
+        return topic.decode(), qos, data
+
+    def pop(self) -> None:
+        path, size = self._files.popleft()
+        path.unlink(missing_ok=True)
+        self._bytes -= size
+
+
+class DetectionPublisher:
+    """Publish stream detections to MQTT in compressed batches."""
+
+    def __init__(
+        self,
+        client: RawPublisher,
+        *,
+        topic_prefix: str = "piwardrive/detections",
+        qos: int | Mapping[str, int] = 0,
+        max_batch: int = 200,
+        max_delay: float = 2.0,
+        encoding: str = "json",
+        compression: str | None = "zlib",
+        compression_level: int = 6,
+        spool_dir: str | os.PathLike[str] | None = None,
+        spool_max_bytes: int = 10 * 1024 * 1024,
+        max_pending: int = 10000,
+    ) -> None:
+        """Initialize the publisher.
+
+        Args:
+            client: Object providing ``publish_raw`` such as ``MQTTClient``
+            topic_prefix: Prefix for per-source topics
+            qos: QoS level for all sources or a mapping of source to QoS
+            max_batch: Publish a source batch once it holds this many records
+            max_delay: Publish a non-empty batch after this many seconds
+            encoding: ``json`` or ``msgpack``
+            compression: ``None``, ``zlib`` or ``zstd``
+            compression_level: Level passed to the compressor
+            spool_dir: Directory for undelivered batches, disabled if ``None``
+            spool_max_bytes: Maximum spool size before dropping oldest batches
+            max_pending: Maximum buffered records before dropping oldest ones
+        """
+        self.client = client
+        self.topic_prefix = topic_prefix.rstrip("/")
+        self._qos = qos
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self._encode = _encoder(encoding)
+        self._compress = _compressor(compression, compression_level)
+        self._spool = (
+            _Spool(spool_dir, spool_max_bytes) if spool_dir is not None else None
+        )
+        self._batches: Dict[str, List[Any]] = {}
+        self._started: Dict[str, float] = {}
+        self._pending = 0
+        self._queue: asyncio.Queue[dict[str, Any]] | None = None
+        self._processor: Any = None
+        self._task: asyncio.Task[None] | None = None
+        self._window: deque[tuple[float, int, int]] = deque()
+        self.stats: Dict[str, float] = {
+            "records": 0,
+            "batches": 0,
+            "published": 0,
+            "failed": 0,
+            "spooled": 0,
+            "replayed": 0,
+            "dropped": 0,
+            "bytes_raw": 0,
+            "bytes_encoded": 0,
+            "bytes_sent": 0,
+            "lag": 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Stream integration
+    # ------------------------------------------------------------------
+    async def start(self, processor: Any) -> None:
+        """Register with ``processor`` and start the publishing task."""
+        if self._task is not None:
+            return
+        self._processor = processor
+        self._queue = processor.register_listener()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop publishing, flush buffered records and unregister."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._processor is not None and self._queue is not None:
+            self._processor.unregister_listener(self._queue)
+        self._queue = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        while True:
+            timeout = self._next_deadline()
+            try:
+                if timeout is None:
+                    event = await self._queue.get()
+                else:
+                    event = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                event = None
+            if event is not None:
+                self.add(event.get("source", "unknown"), event.get("records", []))
+                self.add("alerts", event.get("alerts") or [])
+            await self.flush(due_only=True)
+
+    def _next_deadline(self) -> float | None:
+        if not self._started:
+            return None
+        oldest = min(self._started.values())
+        return max(0.0, oldest + self.max_delay - time.monotonic())
+
+    # ------------------------------------------------------------------
+    # Batching
+    # ------------------------------------------------------------------
+    def add(self, source: str, records: List[Any]) -> None:
+        """Buffer ``records`` from ``source`` for the next batch."""
+        if not records:
+            return
+        batch = self._batches.setdefault(source, [])
+        self._started.setdefault(source, time.monotonic())
+        batch.extend(records)
+        self._pending += len(records)
+        self.stats["records"] += len(records)
+        if self._pending > self.max_pending:
+            # backpressure: shed the oldest records of the largest batch
+            largest = max(self._batches, key=lambda k: len(self._batches[k]))
+            excess = min(self._pending - self.max_pending, len(self._batches[largest]))
+            del self._batches[largest][:excess]
+            self._pending -= excess
+            self.stats["dropped"] += excess
+
+    def qos_for(self, source: str) -> int:
+        """Return the QoS level configured for ``source``."""
+        if isinstance(self._qos, Mapping):
+            return int(self._qos.get(source, self._qos.get("default", 0)))
+        return int(self._qos)
+
+    def encode_batch(self, source: str, records: List[Any]) -> bytes:
+        """Return the encoded and compressed payload for ``records``."""
+        raw = self._encode(
+            {
+                "source": source,
+                "ts": time.time(),
+                "count": len(records),
+                "records": records,
+            }
+        )
+        data = self._compress(raw)
+        self.stats["bytes_raw"] += len(raw)
+        self.stats["bytes_encoded"] += len(data)
+        return data
+
+    async def flush(self, due_only: bool = False) -> int:
+        """Publish buffered batches and return the number sent or spooled.
+
+        Args:
+            due_only: Only publish batches that reached ``max_batch`` records
+                or ``max_delay`` seconds of age.
+        """
+        await self._drain_spool()
+        now = time.monotonic()
+        sent = 0
+        for source in list(self._batches):
+            batch = self._batches[source]
+            if due_only and not (
+                len(batch) >= self.max_batch
+                or now - self._started[source] >= self.max_delay
+            ):
+                continue
+            lag = now - self._started.pop(source)
+            del self._batches[source]
+            self._pending -= len(batch)
+            for i in range(0, len(batch), self.max_batch):
+                await self._publish(source, batch[i : i + self.max_batch], lag)
+                sent += 1
+        return sent
+
+    async def _publish(self, source: str, records: List[Any], lag: float) -> None:
+        topic = f"{self.topic_prefix}/{source}"
+        qos = self.qos_for(source)
+        data = self.encode_batch(source, records)
+        self.stats["batches"] += 1
+        self.stats["lag"] = lag
+        if await self._send(topic, qos, data):
+            self._record_throughput(len(records), len(data))
+            return
+        self.stats["failed"] += 1
+        if self._spool is not None:
+            await asyncio.to_thread(self._spool.push, topic, qos, data)
+            self.stats["spooled"] += 1
+
+    async def _send(self, topic: str, qos: int, data: bytes) -> bool:
+        try:
+            # publish_raw may block on a (re)connect to the broker
+            ok = await asyncio.to_thread(self.client.publish_raw, topic, data, qos=qos)
+        except Exception as exc:
+            logger.debug("MQTT publish to %s failed: %s", topic, exc)
+            return False
+        if ok:
+            self.stats["published"] += 1
+            self.stats["bytes_sent"] += len(data)
+        return bool(ok)
+
+    async def _drain_spool(self) -> None:
+        if not self._spool:
+            return
+        while True:
+            item = await asyncio.to_thread(self._spool.peek)
+            if item is None:
+                return
+            topic, qos, data = item
+            if not await self._send(topic, qos, data):
+                return
+            await asyncio.to_thread(self._spool.pop)
+            self.stats["replayed"] += 1
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+    def _record_throughput(self, records: int, nbytes: int) -> None:
+        now = time.monotonic()
+        self._window.append((now, records, nbytes))
+        while self._window and now - self._window[0][0] > 60.0:
+            self._window.popleft()
+
+    def metrics(self) -> Dict[str, float]:
+        """Return delivery counters, throughput and lag figures."""
+        now = time.monotonic()
+        while self._window and now - self._window[0][0] > 60.0:
+            self._window.popleft()
+        span = now - self._window[0][0] if self._window else 0.0
+        span = max(span, 1.0)
+        records = sum(r for _, r, _ in self._window)
+        nbytes = sum(b for _, _, b in self._window)
+        ratio = (
+            self.stats["bytes_raw"] / self.stats["bytes_encoded"]
+            if self.stats["bytes_encoded"]
+            else 0.0
+        )
+        oldest = min(self._started.values()) if self._started else None
+        return {
+            **self.stats,
+            "records_per_sec": records / span,
+            "bytes_per_sec": nbytes / span,
+            "compression_ratio": ratio,
+            "pending": self._pending,
+            "pending_age": now - oldest if oldest is not None else 0.0,
+            "spool_messages": len(self._spool) if self._spool else 0,
+            "spool_bytes": self._spool.size if self._spool else 0,
+            "spool_dropped": self._spool.dropped if self._spool else 0,
+        }
+
+
+__all__ = ["DetectionPublisher", "RawPublisher"]
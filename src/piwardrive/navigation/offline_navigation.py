@@ -13,7 +13,6 @@ Author: PiWardrive Development Team
 License: MIT
 """
 
-import heapq
 import json
 import logging
 import math
@@ -25,6 +24,10 @@ from enum import Enum
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional
 
+import numpy as np
+
+from .routing import RoutingGraph
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -420,15 +423,18 @@ class DeadReckoning:
 class Pathfinder:
     """Pathfinding and route optimization"""
 
-    def __init__(self):
+    def __init__(self, landmarks: int = 8):
         self.graph: Dict[str, List[Dict[str, Any]]] = {}
         self.nodes: Dict[str, Position] = {}
+        self.landmarks = landmarks
+        self._compiled: Optional[RoutingGraph] = None
 
     def add_node(self, node_id: str, position: Position):
         """Add navigation node"""
         self.nodes[node_id] = position
         if node_id not in self.graph:
             self.graph[node_id] = []
+        self._compiled = None
 
     def add_edge(self, from_node: str, to_node: str, weight: Optional[float] = None):
         """Add navigation edge"""
@@ -439,6 +445,37 @@ class Pathfinder:
             weight = self.nodes[from_node].distance_to(self.nodes[to_node])
 
         self.graph[from_node].append({"node": to_node, "weight": weight or 1.0})
+        self._compiled = None
+
+    def compile(self) -> RoutingGraph:
+        """Return the graph compiled to CSR arrays with landmark bounds.
+
+        The compiled form is cached until the next node or edge is added.
+        """
+        if self._compiled is None:
+            ids = list(self.nodes)
+            known = set(ids)
+            for node, edges in self.graph.items():
+                for other in [node] + [e["node"] for e in edges]:
+                    if other not in known:
+                        known.add(other)
+                        ids.append(other)
+            coords = [
+                (p.x, p.y, p.z) if p is not None else (math.nan,) * 3
+                for p in (self.nodes.get(node) for node in ids)
+            ]
+            compiled = RoutingGraph.from_edges(
+                ids,
+                (
+                    (node, e["node"], e["weight"])
+                    for node, edges in self.graph.items()
+                    for e in edges
+                ),
+                coords,
+            )
+            compiled.build_landmarks(self.landmarks)
+            self._compiled = compiled
+        return self._compiled
 
     def find_path(
         self,
@@ -456,70 +493,39 @@ class Pathfinder:
         else:
             return None
 
+    def distance_matrix(self, sources: List[str], targets: List[str]) -> np.ndarray:
+        """Return shortest route lengths between every source and target.
+
+        Unreachable pairs are ``inf``.
+        """
+        compiled = self.compile()
+        return compiled.many_to_many(
+            [compiled.index[node] for node in sources],
+            [compiled.index[node] for node in targets],
+        )
+
     def _a_star(self, start: str, end: str) -> Optional[List[str]]:
-        """A* pathfinding algorithm"""
+        """A* pathfinding algorithm with landmark bounds"""
         if start not in self.nodes or end not in self.nodes:
             return None
-
-        open_set = [(0, start)]
-        came_from = {}
-        g_score = {start: 0}
-        f_score = {start: self._heuristic(start, end)}
-
-        while open_set:
-            current = heapq.heappop(open_set)[1]
-
-            if current == end:
-                return self._reconstruct_path(came_from, current)
-
-            if current not in self.graph:
-                continue
-
-            for neighbor_info in self.graph[current]:
-                neighbor = neighbor_info["node"]
-                tentative_g_score = g_score[current] + neighbor_info["weight"]
-
-                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
-                    came_from[neighbor] = current
-                    g_score[neighbor] = tentative_g_score
-                    f_score[neighbor] = tentative_g_score + self._heuristic(
-                        neighbor, end
-                    )
-
-                    heapq.heappush(open_set, (f_score[neighbor], neighbor))
-
-        return None
+        return self._route(start, end, heuristic=True)
 
     def _dijkstra(self, start: str, end: str) -> Optional[List[str]]:
         """Dijkstra's algorithm"""
         if start not in self.nodes:
             return None
+        return self._route(start, end, heuristic=False)
 
-        distances = {node: float("inf") for node in self.nodes}
-        distances[start] = 0
-        previous = {}
-        unvisited = set(self.nodes.keys())
-
-        while unvisited:
-            current = min(unvisited, key=lambda x: distances[x])
-
-            if current == end:
-                return self._reconstruct_path(previous, current)
-
-            unvisited.remove(current)
-
-            if current not in self.graph:
-                continue
-
-            for neighbor_info in self.graph[current]:
-                neighbor = neighbor_info["node"]
-                if neighbor in unvisited:
-                    alt = distances[current] + neighbor_info["weight"]
-                    if alt < distances[neighbor]:
-                        distances[neighbor] = alt
-                        previous[neighbor] = current
-
-        return None
+    def _route(self, start: str, end: str, heuristic: bool) -> Optional[List[str]]:
+        compiled = self.compile()
+        if end not in compiled.index:
+            return None
+        result = compiled.shortest_path(
+            compiled.index[start], compiled.index[end], heuristic
+        )
+        if result is None:
+            return None
+        return [compiled.ids[i] for i in result[1]]
 
     def _breadth_first(self, start: str, end: str) -> Optional[List[str]]:
         """Breadth-first search"""
@@ -548,13 +554,6 @@ class Pathfinder:
 
         return None
 
-    def _heuristic(self, node1: str, node2: str) -> float:
-        """Heuristic function for A*"""
-        if node1 not in self.nodes or node2 not in self.nodes:
-            return 0.0
-
-        return self.nodes[node1].distance_to(self.nodes[node2])
-
     def _reconstruct_path(self, came_from: Dict[str, str], current: str) -> List[str]:
         """Reconstruct path from parent dictionary"""
         path = [current]
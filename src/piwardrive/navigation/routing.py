@@ -0,0 +1,246 @@
+"""Compiled routing graphs for offline navigation.
+
+:class:`RoutingGraph` stores a road or trail network as integer-indexed CSR
+arrays, with node coordinates kept in a single array. Point-to-point queries
+run A* guided by ALT bounds: shortest distances to and from a few landmark
+nodes give, through the triangle inequality, a consistent lower bound for
+any pair of nodes. Many-to-many distance tables use SciPy's compiled
+Dijkstra over blocks of sources.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+from typing import Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+Edge = Tuple[Hashable, Hashable, float]
+
+
+def _distances(matrix: csr_matrix, source: int) -> np.ndarray:
+    """Return shortest distances from ``source`` to every node."""
+    row: np.ndarray = dijkstra(matrix, indices=[source])[0]
+    return row
+
+
+class RoutingGraph:
+    """Directed weighted graph in CSR form with optional ALT landmarks."""
+
+    def __init__(
+        self,
+        ids: Sequence[Hashable],
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        weights: np.ndarray,
+        coords: Optional[np.ndarray] = None,
+    ) -> None:
+        """Initialize the graph.
+
+        Args:
+            ids: External node identifiers; node ``i`` is ``ids[i]``.
+            indptr: CSR row pointers, ``len(ids) + 1`` entries.
+            indices: Edge target of each CSR entry.
+            weights: Edge weight of each CSR entry.
+            coords: Optional ``(n, 3)`` node coordinates, NaN when unknown.
+        """
+        self.ids = list(ids)
+        self.index = {node: i for i, node in enumerate(self.ids)}
+        n = len(self.ids)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=float)
+        if coords is None:
+            coords = np.full((n, 3), np.nan)
+        self.coords = np.asarray(coords, dtype=float).reshape(n, 3)
+        self.landmarks = np.empty(0, dtype=np.int64)
+        self._from_landmarks = np.empty((0, n))
+        self._to_landmarks = np.empty((0, n))
+        self._matrix: Optional[csr_matrix] = None
+        self._reverse: Optional[csr_matrix] = None
+        # list lookups are much cheaper than NumPy scalars in the search loop
+        self._ptr = self.indptr.tolist()
+        self._adj = self.indices.tolist()
+        self._wts = self.weights.tolist()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_edges(
+        cls,
+        ids: Sequence[Hashable],
+        edges: Iterable[Edge],
+        coords: Optional[np.ndarray] = None,
+    ) -> "RoutingGraph":
+        """Build a graph from ``(from, to, weight)`` triples.
+
+        Of several parallel edges only the lightest is kept.
+        """
+        ids = list(ids)
+        index = {node: i for i, node in enumerate(ids)}
+        src: List[int] = []
+        dst: List[int] = []
+        wts: List[float] = []
+        for a, b, weight in edges:
+            src.append(index[a])
+            dst.append(index[b])
+            wts.append(weight)
+        s = np.asarray(src, dtype=np.int64)
+        d = np.asarray(dst, dtype=np.int64)
+        w = np.asarray(wts, dtype=float)
+        order = np.lexsort((w, d, s))
+        s, d, w = s[order], d[order], w[order]
+        keep = np.ones(len(s), dtype=bool)
+        keep[1:] = (s[1:] != s[:-1]) | (d[1:] != d[:-1])
+        s, d, w = s[keep], d[keep], w[keep]
+        indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(s, minlength=len(ids)), out=indptr[1:])
+        return cls(ids, indptr, d, w, coords)
+
+    @property
+    def matrix(self) -> csr_matrix:
+        """The graph as a SciPy sparse matrix."""
+        if self._matrix is None:
+            n = len(self)
+            self._matrix = csr_matrix(
+                (self.weights, self.indices, self.indptr), shape=(n, n)
+            )
+        return self._matrix
+
+    @property
+    def reverse_matrix(self) -> csr_matrix:
+        """The graph with every edge reversed."""
+        if self._reverse is None:
+            self._reverse = self.matrix.transpose().tocsr()
+        return self._reverse
+
+    def build_landmarks(self, count: int = 8) -> None:
+        """Select ``count`` landmarks and store distances to and from them.
+
+        Landmarks are picked farthest-first so they sit on the edges of the
+        network, which is where they give the tightest bounds. Nodes the
+        current landmarks cannot reach are picked first, so every component
+        gets one.
+        """
+        n = len(self)
+        count = min(max(count, 0), n)
+        if count == 0:
+            self.landmarks = np.empty(0, dtype=np.int64)
+            self._from_landmarks = np.empty((0, n))
+            self._to_landmarks = np.empty((0, n))
+            return
+        start = _distances(self.matrix, 0)
+        start[np.isinf(start)] = -1.0
+        chosen = [int(np.argmax(start))]
+        rows = [_distances(self.matrix, chosen[0])]
+        closest = rows[0].copy()
+        while len(chosen) < count:
+            score = np.where(np.isinf(closest), np.finfo(float).max, closest)
+            score[chosen] = -1.0
+            chosen.append(int(np.argmax(score)))
+            rows.append(_distances(self.matrix, chosen[-1]))
+            np.minimum(closest, rows[-1], out=closest)
+        self.landmarks = np.asarray(chosen, dtype=np.int64)
+        self._from_landmarks = np.vstack(rows)
+        self._to_landmarks = np.atleast_2d(
+            dijkstra(self.reverse_matrix, indices=self.landmarks)
+        )
+
+    def potential(self, target: int) -> np.ndarray:
+        """Return a lower bound on the distance from every node to ``target``.
+
+        Uses the landmark bounds when landmarks exist, otherwise the
+        straight-line distance between node coordinates.
+        """
+        n = len(self)
+        if len(self.landmarks) == 0:
+            h: np.ndarray = np.linalg.norm(self.coords - self.coords[target], axis=1)
+            h[np.isnan(h)] = 0.0
+            return h
+        h = np.zeros(n)
+        # fmax skips the NaN of inf - inf where a landmark says nothing
+        with np.errstate(invalid="ignore"):
+            for dist_from, dist_to in zip(self._from_landmarks, self._to_landmarks):
+                np.fmax(h, dist_from[target] - dist_from, out=h)
+                np.fmax(h, dist_to - dist_to[target], out=h)
+        return h
+
+    def shortest_path(
+        self, source: int, target: int, heuristic: bool = True
+    ) -> Optional[Tuple[float, List[int]]]:
+        """Return ``(cost, nodes)`` of a shortest path or ``None``.
+
+        ``heuristic=False`` runs plain Dijkstra.
+        """
+        if source == target:
+            return 0.0, [source]
+        inf = math.inf
+        if heuristic:
+            h = self.potential(target).tolist()
+        else:
+            h = [0.0] * len(self)
+        if h[source] == inf:
+            return None
+        ptr, adj, wts = self._ptr, self._adj, self._wts
+        g = {source: 0.0}
+        parent = {source: -1}
+        heap = [(h[source], source)]
+        while heap:
+            f, u = heapq.heappop(heap)
+            if u == target:
+                break
+            gu = g[u]
+            if f > gu + h[u]:
+                continue  # stale entry
+            for e in range(ptr[u], ptr[u + 1]):
+                v = adj[e]
+                hv = h[v]
+                if hv == inf:
+                    continue
+                cost = gu + wts[e]
+                if cost < g.get(v, inf):
+                    g[v] = cost
+                    parent[v] = u
+                    heapq.heappush(heap, (cost + hv, v))
+        else:
+            return None
+        path = [target]
+        while path[-1] != source:
+            path.append(parent[path[-1]])
+        return g[target], path[::-1]
+
+    def many_to_many(
+        self,
+        sources: Sequence[int],
+        targets: Sequence[int],
+        block_size: int = 64,
+    ) -> np.ndarray:
+        """Return the ``(len(sources), len(targets))`` shortest distance table.
+
+        Searches run from whichever side is smaller, ``block_size`` at a
+        time, so at most ``block_size`` full distance rows are held.
+        Unreachable pairs are ``inf``.
+        """
+        src = np.asarray(sources, dtype=np.int64)
+        dst = np.asarray(targets, dtype=np.int64)
+        if len(dst) < len(src):
+            return np.transpose(self._table(self.reverse_matrix, dst, src, block_size))
+        return self._table(self.matrix, src, dst, block_size)
+
+    @staticmethod
+    def _table(
+        matrix: csr_matrix, src: np.ndarray, dst: np.ndarray, block_size: int
+    ) -> np.ndarray:
+        out = np.empty((len(src), len(dst)))
+        for start in range(0, len(src), block_size):
+            block = src[start : start + block_size]
+            rows = np.atleast_2d(dijkstra(matrix, indices=block))
+            out[start : start + len(block)] = rows[:, dst]
+        return out
+
+
+__all__ = ["RoutingGraph"]
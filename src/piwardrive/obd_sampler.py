@@ -0,0 +1,396 @@
+"""Background OBD-II sampler speaking ELM327 directly.
+
+:class:`OBDSampler` polls a set of mode 01 PIDs at per-PID rates from a
+worker thread. PIDs that are due together are requested in one multi-PID
+query (``01 0D 0C 04``) when the adapter supports it, so a dashboard
+refresh costs one adapter round trip instead of one per value. The latest
+values and a short history of each PID are kept in ring buffers and read
+without touching the adapter. :meth:`OBDSampler.read` queries a PID on
+demand between the worker's requests.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Iterable, List, Mapping, Optional, Protocol
+
+try:  # pragma: no cover - optional dependency
+    import serial
+except Exception:  # pragma: no cover - pyserial missing
+    serial = None
+
+logger = logging.getLogger(__name__)
+
+MAX_PIDS_PER_REQUEST = 6
+_PROMPT = b">"
+
+
+class Transport(Protocol):
+    """Byte stream to an ELM327 compatible adapter."""
+
+    def write(self, data: bytes) -> int | None:
+        """Send ``data`` to the adapter."""
+
+    def read_until(self, expected: bytes = b"\n", size: int | None = None) -> bytes:
+        """Read up to and including ``expected``."""
+
+
+@dataclass(frozen=True)
+class PID:
+    """Mode 01 parameter definition."""
+
+    name: str
+    code: int
+    size: int
+    decode: Callable[[bytes], float]
+    unit: str = ""
+
+
+PIDS: Dict[str, PID] = {
+    p.name: p
+    for p in (
+        PID("engine_load", 0x04, 1, lambda d: d[0] * 100.0 / 255.0, "percent"),
+        PID("coolant_temp", 0x05, 1, lambda d: d[0] - 40.0, "degC"),
+        PID("rpm", 0x0C, 2, lambda d: (d[0] * 256 + d[1]) / 4.0, "rpm"),
+        PID("speed", 0x0D, 1, lambda d: float(d[0]), "km/h"),
+        PID("intake_temp", 0x0F, 1, lambda d: d[0] - 40.0, "degC"),
+        PID("maf", 0x10, 2, lambda d: (d[0] * 256 + d[1]) / 100.0, "g/s"),
+        PID("throttle", 0x11, 1, lambda d: d[0] * 100.0 / 255.0, "percent"),
+    )
+}
+_BY_CODE = {p.code: p for p in PIDS.values()}
+
+DEFAULT_RATES: Dict[str, float] = {"speed": 5.0, "rpm": 5.0, "engine_load": 2.0}
+
+
+def _hex(text: str) -> bytearray:
+    try:
+        return bytearray.fromhex(text.replace(" ", ""))
+    except ValueError:
+        return bytearray()
+
+
+_ERRORS = {"NO DATA", "?", "STOPPED", "CAN ERROR", "UNABLE TO CONNECT", "BUS ERROR"}
+
+
+def parse_response(text: str, requested: Iterable[int]) -> Dict[int, bytes]:
+    """Return the data bytes for each PID in an ELM327 mode 01 response.
+
+    Handles spaced or compact hex, CAN multi-frame output (a byte count line
+    followed by ``0:``/``1:`` prefixed frames) and replies from several
+    ECUs. Unknown or unrequested PIDs end parsing of that message.
+    """
+    wanted = set(requested)
+    messages: List[bytearray] = []
+    current: Optional[bytearray] = None
+    for line in text.replace("\r", "\n").split("\n"):
+        line = line.strip()
+        if not line or line.upper() in _ERRORS or line.endswith("..."):
+            continue
+        if ":" in line:
+            index, _, frame = line.partition(":")
+            if current is None or index.strip() == "0":
+                current = bytearray()
+                messages.append(current)
+            current.extend(_hex(frame))
+        elif len(line) <= 3:
+            current = None  # byte count header of a multi-frame response
+        else:
+            messages.append(_hex(line))
+            current = None
+
+    result: Dict[int, bytes] = {}
+    for msg in messages:
+        if not msg or msg[0] != 0x41:
+            continue
+        i = 1
+        while i < len(msg):
+            pid = _BY_CODE.get(msg[i])
+            if pid is None or pid.code not in wanted:
+                break
+            chunk = bytes(msg[i + 1 : i + 1 + pid.size])
+            if len(chunk) < pid.size:
+                break
+            result.setdefault(pid.code, chunk)
+            i += 1 + pid.size
+    return result
+
+
+@dataclass
+class _Series:
+    pid: PID
+    interval: float
+    size: int
+    next_due: float = 0.0
+    samples: int = 0
+    misses: int = 0
+
+    def __post_init__(self) -> None:
+        self.history: Deque[tuple[float, float]] = deque(maxlen=self.size)
+        # monotonic sample times used for the observed rate
+        self.times: Deque[float] = deque(maxlen=64)
+
+
+class OBDSampler:
+    """Poll OBD-II PIDs in the background and cache recent values."""
+
+    def __init__(
+        self,
+        transport: Transport | str | None = None,
+        *,
+        rates: Mapping[str, float] | None = None,
+        history: int = 600,
+        multi_pid: bool = True,
+        baudrate: int = 38400,
+        timeout: float = 1.0,
+    ) -> None:
+        """Initialize the sampler.
+
+        Args:
+            transport: Open transport, serial port path or ``None`` for
+                ``/dev/ttyUSB0``.
+            rates: Sampling rate in Hz for each PID name in :data:`PIDS`.
+            history: Samples kept per PID.
+            multi_pid: Try multi-PID requests before falling back to one
+                PID per request.
+            baudrate: Serial speed when opening a port.
+            timeout: Serial read timeout in seconds.
+        """
+        rates = dict(rates or DEFAULT_RATES)
+        unknown = set(rates) - set(PIDS)
+        if unknown:
+            raise ValueError(f"Unknown PIDs: {', '.join(sorted(unknown))}")
+        self._transport_arg = transport
+        self._baudrate = baudrate
+        self._timeout = timeout
+        self._transport: Optional[Transport] = None
+        self._want_multi = multi_pid
+        self.multi_pid = False
+        self._series: Dict[str, _Series] = {
+            name: _Series(PIDS[name], 1.0 / rate, history)
+            for name, rate in rates.items()
+        }
+        self._lock = threading.Lock()
+        # serializes adapter I/O between the worker and on-demand reads
+        self._io = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._latency: float = float("nan")
+        self._latency_avg: float = float("nan")
+        self.stats: Dict[str, int] = {"requests": 0, "errors": 0, "reconnects": 0}
+
+    # ------------------------------------------------------------------
+    # Adapter I/O
+    def _open(self) -> Transport:
+        arg = self._transport_arg
+        if arg is not None and not isinstance(arg, str):
+            return arg
+        if serial is None:
+            raise RuntimeError("pyserial is required to open an OBD adapter")
+        return serial.Serial(
+            arg or "/dev/ttyUSB0", baudrate=self._baudrate, timeout=self._timeout
+        )
+
+    def _command(self, cmd: str) -> str:
+        assert self._transport is not None
+        start = time.perf_counter()
+        self._transport.write(cmd.encode() + b"\r")
+        raw = self._transport.read_until(_PROMPT)
+        elapsed = time.perf_counter() - start
+        self._latency = elapsed
+        self._latency_avg = (
+            elapsed
+            if self._latency_avg != self._latency_avg  # NaN check
+            else 0.8 * self._latency_avg + 0.2 * elapsed
+        )
+        self.stats["requests"] += 1
+        return raw.decode(errors="replace").rstrip(">").strip()
+
+    def connect(self) -> None:
+        """Open and initialize the adapter, probing multi-PID support."""
+        with self._io:
+            self._transport = self._open()
+            for cmd in ("ATZ", "ATE0", "ATL0", "ATS1", "ATH0", "ATSP0"):
+                self._command(cmd)
+            self.multi_pid = False
+            if self._want_multi and len(self._series) > 1:
+                probe = [s.pid.code for s in list(self._series.values())[:2]]
+                reply = self._query(probe)
+                self.multi_pid = len(reply) == len(probe)
+
+    def _query(self, codes: List[int]) -> Dict[int, bytes]:
+        cmd = "01 " + " ".join(f"{c:02X}" for c in codes)
+        with self._io:
+            return parse_response(self._command(cmd), codes)
+
+    def read(self, name: str) -> float | None:
+        """Query ``name`` from the adapter now and return its value.
+
+        Returns ``None`` for unknown PIDs, while the adapter is not
+        connected or when it does not answer.
+        """
+        pid = PIDS.get(name)
+        if pid is None:
+            return None
+        with self._io:
+            if self._transport is None:
+                return None
+            try:
+                data = self._query([pid.code]).get(pid.code)
+            except Exception as exc:
+                self.stats["errors"] += 1
+                logger.warning("OBD read of %s failed: %s", name, exc)
+                return None
+        return pid.decode(data) if data is not None else None
+
+    def poll_once(self, now: float | None = None) -> int:
+        """Query every due PID once and return the number of values stored."""
+        now = time.monotonic() if now is None else now
+        due = [s for s in self._series.values() if s.next_due <= now]
+        if not due:
+            return 0
+        size = MAX_PIDS_PER_REQUEST if self.multi_pid else 1
+        stored = 0
+        for i in range(0, len(due), size):
+            group = due[i : i + size]
+            try:
+                reply = self._query([s.pid.code for s in group])
+            except Exception as exc:
+                self.stats["errors"] += 1
+                raise ConnectionError(f"OBD adapter query failed: {exc}") from exc
+            ts = time.time()
+            with self._lock:
+                for s in group:
+                    data = reply.get(s.pid.code)
+                    if data is None:
+                        s.misses += 1
+                        continue
+                    s.history.append((ts, s.pid.decode(data)))
+                    s.times.append(time.monotonic())
+                    s.samples += 1
+                    stored += 1
+        for s in due:
+            s.next_due += s.interval
+            if s.next_due <= now:
+                # skip missed slots instead of bursting to catch up
+                s.next_due = now + s.interval
+        return stored
+
+    # ------------------------------------------------------------------
+    # Worker thread
+    def start(self) -> None:
+        """Start sampling in a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="obd-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Stop the worker thread and close the adapter."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._close()
+
+    def _close(self) -> None:
+        transport, self._transport = self._transport, None
+        close = getattr(transport, "close", None)
+        if close is not None and transport is not self._transport_arg:
+            try:
+                close()
+            except Exception:  # pragma: no cover - runtime errors
+                logger.debug("OBD adapter close failed", exc_info=True)
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                if self._transport is None:
+                    self.connect()
+                    backoff = 1.0
+                self.poll_once()
+            except Exception as exc:
+                logger.warning("OBD sampler error: %s", exc)
+                self._close()
+                self.stats["reconnects"] += 1
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+            next_due = min(s.next_due for s in self._series.values())
+            self._stop.wait(max(0.0, next_due - time.monotonic()))
+
+    # ------------------------------------------------------------------
+    # Non-blocking accessors
+    def latest(self, name: str, max_age: float | None = None) -> float | None:
+        """Return the newest value of ``name`` or ``None``.
+
+        Args:
+            name: PID name.
+            max_age: Ignore values older than this many seconds.
+        """
+        series = self._series.get(name)
+        if series is None:
+            return None
+        with self._lock:
+            if not series.history:
+                return None
+            ts, value = series.history[-1]
+        if max_age is not None and time.time() - ts > max_age:
+            return None
+        return value
+
+    def series(
+        self, name: str, since: float | None = None
+    ) -> List[tuple[float, float]]:
+        """Return ``(timestamp, value)`` samples of ``name`` newer than ``since``."""
+        s = self._series.get(name)
+        if s is None:
+            return []
+        with self._lock:
+            items = list(s.history)
+        if since is not None:
+            items = [item for item in items if item[0] > since]
+        return items
+
+    def snapshot(self) -> Dict[str, float | None]:
+        """Return the newest value of every sampled PID."""
+        return {name: self.latest(name) for name in self._series}
+
+    def metrics(self) -> Dict[str, object]:
+        """Return per-PID sample rates and adapter latency."""
+        pids: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            for name, s in self._series.items():
+                span = s.times[-1] - s.times[0] if len(s.times) > 1 else 0.0
+                pids[name] = {
+                    "target_hz": 1.0 / s.interval,
+                    "rate_hz": (len(s.times) - 1) / span if span else 0.0,
+                    "samples": s.samples,
+                    "misses": s.misses,
+                }
+        return {
+            **self.stats,
+            "multi_pid": self.multi_pid,
+            "latency_ms": self._latency * 1000.0,
+            "latency_avg_ms": self._latency_avg * 1000.0,
+            "pids": pids,
+        }
+
+
+__all__ = [
+    "DEFAULT_RATES",
+    "MAX_PIDS_PER_REQUEST",
+    "OBDSampler",
+    "PID",
+    "PIDS",
+    "Transport",
+    "parse_response",
+]
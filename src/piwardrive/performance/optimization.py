@@ -19,7 +19,6 @@ import gzip
 import io
 import logging
 import multiprocessing
-import pickle
 import pstats
 import sqlite3
 import threading
@@ -38,6 +37,8 @@ import lz4.frame
 import numpy as np
 import psutil
 
+from ..local_cache import CacheStrategy, IntelligentCache
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -52,15 +53,6 @@ class OptimizationLevel(Enum):
     EXTREME = "extreme"
 
 
-class CacheStrategy(Enum):
-    """Cache strategy options"""
-
-    LRU = "lru"
-    LFU = "lfu"
-    FIFO = "fifo"
-    ADAPTIVE = "adaptive"
-
-
 class CompressionType(Enum):
     """Compression types"""
 
@@ -234,161 +226,6 @@ class SystemMonitor:
                 time.sleep(self.update_interval)
 
 
-class IntelligentCache:
-    """Intelligent caching system"""
-
-    def __init__(
-        self, max_size: int = 1000, strategy: CacheStrategy = CacheStrategy.LRU
-    ):
-        self.max_size = max_size
-        self.strategy = strategy
-        self.cache: Dict[str, Any] = {}
-        self.access_times: Dict[str, datetime] = {}
-        self.access_counts: Dict[str, int] = {}
-        self.insertion_order: deque = deque()
-        self.lock = threading.Lock()
-
-        # Statistics
-        self.hits = 0
-        self.misses = 0
-        self.evictions = 0
-
-    def get(self, key: str) -> Optional[Any]:
-        """Get item from cache"""
-        with self.lock:
-            if key in self.cache:
-                self.hits += 1
-                self._update_access(key)
-                return self.cache[key]
-            else:
-                self.misses += 1
-                return None
-
-    def put(self, key: str, value: Any):
-        """Put item in cache"""
-        with self.lock:
-            if key in self.cache:
-                self.cache[key] = value
-                self._update_access(key)
-            else:
-                if len(self.cache) >= self.max_size:
-                    self._evict()
-
-                self.cache[key] = value
-                self.access_times[key] = datetime.now()
-                self.access_counts[key] = 1
-                self.insertion_order.append(key)
-
-    def invalidate(self, key: str):
-        """Invalidate cache entry"""
-        with self.lock:
-            if key in self.cache:
-                del self.cache[key]
-                del self.access_times[key]
-                del self.access_counts[key]
-
-                # Remove from insertion order
-                try:
-                    self.insertion_order.remove(key)
-                except ValueError:
-                    pass
-
-    def clear(self):
-        """Clear cache"""
-        with self.lock:
-            self.cache.clear()
-            self.access_times.clear()
-            self.access_counts.clear()
-            self.insertion_order.clear()
-
-            # Reset statistics
-            self.hits = 0
-            self.misses = 0
-            self.evictions = 0
-
-    def get_stats(self) -> Dict[str, Any]:
-        """Get cache statistics"""
-        total_requests = self.hits + self.misses
-        hit_rate = (self.hits / total_requests) if total_requests > 0 else 0
-
-        return {
-            "hits": self.hits,
-            "misses": self.misses,
-            "evictions": self.evictions,
-            "hit_rate": hit_rate,
-            "cache_size": len(self.cache),
-            "max_size": self.max_size,
-            "memory_usage": self._estimate_memory_usage(),
-        }
-
-    def _update_access(self, key: str):
-        """Update access statistics"""
-        self.access_times[key] = datetime.now()
-        self.access_counts[key] = self.access_counts.get(key, 0) + 1
-
-    def _evict(self):
-        """Evict items based on strategy"""
-        if not self.cache:
-            return
-
-        if self.strategy == CacheStrategy.LRU:
-            # Least Recently Used
-            oldest_key = min(
-                self.access_times.keys(), key=lambda k: self.access_times[k]
-            )
-            self._remove_key(oldest_key)
-
-        elif self.strategy == CacheStrategy.LFU:
-            # Least Frequently Used
-            least_used_key = min(
-                self.access_counts.keys(), key=lambda k: self.access_counts[k]
-            )
-            self._remove_key(least_used_key)
-
-        elif self.strategy == CacheStrategy.FIFO:
-            # First In, First Out
-            if self.insertion_order:
-                oldest_key = self.insertion_order.popleft()
-                self._remove_key(oldest_key)
-
-        elif self.strategy == CacheStrategy.ADAPTIVE:
-            # Adaptive strategy based on access patterns
-            now = datetime.now()
-            scores = {}
-
-            for key in self.cache:
-                age = (now - self.access_times.get(key, now)).total_seconds()
-                frequency = self.access_counts.get(key, 1)
-                scores[key] = frequency / (age + 1)  # Higher is better
-
-            worst_key = min(scores.keys(), key=lambda k: scores[k])
-            self._remove_key(worst_key)
-
-        self.evictions += 1
-
-    def _remove_key(self, key: str):
-        """Remove key from all data structures"""
-        if key in self.cache:
-            del self.cache[key]
-        if key in self.access_times:
-            del self.access_times[key]
-        if key in self.access_counts:
-            del self.access_counts[key]
-
-        try:
-            self.insertion_order.remove(key)
-        except ValueError:
-            pass
-
-    def _estimate_memory_usage(self) -> int:
-        """Estimate memory usage in bytes"""
-        total_size = 0
-        for key, value in self.cache.items():
-            total_size += len(key.encode("utf-8"))
-            total_size += len(pickle.dumps(value))
-        return total_size
-
-
 class DataCompressor:
     """Data compression utilities"""
 
@@ -21,12 +21,17 @@ from .core.persistence import (
     backup_database,
     get_db_metrics,
     get_scan_session,
+    get_table_counts,
     iter_scan_sessions,
+    load_ap_cache,
     load_daily_detection_stats,
     load_network_coverage_grid,
+    load_recent_health,
     refresh_daily_detection_stats,
     refresh_network_coverage_grid,
+    save_network_fingerprints,
     save_scan_session,
+    save_suspicious_activities,
     shutdown_pool,
 )
 
@@ -116,11 +121,6 @@ def save_app_state(*args, **kwargs):
     pass
 
 
-# TODO: Stub for load_recent_health
-def load_recent_health(*args, **kwargs):
-    pass
-
-
 # TODO: Stub for flush_health_records
 def flush_health_records(*args, **kwargs):
     pass
@@ -131,11 +131,6 @@ def save_health_record(*args, **kwargs):
     pass
 
 
-# TODO: Stub for load_ap_cache
-def load_ap_cache(*args, **kwargs):
-    pass
-
-
 __all__ = [  # noqa: F405
     *globals().get("__all__", []),
     "_db_path",
@@ -158,6 +153,7 @@ __all__ = [  # noqa: F405
     "get_scan_session",
     "iter_scan_sessions",
     "save_gps_tracks",
+    "save_network_fingerprints",
     "save_suspicious_activities",
     "count_suspicious_activities",
     "load_recent_suspicious",
@@ -167,4 +163,7 @@ __all__ = [  # noqa: F405
     "refresh_network_coverage_grid",
     "load_daily_detection_stats",
     "load_network_coverage_grid",
+    "get_table_counts",
+    "load_ap_cache",
+    "load_recent_health",
 ]
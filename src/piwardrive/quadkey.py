@@ -0,0 +1,136 @@
+"""Integer quadkeys for Web Mercator tiles.
+
+A quadkey interleaves the bits of a tile's ``x`` and ``y`` coordinates so
+that every tile's descendants occupy one contiguous integer range. Shifting
+a key right by two bits per level yields its parent, which makes keys cheap
+to index and to aggregate into coarser tiles with plain SQL.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import List, Tuple
+
+MAX_ZOOM = 24  # ~2.4 m tiles at the equator, 48 bit keys
+MAX_LAT = 85.05112878
+
+
+def _spread(v: int) -> int:
+    v &= 0xFFFFFFFF
+    v = (v | (v << 16)) & 0x0000FFFF0000FFFF
+    v = (v | (v << 8)) & 0x00FF00FF00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F0F0F0F0F
+    v = (v | (v << 2)) & 0x3333333333333333
+    return (v | (v << 1)) & 0x5555555555555555
+
+
+def _compact(v: int) -> int:
+    v &= 0x5555555555555555
+    v = (v | (v >> 1)) & 0x3333333333333333
+    v = (v | (v >> 2)) & 0x0F0F0F0F0F0F0F0F
+    v = (v | (v >> 4)) & 0x00FF00FF00FF00FF
+    v = (v | (v >> 8)) & 0x0000FFFF0000FFFF
+    return (v | (v >> 16)) & 0xFFFFFFFF
+
+
+def tile_xy(lat: float, lon: float, zoom: int) -> Tuple[int, int]:
+    """Return the ``(x, y)`` tile containing ``lat``/``lon`` at ``zoom``."""
+    n = 1 << zoom
+    lat = min(max(lat, -MAX_LAT), MAX_LAT)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def from_xy(x: int, y: int) -> int:
+    """Return the quadkey of tile ``x``/``y``."""
+    return _spread(x) | (_spread(y) << 1)
+
+
+def to_xy(key: int) -> Tuple[int, int]:
+    """Return the ``(x, y)`` tile coordinates of ``key``."""
+    return _compact(key), _compact(key >> 1)
+
+
+def encode(lat: float, lon: float, zoom: int = MAX_ZOOM) -> int:
+    """Return the quadkey of the tile containing ``lat``/``lon`` at ``zoom``."""
+    return from_xy(*tile_xy(lat, lon, zoom))
+
+
+def parent(key: int, zoom: int, level: int) -> int:
+    """Return the ancestor at ``level`` of ``key`` given at ``zoom``."""
+    return key >> (2 * (zoom - level))
+
+
+def bounds(key: int, zoom: int) -> Tuple[float, float, float, float]:
+    """Return ``(min_lat, min_lon, max_lat, max_lon)`` of tile ``key``."""
+    x, y = to_xy(key)
+    n = 1 << zoom
+
+    def lat(row: float) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1.0 - 2.0 * row / n))))
+
+    return lat(y + 1), x / n * 360.0 - 180.0, lat(y), (x + 1) / n * 360.0 - 180.0
+
+
+def center(key: int, zoom: int) -> Tuple[float, float]:
+    """Return the ``(lat, lon)`` centre of tile ``key``."""
+    x, y = to_xy(key)
+    n = 1 << zoom
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1.0 - 2.0 * (y + 0.5) / n))))
+    return lat, (x + 0.5) / n * 360.0 - 180.0
+
+
+def covering_zoom(
+    bbox: Tuple[float, float, float, float], max_tiles: int, max_zoom: int = MAX_ZOOM
+) -> int:
+    """Return the finest zoom at which at most ``max_tiles`` tiles cover ``bbox``."""
+    min_lat, min_lon, max_lat, max_lon = bbox
+    for zoom in range(max_zoom, -1, -1):
+        x0, y1 = tile_xy(min_lat, min_lon, zoom)
+        x1, y0 = tile_xy(max_lat, max_lon, zoom)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) <= max_tiles:
+            return zoom
+    return 0
+
+
+def ranges(
+    bbox: Tuple[float, float, float, float],
+    zoom: int = MAX_ZOOM,
+    max_tiles: int = 16,
+) -> List[Tuple[int, int]]:
+    """Return inclusive key ranges at ``zoom`` covering ``bbox``.
+
+    The box is covered with at most ``max_tiles`` coarser tiles, each of
+    which maps to one contiguous range of keys; adjacent ranges are merged.
+    The cover may include keys outside ``bbox``, so callers still filter on
+    exact coordinates.
+    """
+    min_lat, min_lon, max_lat, max_lon = bbox
+    level = covering_zoom(bbox, max_tiles, zoom)
+    x0, y1 = tile_xy(min_lat, min_lon, level)
+    x1, y0 = tile_xy(max_lat, max_lon, level)
+    shift = 2 * (zoom - level)
+    tiles = sorted(from_xy(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1))
+    merged: List[Tuple[int, int]] = []
+    for tile in tiles:
+        lo, hi = tile << shift, ((tile + 1) << shift) - 1
+        if merged and merged[-1][1] + 1 == lo:
+            merged[-1] = (merged[-1][0], hi)
+        else:
+            merged.append((lo, hi))
+    return merged
+
+
+__all__ = [
+    "MAX_ZOOM",
+    "bounds",
+    "center",
+    "covering_zoom",
+    "encode",
+    "from_xy",
+    "parent",
+    "ranges",
+    "tile_xy",
+    "to_xy",
+]
@@ -23,6 +23,8 @@ json = _impl.json
 
 enable_metrics = _impl.enable_metrics
 get_metrics = _impl.get_metrics
+get_delta_metrics = _impl.get_delta_metrics
+sync_deltas = _impl.sync_deltas
 
 # Public logger instance used by the implementation.
 logger = _impl.logger
@@ -13,7 +13,7 @@ from piwardrive.models import (
     WiFiScanRequest,
     WiFiScanResponse,
 )
-from piwardrive.services import network_fingerprinting, security_analyzer
+from piwardrive.services import network_fingerprinting
 from piwardrive.services.stream_processor import stream_processor
 from piwardrive.sigint_suite.wifi.scanner import async_scan_wifi
 
@@ -102,7 +102,6 @@ async def scan_wifi_get(
     ]
     await persistence.save_wifi_detections(records)
     await network_fingerprinting.fingerprint_wifi_records(records)
-    await security_analyzer.analyze_wifi_records(records)
     stream_processor.publish_wifi(records)
     return WiFiScanResponse(access_points=aps)
 
@@ -188,6 +187,5 @@ async def scan_wifi_post(
     ]
     await persistence.save_wifi_detections(records)
     await network_fingerprinting.fingerprint_wifi_records(records)
-    await security_analyzer.analyze_wifi_records(records)
     stream_processor.publish_wifi(records)
     return WiFiScanResponse(access_points=aps)
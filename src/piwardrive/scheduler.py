@@ -32,12 +32,20 @@ class Updatable(Protocol):
 class PollScheduler:
     """Manage named periodic callbacks using ``asyncio``."""
 
-    def __init__(self) -> None:
-        """Initialize the poll scheduler with empty task collections."""
+    def __init__(self, data_hub: Any = None) -> None:
+        """Initialize the poll scheduler with empty task collections.
+
+        Args:
+            data_hub: :class:`~piwardrive.widget_data.WidgetDataHub` serving
+                widgets that declare ``data_dependencies``. Defaults to the
+                shared hub.
+        """
         self._tasks: Dict[str, asyncio.Task] = {}
         self._next_runs: Dict[str, float] = {}
         self._durations: Dict[str, float] = {}
         self._rules: Dict[str, Mapping[str, Any]] = {}
+        self._data_hub = data_hub
+        self._subscriptions: Dict[str, list[Callable[[], None]]] = {}
 
     # ------------------------------------------------------------------
     # Scheduling rule helpers
@@ -95,11 +103,11 @@ class PollScheduler:
             if not pos:
                 return False
             fences = cls._load_geofences()
-            for name in geos:
-                points = fences.get(name)
-                if points and utils.point_in_polygon(pos, points):
-                    return True
-            return False
+            polygons = [fences[name] for name in geos if fences.get(name)]
+            if not polygons:
+                return False
+            inside = utils.points_in_geofences([pos[0]], [pos[1]], polygons)
+            return bool(inside.any())
         return True
 
     def schedule(
@@ -146,13 +154,22 @@ class PollScheduler:
     # ------------------------------------------------------------------
     # Widget helpers
     def register_widget(self, widget: Updatable, name: str | None = None) -> None:
-        """Register a widget's ``update`` method based on ``update_interval``."""
+        """Register a widget's ``update`` method based on ``update_interval``.
+
+        Widgets declaring ``data_dependencies`` are instead subscribed to the
+        shared data hub and receive each refresh through ``on_data``.
+        """
         interval = getattr(widget, "update_interval", None)
         if interval is None:
             raise ValueError(f"Widget {widget} missing 'update_interval'")
 
         cb_name = name or f"{widget.__class__.__name__}-{id(widget)}"
 
+        deps = getattr(widget, "data_dependencies", None)
+        if deps:
+            self._subscribe_widget(widget, cb_name, deps)
+            return
+
         async def _call_update() -> None:
             try:
                 _result = widget.update()
@@ -163,16 +180,36 @@ class PollScheduler:
 
         self.schedule(cb_name, lambda dt: _call_update(), interval)
 
+    def _subscribe_widget(
+        self, widget: Any, name: str, deps: Mapping[str, float | None]
+    ) -> None:
+        if self._data_hub is None:
+            from .widget_data import data_hub
+
+            self._data_hub = data_hub
+        self.cancel(name)
+        self._data_hub.attach(self)
+        unsubscribe = []
+        for dataset, max_age in deps.items():
+
+            def _push(value: Any, dataset: str = dataset) -> Any:
+                return widget.on_data(dataset, value)
+
+            unsubscribe.append(self._data_hub.subscribe(dataset, _push, max_age))
+        self._subscriptions[name] = unsubscribe
+
     def cancel(self, name: str) -> None:
         """Cancel a scheduled callback by name."""
         task = self._tasks.pop(name, None)
         if task:
             task.cancel()
         self._rules.pop(name, None)
+        for unsubscribe in self._subscriptions.pop(name, []):
+            unsubscribe()
 
     def cancel_all(self) -> None:
         """Cancel all registered callbacks."""
-        for name in list(self._tasks.keys()):
+        for name in [*self._tasks, *self._subscriptions]:
             self.cancel(name)
 
     def get_metrics(self) -> Dict[str, Dict[str, float]]:
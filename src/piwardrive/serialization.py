@@ -0,0 +1,260 @@
+"""Codec registry shared by API responses, streams, caches and exports.
+
+Every codec turns Python objects into ``bytes`` and back. ``json`` is always
+available and uses :func:`piwardrive.fastjson.dumpb`, so with ``orjson``
+installed payloads go from the encoder to the socket, cache or file without
+an intermediate ``str``. ``msgpack`` and ``cbor`` are registered when their
+libraries are installed and can be selected by HTTP clients with an
+``Accept`` header or by WebSocket clients with a subprotocol of the same
+name. NumPy arrays and scalars, dates, sets and dataclasses are converted by
+:func:`to_builtin` so analytics payloads encode with every codec.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import datetime as _dt
+import enum
+import pickle  # nosec B403 - only used for trusted local caches
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List
+
+from . import fastjson
+
+try:  # pragma: no cover - optional dependency
+    import numpy as np
+except Exception:  # pragma: no cover - numpy missing
+    np = None
+
+try:  # pragma: no cover - optional dependency
+    import msgpack
+except Exception:  # pragma: no cover - msgpack missing
+    msgpack = None
+
+try:  # pragma: no cover - optional dependency
+    import cbor2
+except Exception:  # pragma: no cover - cbor2 missing
+    cbor2 = None
+
+try:  # pragma: no cover - optional dependency
+    from starlette.responses import Response
+except Exception:  # pragma: no cover - starlette missing
+    Response = None
+
+
+@dataclass(frozen=True)
+class Codec:
+    """Named pair of ``dumps``/``loads`` functions working on ``bytes``.
+
+    ``negotiable`` codecs may be chosen by remote clients; the others are
+    only used explicitly, e.g. ``pickle`` for trusted in-process caches.
+    """
+
+    name: str
+    media_type: str
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[bytes | str], Any]
+    binary: bool = True
+    negotiable: bool = True
+
+
+_CODECS: Dict[str, Codec] = {}
+
+
+def to_builtin(obj: Any) -> Any:
+    """Return a plain Python replacement for ``obj`` or raise ``TypeError``.
+
+    Used as the ``default`` hook of every encoder.
+    """
+    if np is not None:
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        if isinstance(obj, np.generic):
+            return obj.item()
+    if isinstance(obj, (_dt.datetime, _dt.date, _dt.time)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return bytes(obj).hex()
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+def register_codec(codec: Codec, *, replace: bool = False) -> None:
+    """Add ``codec`` to the registry.
+
+    Raises:
+        ValueError: If a codec with the same name exists and ``replace`` is
+            false.
+    """
+    if codec.name in _CODECS and not replace:
+        raise ValueError(f"Codec already registered: {codec.name}")
+    _CODECS[codec.name] = codec
+
+
+def get_codec(name: str | Codec) -> Codec:
+    """Return the codec registered as ``name``.
+
+    Raises:
+        ValueError: If no such codec is registered.
+    """
+    if isinstance(name, Codec):
+        return name
+    try:
+        return _CODECS[name.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown codec: {name}") from None
+
+
+def available_codecs(negotiable_only: bool = False) -> List[str]:
+    """Return the names of registered codecs."""
+    return [c.name for c in _CODECS.values() if c.negotiable or not negotiable_only]
+
+
+def negotiate(accept: str | None, default: str = "json") -> Codec:
+    """Return the best negotiable codec for an HTTP ``Accept`` header.
+
+    Media ranges are ranked by their ``q`` parameter; ``*/*`` or a missing
+    header selects ``default``.
+    """
+    if not accept:
+        return get_codec(default)
+    by_type = {c.media_type: c for c in _CODECS.values() if c.negotiable}
+    ranked = []
+    for pos, part in enumerate(accept.split(",")):
+        media, *params = (p.strip() for p in part.split(";"))
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            ranked.append((-q, pos, media.lower()))
+    for _, _, media in sorted(ranked):
+        if media in by_type:
+            return by_type[media]
+        if media in ("*/*", "application/*"):
+            return get_codec(default)
+    return get_codec(default)
+
+
+def negotiate_subprotocol(offered: Iterable[str]) -> Codec | None:
+    """Return the first negotiable codec named in ``offered`` subprotocols."""
+    for name in offered:
+        codec = _CODECS.get(name.lower())
+        if codec is not None and codec.negotiable:
+            return codec
+    return None
+
+
+def _json_loads(data: bytes | str) -> Any:
+    return fastjson.loads(data)
+
+
+register_codec(
+    Codec(
+        "json",
+        "application/json",
+        lambda obj: fastjson.dumpb(obj, default=to_builtin),
+        _json_loads,
+        binary=False,
+    )
+)
+
+if msgpack is not None:  # pragma: no branch - depends on environment
+    _packer_opts = {"use_bin_type": True, "default": to_builtin}
+    register_codec(
+        Codec(
+            "msgpack",
+            "application/msgpack",
+            lambda obj: msgpack.packb(obj, **_packer_opts),
+            lambda data: msgpack.unpackb(data, raw=False, strict_map_key=False),
+        )
+    )
+
+if cbor2 is not None:  # pragma: no cover - depends on environment
+    register_codec(
+        Codec(
+            "cbor",
+            "application/cbor",
+            lambda obj: cbor2.dumps(
+                obj, default=lambda enc, o: enc.encode(to_builtin(o))
+            ),
+            cbor2.loads,
+        )
+    )
+
+register_codec(
+    Codec(
+        "pickle",
+        "application/x-python-pickle",
+        lambda obj: pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL),
+        pickle.loads,  # nosec B301 - never negotiated with clients
+        negotiable=False,
+    )
+)
+
+
+if Response is not None:  # pragma: no branch - starlette is a core dependency
+
+    class CodecResponse(Response):
+        """Starlette response rendering its content with a registered codec."""
+
+        def __init__(
+            self, content: Any, codec: str | Codec = "json", **kwargs: Any
+        ) -> None:
+            """Initialize the response.
+
+            Args:
+                content: Object to encode.
+                codec: Codec or codec name used by :meth:`render`.
+                **kwargs: Passed to :class:`starlette.responses.Response`.
+            """
+            self.codec = get_codec(codec)
+            kwargs.setdefault("media_type", self.codec.media_type)
+            super().__init__(content, **kwargs)
+
+        def render(self, content: Any) -> bytes:
+            """Encode ``content`` with the response codec."""
+            return self.codec.dumps(content)
+
+
+def encoded_response(
+    content: Any, accept: str | None = None, **kwargs: Any
+) -> "CodecResponse":
+    """Return ``content`` encoded with the codec negotiated from ``accept``."""
+    return CodecResponse(content, negotiate(accept), **kwargs)
+
+
+async def send_encoded(websocket: Any, payload: Any, codec: Codec) -> None:
+    """Send ``payload`` over ``websocket`` encoded with ``codec``.
+
+    Binary codecs are sent as binary frames. JSON is sent as a text frame,
+    which is what browser clients expect.
+    """
+    data = codec.dumps(payload)
+    if codec.binary:
+        await websocket.send_bytes(data)
+    else:
+        await websocket.send_text(data.decode())
+
+
+__all__ = [
+    "Codec",
+    "CodecResponse",
+    "available_codecs",
+    "encoded_response",
+    "get_codec",
+    "negotiate",
+    "negotiate_subprotocol",
+    "register_codec",
+    "send_encoded",
+    "to_builtin",
+]
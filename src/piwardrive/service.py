@@ -8,7 +8,11 @@ monitoring capabilities.
 
 from __future__ import annotations
 
+import asyncio
+import logging
 import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -50,6 +54,7 @@ from piwardrive.api.system import router as system_router
 from piwardrive.api.websockets import router as ws_router
 from piwardrive.api.widget_marketplace import router as marketplace_router
 from piwardrive.api.widgets import router as widgets_router
+from piwardrive.cpu_pool import shutdown_cpu_pool, warm_cpu_pool
 from piwardrive.error_middleware import add_error_middleware
 from piwardrive.routes import analytics as analytics_routes
 from piwardrive.routes import bluetooth as bluetooth_routes
@@ -57,8 +62,25 @@ from piwardrive.routes import cellular as cellular_routes
 from piwardrive.routes import security as security_routes
 from piwardrive.routes import websocket as websocket_routes
 from piwardrive.routes import wifi as wifi_routes
+from piwardrive.services.stream_processor import stream_processor
 
-app = FastAPI()
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    await stream_processor.start()
+    try:
+        # spawn the CPU pool workers before the first analytics request
+        await asyncio.to_thread(warm_cpu_pool)
+    except (OSError, RuntimeError) as exc:
+        logging.warning("CPU pool warm-up failed: %s", exc)
+    try:
+        yield
+    finally:
+        await stream_processor.stop()
+        await asyncio.to_thread(shutdown_cpu_pool)
+
+
+app = FastAPI(lifespan=_lifespan)
 
 cors_origins = [
     o.strip() for o in os.getenv("PW_CORS_ORIGINS", "").split(",") if o.strip()
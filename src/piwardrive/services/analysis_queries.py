@@ -3,22 +3,15 @@
 from __future__ import annotations
 
 import hashlib
-import threading
 from typing import Any, Sequence
 
-from cachetools import TTLCache
-
-from piwardrive.cache import RedisCache
+from piwardrive.cache import TieredCache
 from piwardrive.database_service import db_service
 
 _CACHE_TTL = 300
 _CACHE_MAX_SIZE = 128
 
-_local_cache: TTLCache[str, list[dict[str, Any]]] = TTLCache(
-    maxsize=_CACHE_MAX_SIZE, ttl=_CACHE_TTL
-)
-_cache_lock = threading.Lock()
-_remote_cache = RedisCache(prefix="analysis")
+_cache = TieredCache("analysis", maxsize=_CACHE_MAX_SIZE, ttl=_CACHE_TTL)
 
 
 async def _cached_fetch(
@@ -26,22 +19,11 @@ async def _cached_fetch(
 ) -> list[dict[str, Any]]:
     params = params or []
     digest = hashlib.sha256(repr((key, params)).encode()).hexdigest()
-    cache_key = f"{key}:{digest}"
-    with _cache_lock:
-        _local_cache.expire()
-        result = _local_cache.get(cache_key)
-    if result is not None:
-        return result
-    result = await _remote_cache.get(cache_key)
-    if result is not None:
-        with _cache_lock:
-            _local_cache[cache_key] = result
-        return result
-    result = await db_service.fetch(query, *params)
-    with _cache_lock:
-        _local_cache[cache_key] = result
-    await _remote_cache.set(cache_key, result, ttl)
-    return result
+
+    async def load() -> list[dict[str, Any]]:
+        return await db_service.fetch(query, *params)
+
+    return await _cache.get_or_set(f"{key}:{digest}", load, ttl, tags=(key,))
 
 
 async def evil_twin_detection() -> list[dict[str, Any]]:
@@ -164,9 +146,17 @@ async def mobile_device_detection() -> list[dict[str, Any]]:
 
 async def clear_cache() -> None:
     """Clear both local and remote analysis query caches."""
-    with _cache_lock:
-        _local_cache.clear()
-    await _remote_cache.clear()
+    await _cache.clear()
+
+
+async def invalidate(kind: str) -> int:
+    """Drop cached results of one analysis, e.g. ``"evil_twin"``."""
+    return await _cache.invalidate_tag(kind)
+
+
+def cache_stats() -> dict[str, Any]:
+    """Return hit/miss counters of the analysis query cache."""
+    return _cache.metrics()
 
 
 __all__ = [
@@ -175,5 +165,7 @@ __all__ = [
     "network_security_analysis",
     "temporal_pattern_analysis",
     "mobile_device_detection",
+    "cache_stats",
     "clear_cache",
+    "invalidate",
 ]
@@ -133,6 +133,7 @@ async def update_fingerprints() -> None:
         rows = await cur.fetchall()
     records = [dict(r) for r in rows]
     await network_fingerprinting.fingerprint_wifi_records(records)
+    await network_fingerprinting.flush_fingerprints()
 
 
 async def cleanup_old_data(days: int = 30) -> None:
@@ -6,33 +6,230 @@ health check functionality for PiWardrive database operations.
 
 from __future__ import annotations
 
+import functools
 import logging
-from collections import defaultdict
-from typing import Any, Dict, List
+import math
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Sequence
 
 from piwardrive import persistence
 
 logger = logging.getLogger(__name__)
 
-# store query durations grouped by SQL verb
-_QUERY_METRICS: dict[str, List[float]] = defaultdict(list)
+# statements slower than this get their plan recorded
+SLOW_QUERY_SECONDS = float(os.getenv("PW_DB_SLOW_QUERY_MS", "100")) / 1000
+# fingerprints beyond this many share the OVERFLOW_FINGERPRINT entry
+MAX_FINGERPRINTS = int(os.getenv("PW_DB_MAX_FINGERPRINTS", "500"))
+OVERFLOW_FINGERPRINT = "<other>"
+# statements whose plan can be requested without running them
+EXPLAINABLE = {"SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH"}
+SAMPLE_CHARS = 500
 
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGS = re.compile(r"[xX]?'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_PARAMS = re.compile(r"\$\d+|%s|%\(\w+\)s|(?<!:):\w+")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROWS = re.compile(r"\(\?\+\)(?:\s*,\s*\(\?\+\))+")
+_SPACE = re.compile(r"\s+")
 
-def record_query(sql: str, duration: float) -> None:
-    """Record execution time for ``sql``."""
-    key = (sql.split() or ["?"])[0].upper()
-    _QUERY_METRICS[key].append(duration)
-    logger.debug("query %s took %.4f sec", key, duration)
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint(sql: str) -> str:
+    """Return ``sql`` with literals, placeholders and value lists normalized.
+
+    Statements that differ only in their values share a fingerprint, e.g.
+    ``SELECT * FROM t WHERE id IN (1, 2)`` becomes
+    ``SELECT * FROM t WHERE id IN (?+)``.
+    """
+    text = _COMMENTS.sub(" ", sql)
+    text = _STRINGS.sub("?", text)
+    text = _NUMBERS.sub("?", text)
+    text = _PARAMS.sub("?", text)
+    text = _SPACE.sub(" ", text).strip().rstrip(";").strip()
+    text = _LISTS.sub("(?+)", text)
+    return _ROWS.sub("(?+)", text) or "?"
+
+
+class LatencyHistogram:
+    """Fixed-size log-bucketed latency histogram.
+
+    Buckets grow by ``2 ** (1 / 8)`` from one microsecond to about
+    17 minutes, so quantiles are within ~4.5% of the true value.
+    """
+
+    MIN_SECONDS = 1e-6
+    BUCKETS_PER_DOUBLING = 8
+    BUCKETS = 240
+
+    def __init__(self) -> None:
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        """Record one duration."""
+        if seconds > self.MIN_SECONDS:
+            index = int(
+                math.log2(seconds / self.MIN_SECONDS) * self.BUCKETS_PER_DOUBLING
+            )
+            index = min(index, self.BUCKETS - 1)
+        else:
+            index = 0
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Return the approximate ``q`` quantile, ``0.0`` when empty."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            seen += bucket
+            if seen >= rank and bucket:
+                break
+        # geometric middle of the bucket
+        value = self.MIN_SECONDS * 2 ** ((index + 0.5) / self.BUCKETS_PER_DOUBLING)
+        return min(max(value, self.min), self.max)
+
+
+@dataclass
+class QueryStats:
+    """Latency statistics and last captured plan of one fingerprint."""
+
+    fingerprint: str
+    sample: str
+    histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+    slow_count: int = 0
+    plan: List[str] | None = None
+    plan_pending: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        hist = self.histogram
+        return {
+            "fingerprint": self.fingerprint,
+            "sample": self.sample,
+            "count": hist.count,
+            "total": hist.total,
+            "avg": hist.total / hist.count if hist.count else 0.0,
+            "p50": hist.quantile(0.5),
+            "p95": hist.quantile(0.95),
+            "p99": hist.quantile(0.99),
+            "max": hist.max,
+            "slow_count": self.slow_count,
+            "plan": self.plan,
+        }
+
+
+_QUERY_STATS: Dict[str, QueryStats] = {}
+_LOCK = threading.Lock()
+
+
+def _verb(sql: str) -> str:
+    return (sql.split(None, 1) or ["?"])[0].upper()
+
+
+def record_query(sql: str, duration: float, explain: bool = True) -> bool:
+    """Record execution time for ``sql`` under its fingerprint.
+
+    Returns ``True`` when the statement was slow and its fingerprint has no
+    plan yet; the caller should then pass it to :func:`capture_plan`.
+    ``explain=False`` never asks for a plan, e.g. for ``executemany``.
+    """
+    key = fingerprint(sql)
+    slow = duration >= SLOW_QUERY_SECONDS
+    with _LOCK:
+        stats = _QUERY_STATS.get(key)
+        if stats is None:
+            if len(_QUERY_STATS) >= MAX_FINGERPRINTS:
+                key = OVERFLOW_FINGERPRINT
+                stats = _QUERY_STATS.get(key)
+            if stats is None:
+                stats = _QUERY_STATS[key] = QueryStats(key, sql[:SAMPLE_CHARS])
+        stats.histogram.add(duration)
+        want_plan = False
+        if slow:
+            stats.slow_count += 1
+            want_plan = (
+                explain
+                and key != OVERFLOW_FINGERPRINT
+                and stats.plan is None
+                and not stats.plan_pending
+                and _verb(sql) in EXPLAINABLE
+            )
+            stats.plan_pending = stats.plan_pending or want_plan
+    if slow:
+        logger.debug("slow query %s took %.4f sec", key, duration)
+    return want_plan
+
+
+async def capture_plan(
+    sql: str,
+    args: Sequence[Any],
+    fetchall: Callable[..., Awaitable[List[Dict[str, Any]]]],
+    explain_prefix: str = "EXPLAIN QUERY PLAN",
+) -> List[str]:
+    """Run ``explain_prefix sql`` through ``fetchall`` and store the plan.
+
+    The statement itself is not executed. Errors are stored as the plan so
+    the fingerprint is not explained again.
+    """
+    try:
+        rows = await fetchall(f"{explain_prefix} {sql}", *args)
+        plan = [
+            str(row["detail"]) if "detail" in row else " ".join(map(str, row.values()))
+            for row in rows
+        ]
+    except Exception as exc:
+        logger.debug("plan capture failed for %s: %s", sql, exc)
+        plan = [f"plan unavailable: {exc}"]
+    with _LOCK:
+        stats = _QUERY_STATS.get(fingerprint(sql))
+        if stats is not None:
+            stats.plan = plan
+            stats.plan_pending = False
+    return plan
 
 
 def get_query_metrics() -> Dict[str, Dict[str, float]]:
-    """Return aggregated query metrics."""
-    result: Dict[str, Dict[str, float]] = {}
-    for key, values in _QUERY_METRICS.items():
-        count = len(values)
-        avg = sum(values) / count if count else 0.0
-        result[key] = {"count": count, "avg": avg}
-    return result
+    """Return latency statistics per fingerprint."""
+    with _LOCK:
+        stats = [s.to_dict() for s in _QUERY_STATS.values()]
+    return {
+        s["fingerprint"]: {
+            k: s[k] for k in ("count", "avg", "total", "p50", "p95", "p99", "max")
+        }
+        for s in stats
+    }
+
+
+def top_queries(limit: int = 20, sort: str = "total") -> List[Dict[str, Any]]:
+    """Return the ``limit`` fingerprints with the highest ``sort`` value.
+
+    ``sort`` is any numeric field of the entries, e.g. ``total``, ``p99`` or
+    ``count``. Entries include a sample statement and the captured plan.
+    """
+    with _LOCK:
+        stats = [s.to_dict() for s in _QUERY_STATS.values()]
+    if stats and not isinstance(stats[0].get(sort), (int, float)):
+        raise ValueError(f"cannot sort by {sort!r}")
+    stats.sort(key=lambda s: s[sort], reverse=True)
+    return stats[:limit]
+
+
+def reset_query_metrics() -> None:
+    """Forget all recorded statistics."""
+    with _LOCK:
+        _QUERY_STATS.clear()
 
 
 async def health_check() -> bool:
@@ -60,4 +257,15 @@ async def analyze_index_usage() -> List[Dict[str, Any]]:
     return [dict(row) for row in rows]
 
 
-__all__ = ["record_query", "get_query_metrics", "health_check", "analyze_index_usage"]
+__all__ = [
+    "LatencyHistogram",
+    "QueryStats",
+    "analyze_index_usage",
+    "capture_plan",
+    "fingerprint",
+    "get_query_metrics",
+    "health_check",
+    "record_query",
+    "reset_query_metrics",
+    "top_queries",
+]
@@ -0,0 +1,237 @@
+"""Concurrent, per-source cached metrics collection.
+
+Each :class:`MetricSource` is sampled on its own interval with its own
+timeout. :meth:`MetricsCollector.collect` returns the cached values
+immediately and refreshes due sources concurrently in the background, so a
+slow or failing source never delays the others. A source that fails or
+times out keeps its last good value and is reported as stale, as is any
+value older than the source's TTL. A blocking fetch cannot be interrupted
+once it times out, so its source is skipped until the worker thread
+returns instead of piling up threads.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import inspect
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MetricSource:
+    """Definition of a single metrics source.
+
+    Attributes:
+        name: Key under which the value is reported.
+        fetch: Coroutine function or blocking callable returning the value.
+            Blocking callables run in a worker thread.
+        interval: Minimum seconds between samples.
+        timeout: Seconds to wait for a sample before giving up.
+        ttl: Age in seconds after which a value is reported as stale.
+            Defaults to three intervals.
+        default: Value reported before the first successful sample.
+    """
+
+    name: str
+    fetch: Callable[[], Any]
+    interval: float = 5.0
+    timeout: float = 2.0
+    ttl: Optional[float] = None
+    default: Any = None
+
+    def __post_init__(self) -> None:
+        if self.ttl is None:
+            self.ttl = self.interval * 3
+
+
+@dataclass
+class _SourceState:
+    source: MetricSource
+    value: Any = None
+    updated: float = 0.0
+    attempted: float = float("-inf")
+    latency: float = float("nan")
+    samples: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    skipped: int = 0
+    error: Optional[str] = None
+    task: Optional[asyncio.Task[None]] = field(default=None, repr=False)
+    # worker thread of a blocking fetch, kept until it returns
+    fetching: Optional[asyncio.Future[Any]] = field(default=None, repr=False)
+
+    def stale(self, now: float) -> bool:
+        ttl = self.source.ttl or 0.0
+        return self.error is not None or not self.samples or now - self.updated > ttl
+
+
+class MetricsCollector:
+    """Sample independent metric sources concurrently and cache the results."""
+
+    def __init__(self, sources: Iterable[MetricSource] = ()) -> None:
+        """Initialize the collector with ``sources``."""
+        self._states: Dict[str, _SourceState] = {}
+        for source in sources:
+            self.add(source)
+
+    def add(self, source: MetricSource) -> None:
+        """Register ``source``, replacing any source with the same name."""
+        state = _SourceState(source, value=source.default)
+        old = self._states.get(source.name)
+        if old is not None and old.task is not None:
+            old.task.cancel()
+        self._states[source.name] = state
+
+    def names(self) -> List[str]:
+        """Return registered source names."""
+        return list(self._states)
+
+    # ------------------------------------------------------------------
+    # Sampling
+    async def _sample(self, state: _SourceState) -> None:
+        source = state.source
+        start = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(source.fetch):
+                value = await asyncio.wait_for(source.fetch(), source.timeout)
+            else:
+                future = asyncio.ensure_future(asyncio.to_thread(source.fetch))
+                future.add_done_callback(_discard_result)
+                state.fetching = future
+                # the thread runs to completion even when the wait times out
+                value = await asyncio.wait_for(asyncio.shield(future), source.timeout)
+        except asyncio.TimeoutError:
+            state.timeouts += 1
+            state.failures += 1
+            state.error = f"timed out after {source.timeout:.1f}s"
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            state.failures += 1
+            state.error = str(exc) or exc.__class__.__name__
+            logger.debug("Metric source %s failed: %s", source.name, exc)
+        else:
+            state.value = value
+            state.updated = time.monotonic()
+            state.samples += 1
+            state.error = None
+        finally:
+            state.latency = time.perf_counter() - start
+
+    @staticmethod
+    def _running(state: _SourceState) -> bool:
+        task = state.task
+        if task is None or task.done():
+            return False
+        # samples left behind by a previous event loop will never finish
+        return task.get_loop() is asyncio.get_running_loop()
+
+    @staticmethod
+    def _busy(state: _SourceState) -> bool:
+        future = state.fetching
+        if future is None or future.done():
+            return False
+        return future.get_loop() is asyncio.get_running_loop()
+
+    def refresh(self, force: bool = False) -> List[asyncio.Task[None]]:
+        """Start sampling every due source and return the running tasks.
+
+        Sources whose previous sample is still running are not restarted,
+        and sources whose previous blocking fetch is still stuck in its
+        worker thread are skipped.
+        """
+        now = time.monotonic()
+        tasks = []
+        for state in self._states.values():
+            if self._running(state):
+                tasks.append(state.task)
+                continue
+            if force or now - state.attempted >= state.source.interval:
+                state.attempted = now
+                if self._busy(state):
+                    state.skipped += 1
+                    continue
+                state.task = asyncio.create_task(self._sample(state))
+                tasks.append(state.task)
+        return tasks
+
+    async def collect(self, wait: bool = False) -> Dict[str, Any]:
+        """Return the latest value of every source.
+
+        Due sources are refreshed concurrently. Only sources that have never
+        produced a value are awaited (bounded by their timeout) unless
+        ``wait`` is set, in which case all running samples are awaited.
+        """
+        self.refresh()
+        pending = [
+            s.task
+            for s in self._states.values()
+            if self._running(s) and (wait or (not s.samples and not s.failures))
+        ]
+        if pending:
+            await asyncio.wait(pending)
+        return self.values()
+
+    def values(self) -> Dict[str, Any]:
+        """Return cached values without sampling."""
+        return {name: state.value for name, state in self._states.items()}
+
+    def stale(self) -> List[str]:
+        """Return the names of sources whose value is stale."""
+        now = time.monotonic()
+        return [name for name, s in self._states.items() if s.stale(now)]
+
+    def reset(self) -> None:
+        """Forget cached values so every source is sampled on next collect."""
+        for name, state in list(self._states.items()):
+            if state.task is not None and not state.task.done():
+                state.task.cancel()
+            self._states[name] = _SourceState(
+                state.source, value=state.source.default, fetching=state.fetching
+            )
+
+    async def close(self) -> None:
+        """Cancel samples that are still running."""
+        tasks = [s.task for s in self._states.values() if self._running(s)]
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await task
+
+    # ------------------------------------------------------------------
+    # Metrics
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Return latency, age and failure figures for each source."""
+        now = time.monotonic()
+        result: Dict[str, Dict[str, Any]] = {}
+        for name, s in self._states.items():
+            result[name] = {
+                "latency_ms": s.latency * 1000.0,
+                "age": now - s.updated if s.samples else None,
+                "stale": s.stale(now),
+                "samples": s.samples,
+                "failures": s.failures,
+                "timeouts": s.timeouts,
+                "skipped": s.skipped,
+                "error": s.error,
+                "interval": s.source.interval,
+                "timeout": s.source.timeout,
+                "ttl": s.source.ttl,
+            }
+        return result
+
+
+def _discard_result(future: asyncio.Future[Any]) -> None:
+    # a fetch that outlived its timeout has nobody left to report to
+    if not future.cancelled():
+        future.exception()
+
+
+__all__ = ["MetricSource", "MetricsCollector"]
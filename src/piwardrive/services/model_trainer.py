@@ -1,36 +1,103 @@
-"""Automated ML model retraining service."""
+"""Automated ML model retraining service.
+
+Training runs in the shared CPU pool so the event loop keeps serving
+requests. Each fitted model is published as a versioned artifact under
+``PW_MODEL_DIR`` and hot-swapped into the live detector. The latest
+published artifact is loaded when the trainer starts, before the first
+retrain is scheduled, so detection works while that retrain runs.
+"""
 
 from __future__ import annotations
 
-from piwardrive import analysis, persistence
+import asyncio
+import logging
+import os
+from pathlib import Path
+
+from piwardrive import analysis, config, persistence
 from piwardrive.scheduler import PollScheduler
 from piwardrive.utils import run_async_task
 
+logger = logging.getLogger(__name__)
+
+MODEL_DIR = os.getenv("PW_MODEL_DIR", str(Path(config.CONFIG_DIR) / "models"))
+# newest health records each retrain is fitted on
+HISTORY_LIMIT = 500
+
 
 class ModelTrainer:
     """Periodically retrain anomaly detection models."""
 
-    def __init__(self, scheduler: PollScheduler, interval: int = 3600) -> None:
+    def __init__(
+        self,
+        scheduler: PollScheduler,
+        interval: int = 3600,
+        model_dir: str | None = None,
+    ) -> None:
         """Initialize the model trainer.
 
         Args:
             scheduler: Scheduler instance for periodic retraining
             interval: Training interval in seconds (default: 3600)
+            model_dir: Directory for published model artifacts
+                (default: ``PW_MODEL_DIR``)
         """
         self._scheduler = scheduler
         self._event = "ml_trainer"
+        self.model_dir = model_dir or MODEL_DIR
+        self._lock = asyncio.Lock()
+        run_async_task(self._start())
         scheduler.schedule(
             self._event, lambda _dt: run_async_task(self.run()), interval
         )
-        run_async_task(self.run())
+
+    async def _start(self) -> None:
+        await self.load_latest()
+        await self.run()
+
+    async def load_latest(self) -> bool:
+        """Install the newest published artifact into the live detector.
+
+        Returns:
+            ``True`` if an artifact was installed.
+        """
+        from piwardrive.analytics import anomaly
+
+        detector = getattr(analysis, "_ANOMALY_DETECTOR", None)
+        if detector is None or not hasattr(detector, "swap"):
+            return False
+        latest = await asyncio.to_thread(anomaly.load_latest_artifact, self.model_dir)
+        return latest is not None and detector.swap(latest)
 
     async def run(self) -> None:
         """Run model retraining on recent health data."""
         detector = getattr(analysis, "_ANOMALY_DETECTOR", None)
         if detector is None or not hasattr(detector, "fit"):
             return
-        records = await persistence.load_health_history(limit=500)
-        detector.fit(records)
+        if not hasattr(detector, "retrain"):
+            records = await persistence.load_recent_health(HISTORY_LIMIT)
+            detector.fit(records)
+            return
+        if self._lock.locked():
+            # the previous training is still running; skip this tick
+            return
+        async with self._lock:
+            await self._retrain(detector)
+
+    async def _retrain(self, detector) -> None:
+        from piwardrive.analytics import anomaly
+
+        if detector.artifact is None:
+            # the detector was replaced since startup
+            await self.load_latest()
+        records = await persistence.load_recent_health(HISTORY_LIMIT)
+        artifact = await detector.retrain(records)
+        if artifact is None:
+            return
+        try:
+            await asyncio.to_thread(anomaly.save_artifact, artifact, self.model_dir)
+        except OSError as exc:
+            logger.warning("Could not publish model v%d: %s", artifact.version, exc)
 
 
-__all__ = ["ModelTrainer"]
+__all__ = ["HISTORY_LIMIT", "MODEL_DIR", "ModelTrainer"]
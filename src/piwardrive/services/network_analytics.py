@@ -2,31 +2,17 @@
 
 from __future__ import annotations
 
-import math
 from datetime import date, datetime, timedelta
 from typing import Any, List
 
 import numpy as np
 
 from piwardrive import network_analytics as heuristics
-from piwardrive import persistence
+from piwardrive import persistence, utils
 from piwardrive.scheduler import PollScheduler
 from piwardrive.utils import run_async_task
 
 
-def _haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    R = 6371000.0
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dl = math.radians(lon2 - lon1)
-    a = (
-        math.sin(dphi / 2) ** 2
-        + math.cos(phi1) * math.cos(phi2) * math.sin(dl / 2) ** 2
-    )
-    return 2 * R * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-
 async def analyze_day(day: date) -> None:
     """Compute analytics for ``day`` and store results."""
     start = datetime.combine(day, datetime.min.time()).isoformat()
@@ -72,7 +58,8 @@ async def analyze_day(day: date) -> None:
         if unique_locs:
             lat_c = sum(p[0] for p in unique_locs) / len(unique_locs)
             lon_c = sum(p[1] for p in unique_locs) / len(unique_locs)
-            radius = max(_haversine(lat_c, lon_c, lat, lon) for lat, lon in unique_locs)
+            lats, lons = zip(*unique_locs)
+            radius = float(utils.haversine_from((lat_c, lon_c), lats, lons).max())
         mobility = min(1.0, len(unique_locs) / total) if total else None
         encs = {r.get("encryption_type") for r in items if r.get("encryption_type")}
         ssids = {r.get("ssid") for r in items if r.get("ssid")}
@@ -4,31 +4,41 @@ from __future__ import annotations
 
 import hashlib
 import json
-from typing import Any, Iterable
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable
 
 from piwardrive import persistence
 
+_CHARACTERISTIC_KEYS = (
+    "vendor_oui",
+    "vendor_name",
+    "encryption_type",
+    "cipher_suite",
+    "authentication_method",
+    "beacon_interval_ms",
+    "dtim_period",
+    "ht_capabilities",
+    "vht_capabilities",
+    "he_capabilities",
+    "country_code",
+    "regulatory_domain",
+    "channel",
+    "frequency_mhz",
+    "tx_power_dbm",
+    "device_type",
+)
+
 
 def _extract_characteristics(record: dict[str, Any]) -> dict[str, Any]:
-    keys = [
-        "vendor_oui",
-        "vendor_name",
-        "encryption_type",
-        "cipher_suite",
-        "authentication_method",
-        "beacon_interval_ms",
-        "dtim_period",
-        "ht_capabilities",
-        "vht_capabilities",
-        "he_capabilities",
-        "country_code",
-        "regulatory_domain",
-        "channel",
-        "frequency_mhz",
-        "tx_power_dbm",
-        "device_type",
-    ]
-    return {k: record.get(k) for k in keys if record.get(k) is not None}
+    return {
+        k: record.get(k) for k in _CHARACTERISTIC_KEYS if record.get(k) is not None
+    }
+
+
+def _characteristics_tuple(record: dict[str, Any]) -> tuple[Any, ...]:
+    return tuple(record.get(k) for k in _CHARACTERISTIC_KEYS)
 
 
 def _classify(record: dict[str, Any]) -> tuple[str, str]:
@@ -48,14 +58,16 @@ def _classify(record: dict[str, Any]) -> tuple[str, str]:
     return classification, risk
 
 
-def _fingerprint_hash(char: dict[str, Any]) -> str:
-    _data = json.dumps(char, sort_keys=True).encode()
-    return hashlib.sha256(_data).hexdigest()
+def _fingerprint_hash(values: tuple[Any, ...]) -> str:
+    # ``repr`` of the fixed-order tuple is canonical and far cheaper than a
+    # sorted JSON dump; blake2b keeps the 64 character hex digest.
+    return hashlib.blake2b(repr(values).encode(), digest_size=32).hexdigest()
 
 
-def _make_row(record: dict[str, Any]) -> dict[str, Any]:
+def _make_row(record: dict[str, Any], fp_hash: str | None = None) -> dict[str, Any]:
     char = _extract_characteristics(record)
-    fp_hash = _fingerprint_hash(char)
+    if fp_hash is None:
+        fp_hash = _fingerprint_hash(_characteristics_tuple(record))
     classification, risk = _classify(record)
     confidence = min(1.0, len(char) / 10.0)
     return {
@@ -69,11 +81,142 @@ def _make_row(record: dict[str, Any]) -> dict[str, Any]:
         "classification": classification,
         "risk_level": risk,
         "tags": json.dumps(list(char.keys())),
+        "created_at": None,
+        "updated_at": None,
     }
 
 
+class FingerprintCache:
+    """Bounded LRU of the last fingerprint written for each BSSID.
+
+    Records whose fingerprint and SSID are unchanged since the last write are
+    dropped. Changed fingerprints are buffered per BSSID and written in a
+    single upsert once ``max_pending`` rows are queued or ``flush_interval``
+    seconds have elapsed.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 50000,
+        *,
+        max_pending: int = 500,
+        flush_interval: float = 30.0,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of BSSIDs remembered.
+            max_pending: Number of queued rows that forces a flush.
+            flush_interval: Seconds after which queued rows are flushed.
+        """
+        self.max_entries = max_entries
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self._hashes: OrderedDict[str, tuple[str, Any]] = OrderedDict()
+        self._pending: Dict[str, dict[str, Any]] = {}
+        self._last_flush = 0.0
+        self.stats: Dict[str, int] = {
+            "changed": 0,
+            "skipped": 0,
+            "writes": 0,
+            "flushes": 0,
+            "evicted": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    @property
+    def pending(self) -> int:
+        """Return the number of rows waiting to be written."""
+        return len(self._pending)
+
+    def add(self, record: dict[str, Any]) -> bool:
+        """Queue ``record`` if its fingerprint changed and return ``True``."""
+        bssid = record.get("bssid")
+        if not bssid:
+            return False
+        fp_hash = _fingerprint_hash(_characteristics_tuple(record))
+        key = (fp_hash, record.get("ssid"))
+        if self._hashes.get(bssid) == key:
+            self._hashes.move_to_end(bssid)
+            self.stats["skipped"] += 1
+            return False
+        self._hashes[bssid] = key
+        self._hashes.move_to_end(bssid)
+        if len(self._hashes) > self.max_entries:
+            self._hashes.popitem(last=False)
+            self.stats["evicted"] += 1
+        self._pending[bssid] = _make_row(record, fp_hash)
+        self.stats["changed"] += 1
+        return True
+
+    def due(self, now: float | None = None) -> bool:
+        """Return ``True`` when queued rows should be written."""
+        if not self._pending:
+            return False
+        now = time.time() if now is None else now
+        return (
+            len(self._pending) >= self.max_pending
+            or now - self._last_flush >= self.flush_interval
+        )
+
+    async def flush(self) -> int:
+        """Write all queued rows and return how many were written."""
+        if not self._pending:
+            return 0
+        rows, self._pending = self._pending, {}
+        try:
+            await persistence.save_network_fingerprints(list(rows.values()))
+        except Exception:
+            # keep newer rows queued since the failed batch was taken
+            rows.update(self._pending)
+            self._pending = rows
+            raise
+        self._last_flush = time.time()
+        self.stats["writes"] += len(rows)
+        self.stats["flushes"] += 1
+        return len(rows)
+
+    def clear(self) -> None:
+        """Forget all cached fingerprints and queued rows."""
+        self._hashes.clear()
+        self._pending.clear()
+        self._last_flush = 0.0
+
+
+_CACHE = FingerprintCache(
+    int(os.getenv("PW_FINGERPRINT_CACHE_SIZE", "50000")),
+    max_pending=int(os.getenv("PW_FINGERPRINT_BATCH", "500")),
+    flush_interval=float(os.getenv("PW_FINGERPRINT_FLUSH_INTERVAL", "30.0")),
+)
+
+
 async def fingerprint_wifi_records(records: Iterable[dict[str, Any]]) -> None:
-    """Generate fingerprints for Wi-Fi detection ``records``."""
-    rows = [_make_row(r) for r in records if r.get("bssid")]
-    if rows:
-        await persistence.save_network_fingerprints(rows)
+    """Generate fingerprints for Wi-Fi detection ``records``.
+
+    Unchanged fingerprints are skipped and changed ones are upserted in
+    periodic batches; see :class:`FingerprintCache`.
+    """
+    for rec in records:
+        _CACHE.add(rec)
+    if _CACHE.due():
+        await _CACHE.flush()
+
+
+async def flush_fingerprints() -> int:
+    """Write any queued fingerprint rows immediately."""
+    return await _CACHE.flush()
+
+
+def get_cache_stats() -> Dict[str, int]:
+    """Return counters describing fingerprint cache effectiveness."""
+    return {**_CACHE.stats, "size": len(_CACHE), "pending": _CACHE.pending}
+
+
+__all__ = [
+    "FingerprintCache",
+    "fingerprint_wifi_records",
+    "flush_fingerprints",
+    "get_cache_stats",
+]
@@ -12,6 +12,8 @@ _DEF_SEVERITY = {
     "evil_twin": "high",
     "deauth_attack": "medium",
     "hidden_ssid": "low",
+    "signal_anomaly": "medium",
+    "suspicious_ssid": "low",
 }
 
 
@@ -4,10 +4,18 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
+import logging
+import os
 import time
+from pathlib import Path
 from typing import Any, Dict, Iterable, Mapping
 
-from piwardrive.services import network_fingerprinting, security_analyzer
+from piwardrive import persistence
+from piwardrive.core import config
+from piwardrive.services import network_fingerprinting
+from piwardrive.services.threat_stream import StreamingThreatDetector
+
+logger = logging.getLogger(__name__)
 
 
 class StreamProcessor:
@@ -19,6 +27,9 @@ class StreamProcessor:
         max_queue: int = 1000,
         listener_queue: int = 100,
         rate_limit: float = 20.0,
+        detector: StreamingThreatDetector | None = None,
+        checkpoint_path: str | os.PathLike[str] | None = None,
+        checkpoint_interval: float = 60.0,
     ) -> None:
         """Initialize the stream processor.
 
@@ -26,6 +37,9 @@ class StreamProcessor:
             max_queue: Maximum size of the processing queue
             listener_queue: Maximum size of listener queues
             rate_limit: Rate limit for processing events per second
+            detector: Streaming threat detector fed with Wi-Fi records
+            checkpoint_path: File used to persist the detector state
+            checkpoint_interval: Seconds between detector checkpoints
         """
         self._queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=max_queue)
         self._listeners: set[asyncio.Queue[dict[str, Any]]] = set()
@@ -39,22 +53,63 @@ class StreamProcessor:
             "cellular": 0,
             "alerts": 0,
         }
+        self.detector = detector or StreamingThreatDetector()
+        self._checkpoint_path = checkpoint_path
+        self._checkpoint_interval = checkpoint_interval
+        self._checkpoint_loaded = False
+        self._last_checkpoint = time.time()
 
     async def start(self) -> None:
-        """Start the stream processor task."""
+        """Start the stream processor task.
+
+        The detector checkpoint is loaded on the first start.
+        """
         if self._running:
             return
         self._running = True
+        await self._load_checkpoint()
         self._task = asyncio.create_task(self._run())
 
+    async def _load_checkpoint(self) -> None:
+        if self._checkpoint_loaded or self._checkpoint_path is None:
+            return
+        self._checkpoint_loaded = True
+        try:
+            await asyncio.to_thread(
+                self.detector.load_checkpoint, self._checkpoint_path
+            )
+        except Exception as exc:  # pragma: no cover - corrupt checkpoint
+            logger.warning("Ignoring detector checkpoint: %s", exc)
+
     async def stop(self) -> None:
         """Stop the stream processor task and clean up."""
         self._running = False
         if self._task is not None:
             self._task.cancel()
-            with contextlib.suppress(Exception):
+            with contextlib.suppress(asyncio.CancelledError, Exception):
                 await self._task
             self._task = None
+        with contextlib.suppress(Exception):
+            await network_fingerprinting.flush_fingerprints()
+        await self.checkpoint()
+
+    async def checkpoint(self) -> None:
+        """Persist the threat detector state if a checkpoint path is set.
+
+        The state is captured on the event loop and written from a worker
+        thread. Nothing is written before the checkpoint has been loaded,
+        so an unstarted processor never overwrites it with an empty state.
+        """
+        if self._checkpoint_path is None or not self._checkpoint_loaded:
+            return
+        self._last_checkpoint = time.time()
+        try:
+            state = self.detector.to_state()
+            await asyncio.to_thread(
+                self.detector.save_checkpoint, self._checkpoint_path, state
+            )
+        except Exception as exc:  # pragma: no cover - disk errors
+            logger.warning("Failed to checkpoint detector: %s", exc)
 
     def register_listener(self) -> asyncio.Queue[dict[str, Any]]:
         """Register a new listener queue for receiving processed events.
@@ -114,9 +169,14 @@ class StreamProcessor:
         """
         self._enqueue("cellular", records)
 
-    async def _process_wifi(self, records: list[dict[str, Any]]) -> None:
+    async def _process_wifi(
+        self, records: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
         await network_fingerprinting.fingerprint_wifi_records(records)
-        await security_analyzer.analyze_wifi_records(records)
+        alerts = self.detector.process(records)
+        if alerts:
+            await persistence.save_suspicious_activities(alerts)
+        return alerts
 
     async def _run(self) -> None:
         sleep = 1.0 / self._rate_limit if self._rate_limit > 0 else 0.0
@@ -124,13 +184,16 @@ class StreamProcessor:
             event = await self._queue.get()
             source = event.get("source")
             records = event.get("records", [])
+            alerts: list[dict[str, Any]] = []
             if source == "wifi":
-                await self._process_wifi(records)
+                alerts = await self._process_wifi(records)
             self.stats[source] = self.stats.get(source, 0) + len(records)
+            self.stats["alerts"] += len(alerts)
             payload = {
                 "timestamp": time.time(),
                 "source": source,
                 "records": records,
+                "alerts": alerts,
                 "stats": self.stats,
             }
             for q in list(self._listeners):
@@ -139,8 +202,18 @@ class StreamProcessor:
                 except asyncio.QueueFull:
                     pass
             self._queue.task_done()
+            if (
+                self._checkpoint_path is not None
+                and time.time() - self._last_checkpoint >= self._checkpoint_interval
+            ):
+                await self.checkpoint()
             if sleep:
                 await asyncio.sleep(sleep)
 
 
-stream_processor = StreamProcessor()
+stream_processor = StreamProcessor(
+    checkpoint_path=os.getenv(
+        "PW_THREAT_CHECKPOINT",
+        str(Path(config.CONFIG_DIR) / "threat_detector.json"),
+    )
+)
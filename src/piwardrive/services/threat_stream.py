@@ -0,0 +1,433 @@
+"""Stateful streaming detector for suspicious Wi-Fi activity.
+
+Unlike :func:`security_analyzer.analyze_wifi_records`, which only sees a
+single scan batch, :class:`StreamingThreatDetector` keeps compact in-memory
+indexes across batches so evil twins and signal anomalies spread over many
+scans are still detected. Alerts are emitted incrementally as records arrive
+and no database rescans are required.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping
+
+from piwardrive.services.security_analyzer import _make_row
+
+SUSPICIOUS_SSID_WORDS = ("free", "wifi", "test", "default")
+SIGNAL_SPREAD_THRESHOLD = 40.0
+CHECKPOINT_VERSION = 1
+
+
+class DecayingCounter:
+    """Counter whose value decays exponentially with ``half_life`` seconds."""
+
+    __slots__ = ("half_life", "value", "updated")
+
+    def __init__(
+        self, half_life: float, value: float = 0.0, updated: float = 0.0
+    ) -> None:
+        self.half_life = half_life
+        self.value = value
+        self.updated = updated
+
+    def _decay(self, now: float) -> None:
+        if now > self.updated and self.value:
+            self.value *= math.pow(0.5, (now - self.updated) / self.half_life)
+        self.updated = max(self.updated, now)
+
+    def add(self, now: float, amount: float = 1.0) -> float:
+        """Add ``amount`` at time ``now`` and return the decayed total."""
+        self._decay(now)
+        self.value += amount
+        return self.value
+
+    def get(self, now: float) -> float:
+        """Return the decayed value at time ``now``."""
+        self._decay(now)
+        return self.value
+
+
+@dataclass
+class SignalStats:
+    """Running RSSI statistics for one BSSID (Welford's algorithm)."""
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    minimum: float = math.inf
+    maximum: float = -math.inf
+
+    def update(self, value: float) -> None:
+        """Fold ``value`` into the running statistics."""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    @property
+    def variance(self) -> float:
+        """Return the sample variance of observed values."""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def spread(self) -> float:
+        """Return ``max - min`` of observed values."""
+        return self.maximum - self.minimum if self.count else 0.0
+
+
+@dataclass
+class SsidGroup:
+    """Distinct properties observed for a single SSID."""
+
+    bssids: set[str] = field(default_factory=set)
+    encryptions: set[str | None] = field(default_factory=set)
+    vendors: set[str | None] = field(default_factory=set)
+
+    def add(self, rec: Mapping[str, Any]) -> bool:
+        """Add ``rec`` and return ``True`` if any property was new."""
+        before = (len(self.bssids), len(self.encryptions), len(self.vendors))
+        bssid = rec.get("bssid")
+        if bssid:
+            self.bssids.add(bssid)
+        self.encryptions.add(rec.get("encryption_type"))
+        self.vendors.add(rec.get("vendor_oui"))
+        return before != (len(self.bssids), len(self.encryptions), len(self.vendors))
+
+    @property
+    def is_evil_twin(self) -> bool:
+        """Return ``True`` when several APs share the SSID with differing traits."""
+        return len(self.bssids) > 1 and (
+            len(self.encryptions) > 1 or len(self.vendors) > 1
+        )
+
+    def evidence(self) -> dict[str, Any]:
+        """Return JSON serializable evidence for an alert."""
+        return {
+            "bssids": sorted(self.bssids),
+            "encryptions": list(self.encryptions),
+            "vendors": list(self.vendors),
+        }
+
+
+@dataclass
+class _BssidState:
+    seen: DecayingCounter
+    signal: SignalStats = field(default_factory=SignalStats)
+    flags: set[str] = field(default_factory=set)
+
+
+class StreamingThreatDetector:
+    """Detect suspicious Wi-Fi activity incrementally across scan batches.
+
+    The detector maintains three indexes:
+
+    * ``SSID -> {BSSIDs, encryptions, vendors}`` for evil twin detection.
+    * ``BSSID -> running min/max/variance of RSSI`` for signal anomalies.
+    * Time-decayed counters used to rate-limit repeated alerts.
+
+    Index sizes are bounded by ``max_ssids`` and ``max_bssids``; the least
+    recently seen entries are evicted first.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_ssids: int = 10000,
+        max_bssids: int = 50000,
+        half_life: float = 600.0,
+        alert_threshold: float = 0.5,
+        signal_threshold: float = SIGNAL_SPREAD_THRESHOLD,
+        suspicious_words: Iterable[str] = SUSPICIOUS_SSID_WORDS,
+        prune_interval: float = 60.0,
+    ) -> None:
+        """Initialize the detector.
+
+        Args:
+            max_ssids: Maximum number of SSIDs kept in the index.
+            max_bssids: Maximum number of BSSIDs kept in the index.
+            half_life: Half-life in seconds of the decayed counters.
+            alert_threshold: Decayed alert count at or above which repeated
+                alerts for the same target are suppressed. The default of 0.5
+                suppresses repeats for one half-life.
+            signal_threshold: RSSI spread in dBm that triggers a signal anomaly.
+            suspicious_words: Substrings that mark an SSID as suspicious.
+            prune_interval: Seconds between sweeps that drop decayed alert
+                counters.
+        """
+        self.max_ssids = max_ssids
+        self.max_bssids = max_bssids
+        self.half_life = half_life
+        self.alert_threshold = alert_threshold
+        self.signal_threshold = signal_threshold
+        self.suspicious_words = tuple(w.lower() for w in suspicious_words)
+        self.prune_interval = prune_interval
+        self._last_prune = float("-inf")
+        self._ssids: OrderedDict[str, SsidGroup] = OrderedDict()
+        self._bssids: OrderedDict[str, _BssidState] = OrderedDict()
+        self._alert_counters: Dict[str, DecayingCounter] = {}
+        self.stats: Dict[str, int] = {
+            "records": 0,
+            "alerts": 0,
+            "suppressed": 0,
+            "evicted": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+    def _ssid_group(self, ssid: str) -> SsidGroup:
+        group = self._ssids.get(ssid)
+        if group is None:
+            group = self._ssids[ssid] = SsidGroup()
+            if len(self._ssids) > self.max_ssids:
+                self._ssids.popitem(last=False)
+                self.stats["evicted"] += 1
+        else:
+            self._ssids.move_to_end(ssid)
+        return group
+
+    def _bssid_state(self, bssid: str) -> _BssidState:
+        state = self._bssids.get(bssid)
+        if state is None:
+            state = self._bssids[bssid] = _BssidState(
+                seen=DecayingCounter(self.half_life)
+            )
+            if len(self._bssids) > self.max_bssids:
+                self._bssids.popitem(last=False)
+                self.stats["evicted"] += 1
+        else:
+            self._bssids.move_to_end(bssid)
+        return state
+
+    def _should_alert(self, key: str, now: float) -> bool:
+        counter = self._alert_counters.get(key)
+        if counter is None:
+            counter = self._alert_counters[key] = DecayingCounter(self.half_life)
+        if counter.get(now) >= self.alert_threshold:
+            self.stats["suppressed"] += 1
+            return False
+        counter.add(now)
+        return True
+
+    def _prune_counters(self, now: float) -> None:
+        # Drop counters that have decayed to nothing to keep memory bounded;
+        # a full sweep per batch would cost O(counters), so it runs on a timer
+        if now - self._last_prune < self.prune_interval:
+            return
+        self._last_prune = now
+        stale = [k for k, c in self._alert_counters.items() if c.get(now) < 0.01]
+        for key in stale:
+            del self._alert_counters[key]
+
+    # ------------------------------------------------------------------
+    # Detection
+    # ------------------------------------------------------------------
+    def process(
+        self, records: Iterable[Mapping[str, Any]], now: float | None = None
+    ) -> List[dict[str, Any]]:
+        """Update the indexes with ``records`` and return new alert rows.
+
+        Args:
+            records: Wi-Fi detection records from a single scan batch.
+            now: Timestamp used for decayed counters, defaults to ``time.time()``.
+
+        Returns:
+            Rows suitable for :func:`persistence.save_suspicious_activities`.
+        """
+        now = time.time() if now is None else now
+        rows: List[dict[str, Any]] = []
+        for rec in records:
+            bssid = rec.get("bssid")
+            if not bssid:
+                continue
+            self.stats["records"] += 1
+            state = self._bssid_state(bssid)
+            state.seen.add(now)
+            ssid = rec.get("ssid") or ""
+
+            if not ssid:
+                if "hidden_ssid" not in state.flags:
+                    state.flags.add("hidden_ssid")
+                    rows.append(
+                        _make_row("hidden_ssid", rec, description="Hidden SSID detected")
+                    )
+            else:
+                group = self._ssid_group(ssid)
+                if (
+                    group.add(rec)
+                    and group.is_evil_twin
+                    and self._should_alert(f"evil_twin:{ssid}", now)
+                ):
+                    rows.append(
+                        _make_row(
+                            "evil_twin",
+                            rec,
+                            evidence=group.evidence(),
+                            description=f"Multiple APs broadcasting {ssid} with different properties",
+                        )
+                    )
+                lowered = ssid.lower()
+                if "suspicious_ssid" not in state.flags and any(
+                    word in lowered for word in self.suspicious_words
+                ):
+                    state.flags.add("suspicious_ssid")
+                    rows.append(
+                        _make_row(
+                            "suspicious_ssid",
+                            rec,
+                            evidence={"ssid": ssid},
+                            description=f"Suspicious SSID: {ssid}",
+                        )
+                    )
+
+            signal = rec.get("signal_strength_dbm")
+            if isinstance(signal, (int, float)):
+                state.signal.update(float(signal))
+                if (
+                    "signal_anomaly" not in state.flags
+                    and state.signal.spread > self.signal_threshold
+                ):
+                    state.flags.add("signal_anomaly")
+                    rows.append(
+                        _make_row(
+                            "signal_anomaly",
+                            rec,
+                            evidence={
+                                "min": state.signal.minimum,
+                                "max": state.signal.maximum,
+                                "variance": state.signal.variance,
+                                "samples": state.signal.count,
+                            },
+                            description=f"Signal variance: {state.signal.spread:g} dBm",
+                        )
+                    )
+                if (
+                    rec.get("station_count") == 0
+                    and signal > -40
+                    and self._should_alert(f"deauth_attack:{bssid}", now)
+                ):
+                    rows.append(
+                        _make_row(
+                            "deauth_attack",
+                            rec,
+                            description="Strong signal with zero clients may indicate deauth attack",
+                        )
+                    )
+
+        self._prune_counters(now)
+        self.stats["alerts"] += len(rows)
+        return rows
+
+    def signal_stats(self, bssid: str) -> SignalStats | None:
+        """Return running RSSI statistics for ``bssid`` if tracked."""
+        state = self._bssids.get(bssid)
+        return state.signal if state else None
+
+    def ssid_group(self, ssid: str) -> SsidGroup | None:
+        """Return the indexed properties for ``ssid`` if tracked."""
+        return self._ssids.get(ssid)
+
+    def activity_rate(self, bssid: str, now: float | None = None) -> float:
+        """Return the time-decayed detection count for ``bssid``."""
+        state = self._bssids.get(bssid)
+        if state is None:
+            return 0.0
+        return state.seen.get(time.time() if now is None else now)
+
+    # ------------------------------------------------------------------
+    # Checkpointing
+    # ------------------------------------------------------------------
+    def to_state(self) -> dict[str, Any]:
+        """Return a JSON serializable snapshot of the detector state."""
+        return {
+            "version": CHECKPOINT_VERSION,
+            "ssids": {
+                ssid: [sorted(g.bssids), list(g.encryptions), list(g.vendors)]
+                for ssid, g in self._ssids.items()
+            },
+            "bssids": {
+                bssid: [
+                    s.signal.count,
+                    s.signal.mean,
+                    s.signal.m2,
+                    s.signal.minimum if s.signal.count else None,
+                    s.signal.maximum if s.signal.count else None,
+                    s.seen.value,
+                    s.seen.updated,
+                    sorted(s.flags),
+                ]
+                for bssid, s in self._bssids.items()
+            },
+            "alerts": {
+                key: [c.value, c.updated] for key, c in self._alert_counters.items()
+            },
+            "stats": dict(self.stats),
+        }
+
+    def load_state(self, state: Mapping[str, Any]) -> None:
+        """Restore detector state produced by :meth:`to_state`."""
+        if state.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version: {state.get('version')}")
+        self._ssids.clear()
+        for ssid, (bssids, encs, vendors) in state.get("ssids", {}).items():
+            self._ssids[ssid] = SsidGroup(set(bssids), set(encs), set(vendors))
+        self._bssids.clear()
+        for bssid, values in state.get("bssids", {}).items():
+            count, mean, m2, lo, hi, seen, updated, flags = values
+            self._bssids[bssid] = _BssidState(
+                signal=SignalStats(
+                    count,
+                    mean,
+                    m2,
+                    math.inf if lo is None else lo,
+                    -math.inf if hi is None else hi,
+                ),
+                seen=DecayingCounter(self.half_life, seen, updated),
+                flags=set(flags),
+            )
+        self._alert_counters = {
+            key: DecayingCounter(self.half_life, value, updated)
+            for key, (value, updated) in state.get("alerts", {}).items()
+        }
+        self.stats.update(state.get("stats", {}))
+
+    def save_checkpoint(
+        self,
+        path: str | os.PathLike[str],
+        state: Mapping[str, Any] | None = None,
+    ) -> None:
+        """Atomically write the detector state to ``path``.
+
+        Pass a ``state`` taken with :meth:`to_state` to write it from another
+        thread while the detector keeps processing.
+        """
+        dest = Path(path)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_suffix(dest.suffix + ".tmp")
+        tmp.write_text(json.dumps(self.to_state() if state is None else state))
+        os.replace(tmp, dest)
+
+    def load_checkpoint(self, path: str | os.PathLike[str]) -> bool:
+        """Load state from ``path`` and return ``True`` if it existed."""
+        src = Path(path)
+        if not src.exists():
+            return False
+        self.load_state(json.loads(src.read_text()))
+        return True
+
+
+__all__ = [
+    "DecayingCounter",
+    "SignalStats",
+    "SsidGroup",
+    "StreamingThreatDetector",
+]
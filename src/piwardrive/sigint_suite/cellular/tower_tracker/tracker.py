@@ -37,5 +37,20 @@ except Exception:
         async def tower_history(self, *_a, **_k):
             return []
 
+        async def update_tower_many(self, *_a, **_k) -> None:
+            pass
+
+        async def log_tower_many(self, *_a, **_k) -> None:
+            pass
+
+        async def log_wifi_many(self, *_a, **_k) -> None:
+            pass
+
+        async def log_bluetooth_many(self, *_a, **_k) -> None:
+            pass
+
+        async def flush(self) -> int:
+            return 0
+
         async def close(self) -> None:
             pass
@@ -3,7 +3,9 @@
 from __future__ import annotations
 
 import logging
-from typing import Optional
+from typing import Any, Optional
+
+from piwardrive.obd_sampler import OBDSampler
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +15,47 @@ except Exception:  # pragma: no cover - library not available
     obd = None
 
 _OBD_CONN: "obd.OBD | None" = None
+_SAMPLER: "OBDSampler | None" = None
+
+# Samples older than this are not returned by the ``read_*_obd`` helpers.
+SAMPLE_MAX_AGE = 5.0
+
+
+def start_obd_sampler(port: Optional[str] = None, **kwargs: Any) -> OBDSampler:
+    """Start a background :class:`~piwardrive.obd_sampler.OBDSampler`.
+
+    While it runs the ``read_*_obd`` helpers return its cached values.
+    PIDs it does not sample, or whose value is stale, are queried through
+    the sampler's adapter connection.
+    """
+    global _SAMPLER
+
+    stop_obd_sampler()
+    close_obd()  # the sampler owns the serial port from now on
+    _SAMPLER = OBDSampler(port, **kwargs)
+    _SAMPLER.start()
+    return _SAMPLER
+
+
+def stop_obd_sampler() -> None:
+    """Stop the background sampler if running."""
+    global _SAMPLER
+
+    if _SAMPLER is not None:
+        _SAMPLER.stop()
+        _SAMPLER = None
+
+
+def get_obd_sampler() -> "OBDSampler | None":
+    """Return the running sampler or ``None``."""
+    return _SAMPLER
+
+
+def _sampled(name: str) -> tuple[bool, float | None]:
+    if _SAMPLER is None:
+        return False, None
+    value = _SAMPLER.latest(name, max_age=SAMPLE_MAX_AGE)
+    return value is not None, value
 
 
 def _get_conn(port: Optional[str] = None) -> "obd.OBD | None":
@@ -49,6 +92,12 @@ def close_obd() -> None:
 
 def read_speed_obd(port: Optional[str] = None) -> float | None:
     """Return vehicle speed in km/h using an OBD-II adapter."""
+    sampled, value = _sampled("speed")
+    if sampled:
+        return value
+    if _SAMPLER is not None:
+        # the sampler owns the serial port
+        return _SAMPLER.read("speed")
     conn = _get_conn(port)
     if conn is None:
         return None
@@ -62,6 +111,12 @@ def read_speed_obd(port: Optional[str] = None) -> float | None:
 
 def read_rpm_obd(port: Optional[str] = None) -> float | None:
     """Return engine RPM using an OBD-II adapter."""
+    sampled, value = _sampled("rpm")
+    if sampled:
+        return value
+    if _SAMPLER is not None:
+        # the sampler owns the serial port
+        return _SAMPLER.read("rpm")
     conn = _get_conn(port)
     if conn is None:
         return None
@@ -75,6 +130,12 @@ def read_rpm_obd(port: Optional[str] = None) -> float | None:
 
 def read_engine_load_obd(port: Optional[str] = None) -> float | None:
     """Return calculated engine load percentage via an OBD-II adapter."""
+    sampled, value = _sampled("engine_load")
+    if sampled:
+        return value
+    if _SAMPLER is not None:
+        # the sampler owns the serial port
+        return _SAMPLER.read("engine_load")
     conn = _get_conn(port)
     if conn is None:
         return None
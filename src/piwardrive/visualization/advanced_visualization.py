@@ -24,7 +24,7 @@ from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 # Visualization libraries
 import matplotlib.pyplot as plt
@@ -33,6 +33,8 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+from .timeline import EventIndex
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -186,30 +188,63 @@ class TimelineController:
     """Timeline control for temporal visualization"""
 
     def __init__(self):
-        self.events: List[TimelineEvent] = []
+        self._index: EventIndex[TimelineEvent] = EventIndex()
+        self._cursor: Optional[datetime] = None
         self.current_time: Optional[datetime] = None
         self.playback_speed = 1.0
         self.is_playing = False
         self.loop_playback = False
         self.time_range: Optional[Tuple[datetime, datetime]] = None
         self.callbacks: List[Callable] = []
+        self.event_callbacks: List[Callable] = []
+
+    @property
+    def events(self) -> List[TimelineEvent]:
+        """Timeline events in timestamp order"""
+        return self._index.events
 
     def add_event(self, event: TimelineEvent):
         """Add timeline event"""
-        self.events.append(event)
-        self.events.sort(key=lambda e: e.timestamp)
+        self._index.add(event)
+        self.time_range = self._index.bounds
 
-        # Update time range
-        if not self.time_range:
-            self.time_range = (event.timestamp, event.timestamp)
-        else:
-            start, end = self.time_range
-            self.time_range = (min(start, event.timestamp), max(end, event.timestamp))
+    def add_events(self, events: Iterable[TimelineEvent]):
+        """Add many timeline events with a single sort"""
+        self._index.extend(events)
+        self.time_range = self._index.bounds
 
     def set_current_time(self, timestamp: datetime):
         """Set current timeline position"""
         self.current_time = timestamp
+        self._cursor = timestamp
+        self._notify_callbacks()
+
+    def advance(self, timestamp: datetime) -> List[TimelineEvent]:
+        """Move the cursor forward and return the events passed on the way.
+
+        Events after the previous cursor up to and including ``timestamp``
+        are returned and handed to the event callbacks.
+        """
+        if self._cursor is not None and timestamp < self._cursor:
+            events: List[TimelineEvent] = []
+        else:
+            events = self._index.window(self._cursor, timestamp)
+        self._cursor = timestamp
+        self.current_time = timestamp
         self._notify_callbacks()
+        self._notify_event_callbacks(events)
+        return events
+
+    def replay(
+        self, step: timedelta = timedelta(seconds=1)
+    ) -> Iterator[Tuple[datetime, List[TimelineEvent]]]:
+        """Yield ``(time, events)`` over the whole range without sleeping"""
+        if not self.time_range:
+            return
+        start, end = self.time_range
+        count = math.ceil((end - start) / step)
+        cursors = (min(start + step * i, end) for i in range(count + 1))
+        yield from self._index.iter_windows(cursors)
 
     def play(self):
         """Start timeline playback"""
@@ -225,6 +260,7 @@ class TimelineController:
         self.is_playing = False
         if self.time_range:
             self.current_time = self.time_range[0]
+            self._cursor = None
             self._notify_callbacks()
 
     def seek(self, position: float):
@@ -234,23 +270,29 @@ class TimelineController:
             duration = (end - start).total_seconds()
             offset = duration * position
             self.current_time = start + timedelta(seconds=offset)
+            self._cursor = self.current_time
             self._notify_callbacks()
 
     def get_events_at_time(
         self, timestamp: datetime, window: timedelta = timedelta(seconds=1)
     ) -> List[TimelineEvent]:
         """Get events within time window"""
-        return [
-            event
-            for event in self.events
-            if abs((event.timestamp - timestamp).total_seconds())
-            <= window.total_seconds()
-        ]
+        return self._index.between(timestamp - window, timestamp + window)
+
+    def get_events_between(
+        self, start: datetime, end: datetime
+    ) -> List[TimelineEvent]:
+        """Get events from ``start`` to ``end`` inclusive"""
+        return self._index.between(start, end)
 
     def add_callback(self, callback: Callable):
         """Add timeline callback"""
         self.callbacks.append(callback)
 
+    def add_event_callback(self, callback: Callable):
+        """Add callback receiving ``(current_time, events)`` during playback"""
+        self.event_callbacks.append(callback)
+
     def _notify_callbacks(self):
         """Notify timeline callbacks"""
         for callback in self.callbacks:
@@ -259,6 +301,14 @@ class TimelineController:
             except Exception as e:
                 logger.error(f"Timeline callback error: {e}")
 
+    def _notify_event_callbacks(self, events: List[TimelineEvent]):
+        """Notify event callbacks of the events in the last window"""
+        for callback in self.event_callbacks:
+            try:
+                callback(self.current_time, events)
+            except Exception as e:
+                logger.error(f"Timeline event callback error: {e}")
+
     def _start_playback_thread(self):
         """Start playback thread"""
 
@@ -268,17 +318,20 @@ class TimelineController:
                     self.current_time = self.time_range[0]
 
                 # Advance time
-                self.current_time += timedelta(seconds=self.playback_speed)
+                next_time = self.current_time + timedelta(seconds=self.playback_speed)
 
                 # Check bounds
-                if self.current_time > self.time_range[1]:
+                if next_time > self.time_range[1]:
                     if self.loop_playback:
-                        self.current_time = self.time_range[0]
+                        self.advance(self.time_range[1])
+                        self._cursor = None
+                        next_time = self.time_range[0]
                     else:
+                        self.advance(self.time_range[1])
                         self.is_playing = False
                         break
 
-                self._notify_callbacks()
+                self.advance(next_time)
                 time.sleep(0.1)  # Update rate
 
         thread = threading.Thread(target=playback_loop)
@@ -611,8 +664,7 @@ class AdvancedVisualizationEngine:
     ) -> go.Figure:
         """Create temporal visualization"""
         # Add events to timeline controller
-        for event in events:
-            self.timeline_controller.add_event(event)
+        self.timeline_controller.add_events(events)
 
         fig = go.Figure()
 
@@ -0,0 +1,137 @@
+"""Time-ordered event index for timeline playback.
+
+:class:`EventIndex` keeps events sorted by timestamp next to a parallel list
+of keys. Inserts use binary search and in-order appends are O(1). Bulk loads
+sort once. Interval queries and playback windows bisect the key list, so
+they cost O(log n + k) for k returned events.
+"""
+
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
+from typing import (
+    Any,
+    Callable,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+
+class EventIndex(Generic[T]):
+    """Events kept in timestamp order for range and window queries."""
+
+    def __init__(
+        self,
+        events: Iterable[T] = (),
+        key: Callable[[T], Any] = attrgetter("timestamp"),
+    ) -> None:
+        """Initialize the index.
+
+        Args:
+            events: Initial events in any order.
+            key: Returns the sort timestamp of an event.
+        """
+        self._key = key
+        self._events: List[T] = []
+        self._keys: List[Any] = []
+        self._lock = threading.Lock()
+        self.extend(events)
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._events)
+
+    @property
+    def events(self) -> List[T]:
+        """The events in timestamp order; do not modify."""
+        return self._events
+
+    @property
+    def bounds(self) -> Optional[Tuple[Any, Any]]:
+        """``(first, last)`` timestamp, or ``None`` when empty."""
+        if not self._keys:
+            return None
+        return self._keys[0], self._keys[-1]
+
+    def add(self, event: T) -> None:
+        """Insert ``event`` after any events with the same timestamp."""
+        ts = self._key(event)
+        with self._lock:
+            if not self._keys or ts >= self._keys[-1]:
+                self._keys.append(ts)
+                self._events.append(event)
+                return
+            pos = bisect_right(self._keys, ts)
+            self._keys.insert(pos, ts)
+            self._events.insert(pos, event)
+
+    def extend(self, events: Iterable[T]) -> None:
+        """Insert many events with a single sort.
+
+        Sorting is stable and nearly linear when ``events`` are already in
+        order, as captures usually are.
+        """
+        new = list(events)
+        if not new:
+            return
+        with self._lock:
+            merged = self._events + new
+            merged.sort(key=self._key)
+            self._events = merged
+            self._keys = [self._key(e) for e in merged]
+
+    def clear(self) -> None:
+        """Remove all events."""
+        with self._lock:
+            self._events = []
+            self._keys = []
+
+    def between(self, start: Any, end: Any) -> List[T]:
+        """Return events with ``start <= timestamp <= end``."""
+        with self._lock:
+            lo = bisect_left(self._keys, start)
+            hi = bisect_right(self._keys, end)
+            return self._events[lo:hi]
+
+    def window(self, after: Optional[Any], until: Any) -> List[T]:
+        """Return events with ``after < timestamp <= until``.
+
+        ``after=None`` starts at the first event. This is the half-open
+        window between two playback cursors, so consecutive windows never
+        repeat or skip an event.
+        """
+        with self._lock:
+            lo = 0 if after is None else bisect_right(self._keys, after)
+            hi = bisect_right(self._keys, until)
+            return self._events[lo:hi] if hi > lo else []
+
+    def iter_windows(
+        self, cursors: Iterable[Any], after: Optional[Any] = None
+    ) -> Iterator[Tuple[Any, List[T]]]:
+        """Yield ``(cursor, events)`` for each successive playback cursor.
+
+        Each batch holds the events since the previous cursor, starting
+        after ``after``. A cursor that moves backwards yields an empty batch
+        and restarts the window there.
+        """
+        for cursor in cursors:
+            if after is not None and cursor < after:
+                batch: List[T] = []
+            else:
+                batch = self.window(after, cursor)
+            after = cursor
+            yield cursor, batch
+
+
+__all__ = ["EventIndex"]
@@ -0,0 +1,330 @@
+"""Shared data layer for dashboard widgets.
+
+Widgets declare the datasets they display through a ``data_dependencies``
+mapping of dataset name to the maximum acceptable age in seconds and receive
+results via ``on_data(name, value)``. A :class:`WidgetDataHub` refreshes each
+dataset once per period no matter how many widgets subscribe to it, and
+concurrent refresh requests share a single in-flight query.
+
+Datasets with a ``watermark`` field are refreshed incrementally: only rows at
+or after the largest value seen so far are fetched and merged into the cached
+rows by ``key``. Rows sharing the watermark are fetched again rather than
+missed when they are written after a refresh. A full reload runs every
+``full_every`` refreshes to pick up deletions.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+Loader = Callable[..., Awaitable[Any]]
+Subscriber = Callable[[Any], Any]
+
+
+@dataclass
+class Dataset:
+    """Definition of a shared widget dataset.
+
+    Attributes:
+        name: Name widgets use in ``data_dependencies``.
+        loader: Coroutine function returning the dataset. Incremental
+            datasets are called with the current watermark, or ``None``
+            for a full load, and return rows at or after it.
+        interval: Default refresh period in seconds.
+        watermark: Row field used for incremental loading.
+        key: Row field identifying a row when merging incremental results.
+        full_every: Number of refreshes between full reloads.
+    """
+
+    name: str
+    loader: Loader
+    interval: float
+    watermark: Optional[str] = None
+    key: Optional[str] = None
+    full_every: int = 10
+
+
+@dataclass
+class DatasetCost:
+    """Running cost figures for a dataset."""
+
+    refreshes: int = 0
+    full_loads: int = 0
+    delta_loads: int = 0
+    errors: int = 0
+    rows_fetched: int = 0
+    total_time: float = 0.0
+    last_time: float = 0.0
+    last_refresh: float = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        """Return the cost figures with the mean refresh time."""
+        return {
+            "refreshes": self.refreshes,
+            "full_loads": self.full_loads,
+            "delta_loads": self.delta_loads,
+            "errors": self.errors,
+            "rows_fetched": self.rows_fetched,
+            "total_time": self.total_time,
+            "last_time": self.last_time,
+            "avg_time": self.total_time / self.refreshes if self.refreshes else 0.0,
+            "last_refresh": self.last_refresh,
+        }
+
+
+@dataclass
+class _State:
+    dataset: Dataset
+    value: Any = None
+    rows: Dict[Any, Dict[str, Any]] = field(default_factory=dict)
+    mark: Any = None
+    loaded_at: float = 0.0
+    since_full: int = 0
+    inflight: Optional[asyncio.Future[Any]] = None
+    subscribers: Dict[int, tuple[Subscriber, float]] = field(default_factory=dict)
+    cost: DatasetCost = field(default_factory=DatasetCost)
+
+
+class WidgetDataHub:
+    """Refresh shared datasets once and push results to subscribed widgets."""
+
+    def __init__(self) -> None:
+        """Initialize an empty hub."""
+        self._states: Dict[str, _State] = {}
+        self._next_id = 0
+        self._scheduler: Any = None
+        self._intervals: Dict[str, float] = {}
+
+    # ------------------------------------------------------------------
+    # Registration
+    def register(self, dataset: Dataset) -> None:
+        """Add ``dataset`` to the hub, replacing one with the same name."""
+        old = self._states.get(dataset.name)
+        state = _State(dataset)
+        if old is not None:
+            state.subscribers = old.subscribers
+        self._states[dataset.name] = state
+
+    def datasets(self) -> List[str]:
+        """Return the names of registered datasets."""
+        return list(self._states)
+
+    def subscribe(
+        self, name: str, callback: Subscriber, max_age: float | None = None
+    ) -> Callable[[], None]:
+        """Call ``callback`` with every refresh of ``name``.
+
+        Args:
+            name: Registered dataset name.
+            callback: Function receiving the dataset value.
+            max_age: Freshness required by the subscriber. The dataset is
+                refreshed at least this often.
+
+        Returns:
+            Function removing the subscription.
+        """
+        state = self._state(name)
+        sub_id = self._next_id
+        self._next_id += 1
+        state.subscribers[sub_id] = (callback, max_age or state.dataset.interval)
+        if state.loaded_at:
+            self._deliver(callback, state.value)
+        self._reschedule(name)
+
+        def _unsubscribe() -> None:
+            if state.subscribers.pop(sub_id, None) is not None:
+                self._reschedule(name)
+
+        return _unsubscribe
+
+    def interval(self, name: str) -> float:
+        """Return the refresh period satisfying all subscribers of ``name``."""
+        state = self._state(name)
+        ages = [age for _, age in state.subscribers.values()]
+        return min([state.dataset.interval, *ages])
+
+    # ------------------------------------------------------------------
+    # Refreshing
+    def get(self, name: str) -> Any:
+        """Return the last value loaded for ``name`` or ``None``."""
+        return self._state(name).value
+
+    async def fetch(self, name: str, max_age: float | None = None) -> Any:
+        """Return ``name`` refreshing it first if older than ``max_age``."""
+        state = self._state(name)
+        age = time.time() - state.loaded_at
+        if state.loaded_at and age <= (max_age or self.interval(name)):
+            return state.value
+        return await self.refresh(name)
+
+    async def refresh(self, name: str) -> Any:
+        """Reload ``name`` once and notify subscribers.
+
+        Calls made while a refresh of the same dataset is running wait for
+        that refresh instead of issuing another query.
+        """
+        state = self._state(name)
+        if state.inflight is not None:
+            return await asyncio.shield(state.inflight)
+        loop = asyncio.get_running_loop()
+        state.inflight = loop.create_future()
+        try:
+            value = await self._load(state)
+        except Exception as exc:
+            state.cost.errors += 1
+            state.inflight.set_exception(exc)
+            # mark retrieved so waiters are optional
+            state.inflight.exception()
+            raise
+        else:
+            state.inflight.set_result(value)
+        finally:
+            state.inflight = None
+        for callback, _ in list(state.subscribers.values()):
+            self._deliver(callback, value)
+        return value
+
+    async def _load(self, state: _State) -> Any:
+        ds = state.dataset
+        cost = state.cost
+        incremental = (
+            ds.watermark is not None
+            and state.mark is not None
+            and state.since_full < ds.full_every
+        )
+        start = time.perf_counter()
+        if ds.watermark is None:
+            value = await ds.loader()
+            cost.rows_fetched += len(value) if hasattr(value, "__len__") else 1
+        else:
+            rows = await ds.loader(state.mark if incremental else None)
+            cost.rows_fetched += len(rows)
+            if not incremental:
+                state.rows.clear()
+                state.since_full = 0
+            self._merge(state, rows)
+            value = list(state.rows.values())
+        elapsed = time.perf_counter() - start
+        cost.refreshes += 1
+        if incremental:
+            cost.delta_loads += 1
+            state.since_full += 1
+        else:
+            cost.full_loads += 1
+        cost.total_time += elapsed
+        cost.last_time = elapsed
+        state.loaded_at = cost.last_refresh = time.time()
+        state.value = value
+        return value
+
+    @staticmethod
+    def _merge(state: _State, rows: List[Dict[str, Any]]) -> None:
+        ds = state.dataset
+        for i, row in enumerate(rows):
+            key = row.get(ds.key) if ds.key else (state.mark, i)
+            state.rows.pop(key, None)
+            state.rows[key] = row
+            mark = row.get(ds.watermark)  # type: ignore[arg-type]
+            if mark is not None and (state.mark is None or mark > state.mark):
+                state.mark = mark
+
+    @staticmethod
+    def _deliver(callback: Subscriber, value: Any) -> None:
+        try:
+            result = callback(value)
+            if inspect.isawaitable(result):
+                asyncio.ensure_future(result)
+        except Exception as exc:  # pragma: no cover - widget failures
+            logging.exception("Widget data subscriber failed: %s", exc)
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    def attach(self, scheduler: Any) -> None:
+        """Refresh subscribed datasets using ``scheduler.schedule``."""
+        if scheduler is not self._scheduler:
+            self._scheduler = scheduler
+            self._intervals.clear()
+        for name in self._states:
+            self._reschedule(name)
+
+    def _reschedule(self, name: str) -> None:
+        if self._scheduler is None:
+            return
+        task = f"widget-data:{name}"
+        if not self._states[name].subscribers:
+            self._intervals.pop(name, None)
+            self._scheduler.cancel(task)
+            return
+        interval = self.interval(name)
+        if (
+            self._intervals.get(name) == interval
+            and task in self._scheduler.get_metrics()
+        ):
+            return
+        self._intervals[name] = interval
+        self._scheduler.schedule(task, lambda _dt: self.refresh(name), interval)
+
+    def _state(self, name: str) -> _State:
+        try:
+            return self._states[name]
+        except KeyError:
+            raise KeyError(f"Unknown widget dataset: {name}") from None
+
+    # ------------------------------------------------------------------
+    # Metrics
+    def costs(self) -> Dict[str, Dict[str, float]]:
+        """Return per-dataset refresh cost and subscriber figures."""
+        result: Dict[str, Dict[str, float]] = {}
+        for name, state in self._states.items():
+            figures = state.cost.as_dict()
+            figures["subscribers"] = len(state.subscribers)
+            figures["interval"] = self.interval(name)
+            figures["cached_rows"] = len(state.rows)
+            result[name] = figures
+        return result
+
+
+async def _load_ap_cache(after: float | None = None) -> List[Dict[str, Any]]:
+    from piwardrive import persistence
+
+    return await persistence.load_ap_cache(after, inclusive=True)
+
+
+async def _load_table_counts() -> Dict[str, int]:
+    from piwardrive import persistence
+
+    return await persistence.get_table_counts()
+
+
+async def _load_recent_health() -> List[Any]:
+    from piwardrive import persistence
+
+    return await persistence.load_recent_health(RECENT_HEALTH_LIMIT)
+
+
+RECENT_HEALTH_LIMIT = 100
+
+DEFAULT_DATASETS = (
+    Dataset("ap_cache", _load_ap_cache, 60.0, watermark="last_time", key="bssid"),
+    Dataset("table_counts", _load_table_counts, 10.0),
+    Dataset("recent_health", _load_recent_health, 30.0),
+)
+
+data_hub = WidgetDataHub()
+for _dataset in DEFAULT_DATASETS:
+    data_hub.register(_dataset)
+
+
+__all__ = [
+    "Dataset",
+    "DatasetCost",
+    "WidgetDataHub",
+    "DEFAULT_DATASETS",
+    "RECENT_HEALTH_LIMIT",
+    "data_hub",
+]
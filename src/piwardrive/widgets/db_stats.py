@@ -9,17 +9,14 @@ from piwardrive.localization import _
 from piwardrive.simpleui import Card as MDCard
 from piwardrive.simpleui import Label as MDLabel
 from piwardrive.simpleui import dp
+from piwardrive.widget_data import data_hub
 
 from .base import DashboardWidget
 
 try:  # pragma: no cover - optional dependency
-    from piwardrive.persistence import _db_path, get_table_counts
+    from piwardrive.persistence import _db_path
 except Exception:  # pragma: no cover - fallbacks for tests without deps
 
-    async def get_table_counts() -> dict[str, int]:
-        """Return an empty table-count mapping when persistence is missing."""
-        return {}
-
     def _db_path() -> str:
         return ""
 
@@ -52,6 +49,7 @@ class DBStatsWidget(DashboardWidget):
     """Show row counts for each table and the DB file size."""
 
     update_interval = 10.0
+    data_dependencies = {"table_counts": 10.0}
 
     def __init__(self, **kwargs: Any) -> None:
         """Create the widget and schedule the first update."""
@@ -62,19 +60,22 @@ class DBStatsWidget(DashboardWidget):
         self.add_widget(self.card)
         self.update()
 
+    def on_data(self, _name: str, counts: dict[str, int]) -> None:
+        """Show ``counts`` from the shared ``table_counts`` dataset."""
+        try:
+            size = os.path.getsize(_db_path()) / 1024
+            parts = [f"{name}:{cnt}" for name, cnt in counts.items()]
+            stats = " ".join(parts)
+            self.label.text = f"{_('db')}: {size:.1f}KB {stats}"
+        except Exception as exc:
+            logging.exception("DBStatsWidget update failed: %s", exc)
+
     def update(self) -> None:
         """Refresh table counts and DB file size."""
-
-        def _apply(counts: dict[str, int]) -> None:
-            try:
-                size = os.path.getsize(_db_path()) / 1024
-                parts = [f"{name}:{cnt}" for name, cnt in counts.items()]
-                stats = " ".join(parts)
-                self.label.text = f"{_('db')}: {size:.1f}KB {stats}"
-            except Exception as exc:
-                logging.exception("DBStatsWidget update failed: %s", exc)
-
         try:
-            run_async_task(get_table_counts(), _apply)
+            run_async_task(
+                data_hub.fetch("table_counts"),
+                lambda counts: self.on_data("table_counts", counts),
+            )
         except Exception as exc:  # pragma: no cover - UI update
             logging.exception("DBStatsWidget schedule failed: %s", exc)
@@ -8,12 +8,12 @@ from typing import Any
 
 from piwardrive.heatmap import histogram, save_png
 from piwardrive.localization import _
-from piwardrive.persistence import load_ap_cache
 from piwardrive.simpleui import Card as MDCard
 from piwardrive.simpleui import Image
 from piwardrive.simpleui import Label as MDLabel
 from piwardrive.simpleui import dp
 from piwardrive.utils import run_async_task
+from piwardrive.widget_data import data_hub
 
 from .base import DashboardWidget
 
@@ -22,6 +22,7 @@ class HeatmapWidget(DashboardWidget):
     """Render a simple heatmap of discovered access points."""
 
     update_interval = 60.0
+    data_dependencies = {"ap_cache": 60.0}
 
     def __init__(self, bins: int = 40, **kwargs: Any) -> None:
         super().__init__(**kwargs)
@@ -36,24 +37,26 @@ class HeatmapWidget(DashboardWidget):
         self._event = f"heatmap_{id(self)}"
         self.update()
 
+    def on_data(self, _name: str, records: list[dict[str, Any]]) -> None:
+        """Render ``records`` from the shared ``ap_cache`` dataset."""
+        try:
+            points = [
+                (r["lat"], r["lon"])
+                for r in records
+                if r.get("lat") is not None and r.get("lon") is not None
+            ]
+            hist, lat_r, lon_r = histogram(points, bins=self.bins)
+            save_png(hist, self._tmp.name)
+            self.image.source = self._tmp.name
+            self.image.reload()
+            self.label.text = (
+                _("heatmap") + f" (cells {len(hist)}x{len(hist[0]) if hist else 0})"
+            )
+        except Exception as exc:
+            logging.exception("HeatmapWidget update failed: %s", exc)
+
     def update(self) -> None:  # pragma: no cover - GUI updates
         """Load AP coordinates and refresh the heatmap."""
-
-        def _apply(records: list[dict[str, Any]]) -> None:
-            try:
-                points = [
-                    (r["lat"], r["lon"])
-                    for r in records
-                    if r.get("lat") is not None and r.get("lon") is not None
-                ]
-                hist, lat_r, lon_r = histogram(points, bins=self.bins)
-                save_png(hist, self._tmp.name)
-                self.image.source = self._tmp.name
-                self.image.reload()
-                self.label.text = (
-                    _("heatmap") + f" (cells {len(hist)}x{len(hist[0]) if hist else 0})"
-                )
-            except Exception as exc:
-                logging.exception("HeatmapWidget update failed: %s", exc)
-
-        run_async_task(load_ap_cache(), _apply)
+        run_async_task(
+            data_hub.fetch("ap_cache"), lambda rows: self.on_data("ap_cache", rows)
+        )
@@ -209,3 +209,6 @@ async def sync_database_to_server(
                     raise
                 await asyncio.sleep(delay)
                 delay *= 2
+
+
+from .delta import get_delta_metrics, sync_deltas  # noqa: E402
@@ -0,0 +1,518 @@
+"""Resumable, compressed delta sync of local tables to an aggregation server.
+
+Rows are synced per table using a watermark stored in a small JSON state
+file. Append-only tables use their rowid. Tables rewritten in place, such as
+``ap_cache`` which is deleted and re-inserted on every save, use a timestamp
+column instead and are upserted by key on the server. New rows are read in
+batches, encoded column by column
+(msgpack when available, JSON otherwise), compressed with zstd or zlib and
+uploaded to ``<url>/sync/<upload_id>`` in fixed-size chunks. Each chunk
+carries its own SHA-256 and the server only accepts a chunk at the offset it
+has already received, so an interrupted upload resumes where it stopped
+instead of starting over. Complete batches are merged by the server's ingest
+workers and polled until done; watermarks advance only after the server
+confirms that the whole batch has been merged.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+import zlib
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+import aiohttp
+import aiosqlite
+
+try:  # pragma: no cover - optional dependency
+    import msgpack
+except Exception:  # pragma: no cover - msgpack missing
+    msgpack = None
+
+try:  # pragma: no cover - optional dependency
+    import zstandard
+except Exception:  # pragma: no cover - zstandard missing
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+SYNC_TABLES: Tuple[str, ...] = (
+    "health_records",
+    "ap_cache",
+    "wifi_detections",
+    "bluetooth_detections",
+    "cellular_detections",
+    "gps_tracks",
+)
+# table -> (key column, timestamp column) for tables rewritten in place
+KEYED_TABLES: Dict[str, Tuple[str, str]] = {"ap_cache": ("bssid", "last_time")}
+FORMAT_VERSION = 1
+CHUNK_SIZE = int(os.getenv("PW_SYNC_CHUNK_SIZE", str(256 * 1024)))
+BATCH_ROWS = int(os.getenv("PW_SYNC_BATCH_ROWS", "5000"))
+DEFAULT_TIMEOUT = 30
+DEFAULT_RETRIES = 3
+INITIAL_RETRY_DELAY = 1.0
+MERGE_POLL_INTERVAL = 0.2
+
+_METRICS: Dict[str, Any] = {
+    "batches": 0,
+    "rows": 0,
+    "raw_bytes": 0,
+    "encoded_bytes": 0,
+    "bytes_sent": 0,
+    "resumed_bytes": 0,
+    "chunk_retries": 0,
+    "bytes_per_sec": float("nan"),
+    "compression_ratio": float("nan"),
+    "last_success": None,
+    "lag_rows": {},
+}
+
+
+def get_delta_metrics() -> Dict[str, Any]:
+    """Return throughput, compression and lag figures of the delta sync.
+
+    ``lag_rows`` maps each table to the rows not yet synced as of the last
+    run and ``lag_seconds`` is the time since the last completed sync.
+    """
+    metrics = dict(_METRICS)
+    metrics["lag_rows"] = dict(_METRICS["lag_rows"])
+    last = _METRICS["last_success"]
+    metrics["lag_seconds"] = time.time() - last if last else float("nan")
+    return metrics
+
+
+def reset_delta_metrics() -> None:
+    """Reset all delta sync metrics."""
+    for key in ("batches", "rows", "raw_bytes", "encoded_bytes", "bytes_sent"):
+        _METRICS[key] = 0
+    _METRICS["resumed_bytes"] = _METRICS["chunk_retries"] = 0
+    _METRICS["bytes_per_sec"] = _METRICS["compression_ratio"] = float("nan")
+    _METRICS["last_success"] = None
+    _METRICS["lag_rows"] = {}
+
+
+# ----------------------------------------------------------------------
+# Codec
+def encode_batch(
+    unit: str, blocks: Sequence[Mapping[str, Any]], compression: str | None = None
+) -> Tuple[bytes, str, int]:
+    """Encode table ``blocks`` from ``unit``.
+
+    Args:
+        unit: Identifier of the sending unit.
+        blocks: Columnar blocks with ``table``, ``columns``, ``rowids`` and
+            ``data`` (one list per column) keys.
+        compression: ``zstd``, ``zlib`` or ``None`` for the best available.
+
+    Returns:
+        Encoded bytes, the encoding label (``<format>+<compression>``) and the
+        uncompressed size.
+    """
+    payload = {"v": FORMAT_VERSION, "unit": unit, "tables": list(blocks)}
+    if msgpack is not None:
+        raw = msgpack.packb(payload, use_bin_type=True, default=str)
+        fmt = "msgpack"
+    else:
+        raw = json.dumps(payload, default=str, separators=(",", ":")).encode()
+        fmt = "json"
+    if compression is None:
+        compression = "zstd" if zstandard is not None else "zlib"
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required for zstd compression")
+        data = zstandard.ZstdCompressor(level=9).compress(raw)
+    elif compression == "zlib":
+        data = zlib.compress(raw, 6)
+    else:
+        raise ValueError(f"Unknown compression: {compression}")
+    return data, f"{fmt}+{compression}", len(raw)
+
+
+class PayloadTooLarge(ValueError):
+    """Raised when a sync payload decompresses beyond the allowed size."""
+
+
+def _decompress(data: bytes, compression: str, max_size: int | None) -> bytes:
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required for zstd compression")
+        dctx = zstandard.ZstdDecompressor()
+        if max_size is None:
+            return dctx.decompress(data)
+        with dctx.stream_reader(data) as reader:
+            raw = reader.read(max_size + 1)
+    elif compression == "zlib":
+        if max_size is None:
+            return zlib.decompress(data)
+        dobj = zlib.decompressobj()
+        raw = dobj.decompress(data, max_size + 1)
+        if not dobj.eof and len(raw) <= max_size:
+            raise zlib.error("incomplete or truncated stream")
+    else:
+        raise ValueError(f"Unknown compression: {compression}")
+    if len(raw) > max_size:
+        raise PayloadTooLarge(f"payload exceeds {max_size} bytes when decompressed")
+    return raw
+
+
+def decode_batch(
+    data: bytes, encoding: str, max_size: int | None = None
+) -> Dict[str, Any]:
+    """Decode bytes produced by :func:`encode_batch`.
+
+    Args:
+        data: Encoded payload.
+        encoding: Encoding label returned by :func:`encode_batch`.
+        max_size: Largest accepted decompressed size in bytes. Decompression
+            stops there and :class:`PayloadTooLarge` is raised.
+    """
+    fmt, _, compression = encoding.partition("+")
+    raw = _decompress(data, compression, max_size)
+    if fmt == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("msgpack is required for the msgpack format")
+        payload = msgpack.unpackb(raw, raw=False)
+    elif fmt == "json":
+        payload = json.loads(raw)
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+    if payload.get("v") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported sync format version: {payload.get('v')}")
+    return payload
+
+
+# ----------------------------------------------------------------------
+# State
+def _load_delta_state(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            state = json.load(fh)
+    except (OSError, ValueError):
+        state = {}
+    if not isinstance(state, dict):
+        state = {}
+    state.setdefault("watermarks", {})
+    state.setdefault("pending", None)
+    return state
+
+
+def _save_delta_state(path: str, state: Mapping[str, Any]) -> None:
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(state, fh)
+        os.replace(tmp, path)
+    except OSError as exc:  # pragma: no cover - write errors
+        logger.exception("Failed to write %s: %s", path, exc)
+
+
+# ----------------------------------------------------------------------
+# Reading deltas
+async def _existing_tables(
+    db: aiosqlite.Connection, tables: Sequence[str]
+) -> List[str]:
+    cur = await db.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    names = {row[0] for row in await cur.fetchall()}
+    return [t for t in tables if t in names]
+
+
+async def _columns(db: aiosqlite.Connection, table: str) -> List[str]:
+    cur = await db.execute(f"PRAGMA table_info({table})")
+    info = await cur.fetchall()
+    pk = [row for row in info if row[5]]
+    alias = None
+    if len(pk) == 1 and str(pk[0][2]).upper() == "INTEGER":
+        alias = pk[0][1]  # INTEGER PRIMARY KEY is the rowid itself
+    return [row[1] for row in info if row[1] != alias]
+
+
+def _range_clause(table: str) -> str:
+    """Return the ``WHERE`` clause selecting one range of ``table``.
+
+    Rowid ranges are inclusive ``[first, last]``; timestamp ranges of
+    :data:`KEYED_TABLES` are ``(after, until]``.
+    """
+    if table in KEYED_TABLES:
+        column = KEYED_TABLES[table][1]
+        return f'"{column}" > ? AND "{column}" <= ?'
+    return "rowid BETWEEN ? AND ?"
+
+
+def _watermark_column(table: str) -> str:
+    if table in KEYED_TABLES:
+        return f'"{KEYED_TABLES[table][1]}"'
+    return "rowid"
+
+
+async def _next_ranges(
+    db: aiosqlite.Connection,
+    tables: Sequence[str],
+    watermarks: Mapping[str, Any],
+    batch_rows: int,
+) -> Dict[str, List[Any]]:
+    ranges: Dict[str, List[Any]] = {}
+    for table in tables:
+        low = watermarks.get(table, 0)
+        column = _watermark_column(table)
+        cur = await db.execute(
+            f"SELECT MAX({column}) FROM (SELECT {column} FROM {table} "
+            f"WHERE {column} > ? ORDER BY {column} LIMIT ?)",
+            (low, batch_rows),
+        )
+        row = await cur.fetchone()
+        if row and row[0] is not None:
+            if table in KEYED_TABLES:
+                # rows sharing the last timestamp all join this batch
+                ranges[table] = [low, row[0]]
+            else:
+                ranges[table] = [int(low) + 1, int(row[0])]
+    return ranges
+
+
+async def _lag(
+    db: aiosqlite.Connection, tables: Sequence[str], watermarks: Mapping[str, Any]
+) -> Dict[str, int]:
+    lag = {}
+    for table in tables:
+        column = _watermark_column(table)
+        cur = await db.execute(
+            f"SELECT COUNT(*) FROM {table} WHERE {column} > ?",
+            (watermarks.get(table, 0),),
+        )
+        lag[table] = (await cur.fetchone())[0]
+    return lag
+
+
+async def _read_blocks(
+    db: aiosqlite.Connection, ranges: Mapping[str, Sequence[Any]]
+) -> List[Dict[str, Any]]:
+    blocks = []
+    for table, (start, end) in ranges.items():
+        columns = await _columns(db, table)
+        select = ", ".join(f'"{c}"' for c in columns)
+        cur = await db.execute(
+            f"SELECT rowid, {select} FROM {table} WHERE {_range_clause(table)} "
+            f"ORDER BY {_watermark_column(table)}, rowid",
+            (start, end),
+        )
+        rows = await cur.fetchall()
+        if not rows:
+            continue
+        rowids, *data = (list(col) for col in zip(*rows))
+        blocks.append(
+            {"table": table, "columns": columns, "rowids": rowids, "data": data}
+        )
+    return blocks
+
+
+# ----------------------------------------------------------------------
+# Upload
+async def _upload_status(session: aiohttp.ClientSession, url: str) -> Dict[str, Any]:
+    async with session.get(url) as resp:
+        if resp.status == 404:
+            return {"received": 0, "complete": False}
+        resp.raise_for_status()
+        return await resp.json()
+
+
+async def _put_chunk(
+    session: aiohttp.ClientSession,
+    url: str,
+    offset: int,
+    chunk: bytes,
+    headers: Mapping[str, str],
+) -> Dict[str, Any]:
+    chunk_headers = {
+        **headers,
+        "X-Chunk-SHA256": hashlib.sha256(chunk).hexdigest(),
+        "Content-Type": "application/octet-stream",
+    }
+    async with session.put(
+        url, params={"offset": str(offset)}, data=chunk, headers=chunk_headers
+    ) as resp:
+        if resp.status == 409:  # offset mismatch; server reports its position
+            return await resp.json()
+        resp.raise_for_status()
+        return await resp.json()
+
+
+async def _upload(
+    session: aiohttp.ClientSession,
+    url: str,
+    data: bytes,
+    encoding: str,
+    digest: str,
+    *,
+    chunk_size: int,
+    retries: int,
+) -> Dict[str, Any]:
+    headers = {
+        "X-Sync-Total": str(len(data)),
+        "X-Sync-SHA256": digest,
+        "X-Sync-Encoding": encoding,
+    }
+    delay = INITIAL_RETRY_DELAY
+    failures = 0
+    status: Dict[str, Any] | None = None
+    while True:
+        try:
+            if status is None:
+                status = await _upload_status(session, url)
+                if status.get("error"):
+                    # an earlier attempt failed to merge; send the batch again
+                    status = {"received": 0, "complete": False}
+                elif status.get("received"):
+                    _METRICS["resumed_bytes"] += int(status["received"])
+            while not status.get("complete"):
+                if status.get("error"):
+                    raise RuntimeError(f"server failed to merge: {status['error']}")
+                if status.get("merging"):
+                    await asyncio.sleep(MERGE_POLL_INTERVAL)
+                    status = await _upload_status(session, url)
+                    continue
+                offset = int(status.get("received", 0))
+                if offset > len(data):
+                    raise RuntimeError("server did not complete the upload")
+                # empty once every byte arrived but the merge was refused
+                chunk = data[offset : offset + chunk_size]
+                status = await _put_chunk(session, url, offset, chunk, headers)
+                _METRICS["bytes_sent"] += len(chunk)
+            return status
+        except (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError) as exc:
+            failures += 1
+            _METRICS["chunk_retries"] += 1
+            if failures >= retries:
+                raise
+            logger.warning("Sync chunk failed (%s), resuming in %.1fs", exc, delay)
+            status = None  # ask the server where to resume
+            await asyncio.sleep(delay)
+            delay *= 2
+
+
+async def sync_deltas(
+    db_path: str,
+    url: str,
+    *,
+    state_file: str | None = None,
+    tables: Sequence[str] = SYNC_TABLES,
+    unit_id: str | None = None,
+    token: str | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    batch_rows: int = BATCH_ROWS,
+    compression: str | None = None,
+    timeout: int = DEFAULT_TIMEOUT,
+    retries: int = DEFAULT_RETRIES,
+) -> Dict[str, int]:
+    """Upload rows changed since the last sync and return counts per table.
+
+    Args:
+        db_path: Local SQLite database.
+        url: Base URL of the aggregation server.
+        state_file: JSON file holding watermarks and the pending upload.
+            Defaults to ``db_path`` suffixed with ``.sync``.
+        tables: Tables to sync; missing tables are skipped.
+        unit_id: Identifier of this unit. Defaults to ``PW_UNIT_ID`` or the
+            host name.
+        token: Optional bearer token.
+        chunk_size: Upload chunk size in bytes.
+        batch_rows: Maximum rows per table in one batch.
+        compression: ``zstd`` or ``zlib``; defaults to the best available.
+        timeout: Total timeout in seconds for each HTTP request.
+        retries: Attempts per batch before giving up. The partial upload is
+            kept and resumed by the next call.
+    """
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(db_path)
+    if state_file is None:
+        state_file = db_path + ".sync"
+    unit = unit_id or os.getenv("PW_UNIT_ID") or socket.gethostname()
+    base = url.rstrip("/")
+    state = _load_delta_state(state_file)
+    watermarks: Dict[str, Any] = state["watermarks"]
+    synced: Dict[str, int] = {}
+    headers = {"Authorization": f"Bearer {token}"} if token else None
+
+    timeout_cfg = aiohttp.ClientTimeout(total=timeout)
+    async with (
+        aiosqlite.connect(db_path) as db,
+        aiohttp.ClientSession(timeout=timeout_cfg, headers=headers) as session,
+    ):
+        present = await _existing_tables(db, tables)
+        while True:
+            pending = state["pending"]
+            if pending is not None:
+                ranges = {t: r for t, r in pending["ranges"].items() if t in present}
+            else:
+                ranges = await _next_ranges(db, present, watermarks, batch_rows)
+            if not ranges:
+                break
+            blocks = await _read_blocks(db, ranges)
+            data, encoding, raw_size = encode_batch(unit, blocks, compression)
+            digest = hashlib.sha256(data).hexdigest()
+            if pending is None or pending.get("sha256") != digest:
+                # rows changed since the interrupted attempt; start afresh
+                pending = {"id": uuid.uuid4().hex, "ranges": ranges, "sha256": digest}
+                state["pending"] = pending
+                _save_delta_state(state_file, state)
+
+            start = time.perf_counter()
+            await _upload(
+                session,
+                f"{base}/sync/{pending['id']}",
+                data,
+                encoding,
+                digest,
+                chunk_size=chunk_size,
+                retries=retries,
+            )
+            elapsed = time.perf_counter() - start
+
+            for block in blocks:
+                synced[block["table"]] = synced.get(block["table"], 0) + len(
+                    block["rowids"]
+                )
+                _METRICS["rows"] += len(block["rowids"])
+            for table, (_start, end) in ranges.items():
+                watermarks[table] = max(watermarks.get(table, 0), end)
+            state["pending"] = None
+            _save_delta_state(state_file, state)
+
+            _METRICS["batches"] += 1
+            _METRICS["raw_bytes"] += raw_size
+            _METRICS["encoded_bytes"] += len(data)
+            _METRICS["compression_ratio"] = (
+                _METRICS["raw_bytes"] / _METRICS["encoded_bytes"]
+            )
+            if elapsed > 0:
+                _METRICS["bytes_per_sec"] = len(data) / elapsed
+            logger.info(
+                "Synced %d bytes (%s, %.1fx) to %s",
+                len(data),
+                encoding,
+                raw_size / max(len(data), 1),
+                base,
+            )
+        _METRICS["lag_rows"] = await _lag(db, present, watermarks)
+    _METRICS["last_success"] = time.time()
+    return synced
+
+
+__all__ = [
+    "BATCH_ROWS",
+    "CHUNK_SIZE",
+    "KEYED_TABLES",
+    "PayloadTooLarge",
+    "SYNC_TABLES",
+    "decode_batch",
+    "encode_batch",
+    "get_delta_metrics",
+    "reset_delta_metrics",
+    "sync_deltas",
+]
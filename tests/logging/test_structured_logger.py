@@ -12,6 +12,7 @@ import pytest
 
 from piwardrive.logging.structured_logger import (
     LogContext,
+    LogQueue,
     PiWardriveLogger,
     StructuredFormatter,
     _get_version,
@@ -907,3 +908,110 @@ class TestDataclassReplaceEdgeCases:
 
         finally:
             log_context.set(original_ctx)
+
+
+class TestLogQueue:
+    """Test the shared bounded log queue."""
+
+    def _record(self, level=logging.INFO, msg="m"):
+        return logging.LogRecord("q", level, "test.py", 1, msg, (), None)
+
+    def test_timestamp_matches_isoformat(self):
+        """Cached per-second timestamps match ``datetime.isoformat``."""
+        from datetime import datetime, timezone
+
+        formatter = StructuredFormatter()
+        for created in (1640995200.0, 1640995200.25, 1640995201.000123):
+            record = self._record()
+            record.created = created
+            expected = datetime.fromtimestamp(created, tz=timezone.utc).isoformat()
+            assert json.loads(formatter.format(record))["timestamp"] == expected
+
+    def test_timestamp_cache_shared_across_threads(self):
+        """Threads alternating seconds never mix a prefix with another second."""
+        import threading
+        from datetime import datetime, timezone
+
+        from piwardrive.logging.structured_logger import _TimestampCache
+
+        cache = _TimestampCache()
+        stamps = [1640995200.5 + n * 3601 for n in range(4)]
+        expected = {
+            t: datetime.fromtimestamp(t, tz=timezone.utc).isoformat() for t in stamps
+        }
+        wrong = []
+
+        def worker(offset):
+            for i in range(2000):
+                created = stamps[(i + offset) % len(stamps)]
+                if cache.format(created) != expected[created]:
+                    wrong.append(created)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert wrong == []
+
+    def test_context_captured_on_logging_thread(self):
+        """Records keep the context active where they were logged."""
+        stream = StringIO()
+        target = logging.StreamHandler(stream)
+        target.setFormatter(StructuredFormatter())
+        lq = LogQueue(maxsize=10)
+        logger = logging.getLogger("test.queue.context")
+        logger.propagate = False
+        logger.addHandler(lq.handler([target]))
+        token = log_context.set(LogContext(request_id="req-9"))
+        try:
+            logger.warning("hello %s", "world")
+        finally:
+            log_context.reset(token)
+        lq.start()
+        lq.stop()
+        logger.handlers.clear()
+
+        data = json.loads(stream.getvalue())
+        assert data["message"] == "hello world"
+        assert data["context"] == {"request_id": "req-9"}
+        assert lq.stats()["emitted"] == 1
+
+    def test_drop_policy_counts_overflow(self):
+        """Records beyond the bound are dropped and counted."""
+        lq = LogQueue(maxsize=3, policy="drop")
+        handler = lq.handler([logging.NullHandler()])
+        for _ in range(5):
+            handler.handle(self._record())
+        assert lq.stats()["dropped"] == 2
+        lq.start()
+        lq.stop()
+        assert lq.stats()["emitted"] == 3
+
+    def test_sample_policy_keeps_warnings(self):
+        """Sampling thins low severity records but keeps warnings."""
+        lq = LogQueue(maxsize=100, policy="sample", sample_every=5, high_water=0.1)
+        handler = lq.handler([])
+        for _ in range(50):
+            handler.handle(self._record(logging.DEBUG))
+        handler.handle(self._record(logging.WARNING))
+        stats = lq.stats()
+        assert stats["sampled"] == 32
+        assert stats["queued"] == 19
+
+    def test_unknown_policy(self):
+        """Unknown overload policies are rejected."""
+        with pytest.raises(ValueError):
+            LogQueue(policy="spill")
+
+    def test_loggers_use_queue_by_default(self, monkeypatch):
+        """Loggers route through the shared queue unless PW_LOG_QUEUE=0."""
+        from piwardrive.logging.structured_logger import BoundedQueueHandler
+
+        monkeypatch.delenv("PW_LOG_QUEUE", raising=False)
+        logger = PiWardriveLogger("test.queue.default", {"streams": True})
+        assert isinstance(logger.logger.handlers[0], BoundedQueueHandler)
+
+        monkeypatch.setenv("PW_LOG_QUEUE", "0")
+        logger = PiWardriveLogger("test.queue.direct", {"streams": True})
+        assert not isinstance(logger.logger.handlers[0], BoundedQueueHandler)
@@ -1,7 +1,10 @@
 import importlib
 import os
+import random
 import sqlite3
+import time
 
+import pytest
 from fastapi.testclient import TestClient
 
 
@@ -33,6 +36,16 @@ def _create_src_db(path: str) -> None:
         db.commit()
 
 
+def _wait_idle(client, timeout=10.0):
+    deadline = time.time() + timeout
+    while True:
+        data = client.get("/ingest").json()
+        if data["queued"] == 0 and data["merged"] + data["failed"] == data["accepted"]:
+            return data
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
 def test_upload_and_stats(tmp_path):
     os.environ["PW_AGG_DIR"] = str(tmp_path)
     module = importlib.import_module("piwardrive.aggregation_service")
@@ -40,19 +53,141 @@ def test_upload_and_stats(tmp_path):
     db_path = tmp_path / "upload.db"
     _create_src_db(str(db_path))
 
-    client = TestClient(module.app)
-    with open(db_path, "rb") as fh:
-        resp = client.post("/upload", files={"file": ("db", fh)})
-    assert resp.status_code == 200
+    with TestClient(module.app) as client:
+        with open(db_path, "rb") as fh:
+            resp = client.post("/upload", files={"file": ("db", fh)})
+        assert resp.status_code == 202
+        job = resp.json()["job"]
+        assert _wait_idle(client)["merged"] == 1
+        status = client.get(f"/ingest/{job}").json()
+        assert status["status"] == "merged"
+        assert status["rows"] == {"health_records": 2, "ap_points": 2}
+
+        data = client.get("/stats").json()
+        assert round(data["temp_avg"], 1) == 45.0
+        assert data["cpu_avg"] == 15.0
+        assert client.get("/stats?unit=db").json() == data
 
-    resp = client.get("/stats")
-    data = resp.json()
-    assert round(data["temp_avg"], 1) == 45.0
-    assert data["cpu_avg"] == 15.0
+        resp = client.get("/overlay?bins=1")
+        pts = resp.json()["points"]
+        assert pts and pts[0][2] == 2
 
-    resp = client.get("/overlay?bins=1")
-    pts = resp.json()["points"]
-    assert pts and pts[0][2] == 2
+
+def test_rollups_match_full_recompute(tmp_path):
+    os.environ["PW_AGG_DIR"] = str(tmp_path)
+    module = importlib.import_module("piwardrive.aggregation_service")
+    importlib.reload(module)
+    rng = random.Random(7)
+    expected = {}
+    with TestClient(module.app) as client:
+        for unit in range(6):
+            path = tmp_path / f"unit{unit}.db"
+            with sqlite3.connect(path) as db:
+                db.execute(
+                    """CREATE TABLE health_records (timestamp TEXT PRIMARY KEY,
+                    cpu_temp REAL, cpu_percent REAL, memory_percent REAL,
+                    disk_percent REAL)"""
+                )
+                db.execute("CREATE TABLE ap_cache (bssid TEXT, lat REAL, lon REAL)")
+                for n in range(20):
+                    row = (
+                        f"u{unit}-{n}",
+                        rng.choice([None, rng.uniform(30, 80)]),
+                        rng.uniform(0, 100),
+                        rng.uniform(0, 100),
+                        rng.uniform(0, 100),
+                    )
+                    db.execute("INSERT INTO health_records VALUES (?,?,?,?,?)", row)
+                    expected[row[0]] = row
+                    db.execute(
+                        "INSERT INTO ap_cache VALUES (?, ?, ?)",
+                        (f"{unit}:{n}", rng.uniform(10, 10.05), rng.uniform(20, 20.05)),
+                    )
+            for _ in range(2):  # duplicate uploads must not skew the rollups
+                with open(path, "rb") as fh:
+                    resp = client.post("/upload", files={"file": (path.name, fh)})
+                assert resp.status_code == 202
+        _wait_idle(client)
+
+        rows = list(expected.values())
+        temps = [r[1] for r in rows if r[1] is not None]
+        data = client.get("/stats").json()
+        assert data["count"] == len(rows)
+        assert abs(data["temp_avg"] - sum(temps) / len(temps)) < 1e-9
+        assert abs(data["disk_avg"] - sum(r[4] for r in rows) / len(rows)) < 1e-9
+        assert client.get("/stats?unit=unit3").json()["count"] == 20
+        assert client.get("/stats?unit=missing").json() == {}
+
+        # duplicate uploads count each access point once
+        pts = client.get("/overlay?bins=1").json()["points"]
+        assert sum(p[2] for p in pts) == 6 * 20
+        pts = client.get("/overlay?bins=4&unit=unit0").json()["points"]
+        assert sum(p[2] for p in pts) == 20
+
+
+def test_health_deduped_per_unit(tmp_path):
+    os.environ["PW_AGG_DIR"] = str(tmp_path)
+    module = importlib.import_module("piwardrive.aggregation_service")
+    importlib.reload(module)
+    db_path = tmp_path / "upload.db"
+    _create_src_db(str(db_path))
+
+    with TestClient(module.app) as client:
+        # both units sampled at t1 and t2; each unit's rows count once
+        for unit in ("pi-a", "pi-b", "pi-a"):
+            with open(db_path, "rb") as fh:
+                resp = client.post(
+                    f"/upload?unit={unit}", files={"file": ("upload.db", fh)}
+                )
+            assert resp.status_code == 202
+        _wait_idle(client)
+        assert client.get("/stats").json()["count"] == 4
+        assert client.get("/stats?unit=pi-a").json()["count"] == 2
+        assert client.get("/stats?unit=pi-b").json()["count"] == 2
+
+        with open(db_path, "rb") as fh:
+            resp = client.post("/upload?unit=*", files={"file": ("upload.db", fh)})
+        assert resp.status_code == 400
+
+
+def test_legacy_health_table_is_migrated(tmp_path):
+    _create_src_db(str(tmp_path / "aggregation.db"))
+    os.environ["PW_AGG_DIR"] = str(tmp_path)
+    module = importlib.import_module("piwardrive.aggregation_service")
+    importlib.reload(module)
+    db_path = tmp_path / "upload.db"
+    _create_src_db(str(db_path))
+
+    with TestClient(module.app) as client:
+        assert client.get("/stats").json()["count"] == 2
+        assert client.get("/stats?unit=unknown").json()["cpu_avg"] == 15.0
+        with open(db_path, "rb") as fh:
+            client.post("/upload?unit=pi-a", files={"file": ("upload.db", fh)})
+        _wait_idle(client)
+        assert client.get("/stats").json()["count"] == 4
+        assert client.get("/stats?unit=unknown").json()["count"] == 2
+    with sqlite3.connect(tmp_path / "aggregation.db") as db:
+        legacy = db.execute("SELECT COUNT(*) FROM health_records_legacy")
+        assert legacy.fetchone()[0] == 2
+
+
+def test_upload_queue_full_returns_503(tmp_path, monkeypatch):
+    os.environ["PW_AGG_DIR"] = str(tmp_path)
+    module = importlib.import_module("piwardrive.aggregation_service")
+    importlib.reload(module)
+    db_path = tmp_path / "upload.db"
+    _create_src_db(str(db_path))
+    monkeypatch.setattr(module, "ingest", module.IngestQueue(workers=0, maxsize=1))
+
+    with TestClient(module.app) as client:
+        codes = []
+        for _ in range(2):
+            with open(db_path, "rb") as fh:
+                resp = client.post("/upload", files={"file": ("db", fh)})
+            codes.append(resp.status_code)
+        assert codes == [202, 503]
+        assert resp.headers["Retry-After"] == "5"
+        assert client.get("/ingest").json()["rejected"] == 1
 
 
 def test_upload_appends(tmp_path):
@@ -66,10 +201,11 @@ def test_upload_appends(tmp_path):
     dest.parent.mkdir(parents=True, exist_ok=True)
     dest.write_text("x")
 
-    client = TestClient(module.app)
-    with open(db_path, "rb") as fh:
-        resp = client.post("/upload", files={"file": ("db", fh)})
-    assert resp.status_code == 200
+    with TestClient(module.app) as client:
+        with open(db_path, "rb") as fh:
+            resp = client.post("/upload", files={"file": ("db", fh)})
+        assert resp.status_code == 202
+        _wait_idle(client)
     assert dest.stat().st_size > 1
 
 
@@ -110,3 +246,114 @@ def test_upload_rejects_evil_db(tmp_path):
     with open(db_path, "rb") as fh:
         resp = client.post("/upload", files={"file": ("../evil.db", fh)})
     assert resp.status_code == 400
+
+
+def _write_aps(path, rows):
+    with sqlite3.connect(path) as db:
+        db.execute(
+            """CREATE TABLE IF NOT EXISTS health_records (timestamp TEXT PRIMARY KEY,
+            cpu_temp REAL, cpu_percent REAL, memory_percent REAL, disk_percent REAL)"""
+        )
+        db.execute(
+            """CREATE TABLE IF NOT EXISTS ap_cache (bssid TEXT PRIMARY KEY,
+            lat REAL, lon REAL, last_time INTEGER)"""
+        )
+        db.executemany("INSERT OR REPLACE INTO ap_cache VALUES (?, ?, ?, ?)", rows)
+
+
+def test_points_dedup_and_move_between_tiles(tmp_path):
+    os.environ["PW_AGG_DIR"] = str(tmp_path)
+    module = importlib.import_module("piwardrive.aggregation_service")
+    importlib.reload(module)
+    path = tmp_path / "van.db"
+    _write_aps(path, [("aa", 40.0, -75.0, 10), ("bb", 40.001, -75.001, 10)])
+
+    def upload(client, name="van.db"):
+        with open(path, "rb") as fh:
+            resp = client.post("/upload", files={"file": (name, fh)})
+        assert resp.status_code == 202
+        _wait_idle(client)
+        return client.get(f"/ingest/{resp.json()['job']}").json()["rows"]
+
+    def tiles(zoom):
+        with sqlite3.connect(tmp_path / "aggregation.db") as db:
+            return db.execute(
+                "SELECT unit_id, tile, count FROM point_tiles WHERE zoom = ? "
+                "ORDER BY unit_id, tile",
+                (zoom,),
+            ).fetchall()
+
+    bbox = "min_lat=39.9&min_lon=-75.1&max_lat=40.1&max_lon=-74.9"
+    with TestClient(module.app) as client:
+        assert upload(client)["ap_points"] == 2
+        before = tiles(18)
+        for _ in range(3):
+            assert upload(client)["ap_points"] == 0
+        assert tiles(18) == before
+        assert len(client.get(f"/points?{bbox}").json()["points"]) == 2
+
+        # a newer sighting moves "aa" far away; an older one is ignored
+        _write_aps(path, [("aa", 51.5, -0.1, 20), ("bb", 0.0, 0.0, 5)])
+        assert upload(client)["ap_points"] == 1
+        assert client.get(f"/points?{bbox}").json()["points"] == [
+            ["bb", 40.001, -75.001, 10]
+        ]
+        london = client.get(
+            "/points?min_lat=51&min_lon=-1&max_lat=52&max_lon=1&unit=van"
+        ).json()["points"]
+        assert london == [["aa", 51.5, -0.1, 20]]
+        assert sum(row[2] for row in tiles(2)) == 4  # two APs, unit and global
+        assert {row[2] for row in tiles(18)} == {1}
+
+        # another unit sees "bb": global keeps one copy, per-unit views differ
+        upload(client, "car.db")
+        pts = client.get("/overlay?bins=1").json()["points"]
+        assert sum(p[2] for p in pts) == 2
+        pts = client.get(f"/overlay?bins=10&{bbox}&unit=van").json()["points"]
+        assert sum(p[2] for p in pts) == 1
+        resp = client.get("/overlay?min_lat=1")
+        assert resp.status_code == 400
+
+
+def test_legacy_point_table_is_migrated(tmp_path):
+    with sqlite3.connect(tmp_path / "aggregation.db") as db:
+        db.execute("CREATE TABLE ap_points (lat REAL, lon REAL)")
+        db.execute("INSERT INTO ap_points VALUES (1.0, 2.0)")
+        db.execute("INSERT INTO ap_points VALUES (1.0, 2.0)")
+    os.environ["PW_AGG_DIR"] = str(tmp_path)
+    module = importlib.import_module("piwardrive.aggregation_service")
+    importlib.reload(module)
+    path = tmp_path / "van.db"
+    _write_aps(path, [("aa", 40.0, -75.0, 10)])
+    with TestClient(module.app) as client:
+        with open(path, "rb") as fh:
+            client.post("/upload", files={"file": ("van.db", fh)})
+        _wait_idle(client)
+        pts = client.get("/overlay?bins=1").json()["points"]
+        assert sum(p[2] for p in pts) == 2
+        pts = client.get("/overlay?bins=1&unit=unknown").json()["points"]
+        assert sum(p[2] for p in pts) == 1
+        bbox = "min_lat=0&min_lon=1&max_lat=2&max_lon=3"
+        data = client.get(f"/points?{bbox}&unit=unknown").json()
+        assert [p[0] for p in data["points"]] == ["legacy:1.0,2.0"]
+    with sqlite3.connect(tmp_path / "aggregation.db") as db:
+        assert db.execute("SELECT COUNT(*) FROM ap_points_legacy").fetchone()[0] == 2
+        assert db.execute("SELECT COUNT(*) FROM ap_points").fetchone()[0] == 4
+
+
+def test_points_negotiates_msgpack(tmp_path):
+    msgpack = pytest.importorskip("msgpack")
+    os.environ["PW_AGG_DIR"] = str(tmp_path)
+    module = importlib.import_module("piwardrive.aggregation_service")
+    importlib.reload(module)
+    path = tmp_path / "van.db"
+    _write_aps(path, [("aa", 40.0, -75.0, 10)])
+    with TestClient(module.app) as client:
+        with open(path, "rb") as fh:
+            client.post("/upload", files={"file": ("van.db", fh)})
+        _wait_idle(client)
+        query = "/points?min_lat=39&min_lon=-76&max_lat=41&max_lon=-74"
+        resp = client.get(query, headers={"Accept": "application/msgpack"})
+        assert resp.headers["content-type"] == "application/msgpack"
+        assert msgpack.unpackb(resp.content) == {"points": [["aa", 40.0, -75.0, 10]]}
+        assert client.get(query).json() == {"points": [["aa", 40.0, -75.0, 10]]}
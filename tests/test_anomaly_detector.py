@@ -1,6 +1,15 @@
+import asyncio
 import logging
+import random
+from dataclasses import replace
 
-from piwardrive.analytics.anomaly import HealthAnomalyDetector
+from piwardrive.analytics import anomaly
+from piwardrive.analytics.anomaly import (
+    HealthAnomalyDetector,
+    fit_health_model,
+    health_features,
+)
+from piwardrive.core.persistence import HealthRecord as CoreHealthRecord
 from piwardrive.persistence import HealthRecord
 
 
@@ -16,3 +25,85 @@ def test_anomaly_warning_triggered(caplog):
     caplog.set_level(logging.WARNING)
     detector(HealthRecord("tx", 90.0, 50.0, 20.0, 30.0))
     assert any("anomaly" in rec.message.lower() for rec in caplog.records)
+
+
+def _records(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        CoreHealthRecord(f"t{i}", rng.gauss(45, 2), rng.gauss(20, 5), 20.0, 30.0)
+        for i in range(n)
+    ]
+
+
+class CountingModel:
+    def __init__(self, model):
+        self.model = model
+        self.calls = 0
+
+    def predict(self, data):
+        self.calls += 1
+        return self.model.predict(data)
+
+
+def test_flush_scores_batch_in_one_predict():
+    detector = HealthAnomalyDetector(batch_size=4)
+    detector.fit(_records(200))
+    counting = CountingModel(detector.artifact.model)
+    detector._artifact = replace(detector.artifact, model=counting)
+
+    async def feed():
+        for rec in _records(3, seed=1):
+            detector(rec)
+        assert counting.calls == 0
+        detector(CoreHealthRecord("tx", 95.0, 99.0, 20.0, 30.0))
+        assert counting.calls == 1
+        detector(CoreHealthRecord("ty", 96.0, 99.0, 20.0, 30.0))
+        await asyncio.sleep(detector.max_delay + 0.1)
+        assert counting.calls == 2
+
+    asyncio.run(feed())
+    mask = detector.predict(
+        [
+            CoreHealthRecord("a", None, 1.0, 0, 0),
+            CoreHealthRecord("b", 99.0, 99.0, 0, 0),
+        ]
+    )
+    assert mask.tolist() == [False, True]
+    assert counting.calls == 3
+
+
+def test_swap_ignores_stale_versions():
+    detector = HealthAnomalyDetector()
+    detector.fit(_records(50))
+    live = detector.artifact
+    stale = fit_health_model(health_features(_records(50, seed=2)), 0.05, 0)
+    assert not detector.swap(stale)
+    assert detector.artifact is live
+    newer = fit_health_model(health_features(_records(50)), 0.05, live.version + 5)
+    assert detector.swap(newer)
+    assert detector.version == live.version + 5
+
+
+def test_retrain_runs_in_cpu_pool(monkeypatch):
+    calls = []
+
+    async def fake_pool(func, *args):
+        calls.append(func)
+        return await asyncio.to_thread(func, *args)
+
+    monkeypatch.setattr(anomaly, "run_cpu_bound_shared", fake_pool)
+    detector = HealthAnomalyDetector()
+    artifact = asyncio.run(detector.retrain(_records(100)))
+    assert calls == [anomaly.fit_health_model]
+    assert detector.artifact is artifact
+    assert artifact.version == 1 and artifact.samples == 100
+
+
+def test_artifacts_roundtrip_and_prune(tmp_path):
+    for version in range(1, 6):
+        art = fit_health_model(health_features(_records(20)), 0.05, version)
+        anomaly.save_artifact(art, tmp_path)
+    assert len(list(tmp_path.glob("*.pkl"))) == anomaly.KEEP_ARTIFACTS
+    latest = anomaly.load_latest_artifact(tmp_path)
+    assert latest.version == 5
+    assert latest.model.predict([[45.0, 20.0]]).shape == (1,)
@@ -16,7 +16,22 @@ import pytest
 # Add source directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from piwardrive.cache import RedisCache
+from piwardrive.cache import SCAN_COUNT, RedisCache
+from piwardrive.serialization import get_codec
+
+_encode = get_codec("json").dumps
+
+
+def _scanning_client(keys):
+    """Return a mock Redis client whose ``scan_iter`` yields ``keys``."""
+
+    async def scan_iter(**_kwargs):
+        for key in keys:
+            yield key
+
+    client = AsyncMock()
+    client.scan_iter = MagicMock(side_effect=scan_iter)
+    return client
 
 
 class TestRedisCacheInitialization:
@@ -180,7 +195,7 @@ class TestRedisCacheSet:
             await cache.set("test_key", test_value)
 
             mock_client.set.assert_called_once_with(
-                "cache:test_key", json.dumps(test_value), ex=None
+                "cache:test_key", _encode(test_value), ex=None
             )
 
     @pytest.mark.asyncio
@@ -196,7 +211,7 @@ class TestRedisCacheSet:
             await cache.set("temp_key", test_value, ttl=ttl)
 
             mock_client.set.assert_called_once_with(
-                "cache:temp_key", json.dumps(test_value), ex=ttl
+                "cache:temp_key", _encode(test_value), ex=ttl
             )
 
     @pytest.mark.asyncio
@@ -211,7 +226,7 @@ class TestRedisCacheSet:
             await cache.set("user_data", test_value, ttl=3600)
 
             mock_client.set.assert_called_once_with(
-                "session:user_data", json.dumps(test_value), ex=3600
+                "session:user_data", _encode(test_value), ex=3600
             )
 
     @pytest.mark.asyncio
@@ -239,7 +254,7 @@ class TestRedisCacheSet:
             ):
                 await cache.set(key, value)
 
-                expected_json = json.dumps(value)
+                expected_json = _encode(value)
                 mock_client.set.assert_called_once_with(
                     f"cache:{key}", expected_json, ex=None
                 )
@@ -312,13 +327,14 @@ class TestRedisCacheClear:
         """Test clear method when matching keys exist."""
         cache = RedisCache(prefix="test")
 
-        mock_client = AsyncMock()
-        mock_client.keys.return_value = ["test:key1", "test:key2", "test:key3"]
+        mock_client = _scanning_client(["test:key1", "test:key2", "test:key3"])
 
         with mock.patch("piwardrive.cache._get_redis_client", return_value=mock_client):
             await cache.clear()
 
-            mock_client.keys.assert_called_once_with("test:*")
+            mock_client.scan_iter.assert_called_once_with(
+                match="test:*", count=SCAN_COUNT
+            )
             mock_client.delete.assert_called_once_with(
                 "test:key1", "test:key2", "test:key3"
             )
@@ -328,13 +344,14 @@ class TestRedisCacheClear:
         """Test clear method when no matching keys exist."""
         cache = RedisCache(prefix="empty")
 
-        mock_client = AsyncMock()
-        mock_client.keys.return_value = []
+        mock_client = _scanning_client([])
 
         with mock.patch("piwardrive.cache._get_redis_client", return_value=mock_client):
             await cache.clear()
 
-            mock_client.keys.assert_called_once_with("empty:*")
+            mock_client.scan_iter.assert_called_once_with(
+                match="empty:*", count=SCAN_COUNT
+            )
             mock_client.delete.assert_not_called()
 
     @pytest.mark.asyncio
@@ -342,13 +359,14 @@ class TestRedisCacheClear:
         """Test clear method with default prefix."""
         cache = RedisCache()  # Default prefix is "cache"
 
-        mock_client = AsyncMock()
-        mock_client.keys.return_value = ["cache:data1", "cache:data2"]
+        mock_client = _scanning_client(["cache:data1", "cache:data2"])
 
         with mock.patch("piwardrive.cache._get_redis_client", return_value=mock_client):
             await cache.clear()
 
-            mock_client.keys.assert_called_once_with("cache:*")
+            mock_client.scan_iter.assert_called_once_with(
+                match="cache:*", count=SCAN_COUNT
+            )
             mock_client.delete.assert_called_once_with("cache:data1", "cache:data2")
 
 
@@ -358,25 +376,27 @@ class TestRedisCacheInvalidatePattern:
     @pytest.mark.asyncio
     async def test_invalidate_pattern_matching_keys(self):
         cache = RedisCache(prefix="pattern")
-        mock_client = AsyncMock()
-        mock_client.keys.return_value = ["pattern:a", "pattern:b"]
+        mock_client = _scanning_client(["pattern:a", "pattern:b"])
 
         with mock.patch("piwardrive.cache._get_redis_client", return_value=mock_client):
             await cache.invalidate_pattern("pattern:*")
 
-            mock_client.keys.assert_called_once_with("pattern:*")
+            mock_client.scan_iter.assert_called_once_with(
+                match="pattern:*", count=SCAN_COUNT
+            )
             mock_client.delete.assert_called_once_with("pattern:a", "pattern:b")
 
     @pytest.mark.asyncio
     async def test_invalidate_pattern_no_keys(self):
         cache = RedisCache(prefix="pattern")
-        mock_client = AsyncMock()
-        mock_client.keys.return_value = []
+        mock_client = _scanning_client([])
 
         with mock.patch("piwardrive.cache._get_redis_client", return_value=mock_client):
             await cache.invalidate_pattern("pattern:*")
 
-            mock_client.keys.assert_called_once_with("pattern:*")
+            mock_client.scan_iter.assert_called_once_with(
+                match="pattern:*", count=SCAN_COUNT
+            )
             mock_client.delete.assert_not_called()
 
 
@@ -400,7 +420,7 @@ class TestRedisCacheIntegration:
             await cache.set("user:123", test_data, ttl=1800)
 
             mock_client.set.assert_called_with(
-                "integration:user:123", json.dumps(test_data), ex=1800
+                "integration:user:123", _encode(test_data), ex=1800
             )
 
         # Mock the get operation
@@ -455,7 +475,7 @@ class TestRedisCacheIntegration:
         with mock.patch("piwardrive.cache._get_redis_client", return_value=mock_client):
             await cache.set("unicode_test", unicode_data)
 
-            expected_json = json.dumps(unicode_data)
+            expected_json = _encode(unicode_data)
             mock_client.set.assert_called_once_with(
                 "unicode:unicode_test", expected_json, ex=None
             )
@@ -503,7 +523,7 @@ class TestRedisCacheEdgeCases:
             # Empty string key
             await cache.set("", "empty key value")
             mock_client.set.assert_called_with(
-                "cache:", json.dumps("empty key value"), ex=None
+                "cache:", _encode("empty key value"), ex=None
             )
 
             await cache.get("")
@@ -523,9 +543,7 @@ class TestRedisCacheEdgeCases:
         with mock.patch("piwardrive.cache._get_redis_client", return_value=mock_client):
             await cache.set(long_key, "value")
             expected_key = f"cache:{long_key}"
-            mock_client.set.assert_called_with(
-                expected_key, json.dumps("value"), ex=None
-            )
+            mock_client.set.assert_called_with(expected_key, _encode("value"), ex=None)
 
     @pytest.mark.asyncio
     async def test_zero_ttl(self):
@@ -536,9 +554,7 @@ class TestRedisCacheEdgeCases:
 
         with mock.patch("piwardrive.cache._get_redis_client", return_value=mock_client):
             await cache.set("zero_ttl", "value", ttl=0)
-            mock_client.set.assert_called_with(
-                "cache:zero_ttl", json.dumps("value"), ex=0
-            )
+            mock_client.set.assert_called_with("cache:zero_ttl", _encode("value"), ex=0)
 
     @pytest.mark.asyncio
     async def test_negative_ttl(self):
@@ -550,7 +566,7 @@ class TestRedisCacheEdgeCases:
         with mock.patch("piwardrive.cache._get_redis_client", return_value=mock_client):
             await cache.set("negative_ttl", "value", ttl=-1)
             mock_client.set.assert_called_with(
-                "cache:negative_ttl", json.dumps("value"), ex=-1
+                "cache:negative_ttl", _encode("value"), ex=-1
             )
 
 
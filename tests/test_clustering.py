@@ -1,4 +1,12 @@
-from piwardrive.analytics.clustering import cluster_positions
+import numpy as np
+from sklearn.cluster import DBSCAN
+from sklearn.metrics import adjusted_rand_score
+
+from piwardrive.analytics.clustering import (
+    EARTH_RADIUS_M,
+    GeoClusterer,
+    cluster_positions,
+)
 
 
 def test_cluster_positions_basic() -> None:
@@ -13,3 +21,55 @@ def test_cluster_positions_basic() -> None:
 
 def test_cluster_positions_empty() -> None:
     assert cluster_positions([]) == []
+
+
+def _blobs(seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform([40.0, -75.0], [40.1, -74.9], (20, 2))
+    pts = np.vstack(
+        [c + rng.normal(0, 0.0003, (40, 2)) for c in centers]
+        + [rng.uniform([40.0, -75.0], [40.1, -74.9], (300, 2))]
+    )
+    return pts[rng.permutation(len(pts))]
+
+
+def _reference(pts, eps_m: float) -> np.ndarray:
+    return DBSCAN(
+        eps=eps_m / EARTH_RADIUS_M,
+        min_samples=5,
+        metric="haversine",
+        algorithm="ball_tree",
+    ).fit_predict(np.radians(pts))
+
+
+def _same_partition(a, b) -> bool:
+    return adjusted_rand_score(a, b) == 1.0 and ((a == -1) == (b == -1)).all()
+
+
+def test_chunked_fit_matches_dbscan() -> None:
+    pts = _blobs()
+    ref = _reference(pts, 60.0)
+    # tiny chunks force clusters across many chunk borders
+    labels = GeoClusterer(60.0, 5, chunk_deg=0.002).fit(pts[:, 0], pts[:, 1])
+    assert _same_partition(labels, ref)
+
+
+def test_update_matches_refit() -> None:
+    pts = _blobs(1)
+    clusterer = GeoClusterer(60.0, 5, chunk_deg=0.01)
+    clusterer.fit(pts[:400, 0], pts[:400, 1])
+    for start in range(400, len(pts), 250):
+        new = clusterer.update(pts[start : start + 250, 0], pts[start : start + 250, 1])
+        assert len(new) == len(pts[start : start + 250])
+    assert len(clusterer) == len(pts)
+    assert _same_partition(clusterer.labels_, _reference(pts, 60.0))
+
+
+def test_update_merges_clusters_and_keeps_smaller_id() -> None:
+    clusterer = GeoClusterer(eps_m=20.0, min_samples=2)
+    # two pairs ~33 m apart along a meridian
+    clusterer.fit([0.0, 0.0001, 0.0004, 0.0005], [0.0] * 4)
+    assert clusterer.labels_.tolist() == [0, 0, 1, 1]
+    assert clusterer.update([0.00025], [0.0]).tolist() == [0]
+    assert clusterer.labels_.tolist() == [0] * 5
+    assert list(clusterer.centroids()) == [0]
@@ -1,13 +1,86 @@
+import asyncio
+import os
+import time
+
+import numpy as np
 import pytest
 
-from piwardrive.cpu_pool import run_cpu_bound
+from piwardrive import cpu_pool
+from piwardrive.cpu_pool import run_cpu_bound, run_cpu_bound_shared
 
 
 def _square(x: int) -> int:
     return x * x
 
 
+def _combine(cols, scale=1.0):
+    return {"sum": cols["a"] + cols["b"] * scale, "rows": len(cols["a"])}
+
+
+def _every_other(arr):
+    return arr[::2]
+
+
+def _slow_copy(arr):
+    time.sleep(0.3)
+    return arr * 2
+
+
+def _is_shared(arr) -> bool:
+    return isinstance(arr, np.ndarray) and not arr.flags.owndata
+
+
+def _shm_blocks() -> set:
+    try:
+        return {n for n in os.listdir("/dev/shm") if n.startswith("psm_")}
+    except FileNotFoundError:  # pragma: no cover - non-Linux
+        return set()
+
+
 @pytest.mark.asyncio
 async def test_run_cpu_bound() -> None:
     result = await run_cpu_bound(_square, 5)
     assert result == 25
+
+
+@pytest.mark.asyncio
+async def test_run_cpu_bound_shared_round_trip() -> None:
+    before = _shm_blocks()
+    a = np.arange(100_000, dtype=float)
+    result = await run_cpu_bound_shared(_combine, {"a": a, "b": a}, scale=2.0)
+    np.testing.assert_allclose(result["sum"], a * 3)
+    assert result["rows"] == len(a)
+    view = await run_cpu_bound_shared(_every_other, a)
+    np.testing.assert_array_equal(view, a[::2])
+    assert _shm_blocks() <= before
+
+
+@pytest.mark.asyncio
+async def test_run_cpu_bound_shared_inputs_are_views() -> None:
+    big = np.ones(cpu_pool.SHM_MIN_BYTES // 8, dtype=float)
+    small = np.ones(4)
+    assert await run_cpu_bound_shared(_is_shared, big)
+    assert not await run_cpu_bound_shared(_is_shared, small)
+
+
+def test_pack_leaves_small_and_object_arrays() -> None:
+    blocks: list = []
+    small = np.ones(4)
+    objs = np.array([object()] * 10_000, dtype=object)
+    packed = cpu_pool._pack((small, objs, "x"), blocks)
+    assert packed[0] is small and packed[1] is objs and packed[2] == "x"
+    assert blocks == []
+
+
+@pytest.mark.asyncio
+async def test_cancelled_shared_call_unlinks_result_blocks() -> None:
+    cpu_pool.warm_cpu_pool()
+    before = _shm_blocks()
+    a = np.arange(100_000, dtype=float)
+    task = asyncio.create_task(run_cpu_bound_shared(_slow_copy, a))
+    await asyncio.sleep(0.1)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0.5)
+    assert _shm_blocks() <= before
@@ -0,0 +1,106 @@
+import asyncio
+import random
+
+import pytest
+
+from piwardrive.db.manager import DatabaseManager
+from piwardrive.db.sqlite import SQLiteAdapter
+from piwardrive.services import db_monitor
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    db_monitor.reset_query_metrics()
+    yield
+    db_monitor.reset_query_metrics()
+
+
+@pytest.mark.parametrize(
+    "sql, expected",
+    [
+        (
+            "SELECT * FROM ap WHERE bssid = 'aa:bb' AND rssi > -70",
+            "SELECT * FROM ap WHERE bssid = ? AND rssi > ?",
+        ),
+        (
+            "select id from t1 where id in (1, 2, 3)  -- hot\n",
+            "select id from t1 where id in (?+)",
+        ),
+        (
+            "INSERT INTO t (a, b) VALUES ($1, $2), ($3, $4);",
+            "INSERT INTO t (a, b) VALUES (?+)",
+        ),
+        ("UPDATE t SET v = :v WHERE k = %s", "UPDATE t SET v = ? WHERE k = ?"),
+        ("SELECT x::int, 'it''s' /* c */ FROM t", "SELECT x::int, ? FROM t"),
+    ],
+)
+def test_fingerprint(sql, expected):
+    assert db_monitor.fingerprint(sql) == expected
+
+
+def test_histogram_quantiles_are_close():
+    rng = random.Random(0)
+    values = [rng.lognormvariate(-6, 1) for _ in range(20000)]
+    hist = db_monitor.LatencyHistogram()
+    for value in values:
+        hist.add(value)
+    values.sort()
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * len(values))]
+        assert hist.quantile(q) == pytest.approx(exact, rel=0.06)
+    assert hist.count == 20000 and len(hist.counts) == hist.BUCKETS
+    assert db_monitor.LatencyHistogram().quantile(0.5) == 0.0
+
+
+def test_record_query_groups_by_fingerprint_and_requests_one_plan(monkeypatch):
+    monkeypatch.setattr(db_monitor, "SLOW_QUERY_SECONDS", 0.5)
+    assert not db_monitor.record_query("SELECT * FROM t WHERE id = 1", 0.01)
+    assert db_monitor.record_query("SELECT * FROM t WHERE id = 2", 0.9)
+    assert not db_monitor.record_query("SELECT * FROM t WHERE id = 3", 0.9)
+    assert not db_monitor.record_query("CREATE TABLE x (a)", 0.9)
+    assert not db_monitor.record_query("DELETE FROM t", 0.9, explain=False)
+    metrics = db_monitor.get_query_metrics()
+    entry = metrics["SELECT * FROM t WHERE id = ?"]
+    assert entry["count"] == 3
+    assert entry["total"] == pytest.approx(1.81)
+    assert entry["p99"] == pytest.approx(0.9, rel=0.05)
+    top = db_monitor.top_queries(limit=2)
+    assert [t["fingerprint"] for t in top] == [
+        "SELECT * FROM t WHERE id = ?",
+        "CREATE TABLE x (a)",
+    ]
+    assert top[0]["slow_count"] == 2
+    with pytest.raises(ValueError):
+        db_monitor.top_queries(sort="sample")
+
+
+def test_fingerprint_count_is_bounded(monkeypatch):
+    monkeypatch.setattr(db_monitor, "MAX_FINGERPRINTS", 3)
+    for i in range(10):
+        db_monitor.record_query(f"SELECT * FROM t{i}", 0.001)
+    metrics = db_monitor.get_query_metrics()
+    assert len(metrics) == 4
+    assert metrics[db_monitor.OVERFLOW_FINGERPRINT]["count"] == 7
+
+
+def test_slow_queries_get_a_plan(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_monitor, "SLOW_QUERY_SECONDS", 0.0)
+
+    async def run():
+        manager = DatabaseManager(SQLiteAdapter(str(tmp_path / "q.db"), pool_size=1))
+        await manager.connect()
+        try:
+            await manager.execute("CREATE TABLE ap (bssid TEXT, rssi INT)")
+            await manager.execute("INSERT INTO ap VALUES (?, ?)", "aa", -60)
+            rows = await manager.fetchall("SELECT * FROM ap WHERE rssi > ?", -70)
+            await asyncio.gather(*manager._plan_tasks)
+        finally:
+            await manager.close()
+        return rows
+
+    assert len(asyncio.run(run())) == 1
+    stats = {s["fingerprint"]: s for s in db_monitor.top_queries()}
+    plan = stats["SELECT * FROM ap WHERE rssi > ?"]["plan"]
+    assert plan and "SCAN" in plan[0]
+    assert stats["CREATE TABLE ap (bssid TEXT, rssi INT)"]["plan"] is None
+    assert stats["INSERT INTO ap VALUES (?+)"]["plan"] is not None
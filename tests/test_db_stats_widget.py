@@ -2,6 +2,8 @@ import asyncio
 import importlib
 from typing import Any
 
+from piwardrive.widget_data import Dataset, WidgetDataHub
+
 
 def _load_widget():
     return importlib.import_module("piwardrive.widgets.db_stats")
@@ -12,12 +14,18 @@ def test_widget_update(monkeypatch: Any) -> None:
     widget = object.__new__(ds.DBStatsWidget)
     widget.label = ds.MDLabel()  # type: ignore[attr-defined]
 
+    async def _counts() -> dict[str, int]:
+        return {"ap_cache": 2}
+
+    hub = WidgetDataHub()
+    hub.register(Dataset("table_counts", _counts, 10.0))
+    monkeypatch.setattr(ds, "data_hub", hub)
     monkeypatch.setattr(ds, "_db_path", lambda: "x.db")
     monkeypatch.setattr(ds.os.path, "getsize", lambda p: 2048)
     monkeypatch.setattr(
         ds,
         "run_async_task",
-        lambda coro, cb: (asyncio.run(coro), cb({"ap_cache": 2})),
+        lambda coro, cb: cb(asyncio.run(coro)),
     )
     ds.DBStatsWidget.update(widget)
     assert "2.0" in widget.label.text
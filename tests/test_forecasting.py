@@ -1,6 +1,13 @@
 import numpy as np
 
-from piwardrive.analytics.forecasting import forecast_cpu_temp
+from piwardrive.analytics import forecasting
+from piwardrive.analytics.forecasting import (
+    ForecastService,
+    fit_holt,
+    forecast_cpu_temp,
+    forecaster,
+)
+from piwardrive.core.persistence import HealthRecord as CoreHealthRecord
 from piwardrive.persistence import HealthRecord
 
 
@@ -13,3 +20,75 @@ def test_forecast_cpu_temp_deterministic():
     assert isinstance(a, list)
     assert len(a) == 3
     assert a == b
+
+
+def test_holt_tracks_linear_trend():
+    values = [40.0 + 0.5 * i for i in range(200)]
+    state = fit_holt(values)
+    pred = state.predict(3)
+    assert abs(pred[0] - 140.0) < 0.5
+    assert pred[0] < pred[1] < pred[2]
+
+
+def test_sync_updates_incrementally(monkeypatch):
+    service = ForecastService(window=100)
+    fits = []
+    real_fit = forecasting.fit_holt
+    monkeypatch.setattr(
+        forecasting, "fit_holt", lambda v: fits.append(len(v)) or real_fit(v)
+    )
+    samples = [(f"{i:04d}", 50.0 + (i % 3)) for i in range(300)]
+    service.sync("t", samples)
+    assert fits == [100]
+    first = service.forecast("t", 2)
+    service.sync("t", samples)  # nothing new
+    assert service.forecast("t", 2) == first
+    service.sync("t", samples + [("0300", 51.0), ("0301", 52.0)])
+    assert fits == [100]
+    assert service.stats()["t"]["updates"] == 2
+
+
+def test_drift_triggers_refit():
+    service = ForecastService(window=50, drift_threshold=5.0)
+    for i in range(50):
+        service.observe("s", 40.0 + (i % 2) * 0.1, i)
+    refits = service.stats()["s"]["refits"]
+    for i in range(50, 60):
+        service.observe("s", 80.0, i)
+    stats = service.stats()["s"]
+    assert stats["refits"] > refits
+    assert abs(service.forecast("s", 1)[0] - 80.0) < 5.0
+
+
+def test_scheduled_refit(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(forecasting.time, "monotonic", lambda: now[0])
+    service = ForecastService(refit_interval=60.0)
+    service.sync("s", [(i, 40.0) for i in range(20)])
+    service.observe("s", 40.0, 20)
+    assert service.stats()["s"]["refits"] == 1
+    now[0] += 61
+    service.observe("s", 40.0, 21)
+    assert service.stats()["s"]["refits"] == 2
+
+
+def test_forecast_cpu_temp_uses_named_series():
+    forecaster.reset()
+    recs = [CoreHealthRecord(f"{i:03d}", 40.0 + i, 0.0, 0.0, 0.0) for i in range(30)]
+    a = forecast_cpu_temp(list(reversed(recs)), 3, series="cpu_temp")
+    assert a[0] > 68.0
+    more = recs + [CoreHealthRecord("030", 70.0, 0.0, 0.0, 0.0)]
+    b = forecast_cpu_temp(more, 3, series="cpu_temp")
+    assert forecaster.stats()["cpu_temp"]["updates"] == 1
+    assert b != a
+    assert forecast_cpu_temp([], 2) != forecast_cpu_temp([], 2)  # NaNs
+
+
+def test_forecast_cpu_temp_is_stateless_without_series():
+    forecaster.reset()
+    ramp = [CoreHealthRecord(f"{i:03d}", 40.0 + i, 0.0, 0.0, 0.0) for i in range(40)]
+    forecast_cpu_temp(ramp, 3)
+    flat = [CoreHealthRecord(f"{i:03d}", 80.0, 0.0, 0.0, 0.0) for i in range(40)]
+    pred = forecast_cpu_temp(flat, 3)
+    assert all(abs(p - 80.0) < 0.5 for p in pred)
+    assert forecaster.stats() == {}
@@ -1,5 +1,8 @@
 import math
 
+import numpy as np
+import pytest
+
 from piwardrive import utils
 from piwardrive.core import utils as core_utils
 
@@ -33,3 +36,51 @@ def test_get_avg_rssi():
     aps = [{"signal_dbm": -50}, {"signal_dbm": -70}, {"signal_dbm": None}]
     avg = utils.get_avg_rssi(aps)
     assert math.isclose(avg, (-50 - 70) / 2)
+
+
+SQUARE = [(0.0, 0.0), (0.0, 1.0), (1.0, 1.0), (1.0, 0.0)]
+TRIANGLE = [(2.0, 2.0), (2.0, 3.0), (3.0, 2.0)]
+
+
+def test_haversine_batch_matches_scalar():
+    lats = np.array([0.0, 10.0, -33.9])
+    lons = np.array([1.0, 20.0, 151.2])
+    expected = [utils.haversine_distance((0.0, 0.0), p) for p in zip(lats, lons)]
+    np.testing.assert_allclose(utils.haversine_from((0.0, 0.0), lats, lons), expected)
+    np.testing.assert_allclose(
+        utils.haversine_pairwise(np.zeros(3), np.zeros(3), lats, lons), expected
+    )
+    with pytest.raises(ValueError):
+        utils.haversine_from((0.0, 0.0), lats, lons[:2])
+
+
+def test_points_in_polygon_matches_scalar():
+    lats = [0.5, 1.5, 0.2, -0.1]
+    lons = [0.5, 0.5, 0.9, 0.5]
+    mask = utils.points_in_polygon(lats, lons, SQUARE)
+    assert mask.tolist() == [utils.point_in_polygon(p, SQUARE) for p in zip(lats, lons)]
+
+
+def test_points_in_geofences_matrix():
+    fences = core_utils.PackedPolygons.from_polygons([SQUARE, TRIANGLE, []])
+    assert len(fences) == 3
+    mask = utils.points_in_geofences([0.5, 2.2, 5.0], [0.5, 2.2, 5.0], fences)
+    assert mask.tolist() == [
+        [True, False, False],
+        [False, True, False],
+        [False, False, False],
+    ]
+
+
+def test_batch_kernels_match_numpy_fallback(monkeypatch):
+    cgeom = pytest.importorskip("cgeom")
+    rng = np.random.default_rng(0)
+    lats, lons = rng.uniform(-0.5, 3.5, 500), rng.uniform(-0.5, 3.5, 500)
+    native = utils.points_in_geofences(lats, lons, [SQUARE, TRIANGLE])
+    dist = utils.haversine_from((1.0, 1.0), lats, lons)
+    monkeypatch.setattr(core_utils, "_points_in_geofences_c", None)
+    monkeypatch.setattr(core_utils, "_haversine_one_to_many_c", None)
+    assert (utils.points_in_geofences(lats, lons, [SQUARE, TRIANGLE]) == native).all()
+    np.testing.assert_allclose(utils.haversine_from((1.0, 1.0), lats, lons), dist)
+    with pytest.raises(TypeError):
+        cgeom.haversine_one_to_many((0.0, 0.0), lats.astype(np.float32), lons, dist)
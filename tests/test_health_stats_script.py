@@ -12,7 +12,7 @@ def test_health_stats_script_output(monkeypatch, capsys):
         return records
 
     monkeypatch.setattr(hs, "load_recent_health", fake_load)
-    monkeypatch.setattr(hs, "forecast_cpu_temp", lambda r, s: [1.0] * s)
+    monkeypatch.setattr(hs, "forecast_cpu_temp", lambda r, s, **_: [1.0] * s)
     hs.main(["--limit", "5", "--forecast", "2"])
     out_lines = [
         json.loads(l) for l in capsys.readouterr().out.strip().splitlines() if l
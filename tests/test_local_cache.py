@@ -0,0 +1,160 @@
+import numpy as np
+import pytest
+
+from piwardrive.local_cache import (
+    CacheStrategy,
+    FrequencySketch,
+    IntelligentCache,
+    register_sizer,
+    sizeof,
+)
+
+
+def _fill(cache, keys):
+    for key in keys:
+        cache.put(key, key)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = IntelligentCache(max_size=3)
+    _fill(cache, "abc")
+    cache.get("a")
+    cache.put("d", "d")
+    assert set(cache.cache) == {"a", "c", "d"}
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_fifo_ignores_hits():
+    cache = IntelligentCache(max_size=3, strategy=CacheStrategy.FIFO)
+    _fill(cache, "abc")
+    cache.get("a")
+    cache.put("d", "d")
+    assert set(cache.cache) == {"b", "c", "d"}
+
+
+def test_lfu_evicts_least_frequent_oldest_first():
+    cache = IntelligentCache(max_size=3, strategy=CacheStrategy.LFU)
+    _fill(cache, "abc")
+    for key in "aab":
+        cache.get(key)
+    cache.put("d", "d")
+    assert set(cache.cache) == {"a", "b", "d"}
+    cache.put("e", "e")
+    assert set(cache.cache) == {"a", "b", "e"}
+    cache.invalidate("e")
+    cache.invalidate("b")
+    cache.put("f", "f")
+    cache.put("g", "g")
+    assert set(cache.cache) == {"a", "f", "g"}
+
+
+def test_tinylfu_admission_protects_hot_keys():
+    cache = IntelligentCache(max_size=10, strategy=CacheStrategy.ADAPTIVE)
+    hot = [f"hot{i}" for i in range(10)]
+    scans = (f"scan{i}" for i in range(1000))
+    for _ in range(50):
+        for key in hot + [next(scans) for _ in range(20)]:
+            if cache.get(key) is None:
+                cache.put(key, key)
+    assert len(set(cache.cache) & set(hot)) >= 9
+    assert cache.get_stats()["rejections"] >= 900
+
+
+def test_admission_lets_popular_newcomer_in():
+    cache = IntelligentCache(max_size=2, strategy=CacheStrategy.LRU, admission=True)
+    _fill(cache, "ab")
+    for _ in range(3):
+        cache.get("c")
+    cache.put("c", "c")
+    assert "c" in cache.cache and len(cache.cache) == 2
+
+
+def test_admission_window_takes_unrequested_puts():
+    cache = IntelligentCache(max_size=10, strategy=CacheStrategy.ADAPTIVE)
+    for i in range(10):
+        cache.put(f"k{i}", i)
+        cache.get(f"k{i}")
+    for i in range(10, 20):
+        cache.put(f"k{i}", i)
+        assert f"k{i}" in cache.cache and len(cache.cache) == 10
+    assert {f"k{i}" for i in range(9)} <= set(cache.cache)
+
+
+def test_size_accounting_and_byte_limit():
+    cache = IntelligentCache(max_size=100, max_bytes=100)
+    cache.put("a", b"x" * 40)
+    cache.put("b", b"x" * 40)
+    assert cache.memory_usage == 80
+    cache.put("c", "declared", size=50)
+    assert set(cache.cache) == {"b", "c"} and cache.memory_usage == 90
+    cache.put("b", b"x" * 10)
+    assert cache.memory_usage == 60
+    cache.put("huge", b"x" * 101)
+    assert "huge" not in cache.cache
+    cache.invalidate("c")
+    assert cache.get_stats()["memory_usage"] == 10
+    cache.clear()
+    assert cache.memory_usage == 0 and not cache.cache
+
+
+def test_shrinking_max_size_evicts():
+    cache = IntelligentCache(max_size=10, strategy=CacheStrategy.ADAPTIVE)
+    _fill(cache, "abcdefghij")
+    cache.max_size = 4
+    assert len(cache.cache) == 4
+    cache.max_size = 100
+    _fill(cache, "klmnop")
+    assert len(cache.cache) == 10
+
+
+def test_namespace_counters():
+    cache = IntelligentCache()
+    cache.put("ap:1", 1)
+    cache.get("ap:1")
+    cache.get("ap:2")
+    cache.get("plain")
+    cache.get("x", namespace="gps")
+    stats = cache.get_stats()["namespaces"]
+    assert stats["ap"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+    assert stats["default"]["misses"] == 1
+    assert stats["gps"]["misses"] == 1
+
+
+def test_sizeof_estimates():
+    assert sizeof(b"abc") == 3
+    assert sizeof(np.zeros(100)) == 800
+    big = [b"x" * 10] * 1000
+    assert 10_000 <= sizeof(big) <= 20_000
+    assert sizeof({"k": b"x" * 100}) > 100
+
+    class Blob:
+        pass
+
+    register_sizer(Blob, lambda _: 1234)
+    assert sizeof(Blob()) == 1234
+
+
+def test_frequency_sketch_counts_and_ages():
+    sketch = FrequencySketch(64)
+    for _ in range(5):
+        sketch.increment("a")
+    assert sketch.estimate("a") >= 5
+    assert sketch.estimate("never") <= 1
+    for _ in range(sketch.sample_size):
+        sketch.increment("b")
+    assert sketch.estimate("a") < 5
+
+
+@pytest.mark.parametrize("strategy", list(CacheStrategy))
+def test_random_workload_keeps_structures_consistent(strategy):
+    rng = np.random.default_rng(0)
+    cache = IntelligentCache(max_size=50, strategy=strategy, max_bytes=4000)
+    for op, key in zip(rng.integers(0, 10, 5000), rng.zipf(1.3, 5000) % 200):
+        key = f"k{key}"
+        if op == 0:
+            cache.invalidate(key)
+        elif cache.get(key) is None:
+            cache.put(key, b"x" * int(rng.integers(1, 200)))
+        assert len(cache.cache) <= 50
+        assert cache.memory_usage <= 4000
+    assert cache.memory_usage == sum(len(v) for v in cache.cache.values())
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+
+from piwardrive.services.metrics_collector import MetricsCollector, MetricSource
+
+
+def test_sources_are_sampled_concurrently():
+    async def slow_a():
+        await asyncio.sleep(0.2)
+        return "a"
+
+    async def slow_b():
+        await asyncio.sleep(0.2)
+        return "b"
+
+    collector = MetricsCollector(
+        [MetricSource("a", slow_a, timeout=1.0), MetricSource("b", slow_b)]
+    )
+
+    async def _run():
+        start = time.perf_counter()
+        values = await collector.collect()
+        return values, time.perf_counter() - start
+
+    values, elapsed = asyncio.run(_run())
+    assert values == {"a": "a", "b": "b"}
+    assert elapsed < 0.35
+    assert collector.metrics()["a"]["latency_ms"] >= 200
+
+
+def test_cached_values_are_returned_without_waiting():
+    calls = []
+
+    def blocking():
+        calls.append(1)
+        return len(calls)
+
+    collector = MetricsCollector([MetricSource("n", blocking, interval=60.0)])
+
+    async def _run():
+        first = await collector.collect()
+        second = await collector.collect()
+        return first, second
+
+    assert asyncio.run(_run()) == ({"n": 1}, {"n": 1})
+    assert len(calls) == 1
+
+
+def test_failed_source_keeps_last_good_value():
+    state = {"fail": False}
+
+    async def flaky():
+        if state["fail"]:
+            raise RuntimeError("systemctl missing")
+        return 42
+
+    collector = MetricsCollector([MetricSource("x", flaky, interval=0.0)])
+
+    async def _run():
+        await collector.collect()
+        state["fail"] = True
+        return await collector.collect(wait=True)
+
+    assert asyncio.run(_run()) == {"x": 42}
+    assert collector.stale() == ["x"]
+    metrics = collector.metrics()["x"]
+    assert metrics["failures"] == 1 and metrics["error"] == "systemctl missing"
+
+
+def test_slow_source_times_out_and_is_stale():
+    async def hang():
+        await asyncio.sleep(10)
+
+    collector = MetricsCollector(
+        [
+            MetricSource("slow", hang, timeout=0.05, default="n/a"),
+            MetricSource("fast", lambda: 1),
+        ]
+    )
+
+    async def _run():
+        return await collector.collect()
+
+    assert asyncio.run(_run()) == {"slow": "n/a", "fast": 1}
+    assert collector.stale() == ["slow"]
+    assert collector.metrics()["slow"]["timeouts"] == 1
+
+
+def test_value_past_ttl_is_stale():
+    collector = MetricsCollector([MetricSource("v", lambda: 1, interval=60, ttl=0.0)])
+    asyncio.run(collector.collect())
+    time.sleep(0.01)
+    assert collector.stale() == ["v"]
+
+
+def test_stuck_blocking_fetch_is_not_restarted():
+    release = threading.Event()
+    calls = []
+
+    def stuck():
+        calls.append(1)
+        release.wait(5)
+        return len(calls)
+
+    collector = MetricsCollector([MetricSource("s", stuck, interval=0.0, timeout=0.02)])
+
+    async def _run():
+        for _ in range(5):
+            await collector.collect(wait=True)
+        release.set()
+        await asyncio.sleep(0.05)
+        return await collector.collect(wait=True)
+
+    assert asyncio.run(_run()) == {"s": 2}
+    metrics = collector.metrics()["s"]
+    assert len(calls) == 2
+    assert metrics["timeouts"] == 1 and metrics["skipped"] == 4
@@ -17,22 +17,83 @@ class DummyScheduler:
         pass
 
 
-async def _fake_load(limit=500):
-    return [1, 2, 3]
+async def _fake_load(limit=10, offset=0):
+    return [1, 2, 3][:limit]
 
 
 def test_model_trainer_runs(monkeypatch):
     dummy = SimpleNamespace(count=0)
+    limits = []
+
+    async def load(limit=10, offset=0):
+        limits.append(limit)
+        return await _fake_load(limit, offset)
 
     def fit(records):
         dummy.count = len(records)
 
     dummy.fit = fit
     monkeypatch.setattr(analysis, "_ANOMALY_DETECTOR", dummy, raising=False)
-    monkeypatch.setattr(persistence, "load_health_history", _fake_load)
+    monkeypatch.setattr(persistence, "load_recent_health", load)
     monkeypatch.setattr(model_trainer, "run_async_task", lambda coro: asyncio.run(coro))
 
     sched = DummyScheduler()
     model_trainer.ModelTrainer(sched, interval=5)
     assert sched.scheduled[0][0] == "ml_trainer"
     assert dummy.count == 3
+    assert limits and set(limits) == {model_trainer.HISTORY_LIMIT}
+
+
+def test_model_trainer_publishes_artifact(monkeypatch, tmp_path):
+    from piwardrive.analytics import anomaly
+    from piwardrive.core.persistence import HealthRecord
+
+    async def load(limit=10, offset=0):
+        return [
+            HealthRecord(f"t{i}", 40.0 + i % 7, 10.0 + i % 5, 0, 0) for i in range(50)
+        ]
+
+    async def in_thread(func, *args):
+        return await asyncio.to_thread(func, *args)
+
+    detector = anomaly.HealthAnomalyDetector()
+    monkeypatch.setattr(analysis, "_ANOMALY_DETECTOR", detector, raising=False)
+    monkeypatch.setattr(persistence, "load_recent_health", load)
+    monkeypatch.setattr(anomaly, "run_cpu_bound_shared", in_thread)
+    monkeypatch.setattr(model_trainer, "run_async_task", lambda coro: asyncio.run(coro))
+
+    trainer = model_trainer.ModelTrainer(DummyScheduler(), model_dir=str(tmp_path))
+    assert detector.version == 2  # initial run plus the scheduled tick
+    assert anomaly.load_latest_artifact(tmp_path).version == 2
+
+    fresh = anomaly.HealthAnomalyDetector()
+    monkeypatch.setattr(analysis, "_ANOMALY_DETECTOR", fresh, raising=False)
+    asyncio.run(trainer.run())
+    # picks up the published model before training its own
+    assert fresh.version == 3
+
+
+def test_model_trainer_loads_artifact_before_training(monkeypatch, tmp_path):
+    from piwardrive.analytics import anomaly
+    from piwardrive.core.persistence import HealthRecord
+
+    records = [HealthRecord(f"t{i}", 40.0 + i % 7, 10.0, 0, 0) for i in range(50)]
+    published = anomaly.HealthAnomalyDetector()
+    published.fit(records)
+    anomaly.save_artifact(published.artifact, tmp_path)
+
+    detector = anomaly.HealthAnomalyDetector()
+    seen = []
+
+    async def retrain(_records):
+        seen.append(detector.version)
+
+    monkeypatch.setattr(detector, "retrain", retrain)
+    monkeypatch.setattr(analysis, "_ANOMALY_DETECTOR", detector, raising=False)
+    monkeypatch.setattr(persistence, "load_recent_health", _fake_load)
+    monkeypatch.setattr(model_trainer, "run_async_task", lambda coro: asyncio.run(coro))
+
+    sched = DummyScheduler()
+    sched.schedule = lambda *args: sched.scheduled.append(args)
+    model_trainer.ModelTrainer(sched, model_dir=str(tmp_path))
+    assert seen == [published.version]
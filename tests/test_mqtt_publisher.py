@@ -0,0 +1,124 @@
+import asyncio
+import json
+import time
+import zlib
+
+import pytest
+
+pytest.importorskip("paho.mqtt.client")
+
+from piwardrive.mqtt.publisher import DetectionPublisher  # noqa: E402
+
+
+class StubClient:
+    def __init__(self, online=True):
+        self.online = online
+        self.messages = []
+
+    def publish_raw(self, topic, data, qos=0, retain=False):
+        if not self.online:
+            return False
+        self.messages.append((topic, qos, data))
+        return True
+
+
+def _decode(data):
+    return json.loads(zlib.decompress(data))
+
+
+def test_batches_by_size_and_source():
+    client = StubClient()
+    pub = DetectionPublisher(client, max_batch=3, max_delay=60, qos={"wifi": 1})
+    pub.add("wifi", [{"bssid": str(i)} for i in range(4)])
+    pub.add("bluetooth", [{"address": "x"}])
+    assert asyncio.run(pub.flush(due_only=True)) == 2
+    topics = [(t, q) for t, q, _ in client.messages]
+    assert topics == [("piwardrive/detections/wifi", 1)] * 2
+    assert [_decode(d)["count"] for _, _, d in client.messages] == [3, 1]
+    # bluetooth batch is neither full nor old enough yet
+    assert pub.metrics()["pending"] == 1
+    asyncio.run(pub.flush())
+    assert client.messages[-1][0] == "piwardrive/detections/bluetooth"
+    assert pub.metrics()["compression_ratio"] > 0
+
+
+def test_offline_spool_replays_in_order(tmp_path):
+    client = StubClient(online=False)
+    pub = DetectionPublisher(client, compression=None, spool_dir=tmp_path)
+    pub.add("wifi", [{"n": 1}])
+    asyncio.run(pub.flush())
+    pub.add("wifi", [{"n": 2}])
+    asyncio.run(pub.flush())
+    assert pub.stats["spooled"] == 2 and len(list(tmp_path.glob("*.msg"))) == 2
+
+    client.online = True
+    pub.add("wifi", [{"n": 3}])
+    asyncio.run(pub.flush())
+    assert [json.loads(d)["records"][0]["n"] for _, _, d in client.messages] == [
+        1,
+        2,
+        3,
+    ]
+    assert pub.stats["replayed"] == 2 and not list(tmp_path.glob("*.msg"))
+
+
+def test_spool_is_bounded(tmp_path):
+    pub = DetectionPublisher(
+        StubClient(online=False), spool_dir=tmp_path, spool_max_bytes=200
+    )
+    for i in range(10):
+        pub.add("wifi", [{"n": i, "pad": "x" * 50}])
+        asyncio.run(pub.flush())
+    assert pub.metrics()["spool_bytes"] <= 200
+    assert pub.metrics()["spool_dropped"] > 0
+
+
+def test_slow_client_does_not_block_loop():
+    class SlowClient(StubClient):
+        def publish_raw(self, topic, data, qos=0, retain=False):
+            time.sleep(0.2)  # e.g. a blocking reconnect
+            return super().publish_raw(topic, data, qos, retain)
+
+    async def main():
+        pub = DetectionPublisher(SlowClient())
+        pub.add("wifi", [{"n": 1}])
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        assert await pub.flush() == 1
+        ticker.cancel()
+        return ticks
+
+    assert asyncio.run(main()) >= 5
+
+
+def test_backpressure_drops_oldest():
+    pub = DetectionPublisher(StubClient(), max_pending=5)
+    pub.add("wifi", list(range(8)))
+    assert pub.stats["dropped"] == 3
+    assert pub._batches["wifi"] == [3, 4, 5, 6, 7]
+
+
+def test_fed_from_stream_processor():
+    from piwardrive.services.stream_processor import StreamProcessor
+
+    async def _run():
+        client = StubClient()
+        proc = StreamProcessor(rate_limit=0)
+        pub = DetectionPublisher(client, max_delay=0.05)
+        await pub.start(proc)
+        await proc.start()
+        proc.publish_bluetooth([{"address": "AA"}])
+        await asyncio.sleep(0.3)
+        await pub.stop()
+        await proc.stop()
+        return client.messages
+
+    messages = asyncio.run(_run())
+    assert messages and messages[0][0] == "piwardrive/detections/bluetooth"
@@ -28,3 +28,33 @@ def test_fingerprint_wifi_records(monkeypatch):
     ]
     asyncio.run(network_fingerprinting.fingerprint_wifi_records(recs))
     assert dummy.saved and dummy.saved[0]["bssid"] == "AA"
+
+
+def test_fingerprint_cache_skips_unchanged(monkeypatch):
+    dummy = Dummy()
+    monkeypatch.setattr(
+        network_fingerprinting.persistence,
+        "save_network_fingerprints",
+        dummy,
+    )
+    cache = network_fingerprinting.FingerprintCache(max_pending=2)
+    rec = {"bssid": "AA", "ssid": "net", "encryption_type": "WPA2"}
+    assert cache.add(rec)
+    assert not cache.add(dict(rec))
+    assert cache.add({**rec, "encryption_type": "WEP"})
+    assert cache.pending == 1 and not cache.due(now=0)
+    cache.add({"bssid": "BB", "ssid": "other"})
+    assert cache.due(now=0)
+    assert asyncio.run(cache.flush()) == 2
+    assert {r["bssid"] for r in dummy.saved} == {"AA", "BB"}
+    assert dummy.saved[0]["risk_level"] == "high"
+    assert cache.stats["skipped"] == 1 and cache.stats["changed"] == 3
+
+
+def test_fingerprint_cache_lru_eviction():
+    cache = network_fingerprinting.FingerprintCache(max_entries=1)
+    cache.add({"bssid": "AA"})
+    cache.add({"bssid": "BB"})
+    assert len(cache) == 1
+    # AA was evicted so it is treated as changed again
+    assert cache.add({"bssid": "AA"})
@@ -0,0 +1,142 @@
+import math
+from datetime import datetime, timezone
+from functools import reduce
+
+import pytest
+
+from piwardrive.hardware import nmea
+from piwardrive.hardware.enhanced_hardware import EnhancedGPSManager
+
+
+def sentence(body: str) -> bytes:
+    checksum = reduce(lambda acc, ch: acc ^ ord(ch), body, 0)
+    return f"${body}*{checksum:02X}\r\n".encode()
+
+
+GGA = sentence("GPGGA,123519,4807.038,N,01131.000,E,1,08,0.9,545.4,M,46.9,M,,")
+RMC = sentence("GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W")
+GSA = sentence("GPGSA,A,3,04,05,,09,12,,,24,,,,,2.5,1.3,2.1")
+GSV = sentence("GPGSV,2,1,08,01,40,083,46,02,17,308,41,12,07,344,39,14,22,228,45")
+NEXT = sentence("GPGGA,123520,4807.040,S,01131.002,W,2,09,1.0,546.0,M,46.9,M,,")
+
+
+def test_checksum_validation():
+    assert nmea.checksum_ok(GGA.strip())
+    assert nmea.checksum_ok(b"$GPGGA,123519,4807.038,N*" + GGA[-4:-2]) is False
+    assert not nmea.checksum_ok(b"$GPGGA,123519")
+    assert not nmea.checksum_ok(b"$GPGGA,123519*ZZ")
+
+
+def test_epoch_sentences_merge_into_one_fix():
+    parser = nmea.NMEAStreamParser()
+    (fix,) = parser.feed(GGA + RMC + GSA + GSV)
+    assert parser.feed(NEXT) == []
+    assert fix.latitude == pytest.approx(48.1173)
+    assert fix.longitude == pytest.approx(11.516667)
+    assert fix.altitude == 545.4
+    assert fix.speed == pytest.approx(22.4 * 1.852)
+    assert fix.bearing == 84.4
+    assert (fix.quality, fix.mode, fix.satellites) == (1, 3, 8)
+    assert (fix.pdop, fix.hdop, fix.vdop) == (2.5, 1.3, 2.1)
+    assert fix.valid and fix.date == (1994, 3, 23)
+    assert fix.timestamp == 764426119.0
+    (last,) = parser.flush()
+    assert last.latitude < 0 and last.longitude < 0
+    assert math.isnan(last.speed) and last.date is None
+    assert parser.stats["ignored"] == 1 and parser.stats["fixes"] == 2
+
+
+def test_fix_emitted_once_gga_rmc_and_gsa_arrive():
+    parser = nmea.NMEAStreamParser()
+    assert parser.feed(RMC + GGA) == []
+    (fix,) = parser.feed(GSA)
+    assert (fix.mode, fix.pdop) == (3, 2.5)
+    assert parser.feed(GSA + NEXT) == []
+    assert (fix.time, fix.mode) == (45319.0, 3)
+    # a GSA after the emitted fix belongs to the next epoch
+    (last,) = parser.flush()
+    assert (last.time, last.mode) == (45320.0, 3)
+    assert parser.stats["fixes"] == 2
+
+
+def test_epoch_without_gsa_emitted_when_next_starts():
+    parser = nmea.NMEAStreamParser()
+    assert parser.feed(GGA + RMC) == []
+    (fix,) = parser.feed(NEXT)
+    assert fix.time == 45319.0 and math.isnan(fix.pdop)
+    assert parser.feed(GSA) == []
+    assert fix.mode == 0
+
+
+def test_parse_log_keeps_late_gsa(tmp_path):
+    pytest.importorskip("numpy")
+    path = tmp_path / "track.nmea"
+    path.write_bytes(GGA + RMC + GSA + NEXT)
+    columns = nmea.parse_log(path, chunk_size=len(GGA + RMC))
+    assert columns["pdop"].tolist()[0] == 2.5
+    assert columns["mode"].tolist() == [3, 0]
+
+
+def test_sentences_split_across_reads():
+    parser = nmea.NMEAStreamParser()
+    data = GGA + RMC + NEXT
+    fixes = [fix for i in range(len(data)) for fix in parser.feed(data[i : i + 1])]
+    fixes += parser.flush()
+    assert [f.time for f in fixes] == [45319.0, 45320.0]
+
+
+def test_bad_checksum_and_noise_are_dropped():
+    parser = nmea.NMEAStreamParser()
+    corrupt = GGA.replace(b"4807.038", b"4907.038")
+    noise = b"\x00\xff" * 200  # no line ending: buffer resyncs
+    for chunk in (corrupt, noise, b"junk" + NEXT):
+        parser.feed(chunk)
+    (fix,) = parser.flush()
+    assert fix.time == 45320.0
+    assert parser.stats["bad_checksum"] == 1
+    assert parser.stats["malformed"] == 1
+
+
+def test_batch_validation_matches_scalar_path():
+    lines = [GGA, RMC, GSA, b"xx" + NEXT, GGA.replace(b"*", b"*0")] * 20
+    fast = nmea.NMEAStreamParser()
+    fast.feed(b"".join(lines))
+    slow = nmea.NMEAStreamParser()
+    for line in lines:
+        slow.feed(line)
+    assert fast.stats == slow.stats
+    assert fast.stats["bad_checksum"] == 20
+
+
+def test_parse_log_returns_columns(tmp_path):
+    np = pytest.importorskip("numpy")
+    path = tmp_path / "track.nmea"
+    path.write_bytes((GGA + RMC + GSA + NEXT) * 3)
+    columns = nmea.parse_log(path, chunk_size=64)
+    assert set(columns) == set(nmea.FIELDS)
+    assert len(columns["latitude"]) == 6
+    assert columns["quality"].dtype == np.int32
+    assert columns["quality"].tolist() == [1, 2] * 3
+    assert np.isnan(columns["timestamp"][1])
+    assert columns["timestamp"][0] == 764426119.0
+
+
+def test_gps_manager_converts_merged_fix():
+    parser = nmea.NMEAStreamParser()
+    (fix,) = parser.feed(GGA + RMC + GSA)
+    assert parser.flush() == []
+    data = EnhancedGPSManager()._fix_to_gps_data(fix)
+    assert data.latitude == pytest.approx(48.1173)
+    assert data.speed == pytest.approx(41.4848)
+    assert (data.vdop, data.fix_type) == (2.1, "gps")
+    assert data.timestamp == datetime(1994, 3, 23, 12, 35, 19, tzinfo=timezone.utc)
+    fix.date = None
+    data = EnhancedGPSManager()._fix_to_gps_data(fix)
+    assert data.timestamp.tzinfo is timezone.utc
+    assert (data.timestamp.hour, data.timestamp.minute) == (12, 35)
+
+
+def test_convert_coordinate_uses_minutes_width():
+    manager = EnhancedGPSManager()
+    assert manager._convert_coordinate("4807.03812", "N") == pytest.approx(48.1173020)
+    assert manager._convert_coordinate("00130.000", "W") == pytest.approx(-1.5)
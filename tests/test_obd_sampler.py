@@ -0,0 +1,141 @@
+import time
+
+import pytest
+
+import piwardrive.vehicle_sensors as vs
+from piwardrive.obd_sampler import OBDSampler, parse_response
+
+
+class FakeELM327:
+    """Minimal ELM327 emulator answering mode 01 requests over CAN."""
+
+    def __init__(self, values, multi_pid=True, latency=0.0):
+        self.values = values  # PID code -> data bytes
+        self.multi_pid = multi_pid
+        self.latency = latency
+        self.commands = []
+        self._reply = b""
+
+    def write(self, data):
+        cmd = data.decode().strip().upper()
+        self.commands.append(cmd)
+        if cmd.startswith("AT"):
+            text = "ELM327 v1.5" if cmd == "ATZ" else "OK"
+        else:
+            text = self._mode01(cmd.split()[1:])
+        self._reply = (text + "\r\r>").encode()
+        return len(data)
+
+    def read_until(self, expected=b"\n", size=None):
+        time.sleep(self.latency)
+        reply, self._reply = self._reply, b""
+        return reply
+
+    def _mode01(self, pids):
+        if len(pids) > 1 and not self.multi_pid:
+            pids = pids[:1]
+        payload = [0x41]
+        for pid in pids:
+            code = int(pid, 16)
+            if code in self.values:
+                payload += [code, *self.values[code]]
+        if len(payload) == 1:
+            return "NO DATA"
+        hexed = [f"{b:02X}" for b in payload]
+        if len(hexed) <= 7:
+            return " ".join(hexed)
+        # ISO-TP: first frame carries 6 bytes, consecutive frames 7
+        lines = [f"{len(hexed):03X}", "0: " + " ".join(hexed[:6])]
+        rest = hexed[6:]
+        for i in range(0, len(rest), 7):
+            chunk = rest[i : i + 7]
+            chunk += ["00"] * (7 - len(chunk))
+            lines.append(f"{i // 7 + 1}: " + " ".join(chunk))
+        return "\r".join(lines)
+
+
+VALUES = {0x0D: [0x32], 0x0C: [0x1A, 0xF8], 0x04: [0x80], 0x05: [0x5A]}
+
+
+def test_parse_multi_frame_and_multiple_ecus():
+    text = "00A\r0: 41 0D 32 0C 1A F8\r1: 04 80 05 5A 00 00 00\r41 0D 33"
+    parsed = parse_response(text, [0x0D, 0x0C, 0x04, 0x05])
+    assert parsed == {0x0D: b"\x32", 0x0C: b"\x1a\xf8", 0x04: b"\x80", 0x05: b"\x5a"}
+    assert parse_response("NO DATA", [0x0D]) == {}
+
+
+def test_multi_pid_request_decodes_values():
+    adapter = FakeELM327(VALUES)
+    sampler = OBDSampler(
+        adapter, rates={"speed": 10, "rpm": 10, "engine_load": 10, "coolant_temp": 1}
+    )
+    sampler.connect()
+    assert sampler.multi_pid
+    adapter.commands.clear()
+    assert sampler.poll_once() == 4
+    assert adapter.commands == ["01 0D 0C 04 05"]
+    assert sampler.snapshot() == {
+        "speed": 50.0,
+        "rpm": 1726.0,
+        "engine_load": pytest.approx(50.2, abs=0.1),
+        "coolant_temp": 50.0,
+    }
+
+
+def test_falls_back_to_single_pid_requests():
+    adapter = FakeELM327(VALUES, multi_pid=False)
+    sampler = OBDSampler(adapter, rates={"speed": 10, "rpm": 10})
+    sampler.connect()
+    assert not sampler.multi_pid
+    adapter.commands.clear()
+    sampler.poll_once()
+    assert adapter.commands == ["01 0D", "01 0C"]
+    assert sampler.latest("rpm") == 1726.0
+
+
+def test_per_pid_rates_and_ring_buffer():
+    adapter = FakeELM327(VALUES)
+    sampler = OBDSampler(adapter, rates={"speed": 8, "engine_load": 1}, history=3)
+    sampler.connect()
+    adapter.commands.clear()
+    for step in range(8):
+        sampler.poll_once(now=1000 + step * 0.125)
+    assert adapter.commands.count("01 0D 04") == 1
+    assert adapter.commands.count("01 0D") == 7
+    assert len(sampler.series("speed")) == 3
+    assert sampler.metrics()["pids"]["engine_load"]["samples"] == 1
+
+
+def test_stale_value_is_read_from_adapter(monkeypatch):
+    adapter = FakeELM327(dict(VALUES))
+    sampler = OBDSampler(adapter, rates={"speed": 1})
+    sampler.connect()
+    sampler.poll_once(now=0)
+    monkeypatch.setattr(vs, "_SAMPLER", sampler)
+    monkeypatch.setattr(vs, "SAMPLE_MAX_AGE", 0.0)
+    adapter.values[0x0D] = [0x3C]
+    assert vs.read_speed_obd() == 60.0
+    assert sampler.read("throttle") is None  # not supported by the vehicle
+    assert sampler.read("bogus") is None
+
+
+def test_background_sampler_feeds_read_helpers(monkeypatch):
+    adapter = FakeELM327(VALUES, latency=0.002)
+    monkeypatch.setattr(vs, "obd", None)
+    sampler = vs.start_obd_sampler(adapter, rates={"speed": 50, "rpm": 50})
+    try:
+        deadline = time.time() + 2
+        while sampler.metrics()["pids"]["speed"]["samples"] < 5:
+            assert time.time() < deadline
+            time.sleep(0.01)
+        assert vs.read_speed_obd() == 50.0
+        assert vs.read_rpm_obd() == 1726.0
+        # not sampled: queried through the sampler's connection
+        assert vs.read_engine_load_obd() == pytest.approx(50.2, abs=0.1)
+        assert "01 04" in adapter.commands
+        metrics = sampler.metrics()
+        assert metrics["latency_avg_ms"] >= 2
+        assert metrics["pids"]["speed"]["rate_hz"] > 0
+    finally:
+        vs.stop_obd_sampler()
+    assert vs.get_obd_sampler() is None
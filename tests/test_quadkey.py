@@ -0,0 +1,32 @@
+import random
+
+from piwardrive import quadkey
+
+
+def test_round_trip_and_parent():
+    key = quadkey.encode(48.8584, 2.2945, 16)
+    x, y = quadkey.tile_xy(48.8584, 2.2945, 16)
+    assert quadkey.to_xy(key) == (x, y)
+    assert quadkey.parent(key, 16, 10) == quadkey.encode(48.8584, 2.2945, 10)
+    min_lat, min_lon, max_lat, max_lon = quadkey.bounds(key, 16)
+    assert min_lat <= 48.8584 <= max_lat and min_lon <= 2.2945 <= max_lon
+    lat, lon = quadkey.center(key, 16)
+    assert min_lat < lat < max_lat and min_lon < lon < max_lon
+
+
+def test_bing_digit_order():
+    # Bing Maps documents tile (3, 5) at level 3 as quadkey "213"
+    assert quadkey.from_xy(3, 5) == int("213", 4)
+
+
+def test_ranges_cover_bbox():
+    rng = random.Random(3)
+    bbox = (40.0, -75.2, 40.3, -74.8)
+    spans = quadkey.ranges(bbox, max_tiles=8)
+    assert len(spans) <= 8
+    assert all(lo <= hi for lo, hi in spans)
+    for _ in range(500):
+        lat = rng.uniform(bbox[0], bbox[2])
+        lon = rng.uniform(bbox[1], bbox[3])
+        key = quadkey.encode(lat, lon)
+        assert any(lo <= key <= hi for lo, hi in spans)
@@ -0,0 +1,281 @@
+import asyncio
+import hashlib
+import importlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+import zlib
+
+import pytest
+
+uvicorn = pytest.importorskip("uvicorn")
+
+import remote_sync.delta as delta  # noqa: E402
+
+
+def _create_db(path, health=50, detections=300):
+    with sqlite3.connect(path) as db:
+        db.execute(
+            """CREATE TABLE health_records (
+                timestamp TEXT PRIMARY KEY, cpu_temp REAL, cpu_percent REAL,
+                memory_percent REAL, disk_percent REAL)"""
+        )
+        db.execute(
+            """CREATE TABLE wifi_detections (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, bssid TEXT, ssid TEXT,
+                signal_strength_dbm INTEGER, latitude REAL, longitude REAL)"""
+        )
+        db.executemany(
+            "INSERT INTO health_records VALUES (?, ?, ?, ?, ?)",
+            [(f"t{i:05d}", 40.0 + i % 5, 10.0, 50.0, 20.0) for i in range(health)],
+        )
+        _add_detections(db, 0, detections)
+
+
+def _add_detections(db, start, count):
+    db.executemany(
+        "INSERT INTO wifi_detections (bssid, ssid, signal_strength_dbm, latitude, "
+        "longitude) VALUES (?, ?, ?, ?, ?)",
+        [
+            (f"00:11:22:33:{i // 256:02x}:{i % 256:02x}", f"net{i % 7}", -40 - i % 50)
+            + (51.0 + i * 1e-5, -0.1 - i * 1e-5)
+            for i in range(start, start + count)
+        ],
+    )
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """Run the aggregation service on a free local port."""
+    monkeypatch.setenv("PW_AGG_DIR", str(tmp_path / "agg"))
+    module = importlib.reload(importlib.import_module("piwardrive.aggregation_service"))
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    srv = uvicorn.Server(
+        uvicorn.Config(module.app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=srv.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 10
+    while not srv.started:
+        assert time.time() < deadline
+        time.sleep(0.02)
+    yield f"http://127.0.0.1:{port}", module
+    srv.should_exit = True
+    thread.join(5)
+
+
+def _synced(module, table):
+    with sqlite3.connect(module.DB_PATH) as db:
+        return db.execute(f"SELECT COUNT(*) FROM synced_{table}").fetchone()[0]
+
+
+def test_codec_roundtrip():
+    blocks = [{"table": "gps_tracks", "columns": ["a"], "rowids": [1], "data": [[2]]}]
+    for compression in ("zlib",) + (("zstd",) if delta.zstandard else ()):
+        data, encoding, raw = delta.encode_batch("unit", blocks, compression)
+        payload = delta.decode_batch(data, encoding)
+        assert payload["unit"] == "unit" and payload["tables"] == blocks
+        assert raw > 0
+
+
+def test_delta_sync_end_to_end(server, tmp_path):
+    url, module = server
+    db_path = tmp_path / "local.db"
+    _create_db(db_path)
+    delta.reset_delta_metrics()
+
+    synced = asyncio.run(
+        delta.sync_deltas(str(db_path), url, unit_id="pi-1", batch_rows=200)
+    )
+    assert synced == {"health_records": 50, "wifi_detections": 300}
+    assert _synced(module, "wifi_detections") == 300
+    with sqlite3.connect(module.DB_PATH) as db:
+        assert db.execute("SELECT COUNT(*) FROM health_records").fetchone()[0] == 50
+
+    metrics = delta.get_delta_metrics()
+    assert metrics["batches"] == 2
+    assert metrics["compression_ratio"] > 1
+    assert metrics["bytes_per_sec"] > 0
+    assert metrics["lag_rows"] == {"health_records": 0, "wifi_detections": 0}
+
+    # only new rows are sent on the next run
+    with sqlite3.connect(db_path) as db:
+        _add_detections(db, 300, 5)
+    synced = asyncio.run(delta.sync_deltas(str(db_path), url, unit_id="pi-1"))
+    assert synced == {"wifi_detections": 5}
+    assert _synced(module, "wifi_detections") == 305
+
+
+def test_interrupted_upload_resumes(server, tmp_path, monkeypatch):
+    url, module = server
+    db_path = tmp_path / "local.db"
+    _create_db(db_path, health=0, detections=2000)
+    delta.reset_delta_metrics()
+
+    real_put = delta._put_chunk
+    calls = []
+
+    async def flaky_put(session, chunk_url, offset, chunk, headers):
+        calls.append(offset)
+        if len(calls) == 3:
+            raise delta.aiohttp.ClientConnectionError("link dropped")
+        return await real_put(session, chunk_url, offset, chunk, headers)
+
+    monkeypatch.setattr(delta, "_put_chunk", flaky_put)
+    with pytest.raises(delta.aiohttp.ClientError):
+        asyncio.run(delta.sync_deltas(str(db_path), url, chunk_size=1024, retries=1))
+    state = delta._load_delta_state(str(db_path) + ".sync")
+    assert state["pending"] is not None and not state["watermarks"]
+
+    synced = asyncio.run(delta.sync_deltas(str(db_path), url, chunk_size=1024))
+    assert synced == {"wifi_detections": 2000}
+    assert _synced(module, "wifi_detections") == 2000
+    assert delta.get_delta_metrics()["resumed_bytes"] == 2048
+    # the resumed upload restarted at the server's offset, not at zero
+    assert calls[3] == 2048
+
+
+def test_merge_waits_for_ingest_queue(server, tmp_path, monkeypatch):
+    url, module = server
+    db_path = tmp_path / "local.db"
+    _create_db(db_path, health=0, detections=20)
+    monkeypatch.setattr(delta, "INITIAL_RETRY_DELAY", 0.01)
+    # the queue is full and has no workers until the next upload starts one
+    queue = module.IngestQueue(workers=0, maxsize=1)
+    queue.submit_sync("0" * 32, "pi-0", [])
+    queue.workers = 1
+    monkeypatch.setattr(module, "ingest", queue)
+
+    synced = asyncio.run(delta.sync_deltas(str(db_path), url, unit_id="pi-1"))
+    assert synced == {"wifi_detections": 20}
+    assert _synced(module, "wifi_detections") == 20
+    assert queue.stats["rejected"] == 1 and queue.stats["merged"] == 2
+    assert not os.listdir(module.SYNC_DIR)
+
+
+def _save_ap_cache(db, records):
+    """Rewrite ``ap_cache`` the way ``persistence.save_ap_cache`` does."""
+    db.execute("DELETE FROM ap_cache")
+    db.executemany("INSERT INTO ap_cache VALUES (?, ?, ?, ?, ?, ?)", records)
+
+
+def test_rewritten_ap_cache_syncs_updates(server, tmp_path):
+    url, module = server
+    db_path = tmp_path / "local.db"
+    with sqlite3.connect(db_path) as db:
+        db.execute(
+            """CREATE TABLE ap_cache (
+                bssid TEXT PRIMARY KEY, ssid TEXT, encryption TEXT,
+                lat REAL, lon REAL, last_time INTEGER)"""
+        )
+        _save_ap_cache(
+            db,
+            [
+                ("aa", "one", "WPA2", 51.0, -0.1, 100),
+                ("bb", "two", "WPA2", 51.1, -0.2, 100),
+                ("cc", "three", "OPEN", 51.2, -0.3, 101),
+            ],
+        )
+    synced = asyncio.run(
+        delta.sync_deltas(str(db_path), url, unit_id="pi-1", batch_rows=1)
+    )
+    assert synced == {"ap_cache": 3}
+
+    # the rewrite restarts rowids; only the moved AP is newer than the watermark
+    with sqlite3.connect(db_path) as db:
+        _save_ap_cache(
+            db,
+            [
+                ("bb", "two", "WPA2", 52.0, -1.0, 200),
+                ("aa", "one", "WPA2", 51.0, -0.1, 100),
+                ("cc", "three", "OPEN", 51.2, -0.3, 101),
+            ],
+        )
+    synced = asyncio.run(delta.sync_deltas(str(db_path), url, unit_id="pi-1"))
+    assert synced == {"ap_cache": 1}
+    with sqlite3.connect(module.DB_PATH) as db:
+        rows = db.execute(
+            "SELECT bssid, lat, last_time FROM synced_ap_cache ORDER BY bssid"
+        ).fetchall()
+    assert rows == [("aa", 51.0, 100), ("bb", 52.0, 200), ("cc", 51.2, 101)]
+
+
+def test_server_rejects_corrupt_chunk(server):
+    url, _module = server
+    import aiohttp
+
+    async def _put():
+        async with aiohttp.ClientSession() as session:
+            headers = {
+                "X-Sync-Total": "3",
+                "X-Sync-SHA256": "0" * 64,
+                "X-Sync-Encoding": "msgpack+zlib",
+                "X-Chunk-SHA256": "0" * 64,
+            }
+            async with session.put(
+                f"{url}/sync/{'a' * 32}", data=b"abc", headers=headers
+            ) as resp:
+                return resp.status
+
+    assert asyncio.run(_put()) == 422
+
+
+async def _put_raw(url, upload_id, data, total=None, digest=None, offset=0):
+    import aiohttp
+
+    headers = {
+        "X-Sync-Total": str(len(data) if total is None else total),
+        "X-Sync-SHA256": digest or hashlib.sha256(data).hexdigest(),
+        "X-Sync-Encoding": "json+zlib",
+        "X-Chunk-SHA256": hashlib.sha256(data).hexdigest(),
+    }
+    async with aiohttp.ClientSession() as session:
+        async with session.put(
+            f"{url}/sync/{upload_id}",
+            params={"offset": str(offset)},
+            data=data,
+            headers=headers,
+        ) as resp:
+            return resp.status, await resp.json()
+
+
+def test_server_limits_upload_size(server, monkeypatch):
+    url, module = server
+    status, _ = asyncio.run(
+        _put_raw(url, "b" * 32, b"abc", total=module.MAX_SYNC_UPLOAD + 1)
+    )
+    assert status == 413
+
+    # a small upload that inflates past the limit is refused while decoding
+    monkeypatch.setattr(module, "MAX_SYNC_DECODED", 1024)
+    bomb = zlib.compress(b"[" + b" " * 100_000 + b"]")
+    status, body = asyncio.run(_put_raw(url, "c" * 32, bomb))
+    assert status == 413 and "exceeds" in body["detail"]
+
+
+def test_server_discards_part_on_new_digest(server):
+    url, module = server
+    upload_id = "d" * 32
+    status, body = asyncio.run(_put_raw(url, upload_id, b"abc", total=6))
+    assert status == 200 and body["received"] == 3
+
+    # the unit rebuilt its batch under the same id: the old bytes are dropped
+    status, body = asyncio.run(
+        _put_raw(url, upload_id, b"xyz", total=6, digest="1" * 64, offset=3)
+    )
+    assert status == 409 and body["received"] == 0
+    assert not os.path.exists(os.path.join(module.SYNC_DIR, f"{upload_id}.part"))
+
+
+def test_decode_batch_limits_size():
+    blocks = [{"table": "gps_tracks", "columns": ["a"], "rowids": [1], "data": [[2]]}]
+    data, encoding, raw = delta.encode_batch("unit", blocks, "zlib")
+    assert delta.decode_batch(data, encoding, max_size=raw)["unit"] == "unit"
+    with pytest.raises(delta.PayloadTooLarge):
+        delta.decode_batch(data, encoding, max_size=raw - 1)
+    with pytest.raises(zlib.error):
+        delta.decode_batch(data[:-4], encoding, max_size=raw)
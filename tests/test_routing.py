@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from scipy.sparse.csgraph import dijkstra
+
+from piwardrive.navigation.offline_navigation import (
+    Pathfinder,
+    PathfindingAlgorithm,
+    Position,
+)
+from piwardrive.navigation.routing import RoutingGraph
+
+
+def _grid_graph(size=20, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = [f"{r}:{c}" for r in range(size) for c in range(size)]
+    coords = [(c * 10.0, r * 10.0, 0.0) for r in range(size) for c in range(size)]
+    edges = []
+    for r in range(size):
+        for c in range(size):
+            for dr, dc in ((0, 1), (1, 0)):
+                if r + dr < size and c + dc < size:
+                    a, b = f"{r}:{c}", f"{r + dr}:{c + dc}"
+                    edges.append((a, b, 10.0 * rng.uniform(1.0, 3.0)))
+                    edges.append((b, a, 10.0 * rng.uniform(1.0, 3.0)))
+    return ids, edges, coords
+
+
+def _path_cost(graph, path):
+    total = 0.0
+    for a, b in zip(path, path[1:]):
+        row = slice(graph.indptr[a], graph.indptr[a + 1])
+        total += graph.weights[row][graph.indices[row] == b].min()
+    return total
+
+
+@pytest.mark.parametrize("landmarks", [0, 1, 4])
+def test_shortest_path_matches_dijkstra(landmarks):
+    graph = RoutingGraph.from_edges(*_grid_graph())
+    graph.build_landmarks(landmarks)
+    exact = dijkstra(graph.matrix, indices=[0, 57, 213])
+    for row, source in enumerate([0, 57, 213]):
+        for target in (399, 20, 187):
+            cost, path = graph.shortest_path(source, target)
+            assert path[0] == source and path[-1] == target
+            assert cost == pytest.approx(exact[row, target])
+            assert _path_cost(graph, path) == pytest.approx(cost)
+
+
+def test_landmark_bounds_are_admissible():
+    graph = RoutingGraph.from_edges(*_grid_graph())
+    graph.build_landmarks(6)
+    exact = dijkstra(graph.matrix)
+    for target in (0, 150, 399):
+        assert (graph.potential(target) <= exact[:, target] + 1e-9).all()
+
+
+def test_parallel_edges_keep_lightest():
+    graph = RoutingGraph.from_edges("abc", [("a", "b", 5.0), ("a", "b", 2.0)])
+    assert graph.weights.tolist() == [2.0]
+    assert graph.shortest_path(0, 1) == (2.0, [0, 1])
+
+
+def test_unreachable_and_components():
+    edges = [("a", "b", 1.0), ("c", "d", 1.0)]
+    graph = RoutingGraph.from_edges("abcd", edges)
+    graph.build_landmarks(2)
+    assert graph.shortest_path(0, 3) is None
+    assert graph.shortest_path(1, 0) is None
+    assert graph.shortest_path(2, 3) == (1.0, [2, 3])
+
+
+def test_many_to_many_matches_dijkstra():
+    graph = RoutingGraph.from_edges(*_grid_graph(12))
+    exact = dijkstra(graph.matrix)
+    sources, targets = [0, 5, 77, 143], [3, 140]
+    table = graph.many_to_many(sources, targets, block_size=3)
+    assert np.allclose(table, exact[np.ix_(sources, targets)])
+    table = graph.many_to_many(targets, sources, block_size=1)
+    assert np.allclose(table, exact[np.ix_(targets, sources)])
+
+
+def test_pathfinder_uses_compiled_graph():
+    finder = Pathfinder()
+    ids, edges, coords = _grid_graph(8)
+    for node, (x, y, _) in zip(ids, coords):
+        finder.add_node(node, Position(x, y))
+    for a, b, weight in edges:
+        finder.add_edge(a, b, weight)
+    compiled = finder.compile()
+    assert finder.compile() is compiled
+    star = finder.find_path("0:0", "7:7")
+    plain = finder.find_path("0:0", "7:7", PathfindingAlgorithm.DIJKSTRA)
+    cost = finder.distance_matrix(["0:0"], ["7:7"])[0, 0]
+    assert star[0] == "0:0" and star[-1] == "7:7"
+    star_cost = _path_cost(compiled, [compiled.index[n] for n in star])
+    plain_cost = _path_cost(compiled, [compiled.index[n] for n in plain])
+    assert star_cost == pytest.approx(cost)
+    assert plain_cost == pytest.approx(cost)
+
+    finder.add_edge("0:0", "7:7", 1.0)
+    assert finder.compile() is not compiled
+    assert finder.find_path("0:0", "7:7") == ["0:0", "7:7"]
+    assert finder.find_path("0:0", "missing") is None
@@ -0,0 +1,101 @@
+import dataclasses
+import datetime as dt
+
+import numpy as np
+import pytest
+
+from piwardrive import fastjson, serialization
+from piwardrive.serialization import get_codec, negotiate, negotiate_subprotocol
+
+
+@dataclasses.dataclass
+class Point:
+    lat: float
+    lon: float
+
+
+PAYLOAD = {
+    "aps": [{"bssid": "aa:bb", "ssid": "cafe", "signal_dbm": -51, "lat": 1.5}],
+    "rssi": np.array([-40, -70], dtype=np.int16),
+    "mean": np.float32(0.5),
+    "when": dt.datetime(2024, 1, 2, 3, 4, 5),
+    "tags": {"wpa2"},
+    "fix": Point(1.0, 2.0),
+}
+EXPECTED = {
+    "aps": PAYLOAD["aps"],
+    "rssi": [-40, -70],
+    "mean": 0.5,
+    "when": "2024-01-02T03:04:05",
+    "tags": ["wpa2"],
+    "fix": {"lat": 1.0, "lon": 2.0},
+}
+
+
+@pytest.mark.parametrize("name", serialization.available_codecs(True))
+def test_round_trip_numpy_aware(name):
+    codec = get_codec(name)
+    data = codec.dumps(PAYLOAD)
+    assert isinstance(data, bytes)
+    assert codec.loads(data) == EXPECTED
+
+
+def test_fastjson_dumpb_returns_bytes():
+    assert fastjson.dumpb({"a": [1, 2]}) == b'{"a":[1,2]}'
+    assert fastjson.loads(fastjson.dumpb({1: "x"})) == {"1": "x"}
+    assert fastjson.dumps({"a": 1}) == '{"a":1}'
+
+
+def test_negotiation():
+    pytest.importorskip("msgpack")
+    assert negotiate(None).name == "json"
+    assert negotiate("*/*").name == "json"
+    assert negotiate("application/msgpack").name == "msgpack"
+    accept = "application/json;q=0.5, application/msgpack;q=0.9"
+    assert negotiate(accept).name == "msgpack"
+    assert negotiate("text/html, application/json;q=0.1").name == "json"
+    assert negotiate_subprotocol(["v2", "msgpack"]).name == "msgpack"
+    # trusted-only codecs are never picked by clients
+    assert negotiate_subprotocol(["pickle"]) is None
+    assert negotiate("application/x-python-pickle").name == "json"
+
+
+def test_registry_rejects_duplicates_and_unknown():
+    with pytest.raises(ValueError):
+        serialization.register_codec(get_codec("json"))
+    with pytest.raises(ValueError):
+        get_codec("yaml")
+
+
+def test_codec_response_and_websocket(monkeypatch):
+    from fastapi import FastAPI, Request, WebSocket
+    from fastapi.testclient import TestClient
+
+    app = FastAPI()
+
+    @app.get("/aps")
+    async def aps(request: Request):
+        return serialization.encoded_response(
+            {"aps": PAYLOAD["aps"]}, request.headers.get("accept")
+        )
+
+    @app.websocket("/ws")
+    async def ws(websocket: WebSocket):
+        codec = serialization.negotiate_subprotocol(
+            websocket.scope.get("subprotocols") or []
+        )
+        await websocket.accept(subprotocol=codec.name if codec else None)
+        await serialization.send_encoded(
+            websocket, {"n": 1}, codec or get_codec("json")
+        )
+        await websocket.close()
+
+    client = TestClient(app)
+    assert client.get("/aps").json() == {"aps": PAYLOAD["aps"]}
+    with client.websocket_connect("/ws") as conn:
+        assert conn.receive_text() == '{"n":1}'
+    if "msgpack" in serialization.available_codecs():
+        resp = client.get("/aps", headers={"Accept": "application/msgpack"})
+        assert get_codec("msgpack").loads(resp.content) == {"aps": PAYLOAD["aps"]}
+        with client.websocket_connect("/ws", subprotocols=["msgpack"]) as conn:
+            assert get_codec("msgpack").loads(conn.receive_bytes()) == {"n": 1}
@@ -93,6 +93,14 @@ def test_status_auth_missing_credentials(monkeypatch) -> None:
         assert resp.status_code == 401
 
 
+@pytest.fixture(autouse=True)
+def _reset_metrics_collector():
+    from piwardrive.api.system import monitoring
+
+    monitoring.collector.reset()
+    yield
+
+
 def test_widget_metrics_endpoint() -> None:
     async def fake_fetch() -> MetricsResult:
         return MetricsResult([{"signal_dbm": -10}], [], 5)
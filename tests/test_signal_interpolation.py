@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from piwardrive.direction_finding.algorithms import SignalMapper
+from piwardrive.direction_finding.config import (
+    InterpolationMethod,
+    SignalMappingConfig,
+)
+from piwardrive.direction_finding.interpolation import (
+    SpatialInterpolator,
+    fit_variogram,
+    grid_axes,
+)
+
+BOUNDS = (40.0, -74.0, 40.01, -73.99)
+
+
+def _samples(count=300, seed=1):
+    rng = np.random.default_rng(seed)
+    lats = 40.0 + rng.random(count) * 0.01
+    lons = -74.0 + rng.random(count) * 0.01
+    # linear field in dBm
+    values = -50.0 - 1000.0 * (lats - 40.0) - 500.0 * (lons + 74.0)
+    return lats, lons, values
+
+
+@pytest.mark.parametrize("method", ["idw", "kriging", "spline"])
+@pytest.mark.parametrize("max_neighbors", [1000, 16])
+def test_interpolator_reproduces_samples(method, max_neighbors):
+    lats, lons, values = _samples()
+    interp = SpatialInterpolator(
+        lats, lons, values, method=method, max_neighbors=max_neighbors
+    )
+    assert np.allclose(interp.predict(lats[:20], lons[:20]), values[:20], atol=1e-6)
+
+
+@pytest.mark.parametrize("max_neighbors", [1000, 16])
+def test_kriging_recovers_linear_field(max_neighbors):
+    lats, lons, values = _samples()
+    interp = SpatialInterpolator(
+        lats, lons, values, method="kriging", max_neighbors=max_neighbors
+    )
+    est = interp.predict([40.005, 40.002], [-73.995, -73.998])
+    assert est == pytest.approx([-57.5, -53.0], abs=0.05)
+
+
+def test_predict_blocks_match_single_pass():
+    lats, lons, values = _samples()
+    whole = SpatialInterpolator(lats, lons, values, method="kriging")
+    blocked = SpatialInterpolator(
+        lats, lons, values, method="kriging", block_size=7, variogram=whole.variogram
+    )
+    q_lat, q_lon = np.meshgrid(np.linspace(40, 40.01, 9), np.linspace(-74, -73.99, 9))
+    assert np.allclose(whole.predict(q_lat, q_lon), blocked.predict(q_lat, q_lon))
+
+
+def test_grid_tiles_cover_render():
+    lats, lons, values = _samples()
+    interp = SpatialInterpolator(lats, lons, values)
+    lat_axis, lon_axis, full = interp.render(BOUNDS, 20.0, tile_size=16)
+    assert full.shape == (len(lat_axis), len(lon_axis))
+    seen = np.zeros(full.shape, dtype=int)
+    for tile in interp.grid(BOUNDS, 20.0, tile_size=16):
+        assert max(tile.values.shape) <= 16
+        rows, cols = tile.values.shape
+        seen[tile.row : tile.row + rows, tile.col : tile.col + cols] += 1
+        assert np.array_equal(tile.lats, lat_axis[tile.row : tile.row + rows])
+        assert np.array_equal(tile.lons, lon_axis[tile.col : tile.col + cols])
+    assert (seen == 1).all()
+
+
+def test_grid_axes_spacing():
+    lat_axis, lon_axis = grid_axes(BOUNDS, 10.0)
+    assert np.diff(lat_axis)[0] * 111195 == pytest.approx(10.0, rel=1e-3)
+    assert lat_axis[-1] <= BOUNDS[2] and lon_axis[-1] <= BOUNDS[3]
+    with pytest.raises(ValueError):
+        grid_axes(BOUNDS, 0)
+
+
+def test_fit_variogram_range():
+    rng = np.random.default_rng(0)
+    xy = rng.random((400, 2)) * 1000
+    values = np.sin(xy[:, 0] / 150) + np.cos(xy[:, 1] / 150)
+    vario = fit_variogram(xy, values)
+    assert vario(np.array(0.0)) == 0.0
+    assert 50 < vario.range < 2000
+    assert vario(np.array(1e6)) == pytest.approx(vario.nugget + vario.sill)
+
+
+def test_signal_mapper_kriging_differs_from_idw():
+    lats, lons, values = _samples(60)
+    results = {}
+    for method in (InterpolationMethod.KRIGING, InterpolationMethod.IDW):
+        mapper = SignalMapper(SignalMappingConfig(interpolation_method=method))
+        for lat, lon, value in zip(lats, lons, values):
+            mapper.add_measurement("aa", (lat, lon), value)
+        results[method] = mapper.interpolate_signal("aa", (40.005, -73.995))
+    assert results[InterpolationMethod.KRIGING] == pytest.approx(-57.5, abs=0.05)
+    assert results[InterpolationMethod.KRIGING] != results[InterpolationMethod.IDW]
+
+
+def test_signal_mapper_reuses_variogram_and_tiles():
+    lats, lons, values = _samples(100)
+    mapper = SignalMapper(SignalMappingConfig(tile_size=8))
+    assert mapper.interpolate_signal("aa", (40.0, -74.0)) is None
+    for lat, lon, value in zip(lats, lons, values):
+        mapper.add_measurement("aa", (lat, lon), value)
+    first = mapper.get_interpolator("aa")
+    assert mapper.get_interpolator("aa") is first
+    mapper.add_measurement("aa", (40.001, -73.999), -52.0)
+    second = mapper.get_interpolator("aa")
+    assert second is not first
+    assert second.variogram is first.variogram
+    tiles = list(mapper.signal_grid("aa", BOUNDS, resolution=100.0))
+    assert tiles and all(max(t.values.shape) <= 8 for t in tiles)
+    many = mapper.interpolate_many("aa", lats[:5], lons[:5])
+    assert np.allclose(many, values[:5], atol=1e-6)
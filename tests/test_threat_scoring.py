@@ -0,0 +1,150 @@
+import random
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+
+from piwardrive.ml import threat_detection as td  # noqa: E402
+
+ENCRYPTIONS = ["WPA2", "wpa2-psk", "WPA3", "WPA2/WPA3", "WPA", "WEP", "Open", ""]
+ENCRYPTIONS += ["OPEN", "open", "WPA-TKIP", "OWE", "Unknown", "wep/wpa2"]
+SSIDS = ["HomeWiFi", "", "_hidden", "Free Hotspot", "TestNet", "cafe#1", "guest"]
+SSIDS += ["EvilCorp", "office", "office"]
+
+
+def _scan(count=400, seed=3):
+    rng = random.Random(seed)
+    scan = []
+    for n in range(count):
+        net = {
+            "bssid": ":".join(f"{rng.randrange(256):02x}" for _ in range(6)),
+            "ssid": rng.choice(SSIDS),
+            "signal_strength": rng.randint(-95, -20),
+            "encryption": rng.choice(ENCRYPTIONS),
+            "channel": rng.choice([1, 6, 11, 36]),
+            "vendor": rng.choice(["Cisco", "Unknown", "", "Apple"]),
+        }
+        if n % 7 == 0:
+            net["wps_enabled"] = True
+        if n % 11 == 0:
+            del net["encryption"]
+        if n % 13 == 0:
+            net["bssid"] = "zz" + net["bssid"][2:]
+        if n % 17 == 0:
+            net["bssid"] = "02:11"
+        scan.append(net)
+    return scan
+
+
+def _strip(assessment):
+    data = assessment.to_dict()
+    data.pop("timestamp")
+    return data
+
+
+def test_score_batch_matches_scalar():
+    scorer = td.RiskScorer()
+    scan = _scan()
+    batch = scorer.score_batch(scan)
+    assert len(batch) == len(scan)
+    for net, assessment in zip(scan, batch):
+        assert _strip(assessment) == _strip(scorer.calculate_network_risk(net))
+    expected = [scorer.calculate_network_risk(n).risk_level for n in scan]
+    assert batch.risk_levels == expected
+
+
+def test_flagged_and_summary_counts():
+    scorer = td.RiskScorer()
+    scan = _scan(200, seed=5)
+    batch = scorer.score_batch(scan)
+    scalar = [scorer.calculate_network_risk(n) for n in scan]
+    flagged = batch.flagged("High")
+    assert flagged.tolist() == [
+        i for i, a in enumerate(scalar) if a.risk_level in ("High", "Critical")
+    ]
+    issues = [not all(a.compliance_status.values()) for a in scalar]
+    assert batch.compliance_issues.tolist() == issues
+    assert sum(batch.level_counts().values()) == len(scan)
+
+
+def test_empty_scan():
+    batch = td.RiskScorer().score_batch([])
+    assert len(batch) == 0
+    assert batch.flagged().size == 0
+    assert td.AnomalyDetector().extract_features([]).shape == (0, 15)
+
+
+def _reference_features(scan_data):
+    rows = []
+    for item in scan_data:
+        enc = item.get("encryption", "")
+        ssid = item.get("ssid", "")
+        rows.append(
+            [
+                item.get("signal_strength", -100),
+                item.get("channel", 0),
+                item.get("frequency", 0),
+                len(ssid),
+                enc == "Open",
+                enc.startswith("WEP"),
+                enc.startswith("WPA"),
+                enc.startswith("WPA2"),
+                enc.startswith("WPA3"),
+                len(item.get("bssid", "").split(":")),
+                ssid.startswith("_"),
+                any(c in ssid for c in "!@#$"),
+                item.get("beacon_interval", 100),
+                len(item.get("vendor_elements", [])),
+                bool(item.get("wps_enabled", False)),
+            ]
+        )
+    return np.array(rows, dtype=float)
+
+
+def test_extract_features_matches_row_builder():
+    scan = _scan(100)
+    scan[0]["vendor_elements"] = ["a", "b"]
+    scan[1]["beacon_interval"] = 50
+    matrix = td.AnomalyDetector().extract_features(scan)
+    np.testing.assert_array_equal(matrix, _reference_features(scan))
+
+
+def test_analyze_scan_data_matches_per_network_rules(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    detector = td.OfflineThreatDetector(str(tmp_path / "models"))
+    scan = _scan(150, seed=9)
+    detector.train_with_data(_scan(300, seed=1))
+    results = detector.analyze_scan_data(scan)
+
+    now = datetime.now()
+    expected = []
+    for net in scan:
+        expected.extend(detector._detect_specific_threats(net, scan))
+    strip = [
+        {k: v for k, v in t.to_dict().items() if k != "timestamp"}
+        for t in results["threats"]
+    ]
+    assert strip == [
+        {k: v for k, v in t.to_dict().items() if k != "timestamp"} for t in expected
+    ]
+    assert all(t.timestamp <= now for t in results["threats"])
+
+    scorer = detector.risk_scorer
+    assert [
+        {k: v for k, v in a.items() if k != "timestamp"}
+        for a in results["risk_assessments"]
+    ] == [_strip(scorer.calculate_network_risk(n)) for n in scan]
+
+    model = detector.anomaly_detector.model
+    scaled = detector.anomaly_detector.scaler.transform(_reference_features(scan))
+    assert [a["index"] for a in results["anomalies"]] == np.flatnonzero(
+        model.predict(scaled) == -1
+    ).tolist()
+
+    flagged = detector.analyze_scan_data(scan, min_risk_level="High")
+    assert flagged["summary"] == results["summary"]
+    assert all(
+        a["risk_level"] in ("High", "Critical") for a in flagged["risk_assessments"]
+    )
@@ -0,0 +1,142 @@
+import json
+import sqlite3
+import sys
+
+from piwardrive.services.threat_stream import DecayingCounter, StreamingThreatDetector
+
+
+def _rec(bssid, ssid="Net", enc="WPA2", vendor="AA", signal=-60, **extra):
+    rec = {
+        "scan_session_id": "s1",
+        "detection_timestamp": "2025-01-01T00:00:00",
+        "bssid": bssid,
+        "ssid": ssid,
+        "encryption_type": enc,
+        "vendor_oui": vendor,
+        "signal_strength_dbm": signal,
+    }
+    rec.update(extra)
+    return rec
+
+
+def test_evil_twin_across_batches():
+    det = StreamingThreatDetector()
+    assert det.process([_rec("AA")], now=0) == []
+    rows = det.process([_rec("BB", enc="OPEN", vendor="BB")], now=10)
+    assert [r["activity_type"] for r in rows] == ["evil_twin"]
+    evidence = json.loads(rows[0]["evidence"])
+    assert evidence["bssids"] == ["AA", "BB"]
+    # repeated sightings do not re-alert
+    assert det.process([_rec("BB", enc="OPEN", vendor="BB")], now=20) == []
+
+
+def test_signal_anomaly_running_stats():
+    det = StreamingThreatDetector()
+    det.process([_rec("AA", ssid="Home", signal=-90)], now=0)
+    rows = det.process([_rec("AA", ssid="Home", signal=-30)], now=1)
+    assert [r["activity_type"] for r in rows] == ["signal_anomaly"]
+    stats = det.signal_stats("AA")
+    assert stats.minimum == -90 and stats.maximum == -30
+    assert stats.variance == 1800.0
+
+
+def test_deauth_alerts_are_rate_limited():
+    det = StreamingThreatDetector(half_life=60.0)
+    rec = _rec("AA", ssid="Home", signal=-30, station_count=0)
+    assert len(det.process([rec], now=0)) == 1
+    assert det.process([rec], now=1) == []
+    assert len(det.process([rec], now=600)) == 1
+    assert det.stats["suppressed"] == 1
+
+
+def test_decaying_counter_half_life():
+    counter = DecayingCounter(10.0)
+    counter.add(0.0, 4.0)
+    assert counter.get(10.0) == 2.0
+
+
+def test_checkpoint_roundtrip(tmp_path):
+    path = tmp_path / "state.json"
+    det = StreamingThreatDetector()
+    det.process([_rec("AA"), _rec("CC", ssid="", signal=-50)], now=0)
+    det.save_checkpoint(path)
+
+    restored = StreamingThreatDetector()
+    assert restored.load_checkpoint(path)
+    assert restored.ssid_group("Net").bssids == {"AA"}
+    # hidden SSID for CC was already reported before the checkpoint
+    rows = restored.process(
+        [_rec("CC", ssid="", signal=-50), _rec("BB", enc="WEP", vendor="BB")], now=5
+    )
+    assert [r["activity_type"] for r in rows] == ["evil_twin"]
+
+
+def test_index_eviction():
+    det = StreamingThreatDetector(max_bssids=2, max_ssids=2)
+    det.process([_rec("A", ssid="x"), _rec("B", ssid="y"), _rec("C", ssid="z")])
+    assert det.signal_stats("A") is None
+    assert det.ssid_group("x") is None
+    assert det.stats["evicted"] == 2
+
+
+def test_replay_script(tmp_path, capsys):
+    db_path = tmp_path / "app.db"
+    with sqlite3.connect(db_path) as db:
+        db.execute(
+            "CREATE TABLE wifi_detections (scan_session_id TEXT, "
+            "detection_timestamp TEXT, bssid TEXT, ssid TEXT, encryption_type TEXT, "
+            "vendor_oui TEXT, signal_strength_dbm INTEGER, station_count INTEGER, "
+            "latitude REAL, longitude REAL)"
+        )
+        db.executemany(
+            "INSERT INTO wifi_detections VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL, NULL)",
+            [
+                ("s1", "t1", "AA", "Net", "WPA2", "AA", -80, 3),
+                ("s1", "t2", "BB", "Net", "OPEN", "BB", -70, 3),
+                ("s1", "t3", "AA", "Net", "WPA2", "AA", -30, 3),
+            ],
+        )
+
+    sys.modules.pop("piwardrive.scripts.replay_threat_detector", None)
+    import piwardrive.scripts.replay_threat_detector as rtd
+
+    rtd.main([str(db_path)])
+    report = json.loads(capsys.readouterr().out)
+    assert report["batches"] == 3
+    assert report["alerts"] == {"evil_twin": 1, "signal_anomaly": 1}
+    assert report["missing"] == [] and report["extra"] == []
+
+
+def test_counters_pruned_on_interval():
+    det = StreamingThreatDetector(half_life=1.0, prune_interval=100.0)
+    rec = _rec("AA", ssid="Home", signal=-30, station_count=0)
+    det.process([rec], now=0)
+    assert len(det._alert_counters) == 1
+    det.process([_rec("BB", ssid="Other")], now=50)
+    assert len(det._alert_counters) == 1  # decayed, but not swept yet
+    det.process([_rec("BB", ssid="Other")], now=100)
+    assert det._alert_counters == {}
+
+
+def test_stream_processor_loads_checkpoint_on_start(tmp_path, monkeypatch):
+    import asyncio
+
+    from piwardrive.services import stream_processor as sp
+
+    path = tmp_path / "state.json"
+    det = StreamingThreatDetector()
+    det.process([_rec("AA")], now=0)
+    det.save_checkpoint(path)
+
+    proc = sp.StreamProcessor(checkpoint_path=path)
+    assert proc.detector.ssid_group("Net") is None
+
+    async def run():
+        await proc.start()
+        assert proc.detector.ssid_group("Net").bssids == {"AA"}
+        proc.detector.process([_rec("BB", ssid="Other")], now=1)
+        await proc.stop()
+
+    monkeypatch.setattr(sp.network_fingerprinting, "flush_fingerprints", None)
+    asyncio.run(run())
+    assert set(json.loads(path.read_text())["bssids"]) == {"AA", "BB"}
@@ -0,0 +1,183 @@
+import asyncio
+import time
+
+import pytest
+
+from piwardrive import cache as cache_mod
+from piwardrive.cache import TieredCache, cache_metrics
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+async def _until(predicate, timeout=2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "condition not met"
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def _client(server):
+    return fakeredis.aioredis.FakeRedis(server=server)
+
+
+@pytest.mark.asyncio
+async def test_l1_only_without_redis():
+    cache = TieredCache("l1only", maxsize=2, client=None)
+    await cache.set("a", 1)
+    await cache.set("b", 2)
+    assert await cache.get("a") == 1
+    await cache.set("c", 3)  # evicts "b", the least recently used
+    assert await cache.get("b") is None
+    stats = cache.metrics()
+    assert stats["evictions"] == 1
+    assert stats["l1_hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["redis"] is False
+
+
+@pytest.mark.asyncio
+async def test_l1_ttl_expires(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache_mod.time, "monotonic", lambda: now[0])
+    cache = TieredCache("expiry", ttl=10, client=None)
+    await cache.set("k", "v")
+    now[0] += 11
+    assert await cache.get("k") is None
+
+
+@pytest.mark.asyncio
+async def test_get_or_set_coalesces_loads():
+    cache = TieredCache("coalesce", client=None)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"rows": [1, 2]}
+
+    results = await asyncio.gather(*(cache.get_or_set("q", loader) for _ in range(5)))
+    assert calls == 1
+    assert all(r == {"rows": [1, 2]} for r in results)
+    assert cache.metrics()["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_get_or_set_propagates_errors():
+    cache = TieredCache("errors", client=None)
+
+    async def loader():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        cache.get_or_set("q", loader),
+        cache.get_or_set("q", loader),
+        return_exceptions=True,
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert await cache.get("q") is None
+
+
+@pytest.mark.asyncio
+async def test_l2_shared_between_instances(server):
+    first = TieredCache("shared", client=_client(server))
+    second = TieredCache("shared", client=_client(server))
+    await first.set("k", [1, 2, 3])
+    assert await second.get("k") == [1, 2, 3]
+    assert second.metrics()["l2_hits"] == 1
+    assert await second.get("k") == [1, 2, 3]
+    assert second.metrics()["l1_hits"] == 1
+    await cache_mod._bus.stop()
+
+
+@pytest.mark.asyncio
+async def test_l2_hit_keeps_remaining_lifetime(server):
+    first = TieredCache("remaining", ttl=300, client=_client(server))
+    second = TieredCache("remaining", ttl=300, client=_client(server))
+    await first.set("k", "v", ttl=2)
+    assert await second.get("k") == "v"
+    expires = second._l1["k"][0] - time.monotonic()
+    assert 0 < expires <= 2
+    assert await second.get_or_set("k", None) == "v"  # L1 hit
+    await cache_mod._bus.stop()
+
+
+@pytest.mark.asyncio
+async def test_pubsub_invalidates_other_l1(server):
+    first = TieredCache("pubsub", client=_client(server))
+    second = TieredCache("pubsub", client=_client(server))
+    await first.set("k", "old")
+    assert await second.get("k") == "old"
+    # give the listeners time to subscribe before publishing
+    await asyncio.sleep(0.1)
+    await first.set("k", "new")
+    await _until(lambda: "k" not in second._l1)
+    assert await second.get("k") == "new"
+    await first.clear()
+    await _until(lambda: not second._l1)
+    assert await second.get("k") is None
+    await cache_mod._bus.stop()
+
+
+@pytest.mark.asyncio
+async def test_invalidate_tag_and_clear_use_no_keys(server, monkeypatch):
+    cli = _client(server)
+
+    async def forbidden(*_a, **_k):
+        raise AssertionError("KEYS must not be used")
+
+    monkeypatch.setattr(cli, "keys", forbidden)
+    cache = TieredCache("tags", client=cli)
+    other = TieredCache("other", client=cli)
+    await cache.set("a", 1, tags=("t",))
+    await cache.set("b", 2, tags=("t",))
+    await cache.set("c", 3)
+    await other.set("a", 9)
+    assert await cache.invalidate_tag("t") == 2
+    assert await cli.get("tags:a") is None
+    assert await cli.get("tags:c") is not None
+    await cache.clear()
+    assert await cli.get("tags:c") is None
+    assert await other.get("a") == 9
+    await cache_mod._bus.stop()
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_fall_back_to_l1():
+    class Broken:
+        def pipeline(self, **_kwargs):
+            raise ConnectionError("down")
+
+    cache = TieredCache("broken", client=Broken())
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        return 42
+
+    assert await cache.get_or_set("k", loader) == 42
+    assert await cache.get_or_set("k", loader) == 42
+    assert calls == 1
+    stats = cache.metrics()
+    assert stats["errors"] == 1
+    assert stats["redis"] is False
+
+
+@pytest.mark.asyncio
+async def test_cache_metrics_by_namespace():
+    cache = TieredCache("metrics-ns", client=None)
+    await cache.set("k", 1)
+    await cache.get("k")
+    await cache.get("missing")
+    stats = cache_metrics()["metrics-ns"]
+    assert stats["l1_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
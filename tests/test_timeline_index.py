@@ -0,0 +1,77 @@
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from piwardrive.visualization.timeline import EventIndex
+
+T0 = datetime(2024, 1, 1)
+
+
+@dataclass
+class Event:
+    timestamp: datetime
+    seq: int
+
+
+def _at(seconds, seq=0):
+    return Event(T0 + timedelta(seconds=seconds), seq)
+
+
+def test_add_keeps_order_and_ties_stable():
+    index = EventIndex()
+    for seq, sec in enumerate([5, 1, 3, 3, 0, 9, 3]):
+        index.add(_at(sec, seq))
+    assert [e.seq for e in index] == [4, 1, 2, 3, 6, 0, 5]
+    assert index.bounds == (T0, T0 + timedelta(seconds=9))
+    assert len(index) == 7
+
+
+def test_extend_matches_repeated_add():
+    rng = random.Random(3)
+    events = [_at(rng.randint(0, 50), seq) for seq in range(300)]
+    one = EventIndex()
+    for event in events:
+        one.add(event)
+    bulk = EventIndex(events[:100])
+    bulk.extend(events[100:])
+    assert [e.seq for e in one] == [e.seq for e in bulk]
+
+
+def test_between_and_window():
+    index = EventIndex(_at(s, s) for s in range(10))
+    assert [
+        e.seq
+        for e in index.between(T0 + timedelta(seconds=2), T0 + timedelta(seconds=4))
+    ] == [2, 3, 4]
+    assert [e.seq for e in index.window(None, T0 + timedelta(seconds=1))] == [0, 1]
+    assert [
+        e.seq
+        for e in index.window(T0 + timedelta(seconds=1), T0 + timedelta(seconds=3))
+    ] == [2, 3]
+    assert index.window(T0 + timedelta(seconds=3), T0 + timedelta(seconds=1)) == []
+    assert EventIndex().bounds is None
+
+
+def test_iter_windows_covers_each_event_once():
+    rng = random.Random(7)
+    index = EventIndex(_at(rng.uniform(0, 100), seq) for seq in range(500))
+    cursors = [T0 + timedelta(seconds=s) for s in range(0, 101, 7)] + [
+        T0 + timedelta(seconds=100)
+    ]
+    seen = [e.seq for _, batch in index.iter_windows(cursors) for e in batch]
+    assert sorted(seen) == list(range(500))
+    assert seen == [e.seq for e in index]
+
+
+def test_iter_windows_backwards_cursor_restarts():
+    index = EventIndex(_at(s, s) for s in range(10))
+    cursors = [T0 + timedelta(seconds=s) for s in (3, 1, 4)]
+    batches = [[e.seq for e in batch] for _, batch in index.iter_windows(cursors)]
+    assert batches == [[0, 1, 2, 3], [], [2, 3, 4]]
+
+
+def test_custom_key():
+    index = EventIndex([3, 1, 2], key=lambda x: x)
+    index.add(0)
+    assert list(index) == [0, 1, 2, 3]
+    assert index.between(1, 2) == [1, 2]
@@ -1,5 +1,7 @@
+import asyncio
 import importlib.util
 import os
+import sqlite3
 
 import pytest
 
@@ -74,3 +76,77 @@ async def test_tower_history(tmp_path):
     assert hist and [rec["rssi"] for rec in hist] == ["-60", "-70"]
 
     await tr.close()
+
+
+@pytest.mark.asyncio
+async def test_bulk_logging_is_buffered(tmp_path):
+    db = tmp_path / "towers.db"
+    tr = TowerTracker(str(db), buffer_size=100, flush_interval=3600)
+
+    await tr.log_wifi_many(
+        {"bssid": "AA", "ssid": f"n{i}", "timestamp": i} for i in range(10)
+    )
+    await tr.log_tower_many([{"tower_id": "t1", "rssi": "-70", "timestamp": 5}])
+    await tr.update_tower_many([{"tower_id": "t1", "lat": 1.0, "lon": 2.0}])
+    assert tr._pending == 12
+
+    hist = await tr.wifi_history("AA")
+    assert tr._pending == 0
+    assert [r["timestamp"] for r in hist] == list(range(9, -1, -1))
+    assert (await tr.get_tower("t1"))["lat"] == 1.0
+    await tr.close()
+
+
+@pytest.mark.asyncio
+async def test_history_keyset_pagination(tmp_path):
+    db = tmp_path / "towers.db"
+    tr = TowerTracker(str(db))
+    # duplicate timestamps must not be skipped across page boundaries
+    await tr.log_bluetooth_many(
+        {"address": "BT", "name": str(i), "timestamp": i // 2} for i in range(7)
+    )
+    recs = [r async for r in tr.iter_bluetooth_history("BT", page_size=2)]
+    assert len(recs) == 7
+    assert [r["timestamp"] for r in recs] == [3, 2, 2, 1, 1, 0, 0]
+
+    conn = await tr._get_conn()
+    cur = await conn.execute(
+        "EXPLAIN QUERY PLAN SELECT timestamp FROM bluetooth_observations "
+        "WHERE address=? ORDER BY timestamp DESC",
+        ("BT",),
+    )
+    plan = " ".join(str(tuple(r)) for r in await cur.fetchall())
+    assert "idx_bt_obs_id_ts" in plan
+    await tr.close()
+
+
+@pytest.mark.asyncio
+async def test_pending_rows_flushed_by_timer(tmp_path):
+    db = tmp_path / "towers.db"
+    tr = TowerTracker(str(db), buffer_size=100, flush_interval=0.05)
+    await tr.log_wifi("AA", "net", timestamp=1)
+    assert tr._pending == 1
+    await asyncio.sleep(0.3)
+    assert tr._pending == 0
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM wifi_observations").fetchone() == (1,)
+    await tr.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_rows(tmp_path):
+    db = tmp_path / "towers.db"
+    tr = TowerTracker(str(db), buffer_size=100, flush_interval=3600)
+    conn = await tr._get_conn()
+    await conn.execute("DROP TABLE wifi_observations")
+    await tr.log_wifi("AA", "net", timestamp=1)
+    await tr.log_tower("t1", "-70", timestamp=2)
+    with pytest.raises(sqlite3.OperationalError):
+        await tr.flush()
+    assert tr._pending == 2
+
+    await tr._init_db()
+    assert await tr.flush() == 2
+    assert [r["ssid"] for r in await tr.wifi_history("AA")] == ["net"]
+    assert len(await tr.tower_history("t1")) == 1
+    await tr.close()
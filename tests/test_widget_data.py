@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from piwardrive.scheduler import PollScheduler
+from piwardrive.widget_data import Dataset, WidgetDataHub
+
+
+def test_concurrent_refreshes_share_one_query():
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"ap_cache": 3}
+
+    hub = WidgetDataHub()
+    hub.register(Dataset("counts", loader, 10.0))
+    seen = []
+    hub.subscribe("counts", seen.append)
+    hub.subscribe("counts", seen.append)
+
+    async def _run():
+        return await asyncio.gather(*(hub.fetch("counts") for _ in range(5)))
+
+    results = asyncio.run(_run())
+    assert len(calls) == 1
+    assert results == [{"ap_cache": 3}] * 5
+    assert seen == [{"ap_cache": 3}] * 2
+    # fresh enough for subsequent readers
+    assert asyncio.run(hub.fetch("counts")) == {"ap_cache": 3}
+    assert len(calls) == 1
+    assert hub.costs()["counts"]["refreshes"] == 1
+
+
+def test_incremental_dataset_merges_by_key():
+    table = [
+        {"bssid": "AA", "last_time": 1},
+        {"bssid": "BB", "last_time": 2},
+    ]
+    marks = []
+
+    async def loader(after):
+        marks.append(after)
+        return [r for r in table if after is None or r["last_time"] > after]
+
+    hub = WidgetDataHub()
+    hub.register(
+        Dataset("ap", loader, 60.0, watermark="last_time", key="bssid", full_every=2)
+    )
+    asyncio.run(hub.refresh("ap"))
+    table.append({"bssid": "AA", "last_time": 3})
+    rows = asyncio.run(hub.refresh("ap"))
+    assert [(r["bssid"], r["last_time"]) for r in rows] == [("BB", 2), ("AA", 3)]
+    asyncio.run(hub.refresh("ap"))
+    # third refresh is a full reload after ``full_every`` deltas
+    asyncio.run(hub.refresh("ap"))
+    assert marks == [None, 2, 3, None]
+    cost = hub.costs()["ap"]
+    assert cost["full_loads"] == 2 and cost["delta_loads"] == 2
+    assert cost["rows_fetched"] == 2 + 1 + 0 + 3
+
+
+def test_incremental_dataset_rereads_rows_at_watermark():
+    table = [{"bssid": "AA", "last_time": 5}]
+
+    async def loader(after):
+        return [r for r in table if after is None or r["last_time"] >= after]
+
+    hub = WidgetDataHub()
+    hub.register(Dataset("ap", loader, 60.0, watermark="last_time", key="bssid"))
+    asyncio.run(hub.refresh("ap"))
+    # written in the same second after the previous refresh
+    table.append({"bssid": "BB", "last_time": 5})
+    rows = asyncio.run(hub.refresh("ap"))
+    assert sorted(r["bssid"] for r in rows) == ["AA", "BB"]
+    assert hub.costs()["ap"]["cached_rows"] == 2
+
+
+def test_failed_refresh_is_counted():
+    async def loader():
+        raise RuntimeError("db locked")
+
+    hub = WidgetDataHub()
+    hub.register(Dataset("bad", loader, 5.0))
+    with pytest.raises(RuntimeError):
+        asyncio.run(hub.refresh("bad"))
+    assert hub.costs()["bad"]["errors"] == 1
+
+
+def test_scheduler_pushes_to_dependent_widgets():
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return len(calls)
+
+    class Widget:
+        update_interval = 5.0
+
+        def __init__(self, max_age):
+            self.data_dependencies = {"counts": max_age}
+            self.values = []
+
+        def on_data(self, name, value):
+            self.values.append((name, value))
+
+        def update(self):  # pragma: no cover - replaced by the hub
+            raise AssertionError("widgets with dependencies are not polled")
+
+    hub = WidgetDataHub()
+    hub.register(Dataset("counts", loader, 10.0))
+
+    async def _run():
+        scheduler = PollScheduler(data_hub=hub)
+        a, b = Widget(0.05), Widget(1.0)
+        scheduler.register_widget(a, name="a")
+        scheduler.register_widget(b, name="b")
+        assert hub.interval("counts") == 0.05
+        await asyncio.sleep(0.12)
+        scheduler.cancel("a")
+        assert hub.interval("counts") == 1.0
+        scheduler.cancel_all()
+        assert scheduler.get_metrics() == {}
+        return a, b
+
+    a, b = asyncio.run(_run())
+    assert len(calls) >= 2
+    assert a.values == b.values
+    assert a.values[0] == ("counts", 1)
+    assert hub.costs()["counts"]["subscribers"] == 0